@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data columnar table benchmark (load, filter, aggregate, group-by, join).
+
+Usage: python benchmarks/columnar-benchmark.py [n_rows]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+
+def _timed(label: str, fn, nbytes: int = 0):
+    t0 = time.perf_counter()
+    result = fn()
+    s = time.perf_counter() - t0
+    rate = f"  {nbytes / s / 2**30:6.2f} GiB/s" if nbytes else ""
+    print(f"  {label:28s} {s * 1000:9.1f}ms{rate}")
+    return result
+
+
+def run():
+    import numpy as np
+
+    from models import Column, create_relational_model, join_batches
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    rng = np.random.default_rng(0)
+    table = create_relational_model().create_table(
+        "events",
+        [Column("region", "int32"), Column("status", "int32"), Column("amount", "float")],
+        storage="columnar",
+    )
+    print(f"columnar table n={n:,}")
+    _timed(
+        "load (extend)",
+        lambda: table.extend(
+            {
+                "region": rng.integers(0, 50, n, dtype=np.int32),
+                "status": rng.integers(0, 4, n, dtype=np.int32),
+                "amount": rng.random(n) * 100,
+            }
+        ),
+    )
+    _timed("sum(amount)", lambda: table.aggregate("sum", "amount"), n * 9)
+    _timed("filter amount > 50 + sum", lambda: table.aggregate("sum", "amount", [("amount", ">", 50.0)]), n * 18)
+    _timed("filter -> new table", lambda: table.filter([("status", "==", 1), ("amount", "<", 10.0)]))
+    _timed("project (view)", lambda: table.project(["amount"]))
+    _timed(
+        "group_by region",
+        lambda: table.group_by(["region"], {"n": ("count", None), "total": ("sum", "amount"), "top": ("max", "amount")}),
+    )
+    _timed("group_by region,status", lambda: table.group_by(["region", "status"], {"avg": ("mean", "amount")}))
+
+    regions = create_relational_model().create_table(
+        "regions", [Column("region", "int32"), Column("weight", "float")], storage="columnar"
+    )
+    regions.extend({"region": np.arange(50, dtype=np.int32), "weight": rng.random(50)})
+    for algorithm in ("hash", "merge"):
+        _timed(
+            f"join region ({algorithm}, streamed)",
+            lambda: sum(len(b) for b in join_batches(table, regions, "region", algorithm=algorithm, batch_size=65536)),
+        )
+
+
+if __name__ == "__main__":
+    run()
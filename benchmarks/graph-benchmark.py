@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data graph benchmark (CSR freeze, traversals, Dijkstra, components, PageRank).
+
+Usage: python benchmarks/graph-benchmark.py [n_edges] [n_nodes]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+
+def _timed(label: str, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"  {label:34s} {(time.perf_counter() - t0) * 1000:9.1f}ms")
+    return result
+
+
+def run():
+    from models import Edge, Node, create_graph
+
+    m = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else m // 5
+    rng = random.Random(0)
+    ids = [f"n{i}" for i in range(n)]
+    print(f"graph nodes={n:,} edges={m:,}")
+
+    graph = create_graph()
+
+    def load():
+        for node_id in ids:
+            graph.add_node(Node(node_id))
+        for e in range(m):
+            graph.add_edge(
+                Edge(f"e{e}", ids[rng.randrange(n)], ids[rng.randrange(n)], properties={"weight": rng.uniform(0.1, 10)})
+            )
+
+    _timed("GraphModel load", load)
+    csr = _timed("freeze -> CSR", graph.freeze)
+    stats = csr.stats()
+    print(f"  CSR arrays {stats['array_bytes'] / 2**20:,.1f} MiB")
+
+    probes = [ids[rng.randrange(n)] for _ in range(1000)]
+    _timed("get_neighbors x1000 (GraphModel)", lambda: [graph.get_neighbors(p) for p in probes])
+    _timed("neighbors x1000 (CSR)", lambda: [csr.neighbors(p) for p in probes])
+    start = probes[0]
+    _timed("bfs (whole reachable graph)", lambda: csr.bfs(start))
+    _timed("dfs (whole reachable graph)", lambda: csr.dfs(start))
+    _timed("k_hop k=2 x100", lambda: [csr.k_hop(p, 2) for p in probes[:100]])
+    _timed("dijkstra single source", lambda: csr.shortest_paths(start))
+    _timed("dijkstra point-to-point x10", lambda: [csr.shortest_path(p, probes[-1]) for p in probes[:10]])
+    _timed("connected components", csr.connected_components)
+    _timed("pagerank", csr.pagerank)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data-service ingestion benchmark (per-record index vs bulk NDJSON / documents).
+
+Usage: python benchmarks/ingest-benchmark.py [n_documents]
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "services" / "engine-data-service"))
+
+
+def _documents(n: int) -> list[dict]:
+    """Simple documents: id, two tags, a price and a short title."""
+    return [
+        {"id": f"doc-{i}", "tags": [f"t{i % 100}", f"g{i % 7}"], "price": i % 1000, "title": f"item {i % 50}"}
+        for i in range(n)
+    ]
+
+
+def _timed(label: str, n: int, fn) -> None:
+    from app import domain_facade
+
+    domain_facade.init_engine()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    print(f"  {label:18s} {seconds:6.2f}s  {n / seconds:>10,.0f} docs/s  indexed={out['indexed']:,}")
+
+
+def run():
+    from app.domain_facade import bulk_index_documents, index_documents
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    threshold = int(os.environ.get("ENGINE_DATA_GC_THRESHOLD", "0"))
+    if threshold > 0:  # as the service does at startup (app.lifecycle)
+        gc.set_threshold(threshold, *gc.get_threshold()[1:])
+    ndjson = "\n".join(json.dumps(d) for d in _documents(n)).encode()
+    print(f"ingest n={n} ndjson={len(ndjson) / 2**20:,.1f} MiB")
+    _timed("per-record", n, lambda: index_documents({"documents": _documents(n)}))
+    _timed("bulk documents", n, lambda: bulk_index_documents({"documents": _documents(n)}))
+    _timed("bulk ndjson", n, lambda: bulk_index_documents(ndjson))
+
+
+if __name__ == "__main__":
+    run()
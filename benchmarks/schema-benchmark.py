@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data DocumentSchema benchmark (interpreted validate vs compiled vs validate_batch).
+
+Usage: python benchmarks/schema-benchmark.py [n_records] [invalid_fraction]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+
+def _schema():
+    from schemas import DocumentSchema, FieldSchema, optional_int, required_string
+
+    return DocumentSchema(
+        "event",
+        [
+            FieldSchema("id", dtype="str", validator=required_string),
+            FieldSchema("user", dtype="str"),
+            FieldSchema("ts", dtype="int", validator=optional_int),
+            FieldSchema("value", dtype="float", required=False),
+            FieldSchema("tags", dtype="list", required=False),
+            FieldSchema("kind", dtype="str", validator=lambda v: v in ("click", "view", "buy")),
+            FieldSchema("meta", dtype="dict", required=False),
+            FieldSchema("note", required=False),
+        ],
+    )
+
+
+def _records(n: int, invalid: float, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        r = {
+            "id": f"e{i}",
+            "user": f"u{i % 997}",
+            "ts": 1_700_000_000 + i,
+            "value": i * 0.5,
+            "tags": ["a"],
+            "kind": ("click", "view", "buy")[i % 3],
+        }
+        if rng.random() < invalid:
+            r[rng.choice(["id", "ts", "kind"])] = rng.choice([None, "", 1.5, "other"])
+        out.append(r)
+    return out
+
+
+def _rate(label: str, n: int, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - t0
+    print(f"  {label:22s} {seconds * 1000:8.1f}ms  {n / seconds:>12,.0f} records/s")
+    return result
+
+
+def run():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    invalid = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    schema = _schema()
+    records = _records(n, invalid)
+    print(f"schema n={n} fields={len(schema.fields)} invalid~{invalid:.0%}")
+    t0 = time.perf_counter()
+    compiled = schema.compile()
+    print(f"  compile                {(time.perf_counter() - t0) * 1000:8.2f}ms")
+    # Count failures instead of keeping every result, as an ingest loop would.
+    interpreted = _rate("interpreted validate", n, lambda: sum(1 for r in records if not schema.validate(r)[0]))
+    fast = _rate("compiled validate", n, lambda: sum(1 for r in records if not compiled.validate(r)[0]))
+    _rate("compiled check", n, lambda: sum(1 for r in records if compiled.check(r)))
+    batch = _rate("compiled validate_batch", n, lambda: compiled.validate_batch(records))
+    assert interpreted == fast == batch.invalid_count
+    assert all(compiled.validate(r) == schema.validate(r) for r in records[:10_000])
+    print(f"  invalid={batch.invalid_count:,}  per-field={batch.field_counts()}")
+
+
+if __name__ == "__main__":
+    run()
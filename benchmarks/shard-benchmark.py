@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data sharded DocumentModel benchmark (ingest and scatter-gather query throughput by shard count).
+
+Usage: python benchmarks/shard-benchmark.py [n_documents] [max_shards]
+"""
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+_QUERIES = 50
+_BATCH = 10_000
+
+
+def _documents(n: int) -> list:
+    from models import Document
+
+    rng = random.Random(7)
+    return [
+        Document(f"doc-{i}", {"status": rng.choice(("open", "closed", "held")), "amount": rng.randint(0, 1000)})
+        for i in range(n)
+    ]
+
+
+def _queries() -> list:
+    rng = random.Random(11)
+    return [
+        [{"field": "status", "eq": rng.choice(("open", "held"))}, {"field": "amount", "range": [lo, lo + 100]}]
+        for lo in (rng.randint(0, 900) for _ in range(_QUERIES))
+    ]
+
+
+def _measure(label: str, model, docs: list, queries: list) -> None:
+    t0 = time.perf_counter()
+    for start in range(0, len(docs), _BATCH):
+        model.insert_many("orders", docs[start : start + _BATCH])
+    ingest = time.perf_counter() - t0
+    model.create_index("orders", "status")
+    t0 = time.perf_counter()
+    # Sharded models count where the shards live; the single model counts its find() results.
+    count = getattr(model, "count", None) or (lambda collection, q: len(model.find(collection, q)))
+    matched = sum(count("orders", q) for q in queries)
+    query = time.perf_counter() - t0
+    print(
+        f"  {label:22s} ingest {len(docs) / ingest:>10,.0f} docs/s   "
+        f"query {len(queries) / query:>8,.1f} q/s   matched={matched:,}"
+    )
+
+
+def run():
+    from models import create_document_model, create_sharded_document_model
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    docs, queries = _documents(n), _queries()
+    print(f"sharded documents n={n} queries={len(queries)} cpus={os.cpu_count()}")
+    _measure("single DocumentModel", create_document_model(), docs, queries)
+    for executor in ("thread", "process"):
+        shards = 1
+        while shards <= max_shards:
+            model = create_sharded_document_model(shards=shards, executor=executor)
+            try:
+                _measure(f"{executor} x{shards}", model, docs, queries)
+            finally:
+                model.close()
+            shards *= 2
+    model = create_sharded_document_model(shards=max_shards)
+    model.insert_many("orders", docs)
+    moved = model.reshard(max_shards + 1)
+    print(f"  reshard {max_shards}->{max_shards + 1}: moved {moved['moved']:,} of {n:,} in {moved['seconds']:.2f}s")
+    model.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data BM25 text index benchmark (index size, build rate, query latency).
+
+Usage: python benchmarks/text-benchmark.py [n_documents] [vocabulary]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from itertools import accumulate
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+
+def _corpus(n: int, vocab: int, seed: int = 0):
+    """Zipf-ish synthetic documents of 20-80 words."""
+    rng = random.Random(seed)
+    words = [f"t{i}" for i in range(vocab)]
+    cum_weights = list(accumulate(1.0 / (i + 1) for i in range(vocab)))
+    for i in range(n):
+        yield f"doc-{i}", {"text": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(20, 80)))}
+
+
+def run():
+    from indexing.text_index import create_text_index
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    vocab = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    index = create_text_index()
+    print(f"text index n={n} vocabulary={vocab}")
+
+    t0 = time.perf_counter()
+    for doc_id, doc in _corpus(n, vocab):
+        index.add(doc_id, doc)
+    build_s = time.perf_counter() - t0
+    stats = index.stats()
+    print(
+        f"  build {build_s:.1f}s ({n / build_s:,.0f} docs/s)  terms={stats['terms']:,}  "
+        f"postings={stats['postings']:,}  positions={stats['positions']:,}  "
+        f"index={stats['index_bytes'] / 2**20:,.1f} MiB"
+    )
+
+    rng = random.Random(1)
+    workloads = [
+        ("rare 2-term", lambda: f"t{rng.randint(5000, vocab - 1)} t{rng.randint(5000, vocab - 1)}"),
+        ("mid 2-term", lambda: f"t{rng.randint(100, 1000)} t{rng.randint(100, 1000)}"),
+        ("common 3-term", lambda: f"t{rng.randint(0, 20)} t{rng.randint(0, 20)} t{rng.randint(20, 100)}"),
+    ]
+    for label, make in workloads:
+        queries = [make() for _ in range(50)]
+        t0 = time.perf_counter()
+        for q in queries:
+            index.search(q, top_k=10)
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        print(f"  {label:14s} top10 {ms:8.2f}ms/query")
+
+    t0 = time.perf_counter()
+    for i in range(0, min(n, 10_000)):
+        index.remove(f"doc-{i}")
+    print(f"  delete 10k docs {time.perf_counter() - t0:.2f}s (incl. compaction when triggered)")
+
+
+if __name__ == "__main__":
+    run()
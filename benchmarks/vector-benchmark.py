@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data vector store benchmark (memory/vector, recall@10, latency).
+
+Usage: python benchmarks/vector-benchmark.py [n_vectors] [dimension]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "engine-data"))
+
+
+def _dataset(n: int, dim: int, queries: int):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(16, n // 500), dim))
+    data = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim))
+    q = data[rng.integers(0, n, queries)] + 0.1 * rng.standard_normal((queries, dim))
+    return data.astype("float32"), q.astype("float32")
+
+
+def _fill(store, data) -> float:
+    t0 = time.perf_counter()
+    matrix = store._ensure_matrix()
+    for i, v in enumerate(data):
+        row = matrix.upsert(f"v{i}", v)
+        if store.index is not None:
+            store.index.add(row)
+    if store.index is not None:
+        store.index.train()
+    return time.perf_counter() - t0
+
+
+def run():
+    from storage.vector_store import create_vector_store
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    data, queries = _dataset(n, dim, 100)
+    print(f"vector store n={n} dim={dim} queries={len(queries)}")
+
+    baseline = create_vector_store(dim, mode="matrix")
+    _fill(baseline, data)
+    t0 = time.perf_counter()
+    for q in queries:
+        baseline.search(q, top_k=10)
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"  float32 exact      bytes/vec={dim * 4:5d}  recall@10=1.000  {exact_ms:7.2f}ms/query")
+
+    t0 = time.perf_counter()
+    batch = baseline.search_batch(queries, top_k=10)
+    batch_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"  float32 batch      bytes/vec={dim * 4:5d}  recall@10=1.000  {batch_ms:7.2f}ms/query ({len(batch)} queries)")
+
+    configs = [
+        ("ivf", {"nprobe": 8}, dim * 4 + 4),
+        ("ivf", {"nprobe": 32}, dim * 4 + 4),
+        ("sq8", {}, None),
+        ("sq8", {"rerank_factor": 4}, None),
+        ("pq", {}, None),
+        ("pq", {"rerank_factor": 8}, None),
+    ]
+    for kind, options, bytes_per_vec in configs:
+        store = create_vector_store(dim, index=kind, **options)
+        build_s = _fill(store, data)
+        report = store.recall_report(queries, top_k=10)
+        if bytes_per_vec is None:
+            bytes_per_vec = store.index.memory_per_vector()
+        label = f"{kind} {options}" if options else kind
+        print(
+            f"  {label:18s} bytes/vec={bytes_per_vec:5d}  recall@10={report['recall_at_k']:.3f}  "
+            f"{report['ann_ms']:7.2f}ms/query  build={build_s:.1f}s"
+        )
+    print("  (quantized bytes/vec counts codes only; re-rank reads float rows from the mmap snapshot)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Nexus Engine — engine-data-service write-ahead log benchmark (ingest with WAL off/on, recovery time per GB).
+
+Usage: python benchmarks/wal-benchmark.py [n_documents] [writer_threads]
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "services" / "engine-data-service"))
+
+
+def _documents(n: int, start: int = 0) -> list[dict]:
+    """Same shape as ingest-benchmark: id, two tags, a price and a short title."""
+    return [
+        {"id": f"doc-{i}", "tags": [f"t{i % 100}", f"g{i % 7}"], "price": i % 1000, "title": f"item {i % 50}"}
+        for i in range(start, start + n)
+    ]
+
+
+def _ingest(label: str, n: int, wal_dir: str | None, sync_interval: float = 0.01) -> None:
+    from app import domain_facade
+
+    domain_facade.init_engine(wal_dir=wal_dir, wal_sync_interval=sync_interval, snapshot_interval=0)
+    ndjson = "\n".join(json.dumps(d) for d in _documents(n)).encode()
+    t0 = time.perf_counter()
+    domain_facade.bulk_index_documents(ndjson)
+    seconds = time.perf_counter() - t0
+    print(f"  {label:28s} {seconds:6.2f}s  {n / seconds:>10,.0f} docs/s")
+
+
+def _writers(label: str, threads: int, per_thread: int, wal_dir: str | None, sync_interval: float) -> None:
+    """Concurrent single-document requests: each is acknowledged only once durable."""
+    from app import domain_facade
+
+    domain_facade.init_engine(wal_dir=wal_dir, wal_sync_interval=sync_interval, snapshot_interval=0)
+
+    def write(t: int) -> None:
+        for doc in _documents(per_thread, start=t * per_thread):
+            domain_facade.index_documents(doc)
+
+    workers = [threading.Thread(target=write, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    seconds = time.perf_counter() - t0
+    n = threads * per_thread
+    syncs = domain_facade.durability_stats().get("wal_syncs", 0)
+    print(f"  {label:28s} {seconds:6.2f}s  {n / seconds:>10,.0f} writes/s  fsyncs={syncs:,}")
+    domain_facade.shutdown_engine()
+
+
+def _recover(label: str, wal_dir: str) -> None:
+    from app import domain_facade
+
+    domain_facade.init_engine(wal_dir=wal_dir, snapshot_interval=0)
+    recovery = domain_facade.durability_stats()["recovery"]
+    size = recovery["snapshot_bytes"] + recovery["wal_bytes"]
+    records = recovery["snapshot_records"] + recovery["wal_records"]
+    seconds = recovery["seconds"]
+    print(
+        f"  {label:28s} {seconds:6.2f}s  {records:>10,} records  {size / 2**20:,.1f} MiB"
+        f"  {seconds / (size / 2**30):,.1f} s/GiB"
+    )
+
+
+def run():
+    from app import domain_facade
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    root = Path(tempfile.mkdtemp(prefix="wal-benchmark-"))
+    try:
+        print(f"bulk ingest n={n}")
+        _ingest("wal off", n, None)
+        _ingest("wal on", n, str(root / "bulk"))
+        domain_facade.shutdown_engine()
+
+        per_thread = max(1, min(n, 2_000) // threads)
+        print(f"single-document writes threads={threads} per_thread={per_thread}")
+        _writers("wal off", threads, per_thread, None, 0.01)
+        _writers("wal on, fsync every append", threads, per_thread, str(root / "each"), 0)
+        _writers("wal on, group commit", threads, per_thread, str(root / "group"), 0.01)
+
+        print("recovery")
+        _recover("replay wal", str(root / "bulk"))
+        domain_facade._engine_context.durable_store.checkpoint()
+        domain_facade.shutdown_engine()
+        _recover("load snapshot", str(root / "bulk"))
+        domain_facade.shutdown_engine()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
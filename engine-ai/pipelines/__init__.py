@@ -1,12 +1,20 @@
 """Pipelines: AI pipeline and stages."""
 from .ai_pipeline import (
+    DEFAULT_STREAM_BATCH_SIZE,
     AIPipeline,
     PipelineStage,
     create_ai_pipeline,
 )
+from .parallel import EXECUTORS
+from .profiling import PROFILERS
+from .stage_metrics import StageMetrics
 
 __all__ = [
     "PipelineStage",
     "AIPipeline",
     "create_ai_pipeline",
+    "DEFAULT_STREAM_BATCH_SIZE",
+    "EXECUTORS",
+    "StageMetrics",
+    "PROFILERS",
 ]
@@ -1,18 +1,31 @@
 """
 AI pipeline — chain stages: load -> preprocess -> infer -> postprocess.
+run() passes one input through the stages; stream() runs many inputs in
+batches, with stages optionally on a thread or process pool (parallel=N)
+and bounded in-flight batches between stages; see parallel. Per-stage
+counters and latency histograms are kept in stage_metrics; a cProfile hook
+can be switched on per stage at runtime (enable_profiling).
 ERL-4: validation at entry, structured logging, platform error model.
 """
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
-from typing import Any, Callable, Generic, TypeVar
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Generic, Iterable, Iterator, NoReturn, TypeVar
 
 from errors.error_model import ExecutionError, ValidationError
+from pipelines.parallel import apply_stage, create_executor, run_pool, validate_parallel
+from pipelines.profiling import CProfileHook, create_profiler
+from pipelines.stage_metrics import StageMetrics
 
 T = TypeVar("T")
 U = TypeVar("U")
 
+DEFAULT_STREAM_BATCH_SIZE = 64
+
 _logger = logging.getLogger("engine-ai")
 
 
@@ -34,9 +47,23 @@ class PipelineStage(Generic[T, U]):
             raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
 
 
+@dataclass
+class _StageSpec:
+    name: str
+    transform: Callable[[Any], Any]
+    parallel: int = 1
+    executor: str = "thread"
+    metrics: StageMetrics = field(init=False)
+    profiler: CProfileHook | None = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        self.metrics = StageMetrics(self.name, self.parallel, self.executor)
+
+
 class AIPipeline:
     """
-    Linear pipeline: add stages; run(input) passes data through each stage.
+    Linear pipeline: add stages; run(input) passes data through each stage,
+    stream(inputs) passes batches of inputs through each stage.
     ERL-4: entry-point validation, structured logging, fail-fast.
     """
 
@@ -44,39 +71,174 @@ class AIPipeline:
         if not (name or "").strip():
             raise ValidationError("pipeline name is required", details={"field": "name"})
         self.name = name
-        self._stages: list[tuple[str, Callable[[Any], Any]]] = []
+        self._stages: list[_StageSpec] = []
         _logger.debug("pipeline.init name=%s", name)
 
-    def add_stage(self, name: str, transform: Callable[[Any], Any]) -> AIPipeline:
-        """Add stage. Validates name and transform before mutation."""
+    def add_stage(
+        self,
+        name: str,
+        transform: Callable[[Any], Any],
+        parallel: int = 1,
+        executor: str = "thread",
+    ) -> AIPipeline:
+        """
+        Add stage (parallel workers on a thread or process pool, used by
+        stream). Validates before mutation.
+        """
         if not (name or "").strip():
             raise ValidationError("stage name is required", details={"field": "name"})
         if transform is None:
             raise ValidationError("transform is required", details={"stage": name})
-        self._stages.append((name, transform))
+        validate_parallel(name, transform, parallel, executor)
+        self._stages.append(_StageSpec(name, transform, parallel, executor))
         _logger.debug("pipeline.add_stage name=%s", name)
         return self
 
+    def _fail(self, stage: _StageSpec, e: Exception, operation: str) -> NoReturn:
+        stage.metrics.record_error()
+        if isinstance(e, ValidationError):
+            raise e
+        _logger.error("pipeline.%s stage=%s error=%s", operation, stage.name, e, exc_info=True)
+        raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
+
     def run(self, input_data: Any) -> Any:
         """Run pipeline. Validates stages present; logs execution."""
         if not self._stages:
             _logger.warning("pipeline.run empty pipeline name=%s", self.name)
             return input_data
         data = input_data
-        for _name, transform in self._stages:
+        for stage in self._stages:
+            profiler = stage.profiler
+            start = time.perf_counter()
             try:
-                data = transform(data)
-            except ValidationError:
-                raise
+                if profiler is None:
+                    data = stage.transform(data)
+                else:
+                    data = profiler.run(stage.transform, data)
             except Exception as e:
-                _logger.error("pipeline.run stage=%s error=%s", _name, e, exc_info=True)
-                raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
-        _logger.info("pipeline.run name=%s stages=%s", self.name, len(self._stages))
+                self._fail(stage, e, "run")
+            stage.metrics.record(1, 1, time.perf_counter() - start)
+        _logger.debug("pipeline.run name=%s stages=%s", self.name, len(self._stages))
         return data
 
+    def stream(
+        self,
+        inputs: Iterable[Any],
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        ordered: bool = True,
+        queue_size: int | None = None,
+    ) -> Iterator[Any]:
+        """
+        Lazily run inputs through the stages batch_size at a time, yielding
+        one output per input. Parallel stages keep at most queue_size batches
+        in flight (default 2 x parallel); ordered=False yields their batches
+        in completion order.
+        """
+        if batch_size < 1:
+            raise ValidationError("batch_size must be >= 1", details={"batch_size": batch_size})
+        if inputs is None:
+            raise ValidationError("inputs is required", details={"field": "inputs"})
+        if queue_size is not None and queue_size < 1:
+            raise ValidationError("queue_size must be >= 1", details={"queue_size": queue_size})
+        return self._stream(iter(inputs), batch_size, ordered, queue_size)
+
+    def _stage_batches(
+        self,
+        stage: _StageSpec,
+        batches: Iterator[list[Any]],
+        ordered: bool,
+        queue_size: int | None,
+        pools: list[Executor],
+    ) -> Iterator[list[Any]]:
+        if stage.parallel == 1:
+            for batch in batches:
+                try:
+                    out, seconds = apply_stage(stage.transform, batch, stage.profiler)
+                except Exception as e:
+                    self._fail(stage, e, "stream")
+                stage.metrics.record(len(batch), len(out), seconds)
+                yield out
+            return
+        pool = create_executor(stage.executor, stage.parallel, stage.name)
+        pools.append(pool)
+        window = queue_size or 2 * stage.parallel
+        for future, items_in in run_pool(
+            pool,
+            stage.transform,
+            batches,
+            window,
+            ordered,
+            stage.metrics.set_queue_depth,
+            lambda: stage.profiler,
+        ):
+            try:
+                out, seconds = future.result()
+            except Exception as e:
+                self._fail(stage, e, "stream")
+            stage.metrics.record(items_in, len(out), seconds)
+            yield out
+
+    def _stream(
+        self, inputs: Iterator[Any], batch_size: int, ordered: bool, queue_size: int | None
+    ) -> Iterator[Any]:
+        def chunks() -> Iterator[list[Any]]:
+            while True:
+                batch = list(islice(inputs, batch_size))
+                if not batch:
+                    return
+                yield batch
+
+        pools: list[Executor] = []
+        batches: Iterator[list[Any]] = chunks()
+        try:
+            for stage in self._stages:
+                batches = self._stage_batches(stage, batches, ordered, queue_size, pools)
+            for batch in batches:
+                yield from batch
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+
     def stages(self) -> list[str]:
         """Stage names in order."""
-        return [n for n, _ in self._stages]
+        return [stage.name for stage in self._stages]
+
+    def stage_metrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Per-stage counters (calls, items in/out, errors, busy time,
+        throughput, queue depth) and per-call latency_ms p50/p95/p99.
+        """
+        return {stage.name: stage.metrics.snapshot() for stage in self._stages}
+
+    def _stage(self, name: str) -> _StageSpec:
+        for stage in self._stages:
+            if stage.name == name:
+                return stage
+        raise ValidationError("Unknown stage", details={"stage": name, "stages": self.stages()})
+
+    def enable_profiling(self, stage: str, kind: str = "cprofile") -> None:
+        """Profile a stage from its next call on. Replaces any hook already set."""
+        spec = self._stage(stage)
+        spec.profiler = create_profiler(stage, kind, spec.executor, spec.parallel)
+        _logger.info("pipeline.profiling name=%s stage=%s kind=%s", self.name, stage, kind)
+
+    def profile_report(self, stage: str, limit: int = 20) -> dict[str, Any]:
+        """Current report of a stage's profiling hook (top functions)."""
+        spec = self._stage(stage)
+        if spec.profiler is None:
+            raise ValidationError("profiling is not enabled", details={"stage": stage})
+        return spec.profiler.report(limit)
+
+    def disable_profiling(self, stage: str, limit: int = 20) -> dict[str, Any] | None:
+        """Remove a stage's hook; returns its final report (None if none was set)."""
+        spec = self._stage(stage)
+        profiler, spec.profiler = spec.profiler, None
+        return None if profiler is None else profiler.report(limit)
+
+    def reset_metrics(self) -> None:
+        """Zero every stage's counters."""
+        for stage in self._stages:
+            stage.metrics.reset()
 
 
 def create_ai_pipeline(name: str = "default") -> AIPipeline:
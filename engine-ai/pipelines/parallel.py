@@ -0,0 +1,106 @@
+"""
+Parallel stages — run an AIPipeline stage on a thread or process pool.
+At most `window` batches are in flight, so a slow stage pushes back on the
+one feeding it; results come back in submission order, or in completion
+order when ordering is not required.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import pickle
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Iterable, Iterator
+
+from errors.error_model import ValidationError
+
+EXECUTORS = ("thread", "process")
+
+
+def _run_batch(transform: Callable[[Any], Any], batch: list[Any]) -> list[Any]:
+    return [transform(record) for record in batch]
+
+
+def apply_stage(
+    transform: Callable[[Any], Any], batch: list[Any], profiler: Any = None
+) -> tuple[list[Any], float]:
+    """Run one batch through a stage, under profiler if set; (outputs, seconds)."""
+    start = time.perf_counter()
+    if profiler is None:
+        out = _run_batch(transform, batch)
+    else:
+        out = profiler.run(_run_batch, transform, batch)
+    return out, time.perf_counter() - start
+
+
+def validate_parallel(
+    name: str, transform: Callable[[Any], Any], parallel: int, executor: str
+) -> None:
+    """Check parallel / executor settings for a stage before it is added."""
+    if not isinstance(parallel, int) or isinstance(parallel, bool) or parallel < 1:
+        raise ValidationError(
+            "parallel must be an integer >= 1", details={"stage": name, "parallel": parallel}
+        )
+    if executor not in EXECUTORS:
+        raise ValidationError(
+            "Unknown executor",
+            details={"stage": name, "executor": executor, "allowed": list(EXECUTORS)},
+        )
+    if executor == "process" and parallel > 1:
+        try:
+            pickle.dumps(transform)
+        except Exception as e:
+            raise ValidationError(
+                "process stages need a picklable transform (module-level function)",
+                details={"stage": name},
+                cause=type(e).__name__,
+            ) from e
+
+
+def create_executor(executor: str, workers: int, name: str) -> Executor:
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{name}")
+
+
+def run_pool(
+    pool: Executor,
+    transform: Callable[[Any], Any],
+    batches: Iterable[list[Any]],
+    window: int,
+    ordered: bool,
+    on_depth: Callable[[int], None],
+    profiler: Callable[[], Any],
+) -> Iterator[tuple[Future, int]]:
+    """
+    Yield (finished future, batch size) keeping at most window batches in
+    flight. profiler() is read per submission so hooks can be switched at runtime.
+    """
+    pending: deque[tuple[Future, int]] = deque()
+
+    def take() -> tuple[Future, int]:
+        if ordered:
+            item = pending.popleft()
+            item[0].exception()
+        else:
+            done, _ = wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+            item = next(p for p in pending if p[0] in done)
+            pending.remove(item)
+        on_depth(len(pending))
+        return item
+
+    for batch in batches:
+        pending.append((pool.submit(apply_stage, transform, batch, profiler()), len(batch)))
+        on_depth(len(pending))
+        while len(pending) >= window:
+            yield take()
+    while pending:
+        yield take()
@@ -0,0 +1,73 @@
+"""
+Stage profiling — a cProfile hook switched on per AIPipeline stage at
+runtime. Stage calls run under one cProfile.Profile, one at a time; calls
+that overlap on other threads run unprofiled and are counted as skipped.
+Stages on a process pool cannot be profiled.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import cProfile
+import threading
+from typing import Any, Callable
+
+from errors.error_model import ValidationError
+
+PROFILERS = ("cprofile",)
+
+
+class CProfileHook:
+    """Deterministic profile of stage calls: run(fn, *args) wraps one call, report() summarises."""
+
+    kind = "cprofile"
+
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+        self._busy = threading.Lock()
+        self.calls = 0
+        self.skipped = 0
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return fn(*args)
+        try:
+            self.calls += 1
+            return self._profile.runcall(fn, *args)
+        finally:
+            self._busy.release()
+
+    def report(self, limit: int = 20) -> dict[str, Any]:
+        """Top functions by cumulative time."""
+        with self._busy:
+            self._profile.create_stats()
+            raw = dict(self._profile.stats) if self.calls else {}
+        rows = sorted(raw.items(), key=lambda kv: kv[1][3], reverse=True)[:limit]
+        return {
+            "kind": self.kind,
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "top": [
+                {
+                    "function": f"{func} ({path}:{line})",
+                    "calls": ncalls,
+                    "total_seconds": tottime,
+                    "cumulative_seconds": cumtime,
+                }
+                for (path, line, func), (_, ncalls, tottime, cumtime, _) in rows
+            ],
+        }
+
+
+def create_profiler(stage: str, kind: str, executor: str, parallel: int) -> CProfileHook:
+    """Validate and build a hook for a stage; process-pool stages are rejected."""
+    if kind not in PROFILERS:
+        raise ValidationError(
+            "Unknown profiler", details={"stage": stage, "kind": kind, "allowed": list(PROFILERS)}
+        )
+    if executor == "process" and parallel > 1:
+        raise ValidationError(
+            "process-pool stages cannot be profiled",
+            details={"stage": stage, "executor": executor},
+        )
+    return CProfileHook()
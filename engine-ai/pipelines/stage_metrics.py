@@ -0,0 +1,92 @@
+"""
+Stage metrics — per-stage counters and a latency histogram for AIPipeline.
+Updated once per stage call (a record in run, a batch in stream); a call
+costs a few additions and one bisect into fixed log-scale buckets.
+snapshot() derives throughput and p50/p95/p99 latency.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any
+
+# Bucket upper bounds in seconds: 1us .. ~1100s, four per doubling, plus overflow.
+LATENCY_BUCKETS: tuple[float, ...] = tuple(1e-6 * 2 ** (i / 4) for i in range(121))
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class StageMetrics:
+    """Counters for one stage: calls, items in/out, busy time, latency, errors, queue depth."""
+
+    def __init__(self, name: str, parallel: int = 1, executor: str = "thread") -> None:
+        self.name = name
+        self.parallel = parallel
+        self.executor = executor
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.items_in = 0
+            self.items_out = 0
+            self.busy_seconds = 0.0
+            self.max_seconds = 0.0
+            self.errors = 0
+            self.queue_depth = 0
+            self.max_queue_depth = 0
+            self._latency = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, items_in: int, items_out: int, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def set_queue_depth(self, depth: int) -> None:
+        with self._lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def _percentile(self, p: float) -> float:
+        # Bucket upper bound holding the p-th percentile call, capped at the slowest call.
+        rank = max(1, -(-self.calls * p // 100))
+        seen = 0
+        for i, n in enumerate(self._latency):
+            seen += n
+            if seen >= rank and i < len(LATENCY_BUCKETS):
+                return min(LATENCY_BUCKETS[i], self.max_seconds)
+        return self.max_seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counters plus items_per_second and per-call latency_ms (mean, p50, p95, p99, max)."""
+        with self._lock:
+            calls = self.calls
+            latency_ms = {
+                f"p{p}": self._percentile(p) * 1000 if calls else 0.0 for p in LATENCY_PERCENTILES
+            }
+            latency_ms["mean"] = self.busy_seconds / calls * 1000 if calls else 0.0
+            latency_ms["max"] = self.max_seconds * 1000
+            return {
+                "parallel": self.parallel,
+                "executor": self.executor,
+                "calls": calls,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "errors": self.errors,
+                "busy_seconds": self.busy_seconds,
+                "items_per_second": (
+                    self.items_in / self.busy_seconds if self.busy_seconds > 0 else 0.0
+                ),
+                "latency_ms": latency_ms,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+            }
@@ -1,6 +1,10 @@
 """Pipeline tests for engine-ai."""
+import time
+
 import pytest
-from pipelines.ai_pipeline import AIPipeline, create_ai_pipeline
+
+from errors.error_model import ExecutionError, ValidationError
+from pipelines.ai_pipeline import create_ai_pipeline
 
 
 class TestAIPipeline:
@@ -20,3 +24,41 @@ class TestAIPipeline:
     def test_run_empty(self):
         p = create_ai_pipeline()
         assert p.run(42) == 42
+
+    def test_stream_parallel_keeps_order(self):
+        def slow(x):
+            time.sleep(0.002)
+            return x + 1
+
+        p = create_ai_pipeline("par").add_stage("slow", slow, parallel=4)
+        assert list(p.stream(range(50), batch_size=4)) == [x + 1 for x in range(50)]
+        metrics = p.stage_metrics()["slow"]
+        assert metrics["items_in"] == 50 and metrics["calls"] == 13 and metrics["parallel"] == 4
+        assert metrics["max_queue_depth"] <= 8
+
+    def test_stream_unordered_and_errors(self):
+        p = create_ai_pipeline().add_stage("inc", lambda x: x + 1, parallel=2)
+        out = p.stream(range(20), batch_size=3, ordered=False, queue_size=1)
+        assert sorted(out) == list(range(1, 21))
+        bad = create_ai_pipeline().add_stage("boom", lambda x: 1 / x, parallel=2)
+        with pytest.raises(ExecutionError):
+            list(bad.stream([1, 0, 2], batch_size=1))
+        assert bad.stage_metrics()["boom"]["errors"] == 1
+        with pytest.raises(ValidationError):
+            create_ai_pipeline().add_stage("lam", lambda x: x, parallel=2, executor="process")
+
+    def test_stage_latency_and_profiling(self):
+        def slow(x):
+            time.sleep(0.003)
+            return x
+
+        p = create_ai_pipeline().add_stage("fast", lambda x: x).add_stage("slow", slow)
+        p.enable_profiling("slow")
+        assert list(p.stream(range(4), batch_size=2)) == [0, 1, 2, 3]
+        metrics = p.stage_metrics()
+        assert metrics["slow"]["latency_ms"]["p50"] >= 6
+        assert metrics["fast"]["latency_ms"]["p99"] < metrics["slow"]["latency_ms"]["p50"]
+        report = p.disable_profiling("slow")
+        assert report["calls"] == 2 and any("slow" in row["function"] for row in report["top"])
+        with pytest.raises(ValidationError):
+            p.enable_profiling("slow", kind="perf")
@@ -1,12 +1,31 @@
-"""Caching: cache engine."""
+"""Caching: cache engine, eviction policies, frequency sketch."""
 from .cache_engine import (
     CacheEntry,
     CacheEngine,
     create_cache_engine,
+    estimate_size,
 )
+from .eviction import (
+    EVICTION_POLICIES,
+    EvictionPolicy,
+    LFUPolicy,
+    LRUPolicy,
+    TinyLFUPolicy,
+    create_policy,
+)
+from .sketch import CountMinSketch, SpaceSaving
 
 __all__ = [
     "CacheEntry",
     "CacheEngine",
     "create_cache_engine",
+    "estimate_size",
+    "EVICTION_POLICIES",
+    "EvictionPolicy",
+    "LFUPolicy",
+    "LRUPolicy",
+    "TinyLFUPolicy",
+    "create_policy",
+    "CountMinSketch",
+    "SpaceSaving",
 ]
@@ -1,14 +1,30 @@
 """
 Cache engine — get/set/delete with optional TTL.
+Bounded by max_entries / max_bytes with an lru, lfu or tinylfu eviction
+policy; expired entries are reclaimed through an expiry heap (amortized on
+every call, or periodically by an optional background reaper) instead of a
+full scan. stats() reports hit/miss/expiration/eviction counters, bytes,
+average entry age and an approximate top-N of hot keys.
+get_or_compute() coalesces concurrent misses per key (single-flight) and can
+serve an expired value while one background refresh runs
+(stale-while-revalidate). Entries may depend on keys of a generation source
+(e.g. IndexingEngine): the generations seen when the value was computed are
+stored with it, and a read after any of them changed is a miss.
 ERL-4: validation at entry, structured logging, platform error model.
 """
 from __future__ import annotations
 
+import heapq
 import logging
-from dataclasses import dataclass, field
+import sys
+import threading
+from dataclasses import dataclass
+from itertools import count
 from time import monotonic
-from typing import Any, Generic, TypeVar
+from typing import Any, Callable, Generic, TypeVar
 
+from caching.eviction import EVICTION_POLICIES, EvictionPolicy, create_policy
+from caching.sketch import SpaceSaving
 from errors.error_model import ValidationError
 
 K = TypeVar("K")
@@ -19,10 +35,20 @@ _logger = logging.getLogger("engine-data")
 
 @dataclass
 class CacheEntry(Generic[V]):
-    """Cached value with optional expiry (monotonic time)."""
+    """
+    Cached value with optional expiry (monotonic time), estimated size in
+    bytes and insert time. stale_until (>= expires_at) keeps an expired value
+    around for stale-while-revalidate reads. depends_on / generations are
+    the dependency keys and their generations when the value was computed.
+    """
 
     value: V
     expires_at: float | None = None
+    size: int = 0
+    created_at: float = 0.0
+    stale_until: float | None = None
+    depends_on: tuple[Any, ...] = ()
+    generations: tuple[int, ...] = ()
 
     def is_expired(self) -> bool:
         """True if TTL passed. Testable."""
@@ -30,60 +56,456 @@ class CacheEntry(Generic[V]):
             return False
         return monotonic() >= self.expires_at
 
+    def reclaim_at(self) -> float | None:
+        """Time after which the entry is dropped (end of the stale window, else expiry)."""
+        return self.stale_until if self.stale_until is not None else self.expires_at
+
+
+class _Flight:
+    """One in-progress load for a key; followers wait on done."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate deep size in bytes of common JSON-like values. Testable."""
+    size = sys.getsizeof(value)
+    if _depth > 8:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += estimate_size(v, _depth + 1)
+    return size
+
 
 class CacheEngine(Generic[K, V]):
     """
     In-memory cache: get, set, delete, optional ttl_seconds.
-    Testable.
+    Optional bounds: max_entries, max_bytes (sizes from size_of, default
+    estimate_size). policy picks victims: "lru", "lfu" or "tinylfu"
+    (lru order + frequency admission). get/set are O(1) amortized;
+    thread-safe. hot_keys sets how many keys the hot-key tracker keeps
+    (0 disables it). generation_source (anything with
+    generations(keys) -> tuple[int, ...]) enables depends_on. Testable.
     """
 
-    def __init__(self, default_ttl_seconds: float | None = None) -> None:
+    def __init__(
+        self,
+        default_ttl_seconds: float | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        policy: str = "lru",
+        size_of: Callable[[Any], int] | None = None,
+        expiry_interval_seconds: float | None = None,
+        hot_keys: int = 32,
+        generation_source: Any = None,
+    ) -> None:
+        if max_entries is not None and max_entries < 1:
+            raise ValidationError("max_entries must be >= 1", details={"field": "max_entries"})
+        if max_bytes is not None and max_bytes < 1:
+            raise ValidationError("max_bytes must be >= 1", details={"field": "max_bytes"})
+        if policy not in EVICTION_POLICIES:
+            raise ValidationError(
+                "Unknown eviction policy",
+                details={"policy": policy, "allowed": list(EVICTION_POLICIES)},
+            )
+        if expiry_interval_seconds is not None and expiry_interval_seconds <= 0:
+            raise ValidationError(
+                "expiry_interval_seconds must be positive", details={"field": "expiry_interval_seconds"}
+            )
         self._default_ttl = default_ttl_seconds
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._size_of = size_of or (estimate_size if max_bytes is not None else None)
+        self._policy_name = policy
+        self._policy: EvictionPolicy[K] = create_policy(policy, capacity_hint=max_entries)
         self._store: dict[K, CacheEntry[V]] = {}
+        self._expiry: list[tuple[float, int, K]] = []
+        self._seq = count()
+        self._bytes = 0
+        self._created_sum = 0.0
+        self._stale_capable = 0  # entries with a stale window: they outlive their TTL
+        self._hot = SpaceSaving(hot_keys) if hot_keys > 0 else None
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._rejections = 0
+        self._coalesced = 0
+        self._stale_hits = 0
+        self._refreshes = 0
+        self._invalidations = 0
+        self._generation_source = generation_source
+        self._inflight: dict[K, _Flight] = {}
+        self._lock = threading.RLock()
+        self._reaper_stop: threading.Event | None = None
+        if expiry_interval_seconds is not None:
+            self._start_reaper(expiry_interval_seconds)
 
-    def get(self, key: K) -> V | None:
-        """Get value; return None if missing or expired. Testable."""
+    def _start_reaper(self, interval: float) -> None:
+        stop = threading.Event()
+        self._reaper_stop = stop
+
+        def reap() -> None:
+            while not stop.wait(interval):
+                self.purge_expired()
+
+        threading.Thread(target=reap, name="cache-engine-reaper", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the background reaper, if any. Testable."""
+        if self._reaper_stop is not None:
+            self._reaper_stop.set()
+            self._reaper_stop = None
+
+    def _drop(self, key: K) -> CacheEntry[V] | None:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            self._created_sum -= entry.created_at
+            self._stale_capable -= entry.stale_until is not None
+            self._policy.on_remove(key)
+        return entry
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """
+        Reclaim entries whose TTL has passed by popping the expiry heap.
+        Heap items for replaced or deleted keys are skipped. Returns count purged.
+        """
+        now = monotonic() if now is None else now
+        purged = 0
+        with self._lock:
+            heap = self._expiry
+            while heap and heap[0][0] <= now:
+                reclaim_at, _, key = heapq.heappop(heap)
+                entry = self._store.get(key)
+                if entry is not None and entry.reclaim_at() == reclaim_at:
+                    self._drop(key)
+                    purged += 1
+            self._expirations += purged
+            if len(heap) > 2 * len(self._store) + 64:
+                self._expiry = [item for item in heap if self._live_item(item)]
+                heapq.heapify(self._expiry)
+        if purged:
+            _logger.debug("cache_engine.purge_expired purged=%s", purged)
+        return purged
+
+    def _live_item(self, item: tuple[float, int, K]) -> bool:
+        entry = self._store.get(item[2])
+        return entry is not None and entry.reclaim_at() == item[0]
+
+    def _lookup(self, key: K) -> CacheEntry[V] | None:
+        """Entry for key, dropping it first if a dependency changed since it was stored."""
         entry = self._store.get(key)
-        if entry is None:
-            return None
-        if entry.is_expired():
-            del self._store[key]
-            return None
-        return entry.value
+        if entry is None or not entry.depends_on:
+            return entry
+        if self._generation_source.generations(entry.depends_on) == entry.generations:
+            return entry
+        self._drop(key)
+        self._invalidations += 1
+        _logger.debug("cache_engine.invalidate key=%s", key)
+        return None
+
+    def _snapshot(self, depends_on: Any) -> tuple[tuple[Any, ...], tuple[int, ...]]:
+        if not depends_on:
+            return (), ()
+        if self._generation_source is None:
+            raise ValidationError(
+                "depends_on requires a generation_source", details={"field": "depends_on"}
+            )
+        keys = tuple(depends_on)
+        return keys, tuple(self._generation_source.generations(keys))
+
+    def get(self, key: K) -> V | None:
+        """Get value; return None if missing, expired or invalidated. Testable."""
+        with self._lock:
+            if self._hot is not None:
+                self._hot.offer(key)
+            entry = self._lookup(key)
+            if entry is None:
+                self._misses += 1
+                self._policy.on_miss(key)
+                return None
+            if entry.is_expired():
+                self._misses += 1
+                if entry.stale_until is None or monotonic() >= entry.stale_until:
+                    self._drop(key)
+                    self._expirations += 1
+                return None
+            self._hits += 1
+            self._policy.on_access(key)
+            return entry.value
+
+    def get_or_compute(
+        self,
+        key: K,
+        loader: Callable[[], V],
+        ttl_seconds: float | None = None,
+        stale_while_revalidate: float | None = None,
+        depends_on: Any = None,
+    ) -> V:
+        """
+        Return the cached value, or compute it with loader() and cache it.
+        Concurrent misses for the same key run loader once; the others wait
+        and share its result (or its exception). With stale_while_revalidate
+        (seconds), a value expired less than that long ago is returned at
+        once while a single background refresh recomputes it. depends_on
+        lists generation-source keys; their generations are captured before
+        loader runs, so a concurrent change invalidates the new value too.
+        Invalidated values are never served stale.
+        """
+        if stale_while_revalidate is not None and stale_while_revalidate < 0:
+            raise ValidationError(
+                "stale_while_revalidate must be non-negative", details={"field": "stale_while_revalidate"}
+            )
+        with self._lock:
+            if self._hot is not None:
+                self._hot.offer(key)
+            entry = self._lookup(key)
+            now = monotonic()
+            if entry is not None and not entry.is_expired():
+                self._hits += 1
+                self._policy.on_access(key)
+                return entry.value
+            if entry is not None and entry.stale_until is not None and now < entry.stale_until:
+                self._stale_hits += 1
+                self._policy.on_access(key)
+                if key not in self._inflight:
+                    flight = self._inflight[key] = _Flight()
+                    self._refreshes += 1
+                    threading.Thread(
+                        target=self._load,
+                        args=(key, loader, ttl_seconds, stale_while_revalidate, depends_on, flight),
+                        name="cache-engine-refresh",
+                        daemon=True,
+                    ).start()
+                return entry.value
+            self._misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self._policy.on_miss(key)
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._coalesced += 1
+        if leader:
+            self._load(key, loader, ttl_seconds, stale_while_revalidate, depends_on, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(
+        self,
+        key: K,
+        loader: Callable[[], V],
+        ttl_seconds: float | None,
+        stale_while_revalidate: float | None,
+        depends_on: Any,
+        flight: _Flight,
+    ) -> None:
+        try:
+            deps = self._snapshot(depends_on)
+            flight.value = loader()
+            self._put(key, flight.value, ttl_seconds, stale_while_revalidate, deps)
+        except BaseException as e:
+            flight.error = e
+            _logger.warning("cache_engine.load failed key=%s error=%s", key, e)
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
 
     def set(
         self,
         key: K,
         value: V,
         ttl_seconds: float | None = None,
+        depends_on: Any = None,
+    ) -> None:
+        """
+        Set value with optional TTL. Rejects negative TTL. May evict to stay within bounds.
+        depends_on: generation-source keys whose change invalidates the value.
+        """
+        self._put(key, value, ttl_seconds, None, self._snapshot(depends_on))
+
+    def _put(
+        self,
+        key: K,
+        value: V,
+        ttl_seconds: float | None,
+        stale_seconds: float | None,
+        deps: tuple[tuple[Any, ...], tuple[int, ...]] = ((), ()),
     ) -> None:
-        """Set value with optional TTL. Rejects negative TTL."""
         ttl = ttl_seconds if ttl_seconds is not None else self._default_ttl
         if ttl is not None and ttl < 0:
             raise ValidationError("ttl_seconds must be non-negative", details={"field": "ttl_seconds"})
-        expires = (monotonic() + ttl) if ttl is not None else None
-        self._store[key] = CacheEntry(value=value, expires_at=expires)
+        now = monotonic()
+        expires = (now + ttl) if ttl is not None else None
+        stale_until = (expires + stale_seconds) if expires is not None and stale_seconds else None
+        size = self._size_of(value) if self._size_of is not None else 0
+        with self._lock:
+            self.purge_expired(now)
+            if self._max_bytes is not None and size > self._max_bytes:
+                self._drop(key)
+                self._rejections += 1
+                _logger.debug("cache_engine.set rejected key=%s size=%s", key, size)
+                return
+            existing = self._store.get(key)
+            entry = CacheEntry(
+                value=value,
+                expires_at=expires,
+                size=size,
+                created_at=now,
+                stale_until=stale_until,
+                depends_on=deps[0],
+                generations=deps[1],
+            )
+            self._store[key] = entry
+            self._bytes += size
+            self._created_sum += now
+            self._stale_capable += stale_until is not None
+            if existing is not None:
+                self._bytes -= existing.size
+                self._created_sum -= existing.created_at
+                self._stale_capable -= existing.stale_until is not None
+                self._policy.on_access(key)
+            else:
+                self._policy.on_insert(key)
+            if expires is not None:
+                heapq.heappush(self._expiry, (entry.reclaim_at(), next(self._seq), key))
+            self._enforce_bounds(key)
         _logger.debug("cache_engine.set key=%s ttl=%s", key, ttl)
 
+    def _over_bounds(self) -> bool:
+        if self._max_entries is not None and len(self._store) > self._max_entries:
+            return True
+        return self._max_bytes is not None and self._bytes > self._max_bytes
+
+    def _enforce_bounds(self, key: K) -> None:
+        while self._over_bounds():
+            victim = self._policy.victim(protect=key)
+            if victim is None:
+                return
+            if victim != key and not self._policy.admit(key, victim):
+                victim = key
+            self._drop(victim)
+            if victim == key:
+                self._rejections += 1
+            else:
+                self._evictions += 1
+            _logger.debug("cache_engine.evict key=%s", victim)
+            if victim == key:
+                return
+
     def delete(self, key: K) -> bool:
         """Delete key. Returns True if key was present."""
-        if key in self._store:
-            del self._store[key]
-            _logger.debug("cache_engine.delete key=%s", key)
-            return True
-        return False
+        with self._lock:
+            if self._drop(key) is not None:
+                _logger.debug("cache_engine.delete key=%s", key)
+                return True
+            return False
 
     def clear(self) -> None:
         """Remove all entries. Testable."""
-        self._store.clear()
+        with self._lock:
+            self._store.clear()
+            self._expiry.clear()
+            self._policy.clear()
+            self._bytes = 0
+            self._created_sum = 0.0
+            self._stale_capable = 0
 
     def size(self) -> int:
-        """Number of entries (including expired until next get). Testable."""
-        return len(self._store)
+        """
+        Number of live entries: expired entries are purged first, and ones
+        past their TTL but kept for stale-while-revalidate are not counted.
+        Testable.
+        """
+        with self._lock:
+            now = monotonic()
+            self.purge_expired(now)
+            if not self._stale_capable:
+                return len(self._store)
+            return sum(1 for e in self._store.values() if e.expires_at is None or now < e.expires_at)
+
+    def bytes(self) -> int:
+        """Estimated bytes held by live entries (0 unless sizes are tracked). Testable."""
+        with self._lock:
+            self.purge_expired()
+            return self._bytes
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Snapshot of counters since creation (or reset_stats): hits, misses,
+        hit_ratio, expirations, evictions, rejections (admission or size),
+        single-flight coalesced waits, stale hits, background refreshes,
+        dependency invalidations, entries (including ones kept for stale
+        reads), bytes, average entry age and hot keys as
+        {"key", "count", "error"} (count - error is a guaranteed lower bound).
+        """
+        with self._lock:
+            now = monotonic()
+            self.purge_expired(now)
+            entries = len(self._store)
+            lookups = self._hits + self._misses
+            return {
+                "policy": self._policy_name,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "rejections": self._rejections,
+                "coalesced": self._coalesced,
+                "stale_hits": self._stale_hits,
+                "refreshes": self._refreshes,
+                "invalidations": self._invalidations,
+                "avg_age_seconds": (now - self._created_sum / entries) if entries else 0.0,
+                "hot_keys": [
+                    {"key": key, "count": c, "error": err}
+                    for key, c, err in (self._hot.top() if self._hot is not None else [])
+                ],
+            }
+
+    def reset_stats(self) -> None:
+        """Zero the counters and forget hot keys; entries are kept. Testable."""
+        with self._lock:
+            self._hits = self._misses = 0
+            self._expirations = self._evictions = self._rejections = 0
+            self._coalesced = self._stale_hits = self._refreshes = self._invalidations = 0
+            if self._hot is not None:
+                self._hot.clear()
 
 
 def create_cache_engine(
     default_ttl_seconds: float | None = None,
+    max_entries: int | None = None,
+    max_bytes: int | None = None,
+    policy: str = "lru",
+    hot_keys: int = 32,
+    generation_source: Any = None,
 ) -> CacheEngine[Any, Any]:
     """Create cache engine. Testable."""
-    return CacheEngine(default_ttl_seconds=default_ttl_seconds)
+    return CacheEngine(
+        default_ttl_seconds=default_ttl_seconds,
+        max_entries=max_entries,
+        max_bytes=max_bytes,
+        policy=policy,
+        hot_keys=hot_keys,
+        generation_source=generation_source,
+    )
@@ -0,0 +1,168 @@
+"""
+Eviction policies for CacheEngine — O(1) bookkeeping per access.
+lru: recency order; lfu: frequency buckets with recency tie-break;
+tinylfu: lru order plus a count-min admission filter that keeps a new key
+out when it is less frequent than the entry it would evict.
+Modular, testable.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Generic, TypeVar
+
+from caching.sketch import CountMinSketch
+
+K = TypeVar("K")
+
+EVICTION_POLICIES = ("lru", "lfu", "tinylfu")
+
+
+class EvictionPolicy(ABC, Generic[K]):
+    """Tracks keys and picks eviction victims. Subclasses keep every hook O(1)."""
+
+    @abstractmethod
+    def on_insert(self, key: K) -> None:
+        """New key stored."""
+
+    @abstractmethod
+    def on_access(self, key: K) -> None:
+        """Existing key read or overwritten."""
+
+    @abstractmethod
+    def on_remove(self, key: K) -> None:
+        """Key deleted, expired or evicted."""
+
+    def on_miss(self, key: K) -> None:
+        """Lookup of an absent key. Default: ignored."""
+
+    @abstractmethod
+    def victim(self, protect: K | None = None) -> K | None:
+        """Key to evict next, avoiding protect unless it is the only key."""
+
+    def admit(self, candidate: K, victim: K) -> bool:
+        """True if candidate may displace victim. Default: always."""
+        return True
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every key."""
+
+
+class LRUPolicy(EvictionPolicy[K]):
+    """Least recently used first."""
+
+    def __init__(self) -> None:
+        self._order: OrderedDict[K, None] = OrderedDict()
+
+    def on_insert(self, key: K) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def on_access(self, key: K) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def on_remove(self, key: K) -> None:
+        self._order.pop(key, None)
+
+    def victim(self, protect: K | None = None) -> K | None:
+        for key in self._order:
+            if key != protect or len(self._order) == 1:
+                return key
+        return None
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class LFUPolicy(EvictionPolicy[K]):
+    """Least frequently used first; least recent within a frequency."""
+
+    def __init__(self) -> None:
+        self._freq: dict[K, int] = {}
+        self._buckets: dict[int, OrderedDict[K, None]] = {}
+        self._min_freq = 0
+
+    def _unlink(self, key: K, freq: int) -> None:
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+
+    def on_insert(self, key: K) -> None:
+        if key in self._freq:
+            self.on_access(key)
+            return
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def on_access(self, key: K) -> None:
+        freq = self._freq.get(key)
+        if freq is None:
+            return
+        self._unlink(key, freq)
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+        if self._min_freq == freq and freq not in self._buckets:
+            self._min_freq = freq + 1
+
+    def on_remove(self, key: K) -> None:
+        freq = self._freq.pop(key, None)
+        if freq is not None:
+            self._unlink(key, freq)
+
+    def victim(self, protect: K | None = None) -> K | None:
+        if not self._freq:
+            return None
+        if self._min_freq not in self._buckets:
+            self._min_freq = min(self._buckets)
+        for key in self._buckets[self._min_freq]:
+            if key != protect:
+                return key
+        for freq in sorted(self._buckets):
+            for key in self._buckets[freq]:
+                if key != protect:
+                    return key
+        return protect
+
+    def clear(self) -> None:
+        self._freq.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+
+class TinyLFUPolicy(LRUPolicy[K]):
+    """LRU eviction order with count-min frequency admission (TinyLFU)."""
+
+    def __init__(self, capacity_hint: int = 1024) -> None:
+        super().__init__()
+        self._sketch = CountMinSketch(width=max(64, capacity_hint * 2))
+
+    def on_insert(self, key: K) -> None:
+        self._sketch.increment(key)
+        super().on_insert(key)
+
+    def on_access(self, key: K) -> None:
+        self._sketch.increment(key)
+        super().on_access(key)
+
+    def on_miss(self, key: K) -> None:
+        self._sketch.increment(key)
+
+    def admit(self, candidate: K, victim: K) -> bool:
+        return self._sketch.estimate(candidate) > self._sketch.estimate(victim)
+
+    def clear(self) -> None:
+        super().clear()
+        self._sketch.clear()
+
+
+def create_policy(name: str, capacity_hint: int | None = None) -> EvictionPolicy[Any]:
+    """Build an eviction policy by name (see EVICTION_POLICIES)."""
+    if name == "lfu":
+        return LFUPolicy()
+    if name == "tinylfu":
+        return TinyLFUPolicy(capacity_hint=capacity_hint or 1024)
+    return LRUPolicy()
@@ -0,0 +1,121 @@
+"""
+Frequency sketches — approximate per-key counters in fixed memory.
+CountMinSketch backs TinyLFU admission; counters age by halving so the
+estimate tracks recent frequency rather than all-time totals.
+SpaceSaving keeps an approximate top-N of the hottest keys.
+Modular, testable.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+
+class CountMinSketch:
+    """
+    depth x width counter matrix; estimate(key) is the minimum of the key's
+    depth counters, so it never under-counts. After sample_size increments
+    every counter is halved (aging).
+    """
+
+    def __init__(self, width: int = 1024, depth: int = 4, sample_size: int | None = None) -> None:
+        self._width = max(16, width)
+        self._depth = max(1, depth)
+        self._rows = [[0] * self._width for _ in range(self._depth)]
+        self._seeds = [0x9E3779B1 * (i + 1) for i in range(self._depth)]
+        self._sample_size = sample_size or self._width * 10
+        self._additions = 0
+
+    def _slots(self, key: Any) -> list[int]:
+        h = hash(key)
+        return [((h ^ seed) * 0x85EBCA6B & 0xFFFFFFFF) % self._width for seed in self._seeds]
+
+    def increment(self, key: Any) -> int:
+        """Count one occurrence of key. Returns the new estimate."""
+        estimate = None
+        for row, slot in zip(self._rows, self._slots(key)):
+            row[slot] += 1
+            estimate = row[slot] if estimate is None else min(estimate, row[slot])
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+        return estimate or 0
+
+    def estimate(self, key: Any) -> int:
+        """Approximate recent count of key (never below the true count since the last aging)."""
+        return min(row[slot] for row, slot in zip(self._rows, self._slots(key)))
+
+    def _age(self) -> None:
+        for row in self._rows:
+            for i, v in enumerate(row):
+                row[i] = v >> 1
+        self._additions //= 2
+
+    def clear(self) -> None:
+        """Reset all counters. Testable."""
+        for row in self._rows:
+            for i in range(self._width):
+                row[i] = 0
+        self._additions = 0
+
+
+class SpaceSaving:
+    """
+    Space-saving top-k counter: tracks at most capacity keys. A new key
+    replaces the current minimum and inherits its count (recorded as error),
+    so any key with true frequency above total/capacity is always tracked.
+    Counts move between buckets, keeping offer() O(1).
+    """
+
+    def __init__(self, capacity: int = 32) -> None:
+        self._capacity = max(1, capacity)
+        self._counts: dict[Any, int] = {}
+        self._errors: dict[Any, int] = {}
+        self._buckets: dict[int, dict[Any, None]] = {}
+        self._min_count = 0
+
+    def _move(self, key: Any, old: int, new: int) -> None:
+        if old:
+            bucket = self._buckets[old]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[old]
+                if self._min_count == old:
+                    self._min_count = new
+        self._buckets.setdefault(new, {})[key] = None
+        self._counts[key] = new
+        if not old and (self._min_count == 0 or new < self._min_count):
+            self._min_count = new
+
+    def offer(self, key: Any) -> None:
+        """Count one occurrence of key."""
+        count = self._counts.get(key)
+        if count is not None:
+            self._move(key, count, count + 1)
+            return
+        if len(self._counts) < self._capacity:
+            self._errors[key] = 0
+            self._move(key, 0, 1)
+            return
+        floor = self._min_count
+        evicted = next(iter(self._buckets[floor]))
+        del self._buckets[floor][evicted]
+        if not self._buckets[floor]:
+            del self._buckets[floor]
+        del self._counts[evicted]
+        del self._errors[evicted]
+        self._errors[key] = floor
+        self._counts[key] = floor + 1
+        self._buckets.setdefault(floor + 1, {})[key] = None
+        self._min_count = floor if floor in self._buckets else floor + 1
+
+    def top(self, n: int | None = None) -> list[tuple[Any, int, int]]:
+        """(key, count, error) by descending count; count - error is a lower bound. Testable."""
+        ranked = sorted(self._counts.items(), key=lambda kv: kv[1], reverse=True)
+        return [(k, c, self._errors[k]) for k, c in ranked[: n or len(ranked)]]
+
+    def clear(self) -> None:
+        """Forget all tracked keys. Testable."""
+        self._counts.clear()
+        self._errors.clear()
+        self._buckets.clear()
+        self._min_count = 0
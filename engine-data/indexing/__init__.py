@@ -1,12 +1,32 @@
-"""Indexing: indexing engine."""
+"""Indexing: indexing engine, posting lists, field indexes, BM25 text index."""
+from .field_indexes import (
+    FIELD_INDEX_KINDS,
+    FieldIndex,
+    PrefixIndex,
+    RangeIndex,
+    create_field_index,
+)
 from .indexing_engine import (
     IndexEntry,
     IndexingEngine,
     create_indexing_engine,
 )
+from .text_index import (
+    Analyzer,
+    TextIndex,
+    create_text_index,
+)
 
 __all__ = [
+    "FIELD_INDEX_KINDS",
+    "FieldIndex",
+    "PrefixIndex",
+    "RangeIndex",
+    "create_field_index",
     "IndexEntry",
     "IndexingEngine",
     "create_indexing_engine",
+    "Analyzer",
+    "TextIndex",
+    "create_text_index",
 ]
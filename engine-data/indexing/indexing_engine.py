@@ -1,17 +1,39 @@
 """
 Indexing engine — build and query indexes over data.
+Doc ids are interned to dense ints and each key's postings are a sorted
+int array (see indexing.postings), so memory stays ~4 bytes per posting and
+search_all / search_any / search_not run as sorted-list set algebra.
+Fields can also get range or prefix indexes (see indexing.field_indexes),
+maintained by the same index/remove calls and combined with keys in select().
+An optional TextIndex (see indexing.text_index) rides the same lifecycle
+for BM25 full-text search; each of its terms has its own generation.
+Every key touched by index/remove gets a fresh generation number, so caches
+can record the generations a result was built from and detect staleness
+per key instead of by TTL alone.
+remove() releases the doc's interned number lazily: once enough removed
+numbers pile up, the next index call compacts, renumbering the live docs
+densely (order kept) through the postings and field indexes, so churning
+ids do not grow the intern table without bound.
 ERL-4: validation at entry, structured logging, platform error model.
 """
 from __future__ import annotations
 
 import logging
+from array import array
 from dataclasses import dataclass, field
-from typing import Any, Callable
+from itertools import count
+from typing import Any, Callable, Iterable
 
 from errors.error_model import ValidationError
+from indexing import postings as pl
+from indexing.field_indexes import FieldIndex, create_field_index, field_value
+from indexing.text_index import TextIndex
 
 _logger = logging.getLogger("engine-data")
 
+# Removed docs tolerated before compact() runs (and compact_ratio of all interned docs).
+_COMPACT_MIN_DEAD = 1024
+
 
 @dataclass
 class IndexEntry:
@@ -24,15 +46,87 @@ class IndexEntry:
 class IndexingEngine:
     """
     In-memory indexing: add documents with a key extractor, query by key.
+    Results come back in first-indexed order of the documents (a doc
+    removed and compacted away counts as new when indexed again).
     ERL-4: entry-point validation, structured logging, fail-fast.
     """
 
     def __init__(
         self,
         key_extractor: Callable[[dict[str, Any]], list[str]] | None = None,
+        text_index: TextIndex | None = None,
+        compact_ratio: float = 0.25,
     ) -> None:
         self._key_extractor = key_extractor or (lambda doc: [str(doc.get("id", ""))])
-        self._index: dict[str, set[str]] = {}
+        self._text_index = text_index
+        self._compact_ratio = compact_ratio
+        self._index: dict[str, array] = {}
+        self._doc_ids: list[str] = []
+        self._doc_numbers: dict[str, int] = {}
+        self._live = bytearray()
+        self._dead = 0
+        self._field_indexes: dict[tuple[str, str], FieldIndex] = {}
+        self._generations: dict[Any, int] = {}
+        self._clock = count(1)
+
+    def _intern(self, doc_id: str) -> int:
+        number = self._doc_numbers.get(doc_id)
+        if number is None:
+            number = self._doc_numbers[doc_id] = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._live.append(1)
+        elif not self._live[number]:
+            self._live[number] = 1
+            self._dead -= 1
+        return number
+
+    @property
+    def text_index(self) -> TextIndex | None:
+        return self._text_index
+
+    @staticmethod
+    def field_key(kind: str, field: str) -> tuple[str, str]:
+        """Generation key of a field index (usable in cache depends_on next to plain keys)."""
+        return (kind, field)
+
+    def add_field_index(
+        self,
+        field: str,
+        kind: str,
+        documents: Iterable[tuple[str, dict[str, Any]]] | None = None,
+    ) -> bool:
+        """
+        Register a range or prefix index on a (dot path) field. Only documents
+        indexed afterwards are covered, plus (doc_id, document) pairs passed in
+        documents as a backfill. Returns False if it already exists.
+        """
+        key = self.field_key(kind, field)
+        if key in self._field_indexes:
+            return False
+        field_index = create_field_index(field, kind)
+        field_index.add_many(
+            (self._intern(doc_id), field_value(document, field)) for doc_id, document in documents or ()
+        )
+        self._field_indexes[key] = field_index
+        self._generations[key] = next(self._clock)
+        _logger.info("indexing_engine.add_field_index field=%s kind=%s", field, kind)
+        return True
+
+    def has_field_index(self, field: str, kind: str) -> bool:
+        """True if a kind index exists on field. Testable."""
+        return self.field_key(kind, field) in self._field_indexes
+
+    def _field_index(self, field: str, kind: str) -> Any:
+        field_index = self._field_indexes.get(self.field_key(kind, field))
+        if field_index is None:
+            raise ValidationError(
+                f"no {kind} index on field", details={"field": field, "kind": kind}
+            )
+        return field_index
+
+    def _resolve(self, postings: array) -> list[str]:
+        doc_ids = self._doc_ids
+        return [doc_ids[n] for n in postings]
 
     def index(self, doc_id: str, document: dict[str, Any]) -> None:
         """Index a document. Validates before state mutation."""
@@ -41,11 +135,57 @@ class IndexingEngine:
         if document is None:
             raise ValidationError("document is required", details={"field": "document"})
         keys = self._key_extractor(document)
+        number = self._intern(doc_id)
         for k in keys:
-            if k not in self._index:
-                self._index[k] = set()
-            self._index[k].add(doc_id)
+            postings = self._index.get(k)
+            if postings is None:
+                postings = self._index[k] = pl.new_postings()
+            pl.insert(postings, number)
+            self._generations[k] = next(self._clock)
+        for key, field_index in self._field_indexes.items():
+            if field_index.add(number, field_value(document, field_index.field)):
+                self._generations[key] = next(self._clock)
+        if self._text_index is not None:
+            self._bump_text(self._text_index.add(doc_id, document))
         _logger.debug("indexing_engine.index doc_id=%s keys=%s", doc_id, len(keys))
+        self._maybe_compact()
+
+    def index_many(self, documents: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """
+        Index (doc_id, document) pairs in one pass. Validates all before
+        mutation; every key the batch touches gets one fresh generation.
+        Returns the number indexed.
+        """
+        items = list(documents)
+        for doc_id, document in items:
+            if not (doc_id or "").strip():
+                raise ValidationError("doc_id is required", details={"field": "doc_id"})
+            if document is None:
+                raise ValidationError("document is required", details={"field": "document", "doc_id": doc_id})
+        extract = self._key_extractor
+        index = self._index
+        field_indexes = list(self._field_indexes.items())
+        touched: set[Any] = set()
+        for doc_id, document in items:
+            number = self._intern(doc_id)
+            for k in extract(document):
+                postings = index.get(k)
+                if postings is None:
+                    postings = index[k] = pl.new_postings()
+                pl.insert(postings, number)
+                touched.add(k)
+            for key, field_index in field_indexes:
+                if field_index.add(number, field_value(document, field_index.field)):
+                    touched.add(key)
+        if self._text_index is not None:
+            touched.update(self.field_key("text", t) for t in self._text_index.add_many(items))
+        generation = next(self._clock)
+        generations = self._generations
+        for key in touched:
+            generations[key] = generation
+        _logger.debug("indexing_engine.index_many documents=%s keys=%s", len(items), len(touched))
+        self._maybe_compact()
+        return len(items)
 
     def remove(self, doc_id: str, document: dict[str, Any]) -> None:
         """Remove document from index. Validates inputs."""
@@ -53,36 +193,208 @@ class IndexingEngine:
             raise ValidationError("doc_id is required", details={"field": "doc_id"})
         if document is None:
             raise ValidationError("document is required", details={"field": "document"})
+        number = self._doc_numbers.get(doc_id)
+        if number is None:
+            return
         keys = self._key_extractor(document)
         for k in keys:
-            if k in self._index:
-                self._index[k].discard(doc_id)
-                if not self._index[k]:
+            postings = self._index.get(k)
+            if postings is not None and pl.discard(postings, number):
+                if not postings:
                     del self._index[k]
+                    self._generations.pop(k, None)
+                else:
+                    self._generations[k] = next(self._clock)
+        for key, field_index in self._field_indexes.items():
+            if field_index.remove(number, field_value(document, field_index.field)):
+                self._generations[key] = next(self._clock)
+        if self._text_index is not None:
+            self._bump_text(self._text_index.remove(doc_id, document))
+        if self._live[number]:
+            self._live[number] = 0
+            self._dead += 1
         _logger.debug("indexing_engine.remove doc_id=%s", doc_id)
 
+    def _maybe_compact(self) -> None:
+        # Checked after indexing, never in remove(): a replace (remove, then index)
+        # revives the doc's number first and so keeps its position.
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead > self._compact_ratio * len(self._doc_ids):
+            self.compact()
+
+    def compact(self) -> int:
+        """
+        Release the interned numbers of removed docs: renumber live docs
+        densely (order kept, so postings stay sorted) in the postings and
+        field indexes. Returns the numbers released. Testable.
+        """
+        live = self._live
+        remap = array("l", [-1]) * len(self._doc_ids)
+        doc_ids: list[str] = []
+        for number, doc_id in enumerate(self._doc_ids):
+            if live[number]:
+                remap[number] = len(doc_ids)
+                doc_ids.append(doc_id)
+        released = len(self._doc_ids) - len(doc_ids)
+        for k in list(self._index):
+            old = self._index[k]
+            postings = array(pl.POSTING_TYPECODE, [remap[n] for n in old if remap[n] >= 0])
+            if not postings:
+                del self._index[k]
+                self._generations.pop(k, None)
+                continue
+            self._index[k] = postings
+            if len(postings) != len(old):
+                self._generations[k] = next(self._clock)
+        for field_index in self._field_indexes.values():
+            field_index.renumber(remap)
+        self._doc_ids = doc_ids
+        self._doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        self._live = bytearray(b"\x01") * len(doc_ids)
+        self._dead = 0
+        _logger.debug("indexing_engine.compact released=%s documents=%s", released, len(doc_ids))
+        return released
+
     def get(self, key: str) -> list[str]:
         """Get doc ids for key. Validates key non-empty."""
         if not (key or "").strip():
             raise ValidationError("key is required", details={"field": "key"})
-        return list(self._index.get(key, set()))
+        return self._resolve(self._index.get(key, ()))
+
+    def _postings(self, keys: list[str], field_name: str) -> list[array]:
+        if keys is None:
+            raise ValidationError(f"{field_name} is required", details={"field": field_name})
+        if isinstance(keys, str):
+            keys = [keys]
+        empty = pl.new_postings()
+        return [self._index.get(k, empty) for k in keys]
 
     def search(self, keys: list[str]) -> list[str]:
         """Get union of doc ids for all keys. Validates keys non-null."""
-        if keys is None:
-            raise ValidationError("keys is required", details={"field": "keys"})
-        result: set[str] = set()
-        for k in keys:
-            result.update(self._index.get(k, set()))
-        return list(result)
+        return self.search_any(keys)
+
+    def search_any(self, keys: list[str]) -> list[str]:
+        """Doc ids matching any key (OR). Testable."""
+        lists = self._postings(keys, "keys")
+        return self._resolve(pl.union_all(lists))
+
+    def search_all(self, keys: list[str]) -> list[str]:
+        """Doc ids matching every key (AND); cost follows the smallest posting list. Testable."""
+        lists = self._postings(keys, "keys")
+        return self._resolve(pl.intersect_all(lists))
+
+    def search_not(self, keys: list[str], exclude: list[str], match: str = "all") -> list[str]:
+        """
+        Doc ids matching keys and none of exclude (AND NOT). match="all"
+        requires every key, match="any" at least one. Testable.
+        """
+        if match not in ("all", "any"):
+            raise ValidationError("match must be 'all' or 'any'", details={"field": "match", "value": match})
+        lists = self._postings(keys, "keys")
+        base = pl.intersect_all(lists) if match == "all" else pl.union_all(lists)
+        for postings in self._postings(exclude, "exclude"):
+            if not base:
+                break
+            base = pl.difference(base, postings)
+        return self._resolve(base)
+
+    def search_range(self, field: str, low: Any = None, high: Any = None) -> list[str]:
+        """Doc ids whose field value lies in [low, high] (None = open end). Testable."""
+        return self._resolve(self._field_index(field, "range").range(low, high))
+
+    def search_prefix(self, field: str, prefix: str) -> list[str]:
+        """Doc ids whose field value starts with prefix. Testable."""
+        return self._resolve(self._field_index(field, "prefix").prefix(prefix))
+
+    def select(
+        self,
+        keys: list[str] | None = None,
+        match: str = "any",
+        exclude: list[str] | None = None,
+        ranges: dict[str, Any] | None = None,
+        prefixes: dict[str, str] | None = None,
+    ) -> list[str]:
+        """
+        Combined query: keys (OR-ed for match="any", AND-ed for "all"),
+        AND every range {field: [low, high]} and prefix {field: prefix}
+        clause, minus docs under any exclude key. No clauses -> no results.
+        """
+        if match not in ("all", "any"):
+            raise ValidationError("match must be 'all' or 'any'", details={"field": "match", "value": match})
+        clauses: list[array] = []
+        if keys:
+            lists = self._postings(keys, "keys")
+            clauses.append(pl.intersect_all(lists) if match == "all" else pl.union_all(lists))
+        for field, bounds in (ranges or {}).items():
+            if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+                raise ValidationError("range must be [low, high]", details={"field": field})
+            clauses.append(self._field_index(field, "range").range(bounds[0], bounds[1]))
+        for field, prefix in (prefixes or {}).items():
+            clauses.append(self._field_index(field, "prefix").prefix(prefix))
+        if not clauses:
+            return []
+        base = pl.intersect_all(clauses)
+        for postings in self._postings(exclude or [], "exclude"):
+            if not base:
+                break
+            base = pl.difference(base, postings)
+        return self._resolve(base)
+
+    def _bump_text(self, terms: set[str]) -> None:
+        for term in terms:
+            self._generations[self.field_key("text", term)] = next(self._clock)
+
+    def _require_text_index(self) -> TextIndex:
+        if self._text_index is None:
+            raise ValidationError("no text index configured", details={"field": "text"})
+        return self._text_index
+
+    def search_text(
+        self,
+        query: str,
+        top_k: int = 10,
+        candidates: list[str] | None = None,
+        phrase: bool = False,
+    ) -> list[tuple[str, float]]:
+        """BM25-ranked (doc_id, score), optionally limited to candidate doc ids. Testable."""
+        return self._require_text_index().search(query, top_k=top_k, candidates=candidates, phrase=phrase)
+
+    def text_dependencies(self, query: str) -> list[tuple[str, str]]:
+        """
+        Generation keys of the query's terms. A cached ranking stays valid
+        while none of them changes (scores may drift slightly as corpus-wide
+        BM25 statistics move).
+        """
+        return [self.field_key("text", t) for t in self._require_text_index().terms(query)]
+
+    def generation(self, key: str) -> int:
+        """Generation of key: changes whenever its postings change; 0 when absent."""
+        return self._generations.get(key, 0)
+
+    def generations(self, keys: list[Any]) -> tuple[int, ...]:
+        """Generations of keys, in order (for cache dependency snapshots). Testable."""
+        gens = self._generations
+        return tuple(gens.get(k, 0) for k in keys)
 
     def keys(self) -> list[str]:
         """All index keys. Testable."""
         return list(self._index.keys())
 
+    def stats(self) -> dict[str, int]:
+        """Key, interned doc, posting and field index counts plus posting bytes. Testable."""
+        postings = sum(len(p) for p in self._index.values())
+        return {
+            "keys": len(self._index),
+            "documents": len(self._doc_ids) - self._dead,
+            "postings": postings,
+            "posting_bytes": postings * array(pl.POSTING_TYPECODE).itemsize,
+            "field_indexes": len(self._field_indexes),
+        }
+
 
 def create_indexing_engine(
     key_extractor: Callable[[dict[str, Any]], list[str]] | None = None,
+    text_index: TextIndex | None = None,
+    compact_ratio: float = 0.25,
 ) -> IndexingEngine:
     """Create indexing engine. Testable."""
-    return IndexingEngine(key_extractor=key_extractor)
+    return IndexingEngine(key_extractor=key_extractor, text_index=text_index, compact_ratio=compact_ratio)
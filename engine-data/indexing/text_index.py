@@ -0,0 +1,437 @@
+"""
+Text index — full-text inverted index with BM25 ranking.
+An Analyzer turns text into (term, position) pairs (tokenize, lowercase,
+stopwords, extra token filters). Each term keeps parallel arrays of doc
+numbers, term frequencies and positions, appended in doc order. Deletes
+tombstone the doc and compaction drops dead postings and renumbers the
+live docs once they pile up.
+Queries score term-at-a-time and keep the best top_k in a heap; with numpy
+installed, long posting lists are scored vectorized.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Iterable
+
+from errors.error_model import ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; scoring falls back to pure Python
+    np = None  # type: ignore[assignment]
+
+_logger = logging.getLogger("engine-data")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_VECTORIZE_MIN_POSTINGS = 4096
+
+DEFAULT_STOPWORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that the their then "
+    "there these they this to was will with".split()
+)
+
+TokenFilter = Callable[[list[tuple[str, int]]], list[tuple[str, int]]]
+
+
+class Analyzer:
+    """
+    Text -> [(term, position)]. Positions count every token before filtering,
+    so phrase adjacency survives stopword removal. filters run in order after
+    lowercasing and stopword removal.
+    """
+
+    def __init__(
+        self,
+        lowercase: bool = True,
+        stopwords: Iterable[str] | None = DEFAULT_STOPWORDS,
+        min_length: int = 1,
+        filters: Iterable[TokenFilter] = (),
+    ) -> None:
+        self._lowercase = lowercase
+        self._stopwords = frozenset(stopwords or ())
+        self._min_length = max(1, min_length)
+        self._filters = list(filters)
+
+    def __call__(self, text: str) -> list[tuple[str, int]]:
+        if self._lowercase:
+            text = text.lower()
+        stop = self._stopwords
+        min_length = self._min_length
+        tokens = [
+            (t, i) for i, t in enumerate(_TOKEN_RE.findall(text))
+            if len(t) >= min_length and t not in stop
+        ]
+        for token_filter in self._filters:
+            tokens = token_filter(tokens)
+        return tokens
+
+    def terms(self, text: str) -> list[str]:
+        """Terms only, in order (duplicates kept). Testable."""
+        return [t for t, _ in self(text)]
+
+
+class _TermPostings:
+    """Postings of one term: doc numbers, tfs and flattened positions (starts index into positions)."""
+
+    __slots__ = ("docs", "tfs", "starts", "positions", "df")
+
+    def __init__(self) -> None:
+        self.docs = array("I")
+        self.tfs = array("I")
+        self.starts = array("Q")
+        self.positions = array("I")
+        self.df = 0
+
+    def positions_at(self, i: int) -> array:
+        start = self.starts[i]
+        return self.positions[start:start + self.tfs[i]]
+
+
+class TextIndex:
+    """
+    BM25 (k1, b) index over the text of the given document fields (dot
+    paths; strings or lists of strings). add/remove are incremental; a doc
+    re-added without remove is replaced (its old postings are tombstoned).
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        fields: Iterable[str] = ("text",),
+        analyzer: Analyzer | None = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        compact_ratio: float = 0.25,
+    ) -> None:
+        self._fields = [f for f in fields if f]
+        if not self._fields:
+            raise ValidationError("at least one text field is required", details={"field": "fields"})
+        self._paths = [(f, f.split(".")) for f in self._fields]
+        self._roots = frozenset(keys[0] for _, keys in self._paths)
+        if k1 < 0 or not 0 <= b <= 1:
+            raise ValidationError("k1 must be >= 0 and b in [0, 1]", details={"k1": k1, "b": b})
+        self._analyzer = analyzer or Analyzer()
+        self._k1 = k1
+        self._b = b
+        self._compact_ratio = compact_ratio
+        self._terms: dict[str, _TermPostings] = {}
+        self._doc_ids: list[str] = []
+        self._doc_numbers: dict[str, int] = {}
+        self._doc_len = array("I")
+        self._live = bytearray()
+        self._live_count = 0
+        self._dead = 0
+        self._total_len = 0
+        self._lock = threading.RLock()
+
+    @property
+    def analyzer(self) -> Analyzer:
+        return self._analyzer
+
+    def _text(self, document: dict[str, Any]) -> str:
+        if self._roots.isdisjoint(document):
+            return ""
+        parts: list[str] = []
+        for path, keys in self._paths:
+            if len(keys) == 1:
+                val: Any = document.get(path)
+            else:
+                val = document
+                for k in keys:
+                    val = val.get(k) if isinstance(val, dict) else None
+            if val is None:
+                continue
+            if isinstance(val, str):
+                parts.append(val)
+            elif isinstance(val, (list, tuple)):
+                parts.extend(v for v in val if isinstance(v, str))
+        return "\n".join(parts)
+
+    def add(self, doc_id: str, document: dict[str, Any]) -> set[str]:
+        """Index the document's text fields. Returns the distinct terms indexed."""
+        if not (doc_id or "").strip():
+            raise ValidationError("doc_id is required", details={"field": "doc_id"})
+        if document is None:
+            raise ValidationError("document is required", details={"field": "document"})
+        tokens = self._analyze(document)
+        with self._lock:
+            return self._add_tokens(doc_id, tokens)
+
+    def add_many(self, documents: Iterable[tuple[str, dict[str, Any]]]) -> set[str]:
+        """
+        Index (doc_id, document) pairs: analyzed first, then appended under
+        one lock acquisition. Validates all before mutation. Returns the
+        distinct terms indexed.
+        """
+        analyzed: list[tuple[str, list[tuple[str, int]]]] = []
+        for doc_id, document in documents:
+            if not (doc_id or "").strip():
+                raise ValidationError("doc_id is required", details={"field": "doc_id"})
+            if document is None:
+                raise ValidationError("document is required", details={"field": "document", "doc_id": doc_id})
+            analyzed.append((doc_id, self._analyze(document)))
+        terms: set[str] = set()
+        with self._lock:
+            for doc_id, tokens in analyzed:
+                terms |= self._add_tokens(doc_id, tokens)
+        return terms
+
+    def _analyze(self, document: dict[str, Any]) -> list[tuple[str, int]]:
+        text = self._text(document)
+        return self._analyzer(text) if text else []
+
+    def _add_tokens(self, doc_id: str, tokens: list[tuple[str, int]]) -> set[str]:
+        if doc_id in self._doc_numbers:
+            self._tombstone(self._doc_numbers.pop(doc_id), ())
+        number = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._doc_numbers[doc_id] = number
+        self._doc_len.append(len(tokens))
+        self._live.append(1)
+        self._live_count += 1
+        self._total_len += len(tokens)
+        grouped: dict[str, list[int]] = {}
+        for term, pos in tokens:
+            grouped.setdefault(term, []).append(pos)
+        for term, positions in grouped.items():
+            postings = self._terms.get(term)
+            if postings is None:
+                postings = self._terms[term] = _TermPostings()
+            postings.docs.append(number)
+            postings.tfs.append(len(positions))
+            postings.starts.append(len(postings.positions))
+            postings.positions.extend(positions)
+            postings.df += 1
+        return set(grouped)
+
+    def remove(self, doc_id: str, document: dict[str, Any] | None = None) -> set[str]:
+        """
+        Remove a document. Pass the indexed document so its terms' document
+        frequencies drop at once (otherwise they are corrected at the next
+        compaction). Returns the terms known to be affected.
+        """
+        if not (doc_id or "").strip():
+            raise ValidationError("doc_id is required", details={"field": "doc_id"})
+        terms = {t for t, _ in self._analyzer(self._text(document))} if document is not None else set()
+        with self._lock:
+            number = self._doc_numbers.pop(doc_id, None)
+            if number is None:
+                return set()
+            self._tombstone(number, terms)
+        return terms
+
+    def _tombstone(self, number: int, terms: Iterable[str]) -> None:
+        self._live[number] = 0
+        self._live_count -= 1
+        self._dead += 1
+        self._total_len -= self._doc_len[number]
+        for term in terms:
+            postings = self._terms.get(term)
+            if postings is not None and postings.df > 0:
+                postings.df -= 1
+        if self._dead > self._compact_ratio * max(1, len(self._doc_ids)):
+            self.compact()
+
+    def compact(self) -> int:
+        """
+        Drop postings of deleted docs, renumber live docs densely (order kept,
+        so postings stay sorted) and recompute document frequencies, so
+        per-doc arrays and query masks track live docs, not churn. Returns
+        postings dropped.
+        """
+        with self._lock:
+            live = self._live
+            remap = array("l", [-1]) * len(self._doc_ids)
+            doc_ids: list[str] = []
+            doc_len = array("I")
+            for number, doc_id in enumerate(self._doc_ids):
+                if live[number]:
+                    remap[number] = len(doc_ids)
+                    doc_ids.append(doc_id)
+                    doc_len.append(self._doc_len[number])
+            dropped = 0
+            for term in list(self._terms):
+                old = self._terms[term]
+                new = _TermPostings()
+                for i, number in enumerate(old.docs):
+                    if not live[number]:
+                        dropped += 1
+                        continue
+                    new.docs.append(remap[number])
+                    new.tfs.append(old.tfs[i])
+                    new.starts.append(len(new.positions))
+                    new.positions.extend(old.positions_at(i))
+                new.df = len(new.docs)
+                if new.docs:
+                    self._terms[term] = new
+                else:
+                    del self._terms[term]
+            self._doc_ids = doc_ids
+            self._doc_numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+            self._doc_len = doc_len
+            self._live = bytearray(b"\x01") * len(doc_ids)
+            self._dead = 0
+        _logger.debug("text_index.compact dropped=%s documents=%s", dropped, len(doc_ids))
+        return dropped
+
+    def _idf(self, df: int) -> float:
+        return math.log(1.0 + (self._live_count - df + 0.5) / (df + 0.5))
+
+    def _candidate_mask(self, candidates: Iterable[str] | None) -> bytearray | None:
+        if candidates is None:
+            return None
+        mask = bytearray(len(self._doc_ids))
+        for doc_id in candidates:
+            number = self._doc_numbers.get(doc_id)
+            if number is not None:
+                mask[number] = 1
+        return mask
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        candidates: Iterable[str] | None = None,
+        phrase: bool = False,
+    ) -> list[tuple[str, float]]:
+        """
+        Top-k (doc_id, BM25 score), best first. candidates restricts scoring
+        to those doc ids; phrase=True requires the query terms to appear at
+        consecutive positions.
+        """
+        if query is None:
+            raise ValidationError("query is required", details={"field": "query"})
+        if top_k < 1:
+            raise ValidationError("top_k must be >= 1", details={"field": "top_k"})
+        tokens = self._analyzer(query)
+        with self._lock:
+            if not tokens or not self._live_count:
+                return []
+            mask = self._candidate_mask(candidates)
+            if phrase:
+                allowed = self._phrase_docs(tokens)
+                if mask is not None:
+                    allowed = {n for n in allowed if mask[n]}
+                mask = bytearray(len(self._doc_ids))
+                for n in allowed:
+                    mask[n] = 1
+            query_terms: dict[str, int] = {}
+            for term, _ in tokens:
+                query_terms[term] = query_terms.get(term, 0) + 1
+            volume = sum(len(self._terms[t].docs) for t in query_terms if t in self._terms)
+            if np is not None and volume >= _VECTORIZE_MIN_POSTINGS:
+                ranked = self._score_vectorized(query_terms, mask, top_k)
+            else:
+                ranked = self._score_python(query_terms, mask, top_k)
+            doc_ids = self._doc_ids
+            return [(doc_ids[n], s) for n, s in ranked]
+
+    def _bm25_norm(self) -> tuple[float, float]:
+        avgdl = self._total_len / self._live_count if self._live_count else 1.0
+        return self._k1 * (1 - self._b), self._k1 * self._b / max(avgdl, 1e-9)
+
+    def _score_python(self, query_terms: dict[str, int], mask: bytearray | None, top_k: int) -> list[tuple[int, float]]:
+        live = self._live
+        doc_len = self._doc_len
+        k1 = self._k1
+        base, per_len = self._bm25_norm()
+        scores: dict[int, float] = {}
+        for term, qtf in query_terms.items():
+            postings = self._terms.get(term)
+            if postings is None:
+                continue
+            weight = self._idf(postings.df) * qtf * (k1 + 1)
+            for number, tf in zip(postings.docs, postings.tfs):
+                if not live[number] or (mask is not None and not mask[number]):
+                    continue
+                scores[number] = scores.get(number, 0.0) + weight * tf / (tf + base + per_len * doc_len[number])
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def _score_vectorized(self, query_terms: dict[str, int], mask: bytearray | None, top_k: int) -> list[tuple[int, float]]:
+        n = len(self._doc_ids)
+        allowed = np.frombuffer(bytes(self._live), dtype=np.uint8).astype(bool)
+        if mask is not None:
+            allowed &= np.frombuffer(bytes(mask), dtype=np.uint8).astype(bool)
+        doc_len = np.frombuffer(self._doc_len, dtype=np.uint32).astype(np.float32)
+        k1 = self._k1
+        base, per_len = self._bm25_norm()
+        scores = np.zeros(n, dtype=np.float32)
+        for term, qtf in query_terms.items():
+            postings = self._terms.get(term)
+            if postings is None:
+                continue
+            docs = np.frombuffer(postings.docs, dtype=np.uint32).astype(np.int64)
+            tf = np.frombuffer(postings.tfs, dtype=np.uint32).astype(np.float32)
+            weight = self._idf(postings.df) * qtf * (k1 + 1)
+            scores[docs] += weight * tf / (tf + base + per_len * doc_len[docs])
+        scores[~allowed] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if hits.size > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        order = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def _phrase_docs(self, tokens: list[tuple[str, int]]) -> set[int]:
+        """Doc numbers containing the tokens at the same relative positions as in the query."""
+        first_pos = tokens[0][1]
+        lists = []
+        for term, pos in tokens:
+            postings = self._terms.get(term)
+            if postings is None:
+                return set()
+            lists.append((postings, pos - first_pos))
+        lists.sort(key=lambda item: len(item[0].docs))
+        smallest = lists[0][0]
+        found: set[int] = set()
+        for i, number in enumerate(smallest.docs):
+            if not self._live[number]:
+                continue
+            starts: set[int] | None = None
+            for postings, offset in lists:
+                j = i if postings is smallest else bisect_left(postings.docs, number)
+                if j >= len(postings.docs) or postings.docs[j] != number:
+                    break
+                shifted = {p - offset for p in postings.positions_at(j)}
+                starts = shifted if starts is None else starts & shifted
+                if not starts:
+                    break
+            else:
+                found.add(number)
+        return found
+
+    def terms(self, query: str) -> list[str]:
+        """Distinct analyzed query terms (for cache dependencies). Testable."""
+        return list(dict.fromkeys(self._analyzer.terms(query or "")))
+
+    def stats(self) -> dict[str, int]:
+        """Live docs, terms, postings and approximate posting bytes. Testable."""
+        with self._lock:
+            postings = sum(len(p.docs) for p in self._terms.values())
+            positions = sum(len(p.positions) for p in self._terms.values())
+            return {
+                "documents": self._live_count,
+                "terms": len(self._terms),
+                "postings": postings,
+                "positions": positions,
+                "index_bytes": postings * 16 + positions * 4 + len(self._doc_ids) * 5,
+            }
+
+    def __len__(self) -> int:
+        return self._live_count
+
+
+def create_text_index(
+    fields: Iterable[str] = ("text",),
+    analyzer: Analyzer | None = None,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> TextIndex:
+    """Create text index. Testable."""
+    return TextIndex(fields=fields, analyzer=analyzer, k1=k1, b=b)
@@ -1,25 +1,66 @@
-"""Models: graph, relational, document."""
+"""Models: graph, relational, document (single or sharded)."""
+from .columnar_table import AGGREGATES, COLUMN_DTYPES, FILTER_OPS, ColumnarTable
 from .document_model import Document, DocumentModel, create_document_model
+from .document_query import (
+    DOCUMENT_INDEX_KINDS,
+    QUERY_OPERATORS,
+    Condition,
+    DocumentIndex,
+    QueryPlan,
+    parse_query,
+    plan_query,
+)
+from .graph_csr import GRAPH_DIRECTIONS, CSRGraph
 from .graph_model import Edge, GraphModel, Node, create_graph
+from .joins import DEFAULT_JOIN_BATCH_SIZE, JOIN_ALGORITHMS, JOIN_TYPES, join_batches
 from .relational_model import (
     Column,
+    TABLE_STORAGES,
     RelationalModel,
     Row,
     Table,
     create_relational_model,
 )
+from .sharded_document_model import (
+    SHARD_EXECUTORS,
+    ShardedDocumentModel,
+    create_sharded_document_model,
+    shard_for,
+)
 
 __all__ = [
     "Node",
     "Edge",
     "GraphModel",
     "create_graph",
+    "CSRGraph",
+    "GRAPH_DIRECTIONS",
     "Column",
     "Row",
     "Table",
     "RelationalModel",
     "create_relational_model",
+    "TABLE_STORAGES",
+    "ColumnarTable",
+    "COLUMN_DTYPES",
+    "AGGREGATES",
+    "FILTER_OPS",
+    "JOIN_TYPES",
+    "JOIN_ALGORITHMS",
+    "DEFAULT_JOIN_BATCH_SIZE",
+    "join_batches",
     "Document",
     "DocumentModel",
     "create_document_model",
+    "ShardedDocumentModel",
+    "create_sharded_document_model",
+    "SHARD_EXECUTORS",
+    "shard_for",
+    "QUERY_OPERATORS",
+    "DOCUMENT_INDEX_KINDS",
+    "Condition",
+    "DocumentIndex",
+    "QueryPlan",
+    "parse_query",
+    "plan_query",
 ]
@@ -0,0 +1,496 @@
+"""
+Columnar table — one typed numpy array per column plus a null mask.
+Rows are appended into amortized-growth buffers; column() and project()
+return read-only views of the live prefix (no copy), and filter, aggregate
+and group_by run as vectorized numpy operators over whole columns.
+Conditions are (column, op, value) tuples AND-ed together; nulls never
+satisfy a comparison and are skipped by aggregates (count(column) counts
+non-null values, count() counts rows).
+Modular, testable.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Sequence
+
+from errors.error_model import DependencyError, ValidationError
+
+from .relational_model import Column, Row
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only columnar tables need it
+    np = None  # type: ignore[assignment]
+
+COLUMN_DTYPES = {
+    "any": "object",
+    "str": "object",
+    "bool": "bool",
+    "int": "int64",
+    "int32": "int32",
+    "int64": "int64",
+    "float": "float64",
+    "float32": "float32",
+    "float64": "float64",
+}
+AGGREGATES = ("sum", "count", "min", "max", "mean")
+FILTER_OPS = ("==", "!=", "<", "<=", ">", ">=", "in", "is_null", "not_null")
+
+_INITIAL_CAPACITY = 16
+_DENSE_CODE_LIMIT = 1 << 22
+_MAX_COMBINED_CODE = (1 << 63) - 1
+_COMPARISONS = {"==": "equal", "!=": "not_equal", "<": "less", "<=": "less_equal", ">": "greater", ">=": "greater_equal"}
+
+
+def require_numpy() -> Any:
+    """Return the numpy module or raise DependencyError when it is not installed."""
+    if np is None:
+        raise DependencyError(
+            "numpy is required for columnar tables",
+            details={"dependency": "numpy"},
+            retryable=False,
+        )
+    return np
+
+
+def _numpy_dtype(column: Column) -> Any:
+    dtype = COLUMN_DTYPES.get(column.dtype)
+    if dtype is None:
+        raise ValidationError(
+            "Unknown column dtype",
+            details={"column": column.name, "dtype": column.dtype, "allowed": list(COLUMN_DTYPES)},
+        )
+    return np.dtype(dtype)
+
+
+def _fill(dtype: Any) -> Any:
+    return None if dtype.kind == "O" else dtype.type(0)
+
+
+class ColumnarTable:
+    """
+    Table with column-major storage. Same insert/select/where surface as
+    Table (rows materialize on demand), plus vectorized column operators.
+    """
+
+    def __init__(self, name: str, columns: list[Column]) -> None:
+        require_numpy()
+        names = [c.name for c in columns]
+        if len(set(names)) != len(names):
+            raise ValidationError("duplicate column names", details={"table": name, "columns": names})
+        self.name = name
+        self.columns = list(columns)
+        self._dtypes = {c.name: _numpy_dtype(c) for c in columns}
+        self._data = {c: np.empty(_INITIAL_CAPACITY, dtype=d) for c, d in self._dtypes.items()}
+        self._nulls = {c: np.zeros(_INITIAL_CAPACITY, dtype=bool) for c in self._dtypes}
+        self._n = 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        name: str,
+        columns: list[Column],
+        data: dict[str, Any],
+        nulls: dict[str, Any] | None = None,
+    ) -> ColumnarTable:
+        """Adopt equal-length arrays (already of the column dtypes) without copying."""
+        t = cls(name, columns)
+        lengths = {len(data[c.name]) for c in columns}
+        if len(lengths) > 1:
+            raise ValidationError("columns must have equal length", details={"table": name})
+        t._n = lengths.pop() if lengths else 0
+        for c in columns:
+            t._data[c.name] = data[c.name]
+            mask = (nulls or {}).get(c.name)
+            t._nulls[c.name] = mask if mask is not None else np.zeros(t._n, dtype=bool)
+        return t
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _column_name(self, name: str) -> str:
+        if name not in self._dtypes:
+            raise ValidationError("Unknown column", details={"table": self.name, "column": name})
+        return name
+
+    def _reserve(self, extra: int) -> None:
+        need = self._n + extra
+        capacity = len(next(iter(self._data.values()), ()))
+        if need <= capacity and all(a.flags.writeable for a in self._data.values()):
+            return
+        capacity = max(_INITIAL_CAPACITY, capacity, need)
+        while capacity < need * 1.25:
+            capacity *= 2
+        for c, dtype in self._dtypes.items():
+            data = np.empty(capacity, dtype=dtype)
+            data[: self._n] = self._data[c][: self._n]
+            nulls = np.zeros(capacity, dtype=bool)
+            nulls[: self._n] = self._nulls[c][: self._n]
+            self._data[c], self._nulls[c] = data, nulls
+
+    def _coerce(self, column: str, value: Any) -> Any:
+        dtype = self._dtypes[column]
+        if dtype.kind == "O":
+            return value
+        try:
+            return dtype.type(value)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(
+                "value does not match column dtype",
+                details={"table": self.name, "column": column, "dtype": str(dtype)},
+                cause=str(e),
+            ) from e
+
+    def insert(self, row: Row | dict[str, Any]) -> None:
+        """Append one row; missing columns are null. Testable."""
+        values = row.values if isinstance(row, Row) else row
+        unknown = set(values) - set(self._dtypes)
+        if unknown:
+            raise ValidationError("Unknown columns", details={"table": self.name, "columns": sorted(unknown)})
+        self._reserve(1)
+        i = self._n
+        for c, dtype in self._dtypes.items():
+            value = values.get(c)
+            if value is None:
+                self._data[c][i] = _fill(dtype)
+                self._nulls[c][i] = True
+            else:
+                self._data[c][i] = self._coerce(c, value)
+                self._nulls[c][i] = False
+        self._n += 1
+
+    def extend(self, columns: dict[str, Sequence[Any]]) -> int:
+        """Append a batch given as column -> values (None = null); returns rows added. Testable."""
+        for c in columns:
+            self._column_name(c)
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) > 1:
+            raise ValidationError("columns must have equal length", details={"table": self.name})
+        n = lengths.pop() if lengths else 0
+        if n == 0:
+            return 0
+        self._reserve(n)
+        start, stop = self._n, self._n + n
+        for c, dtype in self._dtypes.items():
+            values = columns.get(c)
+            if values is None:
+                self._data[c][start:stop] = _fill(dtype)
+                self._nulls[c][start:stop] = True
+                continue
+            if isinstance(values, np.ndarray) and values.dtype != object:
+                nulls = np.zeros(n, dtype=bool)
+            else:
+                nulls = np.fromiter((v is None for v in values), dtype=bool, count=n)
+                if nulls.any() and dtype.kind != "O":
+                    fill = _fill(dtype)
+                    values = [fill if v is None else v for v in values]
+            try:
+                self._data[c][start:stop] = np.asarray(values, dtype=dtype) if dtype.kind != "O" else values
+            except (TypeError, ValueError) as e:
+                raise ValidationError(
+                    "values do not match column dtype",
+                    details={"table": self.name, "column": c, "dtype": str(dtype)},
+                    cause=str(e),
+                ) from e
+            self._nulls[c][start:stop] = nulls
+        self._n = stop
+        return n
+
+    def column(self, name: str) -> Any:
+        """Read-only view of a column's values (nulls hold a fill value). Testable."""
+        view = self._data[self._column_name(name)][: self._n]
+        view.flags.writeable = False
+        return view
+
+    def nulls(self, name: str) -> Any:
+        """Read-only view of a column's null mask. Testable."""
+        view = self._nulls[self._column_name(name)][: self._n]
+        view.flags.writeable = False
+        return view
+
+    def project(self, columns: list[str]) -> ColumnarTable:
+        """Table over a subset of columns sharing this table's buffers (views). Testable."""
+        by_name = {c.name: c for c in self.columns}
+        chosen = [by_name[self._column_name(c)] for c in columns]
+        return ColumnarTable.from_arrays(
+            self.name,
+            chosen,
+            {c.name: self.column(c.name) for c in chosen},
+            {c.name: self.nulls(c.name) for c in chosen},
+        )
+
+    def mask(self, conditions: Iterable[tuple[str, str, Any]]) -> Any:
+        """Boolean row mask for AND-ed (column, op, value) conditions. Testable."""
+        out = np.ones(self._n, dtype=bool)
+        for condition in conditions:
+            if len(condition) != 3 or condition[1] not in FILTER_OPS:
+                raise ValidationError(
+                    "condition must be (column, op, value)",
+                    details={"condition": repr(condition), "allowed": list(FILTER_OPS)},
+                )
+            name, op, value = condition
+            data, nulls = self.column(name), self.nulls(name)
+            if op == "is_null":
+                out &= nulls
+                continue
+            valid = ~nulls if nulls.any() else None
+            if valid is not None:
+                out &= valid
+                data = data[valid]
+            if op == "not_null":
+                continue
+            try:
+                if op == "in":
+                    hit = np.isin(data, np.asarray(list(value), dtype=data.dtype if data.dtype != object else None))
+                else:
+                    hit = getattr(np, _COMPARISONS[op])(data, value)
+            except (TypeError, ValueError) as e:
+                raise ValidationError(
+                    "condition value is not comparable with the column",
+                    details={"column": name, "op": op},
+                    cause=str(e),
+                ) from e
+            hit = np.asarray(hit, dtype=bool)
+            if valid is not None:
+                # Null rows hold fill values (None in object columns) that must never be compared.
+                full = np.zeros(self._n, dtype=bool)
+                full[valid] = hit
+                hit = full
+            out &= hit
+        return out
+
+    def filter(self, conditions: Any) -> ColumnarTable:
+        """Rows matching conditions (or a boolean mask), as a new columnar table. Testable."""
+        keep = conditions if isinstance(conditions, np.ndarray) else self.mask(conditions)
+        if keep.shape != (self._n,):
+            raise ValidationError("mask length must equal row count", details={"rows": self._n})
+        return self.take(np.flatnonzero(keep))
+
+    def take(self, positions: Any) -> ColumnarTable:
+        """Rows at the given positions, as a new columnar table. Testable."""
+        return ColumnarTable.from_arrays(
+            self.name,
+            self.columns,
+            {c: self.column(c)[positions] for c in self._dtypes},
+            {c: self.nulls(c)[positions] for c in self._dtypes},
+        )
+
+    def aggregate(self, fn: str, column: str | None = None, conditions: Any = None) -> Any:
+        """sum/count/min/max/mean over non-null values (optionally filtered); None if empty. Testable."""
+        if fn not in AGGREGATES:
+            raise ValidationError("Unknown aggregate", details={"aggregate": fn, "allowed": list(AGGREGATES)})
+        keep = None if conditions is None else (
+            conditions if isinstance(conditions, np.ndarray) else self.mask(conditions)
+        )
+        if column is None:
+            if fn != "count":
+                raise ValidationError("column is required", details={"aggregate": fn})
+            return int(self._n if keep is None else np.count_nonzero(keep))
+        valid = ~self.nulls(column)
+        if keep is not None:
+            valid &= keep
+        if fn == "count":
+            return int(np.count_nonzero(valid))
+        values = self.column(column)
+        count = int(np.count_nonzero(valid))
+        if count == 0:
+            return None
+        _check_numeric(fn, column, values.dtype)
+        if fn in ("sum", "mean"):
+            total = values.sum(where=valid, dtype=np.int64 if values.dtype.kind == "b" else None)
+            result = total / count if fn == "mean" else total
+        else:
+            values = values[valid] if count < len(values) else values
+            result = values.min() if fn == "min" else values.max()
+        return result.item() if hasattr(result, "item") else result
+
+    def group_by(self, keys: list[str], aggregations: dict[str, tuple[str, str | None]]) -> ColumnarTable:
+        """
+        Group rows by key columns (nulls form their own group) and compute
+        output -> (aggregate, column) per group. Result rows follow key order.
+        Testable.
+        """
+        if not keys:
+            raise ValidationError("group_by needs at least one key", details={"table": self.name})
+        for out, spec in aggregations.items():
+            if not isinstance(spec, tuple) or len(spec) != 2 or spec[0] not in AGGREGATES:
+                raise ValidationError(
+                    "aggregation must be (aggregate, column)",
+                    details={"output": out, "allowed": list(AGGREGATES)},
+                )
+        key_codes: list[Any] = []
+        key_values: list[list[Any]] = []
+        space = 1
+        for name in keys:
+            codes, uniques = _factorize(self.column(name), self.nulls(name))
+            key_codes.append(codes)
+            key_values.append(uniques)
+            space *= len(uniques)
+        if len(keys) == 1:
+            inverse = key_codes[0]
+            key_index = [np.arange(space, dtype=np.int64)]
+        elif space > _MAX_COMBINED_CODE:
+            # The mixed-radix code would overflow int64 and merge unrelated groups:
+            # deduplicate the per-key code rows instead (same lexicographic order).
+            rows, inverse = np.unique(np.stack(key_codes, axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            key_index = list(rows.T)
+        else:
+            codes = np.zeros(self._n, dtype=np.int64)
+            for k, uniques in zip(key_codes, key_values):
+                codes = codes * len(uniques) + k
+            if space <= max(self._n, _DENSE_CODE_LIMIT):
+                present = np.bincount(codes, minlength=space) > 0
+                groups = np.flatnonzero(present)
+                inverse = (np.cumsum(present) - 1)[codes]
+            else:
+                groups, inverse = np.unique(codes, return_inverse=True)
+                inverse = inverse.reshape(-1)
+            key_index = []
+            for uniques in reversed(key_values):
+                key_index.insert(0, groups % len(uniques))
+                groups = groups // len(uniques)
+        n_groups = len(key_index[0])
+
+        out_columns: list[Column] = []
+        data: dict[str, Any] = {}
+        nulls: dict[str, Any] = {}
+        for name, uniques, idx in reversed(list(zip(keys, key_values, key_index))):
+            column = next(c for c in self.columns if c.name == name)
+            dtype = self._dtypes[name]
+            values = [uniques[i] for i in idx]
+            is_null = np.fromiter((v is None for v in values), dtype=bool, count=n_groups)
+            fill = _fill(dtype)
+            data[name] = np.array([fill if v is None else v for v in values], dtype=dtype)
+            nulls[name] = is_null
+            out_columns.insert(0, column)
+
+        for out, (fn, column) in aggregations.items():
+            if column is None:
+                if fn != "count":
+                    raise ValidationError("column is required", details={"aggregate": fn, "output": out})
+                data[out] = np.bincount(inverse, minlength=n_groups).astype(np.int64)
+                nulls[out] = np.zeros(n_groups, dtype=bool)
+                out_columns.append(Column(out, "int"))
+                continue
+            valid = ~self.nulls(column)
+            group_of = inverse[valid]
+            counts = np.bincount(group_of, minlength=n_groups)
+            if fn == "count":
+                data[out], nulls[out] = counts.astype(np.int64), np.zeros(n_groups, dtype=bool)
+                out_columns.append(Column(out, "int"))
+                continue
+            values = self.column(column)[valid]
+            _check_numeric(fn, column, values.dtype)
+            data[out], nulls[out], dtype = _reduce_groups(fn, values, group_of, counts)
+            out_columns.append(Column(out, dtype))
+        return ColumnarTable.from_arrays(self.name, out_columns, data, nulls)
+
+    def to_rows(self) -> list[Row]:
+        """Materialize rows (nulls as None). Testable."""
+        cols = {c: self.column(c).tolist() for c in self._dtypes}
+        masks = {c: self.nulls(c).tolist() for c in self._dtypes}
+        return [
+            Row(values={c: None if masks[c][i] else cols[c][i] for c in self._dtypes})
+            for i in range(self._n)
+        ]
+
+    @property
+    def rows(self) -> list[Row]:
+        return self.to_rows()
+
+    def select(self, columns: list[str] | None = None) -> list[Row]:
+        """Select rows (optionally project columns). Testable."""
+        return (self if columns is None else self.project(columns)).to_rows()
+
+    def where(self, predicate: Any) -> list[Row]:
+        """Filter rows by predicate(row) -> bool, or by (column, op, value) conditions. Testable."""
+        if callable(predicate):
+            return [r for r in self.to_rows() if predicate(r)]
+        return self.filter(predicate).to_rows()
+
+
+def _check_numeric(fn: str, column: str, dtype: Any) -> None:
+    if fn in ("sum", "mean") and dtype.kind not in "biuf":
+        raise ValidationError("aggregate needs a numeric column", details={"aggregate": fn, "column": column})
+
+
+def _factorize(values: Any, nulls: Any) -> tuple[Any, list[Any]]:
+    """Dense codes per row plus the sorted distinct values; null is the last value when present."""
+    has_null = bool(nulls.any())
+    kind = values.dtype.kind
+    if kind in "iub" and len(values):
+        present_values = values[~nulls] if has_null else values
+        low = int(present_values.min()) if len(present_values) else 0
+        high = int(present_values.max()) if len(present_values) else -1
+        if high - low < _DENSE_CODE_LIMIT:
+            offsets = values.astype(np.int64) - low
+            if has_null:
+                offsets[nulls] = 0
+            seen = np.bincount(offsets[~nulls] if has_null else offsets, minlength=high - low + 1) > 0
+            uniques = (np.flatnonzero(seen) + low).tolist()
+            codes = (np.cumsum(seen) - 1)[offsets]
+            if has_null:
+                codes[nulls] = len(uniques)
+                uniques.append(None)
+            if kind == "b":
+                uniques = [None if v is None else bool(v) for v in uniques]
+            return codes.astype(np.int64, copy=False), uniques
+    if kind != "O":
+        uniques, codes = np.unique(values[~nulls] if has_null else values, return_inverse=True)
+        uniques = uniques.tolist()
+        if has_null:
+            full = np.full(len(values), len(uniques), dtype=np.int64)
+            full[~nulls] = codes.reshape(-1)
+            codes = full
+    else:
+        distinct = {v for v, null in zip(values.tolist(), nulls.tolist()) if not null}
+        try:
+            uniques = sorted(distinct)
+        except TypeError:
+            uniques = sorted(distinct, key=repr)
+        lookup = {v: i for i, v in enumerate(uniques)}
+        null_code = len(uniques)
+        codes = np.fromiter(
+            (null_code if null else lookup[v] for v, null in zip(values.tolist(), nulls.tolist())),
+            dtype=np.int64,
+            count=len(values),
+        )
+    if has_null:
+        uniques.append(None)
+    return np.asarray(codes, dtype=np.int64).reshape(-1), uniques
+
+
+def _reduce_groups(fn: str, values: Any, group_of: Any, counts: Any) -> tuple[Any, Any, str]:
+    """Per-group sum/min/max/mean of values with bincount / ufunc.at; empty groups are null."""
+    n_groups = len(counts)
+    empty = counts == 0
+    kind = values.dtype.kind
+    if fn == "mean" or (fn == "sum" and kind == "f"):
+        sums = np.bincount(group_of, weights=values.astype(np.float64, copy=False), minlength=n_groups)
+        if fn == "sum":
+            return sums.astype(values.dtype, copy=False), empty, "float"
+        return sums / np.maximum(counts, 1), empty, "float"
+    if fn == "sum":
+        result = np.zeros(n_groups, dtype=np.uint64 if kind == "u" else np.int64)
+        np.add.at(result, group_of, values)
+        return result, empty, "int"
+    if kind == "O":
+        order = np.argsort(group_of, kind="stable")
+        present = np.flatnonzero(~empty)
+        starts = np.concatenate(([0], np.cumsum(counts[present])[:-1])).astype(np.int64)
+        result = np.full(n_groups, None, dtype=object)
+        if len(present):
+            ufunc = np.minimum if fn == "min" else np.maximum
+            result[present] = ufunc.reduceat(values[order], starts)
+        return result, empty, "any"
+    if kind == "f":
+        start = np.inf if fn == "min" else -np.inf
+    elif kind == "b":
+        start = fn == "min"
+    else:
+        info = np.iinfo(values.dtype)
+        start = info.max if fn == "min" else info.min
+    result = np.full(n_groups, start, dtype=values.dtype)
+    (np.minimum if fn == "min" else np.maximum).at(result, group_of, values)
+    result[empty] = _fill(values.dtype)
+    return result, empty, "float" if kind == "f" else "bool" if kind == "b" else "int"
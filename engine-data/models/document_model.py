@@ -1,9 +1,17 @@
 """
 Document data model — flexible document store with optional schema.
+find accepts a predicate or declarative conditions; the latter use
+per-collection secondary indexes through the planner in document_query.
+Results come back in insertion order whichever access path is chosen.
 Modular, testable.
 """
 from dataclasses import dataclass, field
-from typing import Any
+from itertools import count
+from typing import Any, Iterable
+
+from errors.error_model import ValidationError
+
+from .document_query import DocumentIndex, QueryPlan, matches, parse_query, plan_query
 
 
 @dataclass
@@ -43,16 +51,51 @@ class DocumentModel:
 
     def __init__(self) -> None:
         self._collections: dict[str, dict[str, Document]] = {}
+        self._indexes: dict[str, dict[tuple[str, str], DocumentIndex]] = {}
+        # Insertion sequence per doc id (kept on replace, like dict order) to order index lookups.
+        self._order: dict[str, dict[str, int]] = {}
+        self._sequence = count()
 
     def get_collection(self, name: str) -> dict[str, Document]:
         """Get or create collection. Testable."""
         if name not in self._collections:
             self._collections[name] = {}
+            self._order[name] = {}
         return self._collections[name]
 
     def insert(self, collection: str, doc: Document) -> None:
-        """Insert or replace document. Testable."""
-        self.get_collection(collection)[doc.id] = doc
+        """Insert or replace document (secondary indexes follow). Testable."""
+        coll = self.get_collection(collection)
+        indexes = self._indexes.get(collection, {}).values()
+        if doc.id in coll:
+            for index in indexes:
+                index.remove(doc.id)
+        else:
+            self._order[collection][doc.id] = next(self._sequence)
+        coll[doc.id] = doc
+        for index in indexes:
+            index.add(doc.id, doc)
+
+    def insert_many(self, collection: str, docs: Iterable[Document]) -> list[Document | None]:
+        """Insert or replace documents in order; returns the replaced document (or None) for each. Testable."""
+        coll = self.get_collection(collection)
+        indexes = list(self._indexes.get(collection, {}).values())
+        order = self._order[collection]
+        sequence = self._sequence
+        previous: list[Document | None] = []
+        append = previous.append
+        for doc in docs:
+            old = coll.get(doc.id)
+            if old is not None:
+                for index in indexes:
+                    index.remove(doc.id)
+            else:
+                order[doc.id] = next(sequence)
+            coll[doc.id] = doc
+            for index in indexes:
+                index.add(doc.id, doc)
+            append(old)
+        return previous
 
     def get(self, collection: str, doc_id: str) -> Document | None:
         """Get document by id. Testable."""
@@ -63,12 +106,66 @@ class DocumentModel:
         coll = self.get_collection(collection)
         if doc_id in coll:
             del coll[doc_id]
+            del self._order[collection][doc_id]
+            for index in self._indexes.get(collection, {}).values():
+                index.remove(doc_id)
             return True
         return False
 
+    def create_index(self, collection: str, field_path: str, kind: str = "hash") -> DocumentIndex:
+        """Add a secondary index on a dot-path field (hash or sorted); backfills. Testable."""
+        if not (field_path or "").strip():
+            raise ValidationError("field is required", details={"field": "field"})
+        indexes = self._indexes.setdefault(collection, {})
+        key = (field_path, kind)
+        if key not in indexes:
+            index = DocumentIndex(field_path, kind)
+            index.add_many((doc.id, doc) for doc in self.get_collection(collection).values())
+            indexes[key] = index
+        return indexes[key]
+
+    def drop_index(self, collection: str, field_path: str, kind: str = "hash") -> bool:
+        """Remove a secondary index. Returns True if it existed. Testable."""
+        return self._indexes.get(collection, {}).pop((field_path, kind), None) is not None
+
+    def indexes(self, collection: str) -> list[dict[str, Any]]:
+        """Describe the collection's secondary indexes. Testable."""
+        return [index.describe() for index in self._indexes.get(collection, {}).values()]
+
+    def plan(self, collection: str, query: Any) -> QueryPlan:
+        """Plan a declarative query (condition dict or list of them). Testable."""
+        return plan_query(
+            collection,
+            parse_query(query),
+            self._indexes.get(collection, {}).values(),
+            len(self.get_collection(collection)),
+        )
+
+    def explain(self, collection: str, query: Any) -> dict[str, Any]:
+        """Chosen access path and estimates for a query, without running it. Testable."""
+        return self.plan(collection, query).explain()
+
     def find(self, collection: str, predicate: Any) -> list[Document]:
-        """Find documents where predicate(doc) is True. Testable."""
-        return [d for d in self.get_collection(collection).values() if predicate(d)]
+        """
+        Find documents where predicate(doc) is True, or matching declarative
+        conditions (dict or list of dicts, AND-ed) via the query planner.
+        Insertion order on every plan. Testable.
+        """
+        coll = self.get_collection(collection)
+        if callable(predicate):
+            return [d for d in coll.values() if predicate(d)]
+        plan = self.plan(collection, predicate)
+        if plan.index is None:
+            candidates = coll.values()
+        else:
+            ids = plan.index.lookup(plan.driver)
+            if len(ids) * 4 > len(coll):
+                candidates = [d for doc_id, d in coll.items() if doc_id in ids]
+            else:
+                order = self._order[collection]
+                candidates = [coll[doc_id] for doc_id in sorted(ids, key=order.__getitem__)]
+        residual = plan.residual
+        return [d for d in candidates if all(matches(d, c) for c in residual)]
 
     def list_collections(self) -> list[str]:
         """All collection names. Testable."""
@@ -0,0 +1,288 @@
+"""
+Document queries — declarative conditions, secondary indexes and a planner
+for DocumentModel.find.
+A query is one condition or a list of conditions (AND):
+  {"field": "status", "eq": "open"}, {"field": "tag", "in": ["a", "b"]},
+  {"field": "order.amount", "range": [10, 100]}, {"field": "x", "exists": True}
+Fields are dot paths (Document.get). A list value matches when any element
+does. The planner estimates each condition's row count from the indexes,
+drives the lookup from the most selective one and checks the rest per
+document; with no usable index it scans.
+Modular, testable.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from errors.error_model import ValidationError
+
+QUERY_OPERATORS = ("eq", "in", "range", "exists")
+DOCUMENT_INDEX_KINDS = ("hash", "sorted")
+
+
+@dataclass(frozen=True)
+class Condition:
+    """One parsed condition: field path, operator and operand."""
+
+    field: str
+    op: str
+    value: Any
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"field": self.field, self.op: self.value}
+
+
+def parse_query(query: Any) -> list[Condition]:
+    """Validate a condition dict or list of them; returns the AND-ed conditions."""
+    items = query if isinstance(query, list) else [query]
+    conditions: list[Condition] = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("field"), str) or not item["field"].strip():
+            raise ValidationError("condition must be an object with a field", details={"condition": i})
+        ops = [op for op in QUERY_OPERATORS if op in item]
+        if len(ops) != 1 or len(item) != 2:
+            raise ValidationError(
+                "condition needs exactly one operator",
+                details={"condition": i, "allowed": list(QUERY_OPERATORS)},
+            )
+        op = ops[0]
+        value = item[op]
+        if op == "in" and not isinstance(value, (list, tuple, set)):
+            raise ValidationError("in expects a list", details={"condition": i})
+        if op == "range" and (not isinstance(value, (list, tuple)) or len(value) != 2):
+            raise ValidationError("range expects [low, high]", details={"condition": i})
+        if op == "exists" and not isinstance(value, bool):
+            raise ValidationError("exists expects a boolean", details={"condition": i})
+        conditions.append(Condition(item["field"], op, list(value) if op in ("in", "range") else value))
+    return conditions
+
+
+def _sort_key(value: Any) -> tuple[int, Any] | None:
+    """Orderable key: numbers before strings, never compared across types; None if unorderable."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (0, value) if value == value else None
+    if isinstance(value, str):
+        return (1, value)
+    return None
+
+
+def _elements(value: Any) -> list[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
+
+
+def _in_range(value: Any, bounds: list[Any]) -> bool:
+    key = _sort_key(value)
+    if key is None:
+        return False
+    low, high = bounds
+    if low is not None and (_sort_key(low) is None or _sort_key(low)[0] != key[0] or value < low):
+        return False
+    if high is not None and (_sort_key(high) is None or _sort_key(high)[0] != key[0] or value > high):
+        return False
+    return True
+
+
+def matches(document: Any, condition: Condition) -> bool:
+    """True if the Document satisfies the condition (scan semantics; indexes agree)."""
+    value = document.get(condition.field)
+    if condition.op == "exists":
+        return (value is not None) == condition.value
+    elements = _elements(value)
+    if condition.op == "eq":
+        return value == condition.value or any(v == condition.value for v in elements)
+    if condition.op == "in":
+        return any(v == target for v in elements for target in condition.value)
+    return any(_in_range(v, condition.value) for v in elements)
+
+
+class DocumentIndex:
+    """
+    Secondary index on one field of one collection.
+    hash: value -> doc ids (eq / in / exists). sorted: additionally keeps
+    (value, doc id) pairs in order for range.
+    """
+
+    def __init__(self, field: str, kind: str = "hash") -> None:
+        if kind not in DOCUMENT_INDEX_KINDS:
+            raise ValidationError(
+                "Unknown document index kind", details={"kind": kind, "allowed": list(DOCUMENT_INDEX_KINDS)}
+            )
+        self.field = field
+        self.kind = kind
+        self._buckets: dict[Any, set[str]] = {}
+        self._docs: dict[str, list[Any]] = {}
+        self._sorted: list[tuple[tuple[int, Any], str]] = []
+
+    def add(self, doc_id: str, document: Any) -> None:
+        for entry in self._add(doc_id, document):
+            insort(self._sorted, entry)
+
+    def add_many(self, documents: Iterable[tuple[str, Any]]) -> None:
+        """Backfill (doc_id, document) pairs; sorted entries are ordered once at the end."""
+        entries = [entry for doc_id, document in documents for entry in self._add(doc_id, document)]
+        if entries:
+            self._sorted.extend(entries)
+            self._sorted.sort()
+
+    def _add(self, doc_id: str, document: Any) -> list[tuple[tuple[int, Any], str]]:
+        """Fill the buckets; returns the (key, doc id) entries that belong in _sorted."""
+        raw = document.get(self.field)
+        if raw is None:
+            return []
+        values = [v for v in _elements(raw) if _hashable(v)]
+        self._docs[doc_id] = values
+        entries = []
+        for v in values:
+            self._buckets.setdefault(v, set()).add(doc_id)
+            if self.kind == "sorted":
+                key = _sort_key(v)
+                if key is not None:
+                    entries.append((key, doc_id))
+        return entries
+
+    def remove(self, doc_id: str) -> None:
+        for v in self._docs.pop(doc_id, ()):
+            bucket = self._buckets.get(v)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[v]
+            if self.kind == "sorted":
+                key = _sort_key(v)
+                if key is not None:
+                    i = bisect_left(self._sorted, (key, doc_id))
+                    if i < len(self._sorted) and self._sorted[i] == (key, doc_id):
+                        del self._sorted[i]
+
+    def supports(self, condition: Condition) -> bool:
+        """True if this index can answer the condition exactly."""
+        if condition.field != self.field:
+            return False
+        if condition.op == "eq":
+            return _hashable(condition.value)
+        if condition.op == "in":
+            return all(_hashable(v) for v in condition.value)
+        if condition.op == "exists":
+            return condition.value is True
+        return self.kind == "sorted" and _range_keys(condition.value) is not None
+
+    def _range_slice(self, bounds: list[Any]) -> tuple[int, int]:
+        low_key, high_key = _range_keys(bounds)
+        start = bisect_left(self._sorted, (low_key,)) if low_key is not None else 0
+        stop = bisect_right(self._sorted, (high_key, _MAX_ID)) if high_key is not None else len(self._sorted)
+        return start, stop
+
+    def estimate(self, condition: Condition) -> int:
+        """Upper bound on matching doc ids (cheap: bucket sizes or bisect distance)."""
+        if condition.op == "eq":
+            return len(self._buckets.get(condition.value, ()))
+        if condition.op == "in":
+            return sum(len(self._buckets.get(v, ())) for v in set(condition.value))
+        if condition.op == "exists":
+            return len(self._docs)
+        start, stop = self._range_slice(condition.value)
+        return max(0, stop - start)
+
+    def lookup(self, condition: Condition) -> set[str]:
+        """Doc ids matching the condition."""
+        if condition.op == "eq":
+            return set(self._buckets.get(condition.value, ()))
+        if condition.op == "in":
+            out: set[str] = set()
+            for v in set(condition.value):
+                out.update(self._buckets.get(v, ()))
+            return out
+        if condition.op == "exists":
+            return set(self._docs)
+        start, stop = self._range_slice(condition.value)
+        return {doc_id for _, doc_id in self._sorted[start:stop]}
+
+    def describe(self) -> dict[str, Any]:
+        return {"field": self.field, "kind": self.kind, "entries": len(self._docs), "values": len(self._buckets)}
+
+
+_MAX_ID = "\U0010ffff"
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _range_keys(bounds: list[Any]) -> tuple[Any, Any] | None:
+    """Sort keys of [low, high] (None = open); None when the bounds are unorderable or mixed."""
+    low, high = bounds
+    low_key = _sort_key(low) if low is not None else None
+    high_key = _sort_key(high) if high is not None else None
+    if (low is not None and low_key is None) or (high is not None and high_key is None):
+        return None
+    if low_key is not None and high_key is not None and low_key[0] != high_key[0]:
+        return None
+    if low_key is None and high_key is None:
+        return None
+    if low_key is None:
+        low_key = (high_key[0],)
+    if high_key is None:
+        high_key = (low_key[0], _TYPE_MAX[low_key[0]])
+    return low_key, high_key
+
+
+_TYPE_MAX = {0: float("inf"), 1: _MAX_ID}
+
+
+@dataclass
+class QueryPlan:
+    """Chosen access path: an index condition (or scan) plus residual conditions."""
+
+    collection: str
+    conditions: list[Condition]
+    index: DocumentIndex | None = None
+    driver: Condition | None = None
+    estimated_rows: int = 0
+    candidates: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def residual(self) -> list[Condition]:
+        return [c for c in self.conditions if c is not self.driver]
+
+    def explain(self) -> dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "strategy": "index" if self.index is not None else "scan",
+            "index": self.index.describe() if self.index is not None else None,
+            "driver": self.driver.to_dict() if self.driver is not None else None,
+            "estimated_rows": self.estimated_rows,
+            "residual": [c.to_dict() for c in self.residual],
+            "considered": self.candidates,
+        }
+
+
+def plan_query(
+    collection: str,
+    conditions: list[Condition],
+    indexes: Iterable[DocumentIndex],
+    collection_size: int,
+) -> QueryPlan:
+    """Pick the index condition with the smallest estimate; scan when none applies."""
+    plan = QueryPlan(collection=collection, conditions=conditions, estimated_rows=collection_size)
+    by_field: dict[str, list[DocumentIndex]] = {}
+    for index in indexes:
+        by_field.setdefault(index.field, []).append(index)
+    for condition in conditions:
+        for index in by_field.get(condition.field, ()):
+            if not index.supports(condition):
+                continue
+            estimate = index.estimate(condition)
+            plan.candidates.append({"condition": condition.to_dict(), "index": index.kind, "estimate": estimate})
+            if plan.index is None or estimate < plan.estimated_rows:
+                plan.index, plan.driver, plan.estimated_rows = index, condition, estimate
+    return plan
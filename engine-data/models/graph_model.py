@@ -1,10 +1,14 @@
 """
 Graph data model — nodes, edges, and graph operations.
+freeze() compiles the graph into an immutable CSR snapshot (graph_csr)
+for traversals, shortest paths, components and PageRank.
 Modular, testable.
 """
 from dataclasses import dataclass, field
 from typing import Any
 
+from .graph_csr import CSRGraph
+
 
 @dataclass
 class Node:
@@ -37,18 +41,26 @@ class GraphModel:
         self._edges: dict[str, Edge] = {}
         self._out_edges: dict[str, list[str]] = {}
         self._in_edges: dict[str, list[str]] = {}
+        self._version = 0
+        self._frozen: tuple[tuple[int, str, float], CSRGraph] | None = None
 
     def add_node(self, node: Node) -> None:
         """Add or replace a node. Testable."""
         self._nodes[node.id] = node
         self._out_edges.setdefault(node.id, [])
         self._in_edges.setdefault(node.id, [])
+        self._version += 1
 
     def add_edge(self, edge: Edge) -> None:
         """Add or replace an edge. Testable."""
+        old = self._edges.get(edge.id)
+        if old is not None:
+            self._out_edges[old.source_id].remove(edge.id)
+            self._in_edges[old.target_id].remove(edge.id)
         self._edges[edge.id] = edge
         self._out_edges.setdefault(edge.source_id, []).append(edge.id)
         self._in_edges.setdefault(edge.target_id, []).append(edge.id)
+        self._version += 1
 
     def get_node(self, node_id: str) -> Node | None:
         """Get node by id. Testable."""
@@ -72,6 +84,39 @@ class GraphModel:
                 nodes.append(n)
         return nodes
 
+    def neighbor_ids(self, node_id: str, direction: str = "out") -> list[str]:
+        """Adjacent node ids without materializing Node objects. Testable."""
+        edge_ids = self._out_edges.get(node_id, []) if direction == "out" else self._in_edges.get(node_id, [])
+        edges, nodes = self._edges, self._nodes
+        out: list[str] = []
+        for eid in edge_ids:
+            e = edges[eid]
+            other_id = e.target_id if direction == "out" else e.source_id
+            if other_id in nodes:
+                out.append(other_id)
+        return out
+
+    def freeze(self, weight: str = "weight", default_weight: float = 1.0) -> CSRGraph:
+        """
+        Immutable CSR snapshot; edge weights come from Edge.properties[weight].
+        Edges to unknown nodes are skipped. Cached until the graph changes.
+        Testable.
+        """
+        key = (self._version, weight, default_weight)
+        if self._frozen is not None and self._frozen[0] == key:
+            return self._frozen[1]
+        nodes = self._nodes
+        graph = CSRGraph.from_edges(
+            nodes,
+            (
+                (e.source_id, e.target_id, e.properties.get(weight, default_weight))
+                for e in self._edges.values()
+                if e.source_id in nodes and e.target_id in nodes
+            ),
+        )
+        self._frozen = (key, graph)
+        return graph
+
     def nodes(self) -> list[Node]:
         """All nodes. Testable."""
         return list(self._nodes.values())
@@ -0,0 +1,275 @@
+"""
+Relational joins — hash join and sort-merge join over Table / ColumnarTable.
+Joins stream: matches are produced as (left, right) row positions and
+materialized batch_size at a time, so only the build side (hash) or the
+sort orders (merge) are held in memory, never the whole result.
+hash: builds a dict on the right input's keys and probes with the left in
+left order; put the smaller table on the right.
+merge: walks both inputs in key order (already-sorted inputs skip the
+sort).
+Columnar inputs joined on one numeric key run vectorized for both: the
+build side is a stably sorted right key array probed with searchsorted a
+chunk of left rows at a time (hash probes in left order, merge in key
+order), so the output matches the row-at-a-time algorithms.
+Null keys never match; how="left" keeps unmatched left rows with nulls.
+Batches are lists of Row, or ColumnarTable when both inputs are columnar.
+Modular, testable.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from errors.error_model import ValidationError
+
+from .columnar_table import ColumnarTable, np
+from .relational_model import Column, Row, Table
+
+JOIN_TYPES = ("inner", "left")
+JOIN_ALGORITHMS = ("hash", "merge")
+DEFAULT_JOIN_BATCH_SIZE = 10_000
+
+
+def _key_pairs(on: Any) -> list[tuple[str, str]]:
+    """'id' | ('left_id', 'right_id') | a list of either -> [(left column, right column)]."""
+    items = on if isinstance(on, list) else [on]
+    pairs: list[tuple[str, str]] = []
+    for item in items:
+        if isinstance(item, str) and item:
+            pairs.append((item, item))
+        elif isinstance(item, tuple) and len(item) == 2 and all(isinstance(c, str) and c for c in item):
+            pairs.append(item)
+        else:
+            raise ValidationError("on must name join columns", details={"on": repr(on)})
+    if not pairs:
+        raise ValidationError("on must name join columns", details={"on": repr(on)})
+    return pairs
+
+
+class _Side:
+    """Uniform row access over Table and ColumnarTable (columnar values listed once, lazily)."""
+
+    def __init__(self, table: Table | ColumnarTable) -> None:
+        self.table = table
+        self.columnar = isinstance(table, ColumnarTable)
+        self._lists: dict[str, list[Any]] | None = None
+        if self.columnar:
+            self.names = [c.name for c in table.columns]
+        else:
+            self._rows = table.rows
+            names = [c.name for c in table.columns] or [k for r in self._rows for k in r.values]
+            self.names = list(dict.fromkeys(names))
+
+    def __len__(self) -> int:
+        return len(self.table) if self.columnar else len(self._rows)
+
+    def values(self, column: str) -> list[Any]:
+        if self.columnar:
+            if column not in self.names:
+                raise ValidationError("Unknown join column", details={"table": self.table.name, "column": column})
+            data, nulls = self.table.column(column).tolist(), self.table.nulls(column).tolist()
+            return [None if null else v for v, null in zip(data, nulls)]
+        return [r.get(column) for r in self._rows]
+
+    def keys(self, columns: list[str]) -> list[tuple[Any, ...] | None]:
+        """Key tuple per row; None when any key part is null."""
+        parts = [self.values(c) for c in columns]
+        return [None if any(p is None for p in key) else key for key in zip(*parts)]
+
+    def row(self, i: int) -> dict[str, Any]:
+        if not self.columnar:
+            return self._rows[i].values
+        if self._lists is None:
+            self._lists = {c: self.values(c) for c in self.names}
+        return {c: self._lists[c][i] for c in self.names}
+
+
+def _output_names(left: _Side, right: _Side, pairs: list[tuple[str, str]]) -> dict[str, str]:
+    """Right column -> output name; shared key columns appear once, other clashes get 'table.column'."""
+    shared = {r for l, r in pairs if l == r}
+    taken = set(left.names)
+    out: dict[str, str] = {}
+    for name in right.names:
+        if name in shared:
+            continue
+        out[name] = f"{right.table.name}.{name}" if name in taken else name
+    return out
+
+
+def _hash_pairs(left_keys: list[Any], right_keys: list[Any], how: str) -> Iterator[tuple[int, int]]:
+    build: dict[tuple[Any, ...], list[int]] = {}
+    for j, key in enumerate(right_keys):
+        if key is not None:
+            build.setdefault(key, []).append(j)
+    for i, key in enumerate(left_keys):
+        matches = build.get(key) if key is not None else None
+        if matches:
+            for j in matches:
+                yield i, j
+        elif how == "left":
+            yield i, -1
+
+
+def _sorted_order(keys: list[Any]) -> list[int]:
+    present = [i for i, k in enumerate(keys) if k is not None]
+    if all(keys[a] <= keys[b] for a, b in zip(present, present[1:])):
+        return present
+    return sorted(present, key=keys.__getitem__)
+
+
+def _merge_pairs(left_keys: list[Any], right_keys: list[Any], how: str) -> Iterator[tuple[int, int]]:
+    try:
+        lorder, rorder = _sorted_order(left_keys), _sorted_order(right_keys)
+    except TypeError as e:
+        raise ValidationError("merge join keys are not mutually orderable", cause=str(e)) from e
+    j = 0
+    for i in lorder:
+        key = left_keys[i]
+        try:
+            while j < len(rorder) and right_keys[rorder[j]] < key:
+                j += 1
+        except TypeError as e:
+            raise ValidationError("merge join keys are not mutually orderable", cause=str(e)) from e
+        k = j
+        while k < len(rorder) and right_keys[rorder[k]] == key:
+            yield i, rorder[k]
+            k += 1
+        if k == j and how == "left":
+            yield i, -1
+    if how == "left":
+        for i, key in enumerate(left_keys):
+            if key is None:
+                yield i, -1
+
+
+def _vector_pairs(
+    left: ColumnarTable, right: ColumnarTable, lcol: str, rcol: str, how: str, chunk: int, key_order: bool
+) -> Iterator[tuple[Any, Any]]:
+    """Chunks of (left positions, right positions or -1), in left or left key order, via searchsorted."""
+    rpos = np.flatnonzero(~right.nulls(rcol))
+    rkeys = right.column(rcol)[rpos]
+    if len(rkeys) > 1 and not np.all(rkeys[:-1] <= rkeys[1:]):
+        order = np.argsort(rkeys, kind="stable")
+        rpos, rkeys = rpos[order], rkeys[order]
+    lnulls = left.nulls(lcol)
+    if key_order:
+        lpos = np.flatnonzero(~lnulls)
+        lkeys = left.column(lcol)[lpos]
+        if len(lkeys) > 1 and not np.all(lkeys[:-1] <= lkeys[1:]):
+            lpos = lpos[np.argsort(lkeys, kind="stable")]
+        if how == "left":
+            lpos = np.concatenate((lpos, np.flatnonzero(lnulls)))
+    else:
+        lpos = np.arange(len(left), dtype=np.int64)
+    lvalues = left.column(lcol)
+    for start in range(0, len(lpos), chunk):
+        positions = lpos[start : start + chunk]
+        keys = lvalues[positions]
+        lo = np.searchsorted(rkeys, keys, side="left")
+        hi = np.searchsorted(rkeys, keys, side="right")
+        counts = hi - lo
+        counts[lnulls[positions]] = 0
+        emitted = np.maximum(counts, 1) if how == "left" else counts
+        total = int(emitted.sum())
+        if total == 0:
+            continue
+        li = np.repeat(positions, emitted)
+        offsets = np.arange(total) - np.repeat(np.cumsum(emitted) - emitted, emitted)
+        matched = np.repeat(counts > 0, emitted)
+        ri = np.full(total, -1, dtype=np.int64)
+        ri[matched] = rpos[np.repeat(lo, emitted)[matched] + offsets[matched]]
+        yield li, ri
+
+
+def _columnar_batch(
+    left: ColumnarTable, right: ColumnarTable, names: dict[str, str], li: Any, ri: Any
+) -> ColumnarTable:
+    columns: list[Column] = list(left.columns)
+    data = {c.name: left.column(c.name)[li] for c in left.columns}
+    nulls = {c.name: left.nulls(c.name)[li] for c in left.columns}
+    missing = ri < 0
+    safe = np.where(missing, 0, ri)
+    for c in right.columns:
+        if c.name not in names:
+            continue
+        out = names[c.name]
+        columns.append(Column(out, c.dtype))
+        if len(right):
+            data[out] = right.column(c.name)[safe]
+            nulls[out] = right.nulls(c.name)[safe] | missing
+        else:
+            data[out] = np.zeros(len(ri), dtype=right.column(c.name).dtype)
+            nulls[out] = np.ones(len(ri), dtype=bool)
+    return ColumnarTable.from_arrays(f"{left.name}_{right.name}", columns, data, nulls)
+
+
+def join_batches(
+    left: Table | ColumnarTable,
+    right: Table | ColumnarTable,
+    on: Any,
+    how: str = "inner",
+    algorithm: str = "hash",
+    batch_size: int = DEFAULT_JOIN_BATCH_SIZE,
+) -> Iterator[list[Row] | ColumnarTable]:
+    """Join two tables, yielding result batches of at most batch_size rows. Testable."""
+    if how not in JOIN_TYPES:
+        raise ValidationError("Unknown join type", details={"how": how, "allowed": list(JOIN_TYPES)})
+    if algorithm not in JOIN_ALGORITHMS:
+        raise ValidationError(
+            "Unknown join algorithm", details={"algorithm": algorithm, "allowed": list(JOIN_ALGORITHMS)}
+        )
+    if batch_size < 1:
+        raise ValidationError("batch_size must be >= 1", details={"batch_size": batch_size})
+    pairs = _key_pairs(on)
+    lside, rside = _Side(left), _Side(right)
+    names = _output_names(lside, rside, pairs)
+    columnar = lside.columnar and rside.columnar
+    return _join(lside, rside, pairs, names, how, algorithm, batch_size, columnar)
+
+
+def _join(
+    lside: _Side,
+    rside: _Side,
+    pairs: list[tuple[str, str]],
+    names: dict[str, str],
+    how: str,
+    algorithm: str,
+    batch_size: int,
+    columnar: bool,
+) -> Iterator[list[Row] | ColumnarTable]:
+    left, right = lside.table, rside.table
+    if columnar and len(pairs) == 1:
+        lcol, rcol = pairs[0]
+        kinds = {left.column(lcol).dtype.kind, right.column(rcol).dtype.kind}
+        if kinds <= set("iuf"):
+            for li, ri in _vector_pairs(left, right, lcol, rcol, how, batch_size, algorithm == "merge"):
+                for start in range(0, len(li), batch_size):
+                    yield _columnar_batch(left, right, names, li[start : start + batch_size], ri[start : start + batch_size])
+            return
+    left_keys = lside.keys([l for l, _ in pairs])
+    right_keys = rside.keys([r for _, r in pairs])
+    produce = _hash_pairs if algorithm == "hash" else _merge_pairs
+    batch: list[tuple[int, int]] = []
+    for pair in produce(left_keys, right_keys, how):
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            yield _materialize(lside, rside, names, batch, columnar)
+            batch = []
+    if batch:
+        yield _materialize(lside, rside, names, batch, columnar)
+
+
+def _materialize(
+    lside: _Side, rside: _Side, names: dict[str, str], batch: list[tuple[int, int]], columnar: bool
+) -> list[Row] | ColumnarTable:
+    if columnar:
+        li = np.fromiter((i for i, _ in batch), dtype=np.int64, count=len(batch))
+        ri = np.fromiter((j for _, j in batch), dtype=np.int64, count=len(batch))
+        return _columnar_batch(lside.table, rside.table, names, li, ri)
+    rows: list[Row] = []
+    for i, j in batch:
+        values = dict(lside.row(i))
+        right_values = rside.row(j) if j >= 0 else {}
+        for name, out in names.items():
+            values[out] = right_values.get(name)
+        rows.append(Row(values=values))
+    return rows
@@ -1,9 +1,20 @@
 """
 Relational data model — tables, rows, and simple relational operations.
+Tables are row-oriented by default; storage="columnar" keeps one typed
+numpy array per column instead (see columnar_table).
 Modular, testable.
 """
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
+
+from errors.error_model import ValidationError
+
+if TYPE_CHECKING:
+    from .columnar_table import ColumnarTable
+
+TABLE_STORAGES = ("row", "columnar")
 
 
 @dataclass
@@ -62,18 +73,50 @@ class RelationalModel:
     """
 
     def __init__(self) -> None:
-        self._tables: dict[str, Table] = {}
-
-    def create_table(self, name: str, columns: list[Column]) -> Table:
-        """Create table. Testable."""
-        t = Table(name=name, columns=list(columns))
+        self._tables: dict[str, Table | ColumnarTable] = {}
+
+    def create_table(self, name: str, columns: list[Column], storage: str = "row") -> Table | ColumnarTable:
+        """Create table with row (Table) or columnar (ColumnarTable) storage. Testable."""
+        if storage not in TABLE_STORAGES:
+            raise ValidationError(
+                "Unknown table storage", details={"storage": storage, "allowed": list(TABLE_STORAGES)}
+            )
+        if storage == "columnar":
+            from .columnar_table import ColumnarTable
+
+            t: Table | ColumnarTable = ColumnarTable(name, list(columns))
+        else:
+            t = Table(name=name, columns=list(columns))
         self._tables[name] = t
         return t
 
-    def get_table(self, name: str) -> Table | None:
+    def get_table(self, name: str) -> Table | ColumnarTable | None:
         """Get table by name. Testable."""
         return self._tables.get(name)
 
+    def join(
+        self,
+        left: str,
+        right: str,
+        on: Any,
+        how: str = "inner",
+        algorithm: str = "hash",
+        batch_size: int = 10_000,
+    ) -> Iterator[list[Row] | ColumnarTable]:
+        """
+        Join two named tables on column(s); yields batches of at most
+        batch_size rows (see joins for on / how / algorithm). Testable.
+        """
+        from .joins import join_batches
+
+        tables = []
+        for name in (left, right):
+            t = self._tables.get(name)
+            if t is None:
+                raise ValidationError("Unknown table", details={"table": name})
+            tables.append(t)
+        return join_batches(tables[0], tables[1], on, how=how, algorithm=algorithm, batch_size=batch_size)
+
     def tables(self) -> list[str]:
         """All table names. Testable."""
         return list(self._tables.keys())
@@ -0,0 +1,386 @@
+"""
+Sharded document model — documents hash-partitioned by id across shards.
+Each shard is a DocumentModel with its own secondary indexes. Writes are
+routed to shard_for(id) (batches are split per shard and written to all
+shards at once); find/count/explain scatter to every shard and gather.
+executor="thread" keeps the shards in this process, one lock each (the GIL
+limits how far pure-Python work overlaps); executor="process" hosts every
+shard in its own worker process, so shards insert and query on separate
+cores, at the cost of pickling documents and results (predicates must be
+module-level functions). Placement uses jump consistent hashing, so
+reshard(n) moves only documents whose shard changes (~1/n when adding one).
+Modular, testable.
+"""
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+from errors.error_model import ValidationError
+
+from .document_model import Document, DocumentModel
+from .document_query import parse_query
+
+SHARD_EXECUTORS = ("thread", "process")
+
+_MASK64 = (1 << 64) - 1
+_SEED = 0x9E3779B9
+
+
+def shard_for(doc_id: str, shards: int) -> int:
+    """Jump consistent hash of doc_id into [0, shards); stable across processes. Testable."""
+    raw = doc_id.encode("utf-8")
+    # 64-bit key from two differently seeded crc32s (several times cheaper than a digest).
+    key = (zlib.crc32(raw) << 32) | zlib.crc32(raw, _SEED)
+    bucket, jump = -1, 0
+    while jump < shards:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & _MASK64
+        jump = int((bucket + 1) * (2147483648.0 / ((key >> 33) + 1)))
+    return bucket
+
+
+# Shard operations: run against the shard's DocumentModel wherever it lives.
+
+
+def _insert_many(model: DocumentModel, collection: str, docs: list[Document]) -> int:
+    model.insert_many(collection, docs)
+    return len(docs)
+
+
+def _count(model: DocumentModel, collection: str, query: Any) -> int:
+    if query is None:
+        return len(model.get_collection(collection))
+    return len(model.find(collection, query))
+
+
+def _take_moved(model: DocumentModel, shard: int, shards: int) -> list[tuple[str, Document]]:
+    """Remove and return (collection, document) of documents that belong elsewhere with shards shards."""
+    moved = []
+    for name in model.list_collections():
+        collection = model.get_collection(name)
+        for doc_id in [d for d in collection if shard_for(d, shards) != shard]:
+            moved.append((name, collection[doc_id]))
+            model.delete(name, doc_id)
+    return moved
+
+
+_SHARD_OPS: dict[str, Callable[..., Any]] = {
+    "insert_many": _insert_many,
+    "get": lambda model, collection, doc_id: model.get(collection, doc_id),
+    "delete": lambda model, collection, doc_id: model.delete(collection, doc_id),
+    "find": lambda model, collection, query: model.find(collection, query),
+    "count": _count,
+    "explain": lambda model, collection, query: model.explain(collection, query),
+    "create_index": lambda model, collection, field, kind: model.create_index(collection, field, kind).describe(),
+    "drop_index": lambda model, collection, field, kind: model.drop_index(collection, field, kind),
+    "indexes": lambda model, collection: model.indexes(collection),
+    "collections": lambda model: model.list_collections(),
+    "take_moved": _take_moved,
+}
+
+_worker_model: DocumentModel | None = None
+
+
+def _init_worker() -> None:
+    global _worker_model
+    _worker_model = DocumentModel()
+
+
+def _worker_call(op: str, args: tuple[Any, ...]) -> Any:
+    return _SHARD_OPS[op](_worker_model, *args)
+
+
+class _ThreadShard:
+    """Shard in this process; calls run on the shared thread pool under the shard's lock."""
+
+    def __init__(self, pool: ThreadPoolExecutor) -> None:
+        self.model = DocumentModel()
+        self._lock = threading.Lock()
+        self._pool = pool
+
+    def call(self, op: str, *args: Any) -> Any:
+        with self._lock:
+            return _SHARD_OPS[op](self.model, *args)
+
+    def submit(self, op: str, *args: Any) -> Future:
+        return self._pool.submit(self.call, op, *args)
+
+    def close(self) -> None:
+        pass
+
+
+class _ProcessShard:
+    """Shard owned by a dedicated single-worker process; calls are serialized per shard."""
+
+    def __init__(self) -> None:
+        self._pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker)
+
+    def call(self, op: str, *args: Any) -> Any:
+        return self.submit(op, *args).result()
+
+    def submit(self, op: str, *args: Any) -> Future:
+        return self._pool.submit(_worker_call, op, args)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+class _SharedLock:
+    """Shared for reads/writes (shards lock themselves), exclusive for reshard."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                if not self._shared:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive)
+            self._exclusive = True
+            self._cond.wait_for(lambda: self._shared == 0)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class ShardedDocumentModel:
+    """
+    DocumentModel API over hash-partitioned shards: insert / insert_many /
+    get / delete route by id; find, count and explain scatter-gather (find
+    returns each shard's matches in shard order); create_index builds the
+    index on every shard, including shards added later. reshard(n) changes
+    the shard count, moving documents between shards; reads and writes wait
+    while it runs. close() stops the shard pools.
+    Testable.
+    """
+
+    def __init__(self, shards: int = 4, executor: str = "thread", workers: int | None = None) -> None:
+        if not isinstance(shards, int) or isinstance(shards, bool) or shards < 1:
+            raise ValidationError("shards must be an integer >= 1", details={"shards": shards})
+        if executor not in SHARD_EXECUTORS:
+            raise ValidationError(
+                "Unknown shard executor", details={"executor": executor, "allowed": list(SHARD_EXECUTORS)}
+            )
+        self._executor = executor
+        self._pool = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="document-shard")
+            if executor == "thread"
+            else None
+        )
+        self._gate = _SharedLock()
+        self._index_specs: dict[str, dict[tuple[str, str], None]] = {}
+        self._shards = [self._new_shard() for _ in range(shards)]
+
+    def _new_shard(self) -> _ThreadShard | _ProcessShard:
+        return _ThreadShard(self._pool) if self._pool is not None else _ProcessShard()
+
+    @property
+    def executor(self) -> str:
+        return self._executor
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def _shard(self, doc_id: str) -> _ThreadShard | _ProcessShard:
+        return self._shards[shard_for(doc_id, len(self._shards))]
+
+    def _scatter(self, op: str, *args: Any) -> list[Any]:
+        futures = [shard.submit(op, *args) for shard in self._shards]
+        return [f.result() for f in futures]
+
+    def _check_query(self, query: Any) -> None:
+        # Fail once here rather than once per shard.
+        if not callable(query):
+            parse_query(query)
+        elif self._executor == "process":
+            try:
+                pickle.dumps(query)
+            except Exception as e:
+                raise ValidationError(
+                    "process shards need a picklable predicate (module-level function)",
+                    details={"executor": self._executor},
+                    cause=type(e).__name__,
+                ) from e
+
+    def insert(self, collection: str, doc: Document) -> None:
+        """Insert or replace a document on its shard. Testable."""
+        self.insert_many(collection, (doc,))
+
+    def insert_many(self, collection: str, docs: Iterable[Document]) -> int:
+        """Split documents by shard and write every shard's batch concurrently; returns the count. Testable."""
+        with self._gate.shared():
+            shards = len(self._shards)
+            parts: dict[int, list[Document]] = {}
+            count = 0
+            for doc in docs:
+                if not isinstance(doc.id, str) or not doc.id:
+                    raise ValidationError("document id must be a non-empty string", details={"id": doc.id})
+                parts.setdefault(shard_for(doc.id, shards), []).append(doc)
+                count += 1
+            futures = [self._shards[i].submit("insert_many", collection, part) for i, part in parts.items()]
+            for f in futures:
+                f.result()
+            return count
+
+    def get(self, collection: str, doc_id: str) -> Document | None:
+        """Get document by id from its shard. Testable."""
+        with self._gate.shared():
+            return self._shard(doc_id).call("get", collection, doc_id)
+
+    def delete(self, collection: str, doc_id: str) -> bool:
+        """Delete document. Returns True if removed. Testable."""
+        with self._gate.shared():
+            return self._shard(doc_id).call("delete", collection, doc_id)
+
+    def find(self, collection: str, predicate: Any) -> list[Document]:
+        """Scatter find (predicate or declarative conditions) to all shards; gather in shard order. Testable."""
+        self._check_query(predicate)
+        with self._gate.shared():
+            return [doc for docs in self._scatter("find", collection, predicate) for doc in docs]
+
+    def count(self, collection: str, query: Any = None) -> int:
+        """Number of documents (matching query, if given) summed over shards; no documents cross back. Testable."""
+        if query is not None:
+            self._check_query(query)
+        with self._gate.shared():
+            return sum(self._scatter("count", collection, query))
+
+    def explain(self, collection: str, query: Any) -> dict[str, Any]:
+        """Each shard's plan for a declarative query, plus the total row estimate. Testable."""
+        parse_query(query)
+        with self._gate.shared():
+            plans = self._scatter("explain", collection, query)
+        return {
+            "collection": collection,
+            "shards": plans,
+            "estimated_rows": sum(plan["estimated_rows"] for plan in plans),
+        }
+
+    def create_index(self, collection: str, field_path: str, kind: str = "hash") -> dict[str, Any]:
+        """Add a secondary index on every shard (and on shards added later); returns the merged description."""
+        if not (field_path or "").strip():
+            raise ValidationError("field is required", details={"field": "field"})
+        with self._gate.shared():
+            described = self._scatter("create_index", collection, field_path, kind)
+            self._index_specs.setdefault(collection, {})[(field_path, kind)] = None
+        return _merge_index(described)
+
+    def drop_index(self, collection: str, field_path: str, kind: str = "hash") -> bool:
+        """Remove a secondary index from every shard. Returns True if it existed. Testable."""
+        with self._gate.shared():
+            self._index_specs.get(collection, {}).pop((field_path, kind), None)
+            return any(self._scatter("drop_index", collection, field_path, kind))
+
+    def indexes(self, collection: str) -> list[dict[str, Any]]:
+        """
+        The collection's secondary indexes. entries is the total over shards;
+        distinct values are only known per shard, so values_per_shard_sum
+        adds them up and over-counts any value present on several shards.
+        Testable.
+        """
+        with self._gate.shared():
+            per_shard = self._scatter("indexes", collection)
+        grouped: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for described in per_shard:
+            for d in described:
+                grouped.setdefault((d["field"], d["kind"]), []).append(d)
+        return [_merge_index(group) for group in grouped.values()]
+
+    def list_collections(self) -> list[str]:
+        """All collection names across shards. Testable."""
+        with self._gate.shared():
+            names = self._scatter("collections")
+        return list(dict.fromkeys(name for shard_names in names for name in shard_names))
+
+    def shard_sizes(self, collection: str) -> list[int]:
+        """Documents per shard (balance check). Testable."""
+        with self._gate.shared():
+            return self._scatter("count", collection, None)
+
+    def reshard(self, shards: int) -> dict[str, Any]:
+        """
+        Change the shard count: new shards get the registered indexes, every
+        shard hands over the documents that now hash elsewhere, and surplus
+        shards are drained and closed. Returns moved count and seconds.
+        """
+        if not isinstance(shards, int) or isinstance(shards, bool) or shards < 1:
+            raise ValidationError("shards must be an integer >= 1", details={"shards": shards})
+        started = time.perf_counter()
+        with self._gate.exclusive():
+            before = len(self._shards)
+            if shards == before:
+                return {"shards": shards, "moved": 0, "seconds": 0.0}
+            for _ in range(before, shards):
+                shard = self._new_shard()
+                for collection, specs in self._index_specs.items():
+                    for field_path, kind in specs:
+                        shard.call("create_index", collection, field_path, kind)
+                self._shards.append(shard)
+            moved_lists = [
+                f.result()
+                for f in [shard.submit("take_moved", i, shards) for i, shard in enumerate(self._shards[:before])]
+            ]
+            targets: dict[tuple[int, str], list[Document]] = {}
+            moved = 0
+            for docs in moved_lists:
+                for collection, doc in docs:
+                    targets.setdefault((shard_for(doc.id, shards), collection), []).append(doc)
+                    moved += 1
+            futures = [
+                self._shards[i].submit("insert_many", collection, part) for (i, collection), part in targets.items()
+            ]
+            for f in futures:
+                f.result()
+            for shard in self._shards[shards:]:
+                shard.close()
+            del self._shards[shards:]
+        return {"shards": shards, "moved": moved, "seconds": time.perf_counter() - started}
+
+    def close(self) -> None:
+        """Shut down shard pools (process workers exit; their documents are gone)."""
+        for shard in self._shards:
+            shard.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+def _merge_index(described: list[dict[str, Any]]) -> dict[str, Any]:
+    first = described[0]
+    return {
+        "field": first["field"],
+        "kind": first["kind"],
+        "entries": sum(d["entries"] for d in described),
+        "values_per_shard_sum": sum(d["values"] for d in described),
+        "shards": len(described),
+    }
+
+
+def create_sharded_document_model(
+    shards: int = 4, executor: str = "thread", workers: int | None = None
+) -> ShardedDocumentModel:
+    """Create an empty sharded document model. Testable."""
+    return ShardedDocumentModel(shards=shards, executor=executor, workers=workers)
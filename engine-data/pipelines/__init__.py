@@ -1,14 +1,25 @@
 """Pipelines: data pipeline and stages."""
 from .data_pipeline import (
+    DEFAULT_STREAM_BATCH_SIZE,
+    STAGE_MODES,
     DataPipeline,
     PipelineStage,
     create_pipeline,
     map_stage,
 )
+from .parallel import EXECUTORS
+from .profiling import PROFILERS
+from .stage_metrics import LatencyHistogram, StageMetrics
 
 __all__ = [
     "PipelineStage",
     "DataPipeline",
     "create_pipeline",
     "map_stage",
+    "STAGE_MODES",
+    "DEFAULT_STREAM_BATCH_SIZE",
+    "EXECUTORS",
+    "StageMetrics",
+    "LatencyHistogram",
+    "PROFILERS",
 ]
@@ -1,18 +1,35 @@
 """
 Data pipeline — stages and execution.
+run() pushes one value through every stage; stream() pulls records from an
+iterable in chunks of batch_size and yields outputs lazily, so memory stays
+bounded by one batch per stage. Stages are per-record (fn(record)) or
+per-batch (fn(list) -> list, free to filter or expand), and may run on a
+thread or process pool (parallel=N) with bounded in-flight batches; see
+parallel. Per-stage counters and latency histograms are kept in
+stage_metrics; a cProfile or sampling hook can be switched on per stage at
+runtime (enable_profiling; see profiling).
 ERL-4: validation at entry, structured logging, platform error model.
 """
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
-from typing import Any, Callable, Generic, TypeVar
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Generic, Iterable, Iterator, NoReturn, TypeVar
 
 from errors.error_model import ExecutionError, ValidationError
+from pipelines.parallel import apply_stage, create_executor, run_pool, validate_parallel
+from pipelines.profiling import DEFAULT_SAMPLE_INTERVAL, StageProfiler, create_profiler
+from pipelines.stage_metrics import StageMetrics
 
 T = TypeVar("T")
 U = TypeVar("U")
 
+STAGE_MODES = ("record", "batch")
+DEFAULT_STREAM_BATCH_SIZE = 256
+
 _logger = logging.getLogger("engine-data")
 
 
@@ -36,43 +53,252 @@ class PipelineStage(Generic[T, U]):
             raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
 
 
+@dataclass
+class _StageSpec:
+    name: str
+    transform: Callable[[Any], Any]
+    mode: str = "record"
+    parallel: int = 1
+    executor: str = "thread"
+    metrics: StageMetrics = field(init=False)
+    profiler: StageProfiler | None = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        self.metrics = StageMetrics(self.name, self.parallel, self.executor)
+
+
 class DataPipeline(Generic[T]):
     """
-    Linear pipeline: list of stages; run passes data through each.
+    Linear pipeline: list of stages; run passes data through each, stream
+    passes chunks of an iterable through each.
     ERL-4: entry-point validation, structured logging, fail-fast.
     """
 
     def __init__(self, name: str = "default") -> None:
         self.name = name or "default"
-        self._stages: list[tuple[str, Callable[[Any], Any]]] = []
+        self._stages: list[_StageSpec] = []
         _logger.debug("data_pipeline.init name=%s", self.name)
 
-    def add_stage(self, name: str, transform: Callable[[Any], Any]) -> DataPipeline[T]:
-        """Add stage. Validates name and transform before mutation."""
+    def add_stage(
+        self,
+        name: str,
+        transform: Callable[[Any], Any],
+        mode: str = "record",
+        parallel: int = 1,
+        executor: str = "thread",
+    ) -> DataPipeline[T]:
+        """
+        Add stage (mode: record or batch; parallel workers on a thread or
+        process pool, used by stream). Validates before mutation.
+        """
         if not (name or "").strip():
             raise ValidationError("stage name is required", details={"field": "name"})
         if transform is None:
             raise ValidationError("transform is required", details={"stage": name})
-        self._stages.append((name, transform))
+        if mode not in STAGE_MODES:
+            raise ValidationError(
+                "Unknown stage mode", details={"stage": name, "mode": mode, "allowed": list(STAGE_MODES)}
+            )
+        validate_parallel(name, transform, parallel, executor)
+        self._stages.append(_StageSpec(name, transform, mode, parallel, executor))
         return self
 
+    def _fail(self, stage: _StageSpec, e: Exception, operation: str) -> NoReturn:
+        stage.metrics.record_error()
+        if isinstance(e, ValidationError):
+            raise e
+        _logger.error("data_pipeline.%s stage=%s error=%s", operation, stage.name, e, exc_info=True)
+        raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
+
+    def _finish(self, stage: _StageSpec, items_in: int, out: Any, seconds: float) -> Any:
+        if stage.mode == "batch" and not isinstance(out, list):
+            stage.metrics.record_error()
+            raise ExecutionError(
+                "batch stage must return a list",
+                details={"stage": stage.name, "returned": type(out).__name__},
+                cause="TypeError",
+            )
+        stage.metrics.record(items_in, len(out) if stage.mode == "batch" else items_in, seconds)
+        return out
+
+    def _call(self, stage: _StageSpec, data: Any, operation: str) -> Any:
+        profiler = stage.profiler
+        start = time.perf_counter()
+        try:
+            out = stage.transform(data) if profiler is None else profiler.run(stage.transform, data)
+        except Exception as e:
+            self._fail(stage, e, operation)
+        return self._finish(stage, len(data) if stage.mode == "batch" else 1, out, time.perf_counter() - start)
+
+    def _apply(self, stage: _StageSpec, batch: list[Any], operation: str) -> list[Any]:
+        try:
+            out, seconds = apply_stage(stage.transform, stage.mode, batch, stage.profiler)
+        except Exception as e:
+            self._fail(stage, e, operation)
+        return self._finish(stage, len(batch), out, seconds)
+
+    def _run_batch(self, batch: list[Any], operation: str, start: int = 0) -> list[Any]:
+        for stage in self._stages[start:]:
+            if not batch:
+                break
+            batch = self._apply(stage, batch, operation)
+        return batch
+
     def run(self, initial: T) -> Any:
-        """Run pipeline. Validates stages; maps failures to ExecutionError."""
+        """
+        Run pipeline. Validates stages; maps failures to ExecutionError.
+        Batch stages see [value]; if one returns other than exactly one
+        item, the rest run as a batch and the result is that list (None if
+        empty), matching stream([initial]). Stages run inline (no pools).
+        """
         data: Any = initial
-        for _name, transform in self._stages:
+        for i, stage in enumerate(self._stages):
+            if stage.mode == "record":
+                data = self._call(stage, data, "run")
+                continue
+            out = self._call(stage, [data], "run")
+            if len(out) != 1:
+                out = self._run_batch(out, "run", i + 1)
+                data = out or None
+                break
+            data = out[0]
+        _logger.debug("data_pipeline.run name=%s stages=%s", self.name, len(self._stages))
+        return data
+
+    def stream(
+        self,
+        records: Iterable[Any],
+        batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+        ordered: bool = True,
+        queue_size: int | None = None,
+    ) -> Iterator[Any]:
+        """
+        Lazily run records through the stages batch_size at a time and yield
+        outputs. Input is pulled only as output is consumed. Parallel stages
+        keep at most queue_size batches in flight (default 2 x parallel);
+        ordered=False lets their batches come out in completion order.
+        """
+        if batch_size < 1:
+            raise ValidationError("batch_size must be >= 1", details={"batch_size": batch_size})
+        if records is None:
+            raise ValidationError("records is required", details={"field": "records"})
+        if queue_size is not None and queue_size < 1:
+            raise ValidationError("queue_size must be >= 1", details={"queue_size": queue_size})
+        return self._stream(iter(records), batch_size, ordered, queue_size)
+
+    def _stage_batches(
+        self,
+        stage: _StageSpec,
+        batches: Iterator[list[Any]],
+        ordered: bool,
+        queue_size: int | None,
+        pools: list[Executor],
+    ) -> Iterator[list[Any]]:
+        if stage.parallel == 1:
+            for batch in batches:
+                out = self._apply(stage, batch, "stream")
+                if out:
+                    yield out
+            return
+        pool = create_executor(stage.executor, stage.parallel, stage.name)
+        pools.append(pool)
+        window = queue_size or 2 * stage.parallel
+        for future, items_in in run_pool(
+            pool,
+            stage.transform,
+            stage.mode,
+            batches,
+            window,
+            ordered,
+            stage.metrics.set_queue_depth,
+            lambda: stage.profiler,
+        ):
             try:
-                data = transform(data)
-            except ValidationError:
-                raise
+                out, seconds = future.result()
             except Exception as e:
-                _logger.error("data_pipeline.run stage=%s error=%s", _name, e, exc_info=True)
-                raise ExecutionError(str(e), cause=type(e).__name__, retryable=True) from e
-        _logger.info("data_pipeline.run name=%s stages=%s", self.name, len(self._stages))
-        return data
+                self._fail(stage, e, "stream")
+            out = self._finish(stage, items_in, out, seconds)
+            if out:
+                yield out
+
+    def _stream(
+        self, records: Iterator[Any], batch_size: int, ordered: bool, queue_size: int | None
+    ) -> Iterator[Any]:
+        consumed = produced = 0
+
+        def chunks() -> Iterator[list[Any]]:
+            nonlocal consumed
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    return
+                consumed += len(batch)
+                yield batch
+
+        pools: list[Executor] = []
+        batches: Iterator[list[Any]] = chunks()
+        try:
+            for stage in self._stages:
+                batches = self._stage_batches(stage, batches, ordered, queue_size, pools)
+            for batch in batches:
+                produced += len(batch)
+                yield from batch
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _logger.debug("data_pipeline.stream name=%s in=%s out=%s", self.name, consumed, produced)
+
+    def stage_metrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Per-stage counters (calls, items in/out, errors, busy time,
+        throughput, queue depth) and per-call latency_ms p50/p95/p99.
+        """
+        return {stage.name: stage.metrics.snapshot() for stage in self._stages}
+
+    def _stage(self, name: str) -> _StageSpec:
+        for stage in self._stages:
+            if stage.name == name:
+                return stage
+        raise ValidationError("Unknown stage", details={"stage": name, "stages": self.stages()})
+
+    def enable_profiling(
+        self, stage: str, kind: str = "cprofile", interval: float = DEFAULT_SAMPLE_INTERVAL
+    ) -> None:
+        """
+        Profile a stage from its next call on (kind: cprofile or sample,
+        sampling every interval seconds). Replaces any hook already set.
+        """
+        spec = self._stage(stage)
+        profiler = create_profiler(stage, kind, interval, spec.executor, spec.parallel)
+        previous, spec.profiler = spec.profiler, profiler
+        if previous is not None:
+            previous.close()
+        _logger.info("data_pipeline.profiling name=%s stage=%s kind=%s", self.name, stage, kind)
+
+    def profile_report(self, stage: str, limit: int = 20) -> dict[str, Any]:
+        """Current report of a stage's profiling hook (top functions)."""
+        spec = self._stage(stage)
+        if spec.profiler is None:
+            raise ValidationError("profiling is not enabled", details={"stage": stage})
+        return spec.profiler.report(limit)
+
+    def disable_profiling(self, stage: str, limit: int = 20) -> dict[str, Any] | None:
+        """Remove a stage's hook; returns its final report (None if none was set)."""
+        spec = self._stage(stage)
+        profiler, spec.profiler = spec.profiler, None
+        if profiler is None:
+            return None
+        profiler.close()
+        return profiler.report(limit)
+
+    def reset_metrics(self) -> None:
+        """Zero every stage's counters."""
+        for stage in self._stages:
+            stage.metrics.reset()
 
     def stages(self) -> list[str]:
         """Stage names in order."""
-        return [name for name, _ in self._stages]
+        return [stage.name for stage in self._stages]
 
 
 def create_pipeline(name: str = "default") -> DataPipeline[Any]:
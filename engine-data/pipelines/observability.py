@@ -1,14 +1,18 @@
 """
 Pipeline observability (ERL-4).
-Wrap pipeline run with logging, latency, error classification.
+Wrap pipeline run with logging, latency, error classification; rank stages
+by the latency their StageMetrics recorded.
 """
 from __future__ import annotations
 
 import time
 from typing import Any, Callable
 
+from errors.error_model import ValidationError
 from pipelines.data_pipeline import DataPipeline  # noqa: I100
 
+STAGE_RANK_KEYS = ("p50", "p95", "p99", "mean", "max", "busy_seconds")
+
 
 def run_with_observability(
     pipeline: DataPipeline,
@@ -52,6 +56,27 @@ def run_with_observability(
         raise
 
 
+def slowest_stages(pipeline: DataPipeline, limit: int = 3, by: str = "p95") -> list[dict[str, Any]]:
+    """
+    Stages ordered slowest first by a latency percentile (ms per call) or
+    total busy_seconds, from the pipeline's stage metrics. Testable.
+    """
+    if by not in STAGE_RANK_KEYS:
+        raise ValidationError("Unknown rank key", details={"by": by, "allowed": list(STAGE_RANK_KEYS)})
+    rows = [
+        {
+            "stage": name,
+            "calls": m["calls"],
+            "errors": m["errors"],
+            "busy_seconds": m["busy_seconds"],
+            **m["latency_ms"],
+        }
+        for name, m in pipeline.stage_metrics().items()
+    ]
+    rows.sort(key=lambda row: row[by], reverse=True)
+    return rows[:limit]
+
+
 def data_corruption_detection_hook(record: dict[str, Any]) -> tuple[bool, str]:
     """
     Optional hook for data corruption detection.
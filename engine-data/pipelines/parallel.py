@@ -0,0 +1,109 @@
+"""
+Parallel stages — run a pipeline stage on a thread or process pool.
+Batches are submitted to the pool with at most `window` in flight, which
+bounds the queue between this stage and the next and pushes back on the
+producer; results come back in submission order, or in completion order
+when ordering is not required. Process pools need picklable transforms.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import pickle
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Iterable, Iterator
+
+from errors.error_model import ValidationError
+
+EXECUTORS = ("thread", "process")
+
+
+def _run_batch(transform: Callable[[Any], Any], mode: str, batch: list[Any]) -> Any:
+    return transform(batch) if mode == "batch" else [transform(record) for record in batch]
+
+
+def apply_stage(
+    transform: Callable[[Any], Any], mode: str, batch: list[Any], profiler: Any = None
+) -> tuple[Any, float]:
+    """Run one batch through a stage (in a worker), under profiler if set; (output, seconds)."""
+    start = time.perf_counter()
+    if profiler is None:
+        out = _run_batch(transform, mode, batch)
+    else:
+        out = profiler.run(_run_batch, transform, mode, batch)
+    return out, time.perf_counter() - start
+
+
+def validate_parallel(
+    name: str, transform: Callable[[Any], Any], parallel: int, executor: str
+) -> None:
+    """Check parallel / executor settings for a stage before it is added."""
+    if not isinstance(parallel, int) or isinstance(parallel, bool) or parallel < 1:
+        raise ValidationError(
+            "parallel must be an integer >= 1", details={"stage": name, "parallel": parallel}
+        )
+    if executor not in EXECUTORS:
+        raise ValidationError(
+            "Unknown executor",
+            details={"stage": name, "executor": executor, "allowed": list(EXECUTORS)},
+        )
+    if executor == "process" and parallel > 1:
+        try:
+            pickle.dumps(transform)
+        except Exception as e:
+            raise ValidationError(
+                "process stages need a picklable transform (module-level function)",
+                details={"stage": name},
+                cause=type(e).__name__,
+            ) from e
+
+
+def create_executor(executor: str, workers: int, name: str) -> Executor:
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pipeline-{name}")
+
+
+def run_pool(
+    pool: Executor,
+    transform: Callable[[Any], Any],
+    mode: str,
+    batches: Iterable[list[Any]],
+    window: int,
+    ordered: bool,
+    on_depth: Callable[[int], None],
+    profiler: Callable[[], Any] | None = None,
+) -> Iterator[tuple[Future, int]]:
+    """
+    Yield (finished future, batch size) keeping at most window batches in
+    flight. profiler() is read per submission so hooks can be switched at runtime.
+    """
+    pending: deque[tuple[Future, int]] = deque()
+
+    def take() -> tuple[Future, int]:
+        if ordered:
+            item = pending.popleft()
+            item[0].exception()
+        else:
+            done, _ = wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+            item = next(p for p in pending if p[0] in done)
+            pending.remove(item)
+        on_depth(len(pending))
+        return item
+
+    for batch in batches:
+        hook = profiler() if profiler is not None else None
+        pending.append((pool.submit(apply_stage, transform, mode, batch, hook), len(batch)))
+        on_depth(len(pending))
+        while len(pending) >= window:
+            yield take()
+    while pending:
+        yield take()
@@ -0,0 +1,196 @@
+"""
+Stage profiling — optional hooks switched on per stage at runtime.
+"cprofile" runs stage calls under one cProfile.Profile (one call at a time;
+calls that overlap on other threads run unprofiled and are counted as
+skipped). "sample" runs a background thread that snapshots the stacks of
+threads currently inside the stage every `interval` seconds and counts
+functions by self and cumulative samples; overhead is independent of how
+often the stage is called. Hooks run where the stage runs, so stages on a
+process pool cannot be profiled.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import cProfile
+import pstats
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from types import FrameType
+from typing import Any, Callable
+
+from errors.error_model import ValidationError
+
+PROFILERS = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def _location(code: Any) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StageProfiler(ABC):
+    """Base hook: run(fn, *args) wraps one stage call; report() summarises; close() stops."""
+
+    kind = ""
+
+    @abstractmethod
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Call fn(*args) under the hook and return its result."""
+
+    @abstractmethod
+    def report(self, limit: int = 20) -> dict[str, Any]:
+        """Summary of what was collected, top `limit` entries."""
+
+    def close(self) -> None:
+        """Release resources; the hook must not be used afterwards."""
+
+
+class CProfileHook(StageProfiler):
+    """Deterministic profile of stage calls with cProfile."""
+
+    kind = "cprofile"
+
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+        self._busy = threading.Lock()
+        self.calls = 0
+        self.skipped = 0
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return fn(*args)
+        try:
+            self.calls += 1
+            return self._profile.runcall(fn, *args)
+        finally:
+            self._busy.release()
+
+    def report(self, limit: int = 20) -> dict[str, Any]:
+        """Top functions by cumulative time."""
+        with self._busy:
+            self._profile.create_stats()
+            raw = dict(self._profile.stats) if self.calls else {}
+        rows = sorted(raw.items(), key=lambda kv: kv[1][3], reverse=True)[:limit]
+        return {
+            "kind": self.kind,
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "top": [
+                {
+                    "function": f"{func} ({path}:{line})",
+                    "calls": ncalls,
+                    "total_seconds": tottime,
+                    "cumulative_seconds": cumtime,
+                }
+                for (path, line, func), (_, ncalls, tottime, cumtime, _) in rows
+            ],
+        }
+
+    def print_stats(self, limit: int = 20, sort: str = "cumulative") -> None:
+        """Print the standard pstats table to stdout."""
+        with self._busy:
+            pstats.Stats(self._profile).sort_stats(sort).print_stats(limit)
+
+
+class SamplingHook(StageProfiler):
+    """Statistical profile: periodic stack samples of threads inside the stage."""
+
+    kind = "sample"
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.calls = 0
+        self.samples = 0
+        self._active: dict[int, int] = {}
+        self._self: Counter[str] = Counter()
+        self._cumulative: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="stage-sampler", daemon=True)
+        self._thread.start()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        tid = threading.get_ident()
+        with self._lock:
+            self.calls += 1
+            self._active[tid] = self._active.get(tid, 0) + 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                if self._active[tid] == 1:
+                    del self._active[tid]
+                else:
+                    self._active[tid] -= 1
+
+    def _sample(self, frame: FrameType | None) -> None:
+        # Walk out to this hook's run() frame so only the stage's own frames count.
+        seen: set[str] = set()
+        innermost = True
+        while frame is not None and frame.f_code is not SamplingHook.run.__code__:
+            where = _location(frame.f_code)
+            if innermost:
+                self._self[where] += 1
+                innermost = False
+            if where not in seen:
+                seen.add(where)
+                self._cumulative[where] += 1
+            frame = frame.f_back
+        if not innermost:
+            self.samples += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for tid in self._active:
+                    self._sample(frames.get(tid))
+
+    def report(self, limit: int = 20) -> dict[str, Any]:
+        """Top functions by self samples, and by samples anywhere on the stage's stack."""
+        with self._lock:
+            total = self.samples or 1
+            return {
+                "kind": self.kind,
+                "interval": self.interval,
+                "calls": self.calls,
+                "samples": self.samples,
+                "top": [
+                    {"function": where, "samples": n, "fraction": n / total}
+                    for where, n in self._self.most_common(limit)
+                ],
+                "cumulative": [
+                    {"function": where, "samples": n, "fraction": n / total}
+                    for where, n in self._cumulative.most_common(limit)
+                ],
+            }
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def create_profiler(
+    stage: str, kind: str, interval: float, executor: str = "thread", parallel: int = 1
+) -> StageProfiler:
+    """Validate and build a hook for a stage; process-pool stages are rejected."""
+    if kind not in PROFILERS:
+        raise ValidationError(
+            "Unknown profiler", details={"stage": stage, "kind": kind, "allowed": list(PROFILERS)}
+        )
+    if not interval > 0:
+        raise ValidationError(
+            "interval must be > 0", details={"stage": stage, "interval": interval}
+        )
+    if executor == "process" and parallel > 1:
+        raise ValidationError(
+            "process-pool stages cannot be profiled", details={"stage": stage, "executor": executor}
+        )
+    if kind == "sample":
+        return SamplingHook(interval)
+    return CProfileHook()
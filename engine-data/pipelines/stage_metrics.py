@@ -0,0 +1,128 @@
+"""
+Stage metrics — per-stage counters and latency histograms for DataPipeline.
+Updated once per stage call (a record in run, a batch in stream) from the
+thread driving the pipeline; recording is a few additions and one bisect
+into fixed log-scale buckets, so it is cheap enough to leave on.
+snapshot() derives throughput and p50/p95/p99 latency.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any
+
+# Bucket upper bounds in seconds: 1us .. ~1100s, four buckets per doubling
+# (each bound ~19% above the previous), plus an overflow bucket.
+LATENCY_BUCKETS: tuple[float, ...] = tuple(1e-6 * 2 ** (i / 4) for i in range(121))
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Fixed log-bucket histogram of durations; percentiles are bucket upper
+    bounds, capped at the max seen.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Duration (seconds) at or below which p percent of samples fall; 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Non-empty buckets as (upper bound seconds, count); the overflow bound is inf."""
+        bounds = LATENCY_BUCKETS + (float("inf"),)
+        return [(bounds[i], n) for i, n in enumerate(self.counts) if n]
+
+
+class StageMetrics:
+    """Counters for one stage: calls, items in/out, busy time, latency, errors, queue depth."""
+
+    def __init__(self, name: str, parallel: int = 1, executor: str = "thread") -> None:
+        self.name = name
+        self.parallel = parallel
+        self.executor = executor
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.items_in = 0
+            self.items_out = 0
+            self.busy_seconds = 0.0
+            self.errors = 0
+            self.queue_depth = 0
+            self.max_queue_depth = 0
+            self.latency = LatencyHistogram()
+
+    def record(self, items_in: int, items_out: int, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += seconds
+            self.latency.add(seconds)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def set_queue_depth(self, depth: int) -> None:
+        with self._lock:
+            self.queue_depth = depth
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+    def histogram(self) -> list[tuple[float, int]]:
+        """Per-call latency buckets (upper bound seconds, count)."""
+        with self._lock:
+            return self.latency.buckets()
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Counters plus items_per_second (items in per busy second, summed over
+        workers) and per-call latency_ms (mean, p50, p95, p99, max).
+        """
+        with self._lock:
+            latency = self.latency
+            latency_ms = {f"p{p}": latency.percentile(p) * 1000 for p in LATENCY_PERCENTILES}
+            latency_ms["mean"] = latency.total / latency.count * 1000 if latency.count else 0.0
+            latency_ms["max"] = latency.max * 1000
+            return {
+                "parallel": self.parallel,
+                "executor": self.executor,
+                "calls": self.calls,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "errors": self.errors,
+                "busy_seconds": self.busy_seconds,
+                "items_per_second": (
+                    self.items_in / self.busy_seconds if self.busy_seconds > 0 else 0.0
+                ),
+                "latency_ms": latency_ms,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+            }
@@ -5,10 +5,14 @@ from .base_schema import (
     optional_int,
     required_string,
 )
+from .compiled_schema import BatchValidation, CompiledSchema, compile_schema
 
 __all__ = [
     "FieldSchema",
     "DocumentSchema",
     "required_string",
     "optional_int",
+    "CompiledSchema",
+    "BatchValidation",
+    "compile_schema",
 ]
@@ -1,9 +1,17 @@
 """
 Base schemas — field definitions and validation helpers.
+DocumentSchema.validate interprets the fields per record; compile() returns
+a generated validator with the same results (see compiled_schema), and
+validate_batch runs it over many records into an error bitmap.
 Modular, testable.
 """
-from dataclasses import dataclass
-from typing import Any, Callable
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+if TYPE_CHECKING:
+    from .compiled_schema import BatchValidation, CompiledSchema
 
 
 @dataclass
@@ -30,6 +38,9 @@ class DocumentSchema:
 
     name: str
     fields: list[FieldSchema]
+    _compiled: tuple[tuple[Any, ...], CompiledSchema] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def validate(self, data: dict[str, Any]) -> tuple[bool, list[str]]:
         """
@@ -45,6 +56,23 @@ class DocumentSchema:
                 errors.append(f"Invalid value for field: {f.name}")
         return (len(errors) == 0, errors)
 
+    def compile(self) -> CompiledSchema:
+        """Generated validator for the current fields (same results as validate). Testable."""
+        from .compiled_schema import compile_schema
+
+        return compile_schema(self)
+
+    def compiled(self) -> CompiledSchema:
+        """compile(), cached until the fields change."""
+        key = tuple((f.name, f.required, f.validator) for f in self.fields)
+        if self._compiled is None or self._compiled[0] != key:
+            self._compiled = (key, self.compile())
+        return self._compiled[1]
+
+    def validate_batch(self, records: Sequence[dict[str, Any]]) -> BatchValidation:
+        """Validate many records with the compiled validator; returns an error bitmap. Testable."""
+        return self.compiled().validate_batch(records)
+
 
 def required_string(value: Any) -> bool:
     """Validator: non-empty string. Testable."""
@@ -0,0 +1,152 @@
+"""
+Compiled schemas — DocumentSchema turned into generated Python source.
+The generated check(record) reads each field once and tests it with the
+stock validators inlined, returning a bitmask of failing fields (0 =
+valid); no error strings are built unless a record fails. validate_batch maps check
+over many records and packs the failures into a bitmap plus per-record
+field masks. Results match DocumentSchema.validate.
+Modular, testable.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+from errors.error_model import ValidationError
+
+from .base_schema import optional_int, required_string
+
+if TYPE_CHECKING:
+    from .base_schema import DocumentSchema
+
+# Validators from base_schema inlined by identity; any other runs as a call.
+INLINE_VALIDATORS: dict[Callable[[Any], bool], str] = {
+    required_string: "(isinstance(v, str) and len(v.strip()) > 0)",
+    optional_int: "(v is None or isinstance(v, int))",
+}
+
+
+@dataclass
+class BatchValidation:
+    """
+    validate_batch result: bitmap has bit i set when record i is invalid;
+    masks maps each invalid record to the bitmask of its failing fields
+    (bit j = fields[j]).
+    """
+
+    count: int
+    bitmap: bytearray
+    masks: dict[int, int]
+    fields: tuple[str, ...]
+
+    @property
+    def invalid_count(self) -> int:
+        return len(self.masks)
+
+    @property
+    def valid(self) -> bool:
+        return not self.masks
+
+    def is_valid(self, index: int) -> bool:
+        return not self.bitmap[index >> 3] >> (index & 7) & 1
+
+    def invalid_indices(self) -> list[int]:
+        return sorted(self.masks)
+
+    def failed_fields(self, index: int) -> list[str]:
+        mask = self.masks.get(index, 0)
+        return [name for j, name in enumerate(self.fields) if mask >> j & 1]
+
+    def field_counts(self) -> dict[str, int]:
+        """Failures per field across the batch."""
+        counts = dict.fromkeys(self.fields, 0)
+        for mask in self.masks.values():
+            for j, name in enumerate(self.fields):
+                if mask >> j & 1:
+                    counts[name] += 1
+        return {name: n for name, n in counts.items() if n}
+
+    def select(self, records: Sequence[Any], valid: bool = True) -> list[Any]:
+        """The valid (or invalid) records, in order."""
+        masks = self.masks
+        return [r for i, r in enumerate(records) if (i not in masks) == valid]
+
+
+class CompiledSchema:
+    """
+    Generated validator for a DocumentSchema: check(data) -> failing-field
+    mask, validate(data) -> (valid, errors) like DocumentSchema.validate
+    (both generated functions), and validate_batch.
+    """
+
+    def __init__(self, name: str, fields: list[tuple[str, bool]], namespace: dict[str, Any], source: str) -> None:
+        self.name = name
+        self.fields = tuple(name for name, _ in fields)
+        self._required = tuple(required for _, required in fields)
+        self.source = source
+        namespace["_errors"] = self.errors
+        exec(compile(source, f"<schema {name}>", "exec"), namespace)
+        self.check: Callable[[Any], int] = namespace["check"]
+        self.validate: Callable[[Any], tuple[bool, list[str]]] = namespace["validate"]
+
+    def errors(self, data: dict[str, Any], mask: int | None = None) -> list[str]:
+        """Messages for a record (as DocumentSchema.validate words them)."""
+        mask = self.check(data) if mask is None else mask
+        out: list[str] = []
+        for j, name in enumerate(self.fields):
+            if mask >> j & 1:
+                missing = self._required[j] and data.get(name) is None
+                out.append(f"Missing required field: {name}" if missing else f"Invalid value for field: {name}")
+        return out
+
+    def validate_batch(self, records: Sequence[dict[str, Any]]) -> BatchValidation:
+        """Check every record (dicts); returns the invalid bitmap and per-record field masks."""
+        if records is None:
+            raise ValidationError("records is required", details={"field": "records"})
+        try:
+            results = list(map(self.check, records))
+        except AttributeError as e:
+            bad = next((i for i, r in enumerate(records) if not isinstance(r, dict)), None)
+            if bad is None:
+                raise
+            raise ValidationError("record must be a dict", details={"index": bad}) from e
+        bitmap = bytearray((len(results) + 7) >> 3)
+        masks: dict[int, int] = {}
+        for i, mask in enumerate(results):
+            if mask:
+                masks[i] = mask
+                bitmap[i >> 3] |= 1 << (i & 7)
+        return BatchValidation(count=len(results), bitmap=bitmap, masks=masks, fields=self.fields)
+
+
+def _field_source(j: int, name: str, required: bool, validator: Any) -> list[str]:
+    bit = f"m |= {1 << j}"
+    call = None if validator is None else INLINE_VALIDATORS.get(validator, f"_v{j}(v)")
+    if not required and call is None:
+        return []
+    lines = [f"    v = get({name!r})"]
+    if required:
+        lines += ["    if v is None:", f"        {bit}", '    elif isinstance(v, str) and v == "":', f"        {bit}"]
+    else:
+        lines += ["    if v is None or isinstance(v, str) and v == \"\":", "        pass"]
+    if call is not None:
+        lines += [f"    elif not {call}:", f"        {bit}"]
+    return lines
+
+
+def compile_schema(schema: DocumentSchema) -> CompiledSchema:
+    """
+    Generate check(data) -> mask and validate(data) -> (valid, errors) from
+    the same field checks, then exec them. Testable.
+    """
+    namespace: dict[str, Any] = {}
+    body: list[str] = ["    get = data.get", "    m = 0"]
+    for j, f in enumerate(schema.fields):
+        if f.validator is not None and f.validator not in INLINE_VALIDATORS:
+            namespace[f"_v{j}"] = f.validator
+        body += _field_source(j, f.name, f.required, f.validator)
+    source = "\n".join(
+        ["def check(data):", *body, "    return m", "", "", "def validate(data):", *body]
+        + ["    if not m:", "        return (True, [])", "    return (False, _errors(data, m))", ""]
+    )
+    return CompiledSchema(schema.name, [(f.name, f.required) for f in schema.fields], namespace, source)
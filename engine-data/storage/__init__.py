@@ -1,12 +1,24 @@
-"""Storage: vector store and data loader."""
+"""Storage: vector store, data loader, write-ahead log and durable store."""
 from .data_loader import (
+    DEFAULT_LOAD_BATCH_SIZE,
     DataLoader,
     LoadResult,
     create_data_loader,
+    load_file,
     load_from_iter,
     load_from_list,
 )
+from .durable_store import WAL_OPS, DurableStore
+from .file_readers import FILE_FORMATS
+from .ivf_index import IVFIndex, recall_report
+from .metadata_index import MetadataIndex, matches_filter
+from .quantization import ProductQuantizer, QuantizedIndex, ScalarQuantizer
+from .vector_matrix import VectorMatrix
+from .vector_snapshot import SNAPSHOT_VERSION, PackedRecords
+from .wal import WriteAheadLog
 from .vector_store import (
+    VECTOR_INDEX_TYPES,
+    VECTOR_STORE_MODES,
     VectorEntry,
     VectorStore,
     cosine_similarity,
@@ -14,7 +26,19 @@ from .vector_store import (
 )
 
 __all__ = [
+    "VECTOR_INDEX_TYPES",
+    "VECTOR_STORE_MODES",
+    "IVFIndex",
+    "recall_report",
+    "MetadataIndex",
+    "matches_filter",
+    "QuantizedIndex",
+    "ScalarQuantizer",
+    "ProductQuantizer",
+    "SNAPSHOT_VERSION",
+    "PackedRecords",
     "VectorEntry",
+    "VectorMatrix",
     "VectorStore",
     "cosine_similarity",
     "create_vector_store",
@@ -22,5 +46,11 @@ __all__ = [
     "DataLoader",
     "load_from_iter",
     "load_from_list",
+    "load_file",
+    "FILE_FORMATS",
+    "DEFAULT_LOAD_BATCH_SIZE",
     "create_data_loader",
+    "WriteAheadLog",
+    "DurableStore",
+    "WAL_OPS",
 ]
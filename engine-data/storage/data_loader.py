@@ -1,102 +1,289 @@
 """
-Data loader — load data from sources (in-memory, file-like, iterators).
+Data loader — load data from sources (in-memory, file-like, iterators, files).
+Records reach the sink one at a time, or a list at a time with sink_batch.
+Errors are capped: LoadResult keeps the first max_errors messages and counts
+the rest. load_file streams JSONL / CSV / Parquet in chunks (see file_readers).
 ERL-4: validation at entry, structured logging, platform error model.
 """
 from __future__ import annotations
 
 import logging
+import os
 from dataclasses import dataclass
-from typing import Any, Callable, Iterator
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
 
 from errors.error_model import ValidationError
+from storage.file_readers import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_MAX_ERRORS,
+    DEFAULT_ROW_BATCH,
+    Chunk,
+    detect_format,
+    read_csv,
+    read_jsonl,
+    read_parquet,
+)
 
 _logger = logging.getLogger("engine-data")
 
+DEFAULT_LOAD_BATCH_SIZE = 1000
+
+Record = dict[str, Any]
+Sink = Callable[[Record], None]
+BatchSink = Callable[[list[Record]], None]
+Validator = Callable[[Record], tuple[bool, str]]
+
 
 @dataclass
 class LoadResult:
-    """Result of a load: count and optional errors."""
+    """Result of a load: count, the first errors (capped) and the total error count."""
 
     count: int
     errors: list[str]
+    error_count: int = 0
+
+    @property
+    def errors_truncated(self) -> bool:
+        return self.error_count > len(self.errors)
+
+
+class _LoadState:
+    """Validates and sinks batches of records; counts loads and keeps capped errors."""
+
+    def __init__(
+        self, sink: Sink | None, sink_batch: BatchSink | None, validator: Validator | None, max_errors: int
+    ) -> None:
+        if sink is None and sink_batch is None:
+            raise ValidationError("sink or sink_batch is required", details={"field": "sink"})
+        self.sink = sink
+        self.sink_batch = sink_batch
+        self.validator = validator
+        self.max_errors = max_errors
+        self.count = 0
+        self.errors: list[str] = []
+        self.error_count = 0
+
+    def error(self, message: str, n: int = 1) -> None:
+        self.error_count += n
+        if len(self.errors) < self.max_errors:
+            self.errors.append(message)
+
+    def push(self, records: list[Record]) -> None:
+        if self.validator is not None:
+            valid: list[Record] = []
+            for record in records:
+                ok, msg = self.validator(record)
+                if ok:
+                    valid.append(record)
+                else:
+                    self.error(msg)
+            records = valid
+        if not records:
+            return
+        if self.sink_batch is not None:
+            try:
+                self.sink_batch(records)
+                self.count += len(records)
+            except Exception as e:
+                self.error(f"batch of {len(records)} failed: {e}", len(records))
+                _logger.debug("data_loader.batch_error size=%s error=%s", len(records), e)
+            return
+        sink = self.sink
+        for record in records:
+            try:
+                sink(record)
+                self.count += 1
+            except Exception as e:
+                self.error(str(e))
+                _logger.debug("data_loader.record_error error=%s", e)
+
+    def push_chunk(self, chunk: Chunk, batch_size: int) -> None:
+        records, failed, messages = chunk
+        if failed:
+            self.error_count += failed - len(messages)
+            for message in messages:
+                self.error(message)
+        for start in range(0, len(records), batch_size):
+            self.push(records[start : start + batch_size])
+
+    def result(self) -> LoadResult:
+        return LoadResult(count=self.count, errors=self.errors, error_count=self.error_count)
 
 
 def load_from_iter(
     source: Iterator[dict[str, Any]],
-    sink: Callable[[dict[str, Any]], None],
-    validator: Callable[[dict[str, Any]], tuple[bool, str]] | None = None,
+    sink: Sink | None = None,
+    validator: Validator | None = None,
+    sink_batch: BatchSink | None = None,
+    batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+    max_errors: int = DEFAULT_MAX_ERRORS,
 ) -> LoadResult:
     """
-    Load records from an iterator; optionally validate; push to sink.
-    Validates source and sink non-null before execution.
+    Load records from an iterator; optionally validate; push to sink per
+    record, or to sink_batch batch_size at a time. Keeps the first
+    max_errors messages. Validates source and sink before execution.
     """
     if source is None:
         raise ValidationError("source is required", details={"field": "source"})
-    if sink is None:
-        raise ValidationError("sink is required", details={"field": "sink"})
-    count = 0
-    errors: list[str] = []
-    for record in source:
-        if validator is not None:
-            ok, msg = validator(record)
-            if not ok:
-                errors.append(msg)
-                continue
-        try:
-            sink(record)
-            count += 1
-        except Exception as e:
-            errors.append(str(e))
-            _logger.debug("data_loader.record_error error=%s", e)
-    _logger.info("data_pipeline.load_from_iter count=%s errors=%s", count, len(errors))
-    return LoadResult(count=count, errors=errors)
+    state = _LoadState(sink, sink_batch, validator, max_errors)
+    source = iter(source)
+    while True:
+        batch = list(islice(source, batch_size))
+        if not batch:
+            break
+        state.push(batch)
+    _logger.info("data_pipeline.load_from_iter count=%s errors=%s", state.count, state.error_count)
+    return state.result()
 
 
 def load_from_list(
     records: list[dict[str, Any]],
-    sink: Callable[[dict[str, Any]], None],
-    validator: Callable[[dict[str, Any]], tuple[bool, str]] | None = None,
+    sink: Sink | None = None,
+    validator: Validator | None = None,
+    sink_batch: BatchSink | None = None,
+    batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+    max_errors: int = DEFAULT_MAX_ERRORS,
 ) -> LoadResult:
     """Load from list of dicts. Validates records and sink non-null."""
     if records is None:
         raise ValidationError("records is required", details={"field": "records"})
-    if sink is None:
-        raise ValidationError("sink is required", details={"field": "sink"})
-    return load_from_iter(iter(records), sink=sink, validator=validator)
+    return load_from_iter(
+        iter(records),
+        sink=sink,
+        validator=validator,
+        sink_batch=sink_batch,
+        batch_size=batch_size,
+        max_errors=max_errors,
+    )
+
+
+def read_file(
+    path: str,
+    file_format: str | None = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    use_mmap: bool = False,
+    workers: int = 1,
+    row_batch: int = DEFAULT_ROW_BATCH,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    **csv_options: Any,
+) -> Iterable[Chunk]:
+    """Validated chunk reader for a file (format from the suffix unless given)."""
+    if not path or not os.path.isfile(path):
+        raise ValidationError("file not found", details={"path": path})
+    if chunk_bytes < 1 or workers < 1 or row_batch < 1:
+        raise ValidationError(
+            "chunk_bytes, workers and row_batch must be >= 1",
+            details={"chunk_bytes": chunk_bytes, "workers": workers, "row_batch": row_batch},
+        )
+    fmt = detect_format(path, file_format)
+    if fmt == "jsonl":
+        return read_jsonl(path, chunk_bytes, use_mmap, workers, max_errors)
+    if fmt == "csv":
+        return read_csv(path, row_batch, max_errors, **csv_options)
+    return read_parquet(path, row_batch)
+
+
+def load_file(
+    path: str,
+    sink: Sink | None = None,
+    validator: Validator | None = None,
+    sink_batch: BatchSink | None = None,
+    file_format: str | None = None,
+    batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    **read_options: Any,
+) -> LoadResult:
+    """
+    Stream a JSONL / CSV / Parquet file into the sink. read_options go to
+    read_file (chunk_bytes, use_mmap, workers, row_batch, csv delimiter /
+    encoding). Parse errors are reported as "line N: message".
+    """
+    state = _LoadState(sink, sink_batch, validator, max_errors)
+    for chunk in read_file(path, file_format, max_errors=max_errors, **read_options):
+        state.push_chunk(chunk, batch_size)
+    _logger.info("data_loader.load_file path=%s count=%s errors=%s", path, state.count, state.error_count)
+    return state.result()
 
 
 class DataLoader:
     """
-    Configurable loader: set source and sink, then load().
+    Configurable loader: set sink (per record) and/or sink_batch (per batch,
+    preferred when both are set), then load(), load_records() or load_file().
     ERL-4: entry-point validation, structured logging, fail-fast.
     """
 
     def __init__(
         self,
-        sink: Callable[[dict[str, Any]], None],
-        validator: Callable[[dict[str, Any]], tuple[bool, str]] | None = None,
+        sink: Sink | None = None,
+        validator: Validator | None = None,
+        sink_batch: BatchSink | None = None,
+        batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+        max_errors: int = DEFAULT_MAX_ERRORS,
     ) -> None:
-        if sink is None:
+        if sink is None and sink_batch is None:
             raise ValidationError("sink is required", details={"field": "sink"})
+        if batch_size < 1 or max_errors < 0:
+            raise ValidationError(
+                "batch_size must be >= 1 and max_errors >= 0",
+                details={"batch_size": batch_size, "max_errors": max_errors},
+            )
         self._sink = sink
+        self._sink_batch = sink_batch
         self._validator = validator
+        self._batch_size = batch_size
+        self._max_errors = max_errors
+
+    def _options(self) -> dict[str, Any]:
+        return {
+            "sink": self._sink,
+            "validator": self._validator,
+            "sink_batch": self._sink_batch,
+            "batch_size": self._batch_size,
+            "max_errors": self._max_errors,
+        }
 
     def load(self, source: Iterator[dict[str, Any]]) -> LoadResult:
         """Load from iterator. Validates source non-null."""
         if source is None:
             raise ValidationError("source is required", details={"field": "source"})
-        return load_from_iter(source, sink=self._sink, validator=self._validator)
+        return load_from_iter(source, **self._options())
 
     def load_records(self, records: list[dict[str, Any]]) -> LoadResult:
         """Load from list. Validates records non-null."""
         if records is None:
             raise ValidationError("records is required", details={"field": "records"})
-        return load_from_list(records, sink=self._sink, validator=self._validator)
+        return load_from_list(records, **self._options())
+
+    def load_file(
+        self,
+        path: str,
+        format: str | None = None,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        use_mmap: bool = False,
+        workers: int = 1,
+        **csv_options: Any,
+    ) -> LoadResult:
+        """
+        Load a jsonl / csv / parquet file (format from the suffix unless
+        given) in chunks of about chunk_bytes; use_mmap splits lines in a
+        memory map, workers > 1 parses JSONL blocks on a process pool.
+        """
+        return load_file(
+            path,
+            file_format=format,
+            chunk_bytes=chunk_bytes,
+            use_mmap=use_mmap,
+            workers=workers,
+            **csv_options,
+            **self._options(),
+        )
 
 
 def create_data_loader(
-    sink: Callable[[dict[str, Any]], None],
-    validator: Callable[[dict[str, Any]], tuple[bool, str]] | None = None,
+    sink: Sink | None = None,
+    validator: Validator | None = None,
+    sink_batch: BatchSink | None = None,
 ) -> DataLoader:
     """Create a data loader. Testable."""
-    return DataLoader(sink=sink, validator=validator)
+    return DataLoader(sink=sink, validator=validator, sink_batch=sink_batch)
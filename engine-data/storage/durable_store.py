@@ -0,0 +1,388 @@
+"""
+Durable store — write-ahead logging, snapshots and recovery for the
+in-memory DocumentModel, IndexingEngine and VectorStore.
+Writes are logged as idempotent ops ("put"/"del" documents, "vput"/"vdel"
+vectors) before they are applied, under one lock so log order is apply
+order and a write the log refuses (closed or failed WAL) never reaches
+memory; callers are acknowledged once the WAL's group commit makes the op
+durable. checkpoint() writes a compacted snapshot (one put/vput line per
+live document/vector, tagged with the lsn it covers) and drops the WAL
+segments it makes redundant, so replay is bounded by the log written since
+the last snapshot. A background thread checkpoints every snapshot_interval
+seconds, or sooner once snapshot_wal_bytes of log have accumulated.
+On open, the newest snapshot is loaded and the WAL replayed on top; the
+indexing engine is rebuilt from the documents of index_collection.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from errors.error_model import ExecutionError, ValidationError
+from models.document_model import Document, DocumentModel
+from storage.vector_store import VectorEntry, VectorStore
+from storage.wal import DEFAULT_SEGMENT_BYTES, DEFAULT_SYNC_INTERVAL, WriteAheadLog, _fsync_dir
+
+_logger = logging.getLogger("engine-data")
+
+WAL_OPS = ("put", "del", "vput", "vdel")
+SNAPSHOT_FORMAT = "nexus-data-snapshot"
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_INTERVAL = 300.0
+DEFAULT_SNAPSHOT_WAL_BYTES = 256 * 1024 * 1024
+
+_SNAPSHOT_PREFIX = "snapshot-"
+_SNAPSHOT_SUFFIX = ".jsonl"
+_WAL_DIR = "wal"
+_APPLY_BATCH = 10_000
+_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str).encode
+_decode = json.JSONDecoder().decode
+
+
+def _snapshot_name(lsn: int) -> str:
+    return f"{_SNAPSHOT_PREFIX}{lsn:020d}{_SNAPSHOT_SUFFIX}"
+
+
+def _indexed(doc_id: str, body: dict[str, Any]) -> dict[str, Any]:
+    return body if body.get("id") == doc_id else {**body, "id": doc_id}
+
+
+class DurableStore:
+    """
+    WAL + snapshots around existing in-memory structures. put_many/delete
+    and put_vector/delete_vector log, apply and wait for durability; code
+    that applies writes itself calls log(ops) first (holding the same lock)
+    and wait() after. lock guards the structures: pass the lock other
+    writers already hold, so checkpoints see a consistent state.
+    Testable.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        document_model: DocumentModel,
+        indexing_engine: Any | None = None,
+        vector_store: VectorStore | None = None,
+        index_collection: str = "default",
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        wait_durable: bool = True,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+        snapshot_wal_bytes: int = DEFAULT_SNAPSHOT_WAL_BYTES,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        lock: Any | None = None,
+    ) -> None:
+        if not str(directory or "").strip():
+            raise ValidationError("directory is required", details={"field": "directory"})
+        if document_model is None:
+            raise ValidationError("document_model is required", details={"field": "document_model"})
+        if snapshot_interval < 0:
+            raise ValidationError("snapshot_interval must be >= 0", details={"snapshot_interval": snapshot_interval})
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.document_model = document_model
+        self.indexing_engine = indexing_engine
+        self.vector_store = vector_store
+        self.index_collection = index_collection
+        self.wait_durable = wait_durable
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_wal_bytes = snapshot_wal_bytes
+        self.lock = lock if lock is not None else threading.Lock()
+        self._log_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self.checkpoints = 0
+        started = time.perf_counter()
+        for partial in self.directory.glob(f"{_SNAPSHOT_PREFIX}*.tmp"):
+            partial.unlink()  # a checkpoint that died before its rename
+        snapshot = self._latest_snapshot()
+        self.snapshot_lsn = snapshot[0] if snapshot else 0
+        self.wal = WriteAheadLog(
+            self.directory / _WAL_DIR, sync_interval, segment_bytes, first_lsn=self.snapshot_lsn + 1
+        )
+        self.recovery = self._recover(snapshot, started)
+        self._wal_mark = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._snapshotter: threading.Thread | None = None
+        if snapshot_interval > 0:
+            self._snapshotter = threading.Thread(target=self._snapshot_loop, name="snapshotter", daemon=True)
+            self._snapshotter.start()
+
+    # -- writes ---------------------------------------------------------------
+
+    def put_many(self, collection: str, items: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """Insert or replace (doc_id, body) pairs (last wins per id); returns the lsn."""
+        latest = dict(items)
+        for doc_id in latest:
+            if not (doc_id or "").strip():
+                raise ValidationError("doc_id is required", details={"field": "doc_id"})
+        ops = [{"op": "put", "c": collection, "id": doc_id, "body": body} for doc_id, body in latest.items()]
+        with self.lock:
+            lsn = self.log(ops)
+            self._put(collection, latest)
+        return self._acknowledge(lsn)
+
+    def put(self, collection: str, doc_id: str, body: dict[str, Any]) -> int:
+        """Insert or replace one document; returns the lsn."""
+        return self.put_many(collection, ((doc_id, body),))
+
+    def delete(self, collection: str, doc_id: str) -> bool:
+        """Delete a document. Returns True if removed."""
+        with self.lock:
+            if self.document_model.get(collection, doc_id) is None:
+                return False
+            lsn = self.log([{"op": "del", "c": collection, "id": doc_id}])
+            self._delete(collection, doc_id)
+        self._acknowledge(lsn)
+        return True
+
+    def put_vector(self, entry: VectorEntry) -> int:
+        """Add or replace a vector; returns the lsn."""
+        store = self._require_vector_store()
+        with self.lock:
+            store.validate_entry(entry)
+            lsn = self.log([{"op": "vput", "id": entry.id, "vector": list(entry.vector), "metadata": entry.metadata}])
+            store.add(entry)
+        return self._acknowledge(lsn)
+
+    def delete_vector(self, id: str) -> bool:
+        """Delete a vector. Returns True if removed."""
+        store = self._require_vector_store()
+        with self.lock:
+            if store.get(id) is None:
+                return False
+            lsn = self.log([{"op": "vdel", "id": id}])
+            store.delete(id)
+        self._acknowledge(lsn)
+        return True
+
+    def log(self, ops: list[dict[str, Any]]) -> int:
+        """
+        Append ops before applying them (call under lock); returns the last
+        lsn without waiting. Raises if the WAL is closed or failed, in which
+        case the caller must not apply them.
+        """
+        with self._log_lock:
+            lsn = self.wal.append_many(ops)
+        if self.snapshot_wal_bytes and self.wal.bytes_written - self._wal_mark >= self.snapshot_wal_bytes:
+            self._wake.set()
+        return lsn
+
+    def wait(self, lsn: int | None = None) -> bool:
+        """Block until lsn (default: everything logged so far) is durable."""
+        return self.wal.wait(self.wal.last_lsn if lsn is None else lsn)
+
+    def _acknowledge(self, lsn: int) -> int:
+        if self.wait_durable:
+            self.wal.wait(lsn)
+        return lsn
+
+    def _require_vector_store(self) -> VectorStore:
+        if self.vector_store is None:
+            raise ValidationError("no vector store attached", details={"field": "vector_store"})
+        return self.vector_store
+
+    # -- apply (write path and replay) ---------------------------------------
+
+    def _put(self, collection: str, latest: dict[str, dict[str, Any]]) -> None:
+        previous = self.document_model.insert_many(
+            collection, [Document(id=doc_id, body=body) for doc_id, body in latest.items()]
+        )
+        if self.indexing_engine is None or collection != self.index_collection:
+            return
+        for doc_id, old in zip(latest, previous):
+            if old is not None:
+                self.indexing_engine.remove(doc_id, _indexed(doc_id, old.body))
+        self.indexing_engine.index_many([(doc_id, _indexed(doc_id, body)) for doc_id, body in latest.items()])
+
+    def _delete(self, collection: str, doc_id: str) -> bool:
+        old = self.document_model.get(collection, doc_id)
+        if old is None:
+            return False
+        self.document_model.delete(collection, doc_id)
+        if self.indexing_engine is not None and collection == self.index_collection:
+            self.indexing_engine.remove(doc_id, _indexed(doc_id, old.body))
+        return True
+
+    def apply(self, ops: Iterable[dict[str, Any]]) -> int:
+        """Apply logged ops without logging them (replay); runs of puts go in batches. Returns ops applied."""
+        applied = 0
+        batch: dict[str, dict[str, Any]] = {}
+        batch_collection: str | None = None
+        for op in ops:
+            kind = op.get("op")
+            if batch and (kind != "put" or op["c"] != batch_collection or len(batch) >= _APPLY_BATCH):
+                self._put(batch_collection, batch)
+                batch = {}
+            if kind == "put":
+                batch_collection = op["c"]
+                batch[op["id"]] = op["body"]
+            elif kind == "del":
+                self._delete(op["c"], op["id"])
+            elif kind == "vput":
+                self._require_vector_store().add(VectorEntry(op["id"], op["vector"], op.get("metadata") or {}))
+            elif kind == "vdel":
+                self._require_vector_store().delete(op["id"])
+            else:
+                raise ExecutionError("unknown log op", details={"op": kind, "allowed": list(WAL_OPS)})
+            applied += 1
+        if batch:
+            self._put(batch_collection, batch)
+        return applied
+
+    # -- snapshots -----------------------------------------------------------
+
+    def _snapshots(self) -> list[tuple[int, Path]]:
+        out = []
+        for path in self.directory.glob(f"{_SNAPSHOT_PREFIX}*{_SNAPSHOT_SUFFIX}"):
+            digits = path.name[len(_SNAPSHOT_PREFIX) : -len(_SNAPSHOT_SUFFIX)]
+            if digits.isdigit():
+                out.append((int(digits), path))
+        return sorted(out)
+
+    def _latest_snapshot(self) -> tuple[int, Path] | None:
+        snapshots = self._snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def _snapshot_ops(self) -> tuple[int, list[tuple[str, Any]], list[VectorEntry]]:
+        # Under lock: the lsn and references to every live document and vector.
+        with self.lock:
+            with self._log_lock:
+                lsn = self.wal.rotate()
+            model = self.document_model
+            documents = [(name, list(model.get_collection(name).values())) for name in model.list_collections()]
+            vectors = self.vector_store.entries() if self.vector_store is not None else []
+        return lsn, documents, vectors
+
+    def checkpoint(self) -> dict[str, Any]:
+        """
+        Write a snapshot covering everything logged so far, then drop older
+        snapshots and covered WAL segments. Documents are captured by
+        reference under the lock and serialized outside it.
+        """
+        with self._checkpoint_lock:
+            started = time.perf_counter()
+            lsn, documents, vectors = self._snapshot_ops()
+            if lsn == self.snapshot_lsn and self._latest_snapshot() is not None:
+                return {"lsn": lsn, "written": False}
+            path = self.directory / _snapshot_name(lsn)
+            tmp = path.with_suffix(".tmp")
+            records = 0
+            with open(tmp, "wb") as f:
+                header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "lsn": lsn}
+                f.write(_encode(header).encode("utf-8") + b"\n")
+                for collection, docs in documents:
+                    lines = [
+                        _encode({"op": "put", "c": collection, "id": d.id, "body": d.body}) for d in docs
+                    ]
+                    if lines:
+                        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    records += len(lines)
+                for entry in vectors:
+                    op = {"op": "vput", "id": entry.id, "vector": list(entry.vector), "metadata": entry.metadata}
+                    f.write(_encode(op).encode("utf-8") + b"\n")
+                records += len(vectors)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            # The rename must be durable before the snapshots and WAL segments it replaces go.
+            _fsync_dir(self.directory)
+            for old_lsn, old in self._snapshots():
+                if old_lsn < lsn:
+                    old.unlink()
+            self.snapshot_lsn = lsn
+            self.wal.truncate(lsn)
+            self._wal_mark = self.wal.bytes_written
+            self.checkpoints += 1
+            seconds = time.perf_counter() - started
+            size = path.stat().st_size
+            _logger.info("durable_store.checkpoint lsn=%s records=%s bytes=%s seconds=%.3f", lsn, records, size, seconds)
+            return {"lsn": lsn, "written": True, "records": records, "bytes": size, "seconds": seconds}
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.snapshot_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self.wal.last_lsn > self.snapshot_lsn:
+                try:
+                    self.checkpoint()
+                except Exception:
+                    _logger.exception("durable_store.checkpoint failed directory=%s", self.directory)
+
+    # -- recovery ------------------------------------------------------------
+
+    @staticmethod
+    def _read_snapshot(path: Path) -> Iterator[dict[str, Any]]:
+        with open(path, encoding="utf-8") as f:
+            header = _decode(f.readline())
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+                raise ExecutionError(
+                    "unsupported snapshot", details={"path": str(path), "format": header.get("format")}
+                )
+            for line in f:
+                yield _decode(line)
+
+    def _recover(self, snapshot: tuple[int, Path] | None, started: float) -> dict[str, Any]:
+        snapshot_records = snapshot_bytes = 0
+        # Replay allocates millions of long-lived acyclic objects; the cyclic
+        # GC would rescan them over and over, so it is paused until done.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with self.lock:
+                if snapshot is not None:
+                    snapshot_records = self.apply(self._read_snapshot(snapshot[1]))
+                    snapshot_bytes = snapshot[1].stat().st_size
+                wal_bytes = self.wal.size_bytes()
+                replayed = self.apply(record for _, record in self.wal.replay(self.snapshot_lsn))
+        finally:
+            if gc_enabled:
+                gc.enable()
+        stats = {
+            "snapshot_lsn": self.snapshot_lsn,
+            "snapshot_records": snapshot_records,
+            "snapshot_bytes": snapshot_bytes,
+            "wal_records": replayed,
+            "wal_bytes": wal_bytes,
+            "lsn": self.wal.last_lsn,
+            "seconds": time.perf_counter() - started,
+        }
+        _logger.info(
+            "durable_store.recover snapshot_lsn=%s snapshot_records=%s wal_records=%s seconds=%.3f",
+            self.snapshot_lsn,
+            snapshot_records,
+            replayed,
+            stats["seconds"],
+        )
+        return stats
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def stats(self) -> dict[str, Any]:
+        """Lsns, WAL size/segments/syncs, checkpoints and the last recovery."""
+        return {
+            "lsn": self.wal.last_lsn,
+            "durable_lsn": self.wal.durable_lsn,
+            "snapshot_lsn": self.snapshot_lsn,
+            "wal_bytes": self.wal.size_bytes(),
+            "wal_segments": len(self.wal.segments()),
+            "wal_syncs": self.wal.syncs,
+            "checkpoints": self.checkpoints,
+            "recovery": dict(self.recovery),
+        }
+
+    def close(self) -> None:
+        """Stop the snapshot thread and flush the WAL. Idempotent."""
+        self._stop.set()
+        self._wake.set()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self.wal.close()
@@ -0,0 +1,203 @@
+"""
+File readers — stream records out of JSONL, CSV and Parquet files in chunks.
+JSONL is cut into blocks of whole lines (about chunk_bytes each), found by
+seeking for newlines in a read buffer or, with use_mmap, directly in a
+memory map; blocks parse independently, so they can go to a process pool
+(workers > 1) with a bounded number in flight, results kept in file order.
+Parse errors are counted per block with only the first max_errors kept, so
+a corrupt file costs counters, not memory. CSV (csv.DictReader; quoted
+fields may span lines, so it is read sequentially) and Parquet (pyarrow,
+optional) yield row batches.
+Modular, testable.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterator
+
+from errors.error_model import DependencyError, ValidationError
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only parquet needs it
+    pq = None  # type: ignore[assignment]
+
+FILE_FORMATS = ("jsonl", "csv", "parquet")
+FORMAT_SUFFIXES = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_ROW_BATCH = 10_000
+DEFAULT_MAX_ERRORS = 100
+
+# A parsed chunk: (records, error_count, first errors as "line N: message").
+Chunk = tuple[list[dict[str, Any]], int, list[str]]
+
+_json_decode = json.JSONDecoder().decode
+
+
+def require_pyarrow() -> Any:
+    """Return pyarrow.parquet or raise DependencyError when it is not installed."""
+    if pq is None:
+        raise DependencyError(
+            "pyarrow is required for parquet files",
+            details={"dependency": "pyarrow"},
+            retryable=False,
+        )
+    return pq
+
+
+def detect_format(path: str, file_format: str | None = None) -> str:
+    """Explicit format, else from the file suffix. Validates against FILE_FORMATS."""
+    fmt = file_format or FORMAT_SUFFIXES.get(os.path.splitext(path)[1].lower())
+    if fmt not in FILE_FORMATS:
+        raise ValidationError(
+            "Unknown file format", details={"path": path, "format": file_format, "allowed": list(FILE_FORMATS)}
+        )
+    return fmt
+
+
+def iter_line_blocks(
+    path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES, use_mmap: bool = False
+) -> Iterator[tuple[int, bytes]]:
+    """Yield (first line number, block of whole lines) of roughly chunk_bytes each."""
+    line = 1
+    with open(path, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start, size = 0, len(mm)
+                while start < size:
+                    end = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+                    end = size if end < 0 else end + 1
+                    block = mm[start:end]
+                    yield line, block
+                    line += block.count(b"\n")
+                    start = end
+            return
+        tail = b""
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                tail += data
+                continue
+            block, tail = tail + data[: cut + 1], data[cut + 1 :]
+            yield line, block
+            line += block.count(b"\n")
+        if tail:
+            yield line, tail
+
+
+def _line_error(errors: list[str], max_errors: int, line: int, message: str) -> None:
+    if len(errors) < max_errors:
+        errors.append(f"line {line}: {message}")
+
+
+def parse_jsonl_block(first_line: int, block: bytes, max_errors: int = DEFAULT_MAX_ERRORS) -> Chunk:
+    """Parse one block of JSONL; blank lines are skipped, non-objects are errors. Runs in workers."""
+    try:
+        lines: list[Any] = block.decode().split("\n")
+        decode = _json_decode
+    except UnicodeDecodeError:
+        lines, decode = block.split(b"\n"), json.loads
+    records: list[dict[str, Any]] = []
+    append = records.append
+    errors: list[str] = []
+    failed = 0
+    for i, text in enumerate(lines):
+        if not text.strip():
+            continue
+        try:
+            value = decode(text)
+        except ValueError as e:
+            failed += 1
+            _line_error(errors, max_errors, first_line + i, f"invalid JSON ({e.__class__.__name__})")
+            continue
+        if type(value) is dict:
+            append(value)
+        else:
+            failed += 1
+            _line_error(errors, max_errors, first_line + i, "record must be a JSON object")
+    return records, failed, errors
+
+
+def read_jsonl(
+    path: str,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    use_mmap: bool = False,
+    workers: int = 1,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+) -> Iterator[Chunk]:
+    """
+    Parsed JSONL chunks in file order; workers > 1 parses on a process pool
+    with 2 x workers blocks in flight.
+    """
+    blocks = iter_line_blocks(path, chunk_bytes, use_mmap)
+    if workers <= 1:
+        for first_line, block in blocks:
+            yield parse_jsonl_block(first_line, block, max_errors)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque[Future] = deque()
+    try:
+        for first_line, block in blocks:
+            pending.append(pool.submit(parse_jsonl_block, first_line, block, max_errors))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def read_csv(
+    path: str,
+    batch_size: int = DEFAULT_ROW_BATCH,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    delimiter: str = ",",
+    encoding: str = "utf-8",
+) -> Iterator[Chunk]:
+    """Rows as dicts keyed by the header, batch_size per chunk; rows with extra fields are errors."""
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        records: list[dict[str, Any]] = []
+        errors: list[str] = []
+        failed = 0
+        while True:
+            try:
+                row = next(reader, None)
+            except csv.Error as e:
+                # Malformed input the csv module cannot resync from: report and stop.
+                _line_error(errors, max_errors, reader.line_num, str(e))
+                yield records, failed + 1, errors
+                return
+            if row is None:
+                break
+            if None in row:
+                failed += 1
+                _line_error(errors, max_errors, reader.line_num, f"expected {len(reader.fieldnames or ())} fields")
+            else:
+                records.append(row)
+            if len(records) >= batch_size:
+                yield records, failed, errors
+                records, errors, failed = [], [], 0
+        if records or failed:
+            yield records, failed, errors
+
+
+def read_parquet(path: str, batch_size: int = DEFAULT_ROW_BATCH) -> Iterator[Chunk]:
+    """Row groups streamed as batch_size record batches (pyarrow)."""
+    parquet = require_pyarrow()
+    for batch in parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield batch.to_pylist(), 0, []
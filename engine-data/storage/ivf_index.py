@@ -0,0 +1,247 @@
+"""
+IVF index — approximate nearest-neighbour search over a VectorMatrix.
+Spherical k-means coarse centroids partition rows into inverted lists;
+a query scans only the nprobe lists whose centroids score highest.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from errors.error_model import ValidationError
+from storage.vector_matrix import VectorMatrix, np, require_numpy, select_top_k
+
+_logger = logging.getLogger("engine-data")
+
+_TRAIN_SAMPLE_PER_LIST = 256
+_ASSIGN_CHUNK_ROWS = 65536
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of a VectorMatrix.
+    Until trained (explicitly, or automatically once train_threshold rows
+    exist) searches fall back to the exact scan. Knobs: n_lists (coarse
+    centroids, default ~sqrt(rows)) and nprobe (lists scanned per query).
+    State is a centroid matrix plus a per-row label array (-1 unassigned);
+    inverted lists are int64 row arrays regrouped lazily from the labels.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        matrix: VectorMatrix,
+        n_lists: int | None = None,
+        nprobe: int = 8,
+        train_iters: int = 10,
+        train_threshold: int = 1024,
+        seed: int = 0,
+    ) -> None:
+        require_numpy()
+        if n_lists is not None and n_lists < 1:
+            raise ValidationError("n_lists must be >= 1", details={"n_lists": n_lists})
+        if nprobe < 1:
+            raise ValidationError("nprobe must be >= 1", details={"nprobe": nprobe})
+        self._matrix = matrix
+        self._n_lists = n_lists
+        self.nprobe = nprobe
+        self._train_iters = max(1, train_iters)
+        self._train_threshold = max(1, train_threshold)
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Any = None
+        self._labels = np.full(0, -1, dtype=np.int32)
+        self._lists: list[Any] | None = None
+
+    @property
+    def trained(self) -> bool:
+        """True once coarse centroids exist."""
+        return self._centroids is not None
+
+    def n_lists(self) -> int:
+        """Number of inverted lists (0 until trained)."""
+        return 0 if self._centroids is None else int(self._centroids.shape[0])
+
+    def options(self) -> dict[str, Any]:
+        """Constructor knobs (for snapshots). Testable."""
+        return {
+            "n_lists": self._n_lists,
+            "nprobe": self.nprobe,
+            "train_iters": self._train_iters,
+            "train_threshold": self._train_threshold,
+        }
+
+    def state(self, rows: Any) -> dict[str, Any]:
+        """Centroids plus labels of the given (live) rows; {} while untrained."""
+        if self._centroids is None:
+            return {}
+        return {"centroids": self._centroids, "labels": self._labels_for(self._matrix.rows())[rows]}
+
+    def restore(self, arrays: dict[str, Any]) -> None:
+        """Adopt saved centroids and per-row labels (arrays may be memory-mapped)."""
+        self._centroids = arrays["centroids"]
+        self._labels = arrays["labels"]
+        self._lists = None
+
+    def _labels_for(self, rows: int) -> Any:
+        if self._labels.shape[0] < rows:
+            grown = np.full(max(rows, self._labels.shape[0] * 2), -1, dtype=np.int32)
+            grown[: self._labels.shape[0]] = self._labels
+            self._labels = grown
+        return self._labels[:rows]
+
+    def _group(self) -> list[Any]:
+        """Inverted lists regrouped from labels with one stable argsort."""
+        if self._lists is None:
+            labels = self._labels_for(self._matrix.rows())
+            assigned = np.flatnonzero(labels >= 0)
+            order = assigned[np.argsort(labels[assigned], kind="stable")]
+            counts = np.bincount(labels[assigned], minlength=self.n_lists())
+            self._lists = np.split(order.astype(np.int64), np.cumsum(counts)[:-1])
+        return self._lists
+
+    def train(self) -> None:
+        """Fit centroids with spherical k-means on a sample of live rows, then assign all rows."""
+        live = np.flatnonzero(self._matrix.live_mask())
+        if live.size == 0:
+            raise ValidationError("cannot train IVF index on an empty store", details={"rows": 0})
+        k = self._n_lists or max(1, int(round(live.size ** 0.5)))
+        k = min(k, live.size)
+        sample_size = min(live.size, k * _TRAIN_SAMPLE_PER_LIST)
+        sample = self._rng.choice(live, size=sample_size, replace=False)
+        data = self._matrix.unit_rows()[sample]
+        centroids = data[self._rng.choice(sample_size, size=k, replace=False)].copy()
+        for _ in range(self._train_iters):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=k)
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                sums[empty] = data[self._rng.choice(sample_size, size=empty.size)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+        self._centroids = centroids.astype(np.float32)
+        self._labels = np.full(self._matrix.rows(), -1, dtype=np.int32)
+        for start in range(0, live.size, _ASSIGN_CHUNK_ROWS):
+            rows = live[start:start + _ASSIGN_CHUNK_ROWS]
+            self._labels[rows] = np.argmax(self._matrix.unit_rows()[rows] @ self._centroids.T, axis=1)
+        self._lists = None
+        _logger.info("ivf_index.train rows=%s lists=%s sample=%s", live.size, k, sample_size)
+
+    def _maybe_train(self) -> None:
+        if self._centroids is None and self._matrix.size() >= self._train_threshold:
+            self.train()
+
+    def add(self, row: int) -> None:
+        """Assign a (new or overwritten) row to its nearest centroid list."""
+        if self._centroids is None:
+            return
+        self.remove(row)
+        label = int(np.argmax(self._centroids @ self._matrix.unit_rows()[row]))
+        self._labels_for(row + 1)[row] = label
+        if self._lists is not None:
+            self._lists[label] = np.append(self._lists[label], row)
+
+    def remove(self, row: int) -> None:
+        """Drop a row from its inverted list."""
+        if self._centroids is None or row >= self._labels.shape[0]:
+            return
+        label = int(self._labels[row])
+        if label < 0:
+            return
+        self._labels[row] = -1
+        if self._lists is not None:
+            rows = self._lists[label]
+            self._lists[label] = rows[rows != row]
+
+    def remap(self, remap: Any) -> None:
+        """Apply a VectorMatrix.compact() remap (old row -> new row, -1 dropped)."""
+        if self._centroids is None:
+            return
+        old = self._labels_for(remap.shape[0])
+        kept = remap >= 0
+        labels = np.full(int(kept.sum()), -1, dtype=np.int32)
+        labels[remap[kept]] = old[kept]
+        self._labels = labels
+        self._lists = None
+
+    def _probe(self, q: Any, top_k: int, min_score: float | None, nprobe: int) -> list[tuple[int, float]]:
+        lists = self._group()
+        centroid_scores = self._centroids @ q
+        probes = min(nprobe, len(lists))
+        if probes < len(lists):
+            labels = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        else:
+            labels = np.arange(len(lists))
+        candidates = np.concatenate([lists[int(c)] for c in labels])
+        if candidates.size == 0:
+            return []
+        scores = self._matrix.unit_rows()[candidates] @ q
+        return select_top_k(scores, top_k, min_score, rows=candidates)
+
+    def search(
+        self,
+        query: list[float],
+        top_k: int,
+        min_score: float | None = None,
+        nprobe: int | None = None,
+    ) -> list[tuple[int, float]]:
+        """Approximate top-k (row, score). Exact scan while untrained."""
+        self._maybe_train()
+        if self._centroids is None:
+            return self._matrix.search(query, top_k, min_score)
+        q = self._matrix.normalize_query(query)
+        return self._probe(q, top_k, min_score, nprobe or self.nprobe)
+
+    def search_batch(
+        self,
+        queries: Any,
+        top_k: int,
+        min_score: float | None = None,
+        nprobe: int | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Approximate top-k per query. Exact batched scan while untrained."""
+        self._maybe_train()
+        if self._centroids is None:
+            return self._matrix.search_batch(queries, top_k, min_score)
+        q = self._matrix.normalize_queries(queries)
+        return [self._probe(row, top_k, min_score, nprobe or self.nprobe) for row in q]
+
+
+def recall_report(
+    matrix: VectorMatrix,
+    index: Any,
+    queries: Any,
+    top_k: int = 10,
+) -> dict[str, Any]:
+    """
+    Recall@k of an approximate index (IVF or quantized) against the exact
+    scan for the given queries, with mean per-query latency of both. Testable.
+    """
+    q = np.asarray(queries, dtype=np.float32)
+    if q.ndim != 2 or q.shape[0] == 0:
+        raise ValidationError("queries must be a non-empty 2-D batch", details={"field": "queries"})
+    t0 = time.perf_counter()
+    exact = [matrix.search(row, top_k) for row in q]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(q)
+    t0 = time.perf_counter()
+    approx = [index.search(row, top_k) for row in q]
+    ann_ms = (time.perf_counter() - t0) * 1000 / len(q)
+    hits = 0
+    total = 0
+    for e, a in zip(exact, approx):
+        truth = {r for r, _ in e}
+        hits += len(truth.intersection(r for r, _ in a))
+        total += len(truth)
+    return {
+        "index": index.kind,
+        "options": index.options(),
+        "k": top_k,
+        "queries": int(len(q)),
+        "recall_at_k": hits / total if total else 1.0,
+        "exact_ms": exact_ms,
+        "ann_ms": ann_ms,
+    }
@@ -0,0 +1,120 @@
+"""
+Metadata index — per-field inverted indexes over VectorEntry metadata.
+Resolves a filter such as {"tenant": "t1", "type": ["a", "b"]} to candidate
+rows before any vector is scored. Fields are ANDed; a list value is any-of.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterator
+
+from errors.error_model import ValidationError
+from storage.vector_matrix import np, require_numpy
+
+_logger = logging.getLogger("engine-data")
+
+
+def _values(value: Any) -> Iterator[Any]:
+    """Hashable index values for a metadata value; list values index each element."""
+    items = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+    for v in items:
+        try:
+            hash(v)
+        except TypeError:
+            continue
+        yield v
+
+
+def validate_filter(filter: Any) -> dict[str, list[Any]]:
+    """Normalize a filter to field -> allowed values. Raises ValidationError if malformed."""
+    if not isinstance(filter, dict):
+        raise ValidationError("filter must be a dict", details={"field": "filter"})
+    out: dict[str, list[Any]] = {}
+    for field_name, value in filter.items():
+        if not isinstance(field_name, str) or not field_name:
+            raise ValidationError("filter field must be a non-empty string", details={"field": field_name})
+        out[field_name] = list(_values(value))
+    return out
+
+
+def matches_filter(metadata: dict[str, Any] | None, filter: dict[str, list[Any]]) -> bool:
+    """True if metadata satisfies a normalized filter. Testable."""
+    metadata = metadata or {}
+    for field_name, allowed in filter.items():
+        if field_name not in metadata:
+            return False
+        if not any(v in allowed for v in _values(metadata[field_name])):
+            return False
+    return True
+
+
+class MetadataIndex:
+    """
+    field -> value -> set of rows. Maintained alongside a VectorMatrix:
+    add/remove on row changes, remap after compaction.
+    """
+
+    def __init__(self) -> None:
+        require_numpy()
+        self._fields: dict[str, dict[Any, set[int]]] = {}
+
+    def add(self, row: int, metadata: dict[str, Any] | None) -> None:
+        """Index every top-level metadata field of row."""
+        for field_name, value in (metadata or {}).items():
+            postings = self._fields.setdefault(field_name, {})
+            for v in _values(value):
+                postings.setdefault(v, set()).add(row)
+
+    def remove(self, row: int, metadata: dict[str, Any] | None) -> None:
+        """Unindex row for the metadata it was added with."""
+        for field_name, value in (metadata or {}).items():
+            postings = self._fields.get(field_name)
+            if postings is None:
+                continue
+            for v in _values(value):
+                rows = postings.get(v)
+                if rows is None:
+                    continue
+                rows.discard(row)
+                if not rows:
+                    del postings[v]
+            if not postings:
+                del self._fields[field_name]
+
+    def remap(self, remap: Any) -> None:
+        """Apply a VectorMatrix.compact() remap (old row -> new row, -1 dropped)."""
+        for postings in self._fields.values():
+            for v, rows in list(postings.items()):
+                postings[v] = {int(remap[r]) for r in rows if remap[r] >= 0}
+
+    def fields(self) -> list[str]:
+        """Indexed field names. Testable."""
+        return list(self._fields.keys())
+
+    def candidate_rows(self, filter: dict[str, list[Any]]) -> Any:
+        """
+        Sorted int64 rows matching a normalized filter. Per-field unions are
+        intersected smallest-first so cost follows the most selective field.
+        """
+        per_field: list[set[int]] = []
+        for field_name, allowed in filter.items():
+            postings = self._fields.get(field_name, {})
+            matched: set[int] = set()
+            for v in allowed:
+                matched |= postings.get(v, set())
+            if not matched:
+                return np.empty(0, dtype=np.int64)
+            per_field.append(matched)
+        if not per_field:
+            raise ValidationError("filter must name at least one field", details={"field": "filter"})
+        per_field.sort(key=len)
+        rows = set(per_field[0])
+        for other in per_field[1:]:
+            rows.intersection_update(other)
+            if not rows:
+                break
+        out = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        out.sort()
+        _logger.debug("metadata_index.candidate_rows fields=%s rows=%s", len(per_field), out.size)
+        return out
@@ -0,0 +1,305 @@
+"""
+Quantized indexes — compact codes for VectorMatrix rows.
+ScalarQuantizer stores one uint8 per dimension (sq8); ProductQuantizer
+splits vectors into m subspaces with 256-entry trained codebooks (pq).
+Search uses asymmetric distance computation (float query vs coded rows)
+and can re-rank the best candidates exactly against the float matrix,
+which stays on disk when the store is opened from a memory-mapped snapshot.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any
+
+from errors.error_model import ValidationError
+from storage.vector_matrix import VectorMatrix, np, require_numpy, select_top_k
+
+_logger = logging.getLogger("engine-data")
+
+_SCAN_CHUNK_ROWS = 4096
+
+
+class QuantizedIndex(ABC):
+    """
+    Base for code-based indexes over a VectorMatrix. Rows are encoded on add
+    once trained (explicitly or when train_threshold rows exist); until then
+    search is the exact scan. rerank_factor > 0 re-scores the best
+    top_k * rerank_factor ADC candidates exactly.
+    """
+
+    kind = "quantized"
+    train_sample = 65536
+
+    def __init__(
+        self,
+        matrix: VectorMatrix,
+        rerank_factor: int = 0,
+        train_threshold: int = 1024,
+        seed: int = 0,
+    ) -> None:
+        require_numpy()
+        if rerank_factor < 0:
+            raise ValidationError("rerank_factor must be >= 0", details={"rerank_factor": rerank_factor})
+        self._matrix = matrix
+        self.rerank_factor = rerank_factor
+        self._train_threshold = max(1, train_threshold)
+        self._rng = np.random.default_rng(seed)
+        self._codes: Any = None
+        self._trained = False
+
+    @property
+    def trained(self) -> bool:
+        """True once codebooks exist."""
+        return self._trained
+
+    @abstractmethod
+    def code_size(self) -> int:
+        """Bytes per encoded vector."""
+
+    def memory_per_vector(self) -> int:
+        """Resident bytes per vector for the codes (float rows excluded)."""
+        return self.code_size()
+
+    def options(self) -> dict[str, Any]:
+        """Constructor knobs (for snapshots). Testable."""
+        return {"rerank_factor": self.rerank_factor, "train_threshold": self._train_threshold}
+
+    @abstractmethod
+    def _fit(self, sample: Any) -> None:
+        """Train codebooks on a float sample."""
+
+    @abstractmethod
+    def _encode(self, rows: Any) -> Any:
+        """uint8 codes for float rows."""
+
+    @abstractmethod
+    def _codebooks(self) -> dict[str, Any]:
+        """Trained state as named arrays."""
+
+    @abstractmethod
+    def _load_codebooks(self, arrays: dict[str, Any]) -> None:
+        """Adopt arrays returned by _codebooks()."""
+
+    @abstractmethod
+    def _adc(self, q: Any, codes: Any) -> Any:
+        """Approximate scores of query q against codes."""
+
+    def state(self, rows: Any) -> dict[str, Any]:
+        """Codebooks plus codes of the given (live) rows; {} while untrained."""
+        if not self._trained:
+            return {}
+        return {**self._codebooks(), "codes": self._codes[rows]}
+
+    def restore(self, arrays: dict[str, Any]) -> None:
+        """Adopt saved codebooks and per-row codes (arrays may be memory-mapped)."""
+        self._load_codebooks(arrays)
+        self._codes = arrays["codes"]
+        self._trained = True
+
+    def _reserve(self, rows: int) -> None:
+        capacity = self._codes.shape[0]
+        if rows <= capacity:
+            return
+        grown = np.zeros((max(rows, capacity * 2),) + self._codes.shape[1:], dtype=np.uint8)
+        grown[:capacity] = self._codes
+        self._codes = grown
+
+    def train(self) -> None:
+        """Fit codebooks on a sample of live rows, then encode every row."""
+        live = np.flatnonzero(self._matrix.live_mask())
+        if live.size == 0:
+            raise ValidationError("cannot train quantizer on an empty store", details={"rows": 0})
+        sample = self._rng.choice(live, size=min(live.size, self.train_sample), replace=False)
+        self._fit(np.asarray(self._matrix.unit_rows()[np.sort(sample)], dtype=np.float32))
+        n = self._matrix.rows()
+        self._codes = np.zeros((n, self.code_size()), dtype=np.uint8)
+        for start in range(0, n, _SCAN_CHUNK_ROWS):
+            stop = min(n, start + _SCAN_CHUNK_ROWS)
+            self._codes[start:stop] = self._encode(self._matrix.unit_rows()[start:stop])
+        self._trained = True
+        _logger.info("quantized_index.train kind=%s rows=%s code_size=%s", self.kind, n, self.code_size())
+
+    def _maybe_train(self) -> None:
+        if not self._trained and self._matrix.size() >= self._train_threshold:
+            self.train()
+
+    def add(self, row: int) -> None:
+        """Encode a (new or overwritten) row."""
+        if not self._trained:
+            return
+        self._reserve(row + 1)
+        self._codes[row] = self._encode(self._matrix.unit_rows()[row:row + 1])[0]
+
+    def remove(self, row: int) -> None:
+        """No-op: tombstones in the matrix live mask exclude the row."""
+
+    def remap(self, remap: Any) -> None:
+        """Apply a VectorMatrix.compact() remap (old row -> new row, -1 dropped)."""
+        if not self._trained:
+            return
+        kept = np.flatnonzero(remap >= 0)
+        self._codes = np.ascontiguousarray(self._codes[kept])
+
+    def _scores(self, q: Any) -> Any:
+        n = self._matrix.rows()
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _SCAN_CHUNK_ROWS):
+            stop = min(n, start + _SCAN_CHUNK_ROWS)
+            scores[start:stop] = self._adc(q, self._codes[start:stop])
+        live = self._matrix.live_mask()
+        if not live.all():
+            scores[~live] = -np.inf
+        return scores
+
+    def _query(self, q: Any, top_k: int, min_score: float | None) -> list[tuple[int, float]]:
+        scores = self._scores(q)
+        if not self.rerank_factor:
+            return select_top_k(scores, top_k, min_score)
+        candidates = np.asarray([r for r, _ in select_top_k(scores, top_k * self.rerank_factor)], dtype=np.int64)
+        if candidates.size == 0:
+            return []
+        exact = np.asarray(self._matrix.unit_rows()[np.sort(candidates)] @ q)
+        return select_top_k(exact, top_k, min_score, rows=np.sort(candidates))
+
+    def search(
+        self,
+        query: list[float],
+        top_k: int,
+        min_score: float | None = None,
+    ) -> list[tuple[int, float]]:
+        """Approximate top-k (row, score) by ADC, optionally re-ranked exactly."""
+        self._maybe_train()
+        if not self._trained:
+            return self._matrix.search(query, top_k, min_score)
+        return self._query(self._matrix.normalize_query(query), top_k, min_score)
+
+    def search_batch(
+        self,
+        queries: Any,
+        top_k: int,
+        min_score: float | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """Approximate top-k per query. Exact batched scan while untrained."""
+        self._maybe_train()
+        if not self._trained:
+            return self._matrix.search_batch(queries, top_k, min_score)
+        return [self._query(q, top_k, min_score) for q in self._matrix.normalize_queries(queries)]
+
+
+class ScalarQuantizer(QuantizedIndex):
+    """
+    sq8: per-dimension affine map of [min, max] onto 0..255.
+    q . x ~= q . lo + (q * scale) . codes, computed in float32.
+    """
+
+    kind = "sq8"
+
+    def __init__(self, matrix: VectorMatrix, **options: Any) -> None:
+        super().__init__(matrix, **options)
+        self._lo: Any = None
+        self._scale: Any = None
+
+    def code_size(self) -> int:
+        return self._matrix.dimension
+
+    def _fit(self, sample: Any) -> None:
+        lo = sample.min(axis=0)
+        hi = sample.max(axis=0)
+        self._lo = lo.astype(np.float32)
+        self._scale = np.maximum((hi - lo) / 255.0, 1e-12).astype(np.float32)
+
+    def _encode(self, rows: Any) -> Any:
+        return np.clip(np.rint((rows - self._lo) / self._scale), 0, 255).astype(np.uint8)
+
+    def _codebooks(self) -> dict[str, Any]:
+        return {"lo": self._lo, "scale": self._scale}
+
+    def _load_codebooks(self, arrays: dict[str, Any]) -> None:
+        self._lo = arrays["lo"]
+        self._scale = arrays["scale"]
+
+    def _adc(self, q: Any, codes: Any) -> Any:
+        return codes.astype(np.float32) @ (q * self._scale) + float(q @ self._lo)
+
+
+class ProductQuantizer(QuantizedIndex):
+    """
+    pq: m subspaces x 256 centroids (k-means per subspace), one byte per
+    subspace. ADC builds an (m, 256) table of query-centroid dot products
+    and sums m table lookups per row.
+    """
+
+    kind = "pq"
+    train_sample = 16384
+
+    def __init__(
+        self,
+        matrix: VectorMatrix,
+        m: int | None = None,
+        train_iters: int = 15,
+        **options: Any,
+    ) -> None:
+        super().__init__(matrix, **options)
+        dim = matrix.dimension
+        if m is None:
+            m = max(c for c in range(1, max(1, dim // 8) + 1) if dim % c == 0)
+        if m < 1 or dim % m != 0:
+            raise ValidationError("pq m must divide the dimension", details={"m": m, "dimension": dim})
+        self._m = m
+        self._train_iters = max(1, train_iters)
+        self._centroids: Any = None
+
+    def code_size(self) -> int:
+        return self._m
+
+    def options(self) -> dict[str, Any]:
+        return {**super().options(), "m": self._m, "train_iters": self._train_iters}
+
+    def _split(self, rows: Any) -> Any:
+        return rows.reshape(rows.shape[0], self._m, -1)
+
+    def _fit(self, sample: Any) -> None:
+        parts = self._split(sample)
+        ks = min(256, sample.shape[0])
+        centroids = np.zeros((self._m, 256, parts.shape[2]), dtype=np.float32)
+        for j in range(self._m):
+            x = parts[:, j, :]
+            c = x[self._rng.choice(x.shape[0], size=ks, replace=False)].copy()
+            for _ in range(self._train_iters):
+                labels = self._nearest(x, c)
+                order = np.argsort(labels, kind="stable")
+                counts = np.bincount(labels, minlength=ks)
+                filled = np.flatnonzero(counts)
+                starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+                sums = np.add.reduceat(x[order], starts, axis=0)
+                c[filled] = sums / counts[filled, None]
+            centroids[j, :ks] = c
+            centroids[j, ks:] = c[0]
+        self._centroids = centroids
+
+    @staticmethod
+    def _nearest(x: Any, c: Any) -> Any:
+        dist = (c * c).sum(axis=1)[None, :] - 2.0 * (x @ c.T)
+        return np.argmin(dist, axis=1)
+
+    def _encode(self, rows: Any) -> Any:
+        parts = self._split(np.asarray(rows, dtype=np.float32))
+        codes = np.empty((parts.shape[0], self._m), dtype=np.uint8)
+        for j in range(self._m):
+            codes[:, j] = self._nearest(parts[:, j, :], self._centroids[j])
+        return codes
+
+    def _codebooks(self) -> dict[str, Any]:
+        return {"centroids": self._centroids}
+
+    def _load_codebooks(self, arrays: dict[str, Any]) -> None:
+        self._centroids = arrays["centroids"]
+
+    def _adc(self, q: Any, codes: Any) -> Any:
+        table = np.einsum("mkd,md->mk", self._centroids, q.reshape(self._m, -1))
+        scores = np.zeros(codes.shape[0], dtype=np.float32)
+        for j in range(self._m):
+            scores += table[j].take(codes[:, j])
+        return scores
@@ -0,0 +1,351 @@
+"""
+Vector matrix — contiguous, pre-normalized float32 storage for VectorStore.
+Rows are addressed through id <-> row maps; deletes tombstone a row and
+compaction reclaims tombstoned rows in one pass.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Sequence
+
+from errors.error_model import DependencyError, ValidationError
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only matrix-backed modes need it
+    np = None  # type: ignore[assignment]
+
+_logger = logging.getLogger("engine-data")
+
+_INITIAL_CAPACITY = 16
+_BATCH_CHUNK_ROWS = 65536
+
+
+def require_numpy() -> Any:
+    """Return the numpy module or raise DependencyError when it is not installed."""
+    if np is None:
+        raise DependencyError(
+            "numpy is required for matrix-backed vector storage",
+            details={"dependency": "numpy"},
+            retryable=False,
+        )
+    return np
+
+
+class VectorMatrix:
+    """
+    Row-major float32 matrix of unit vectors plus original norms.
+    Deleted rows are tombstoned in a live mask; compact() drops them and
+    returns an old-row -> new-row remap (-1 for dropped rows).
+    from_arrays() adopts existing (e.g. memory-mapped) arrays; ids and
+    metadata may then be lazy read-only sequences, copied into lists and
+    indexed by id only on first mutation or id lookup.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        compact_ratio: float = 0.25,
+        min_compact: int = 64,
+    ) -> None:
+        require_numpy()
+        if dimension is None or dimension < 1:
+            raise ValidationError("dimension must be >= 1", details={"dimension": dimension})
+        if not 0 < compact_ratio <= 1:
+            raise ValidationError("compact_ratio must be in (0, 1]", details={"compact_ratio": compact_ratio})
+        self.dimension = dimension
+        self._compact_ratio = compact_ratio
+        self._min_compact = max(1, min_compact)
+        self._data = np.zeros((_INITIAL_CAPACITY, dimension), dtype=np.float32)
+        self._norms = np.zeros(_INITIAL_CAPACITY, dtype=np.float32)
+        self._live = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._ids: Sequence[str | None] = []
+        self._metadata: Sequence[dict[str, Any] | None] = []
+        self._rows: dict[str, int] | None = {}
+        self._live_count = 0
+        self._dead = 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        data: Any,
+        norms: Any,
+        ids: Sequence[str],
+        metadata: Sequence[dict[str, Any] | None],
+        compact_ratio: float = 0.25,
+    ) -> VectorMatrix:
+        """Adopt unit rows and norms without copying; every row is live."""
+        m = cls(int(data.shape[1]), compact_ratio=compact_ratio)
+        if not (data.shape[0] == norms.shape[0] == len(ids) == len(metadata)):
+            raise ValidationError(
+                "snapshot arrays disagree on row count",
+                details={"data": int(data.shape[0]), "norms": int(norms.shape[0]), "ids": len(ids)},
+            )
+        m._data = data
+        m._norms = norms
+        m._live = np.ones(data.shape[0], dtype=bool)
+        m._ids = ids
+        m._metadata = metadata
+        m._rows = None
+        m._live_count = len(ids)
+        return m
+
+    def _row_map(self) -> dict[str, int]:
+        if self._rows is None:
+            self._rows = {id: i for i, id in enumerate(self._ids) if id is not None}
+        return self._rows
+
+    def _mutable(self) -> None:
+        if not isinstance(self._ids, list):
+            self._ids = list(self._ids)
+        if not isinstance(self._metadata, list):
+            self._metadata = list(self._metadata)
+
+    def _reserve(self, rows: int) -> None:
+        """Grow backing arrays geometrically so appends are amortized O(d)."""
+        capacity = self._data.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2)
+        data = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        data[:capacity] = self._data
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        norms[:capacity] = self._norms
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:capacity] = self._live
+        self._data, self._norms, self._live = data, norms, live
+
+    def upsert(self, id: str, vector: list[float], metadata: dict[str, Any] | None = None) -> int:
+        """Insert or overwrite the row for id in place. Returns the row."""
+        vec = np.asarray(vector, dtype=np.float32)
+        if vec.shape != (self.dimension,):
+            raise ValidationError(
+                "Vector dimension mismatch",
+                details={"expected": self.dimension, "actual": int(vec.size)},
+            )
+        rows = self._row_map()
+        self._mutable()
+        row = rows.get(id)
+        if row is None:
+            row = len(self._ids)
+            self._reserve(row + 1)
+            self._ids.append(id)
+            self._metadata.append(metadata)
+            rows[id] = row
+            self._live[row] = True
+            self._live_count += 1
+        else:
+            self._metadata[row] = metadata
+        norm = float(np.linalg.norm(vec))
+        self._data[row] = vec / norm if norm > 0 else 0.0
+        self._norms[row] = norm
+        return row
+
+    def remove(self, id: str) -> int | None:
+        """Tombstone the row for id. Returns the row, or None if absent."""
+        row = self._row_map().pop(id, None)
+        if row is None:
+            return None
+        self._mutable()
+        self._live[row] = False
+        self._live_count -= 1
+        self._ids[row] = None
+        self._metadata[row] = None
+        self._dead += 1
+        return row
+
+    def row_of(self, id: str) -> int | None:
+        """Row for id, or None."""
+        return self._row_map().get(id)
+
+    def id_at(self, row: int) -> str | None:
+        """Id stored at row (None if tombstoned)."""
+        return self._ids[row]
+
+    def metadata_at(self, row: int) -> dict[str, Any]:
+        """Metadata stored at row."""
+        return self._metadata[row] or {}
+
+    def vector_at(self, row: int) -> list[float]:
+        """Original vector at row, reconstructed from unit row and norm."""
+        return (self._data[row] * self._norms[row]).tolist()
+
+    def rows(self) -> int:
+        """Rows in use, including tombstones."""
+        return len(self._ids)
+
+    def size(self) -> int:
+        """Live rows."""
+        return self._live_count
+
+    def live_mask(self) -> Any:
+        """Boolean live mask over rows in use (view)."""
+        return self._live[: len(self._ids)]
+
+    def unit_rows(self) -> Any:
+        """Unit-normalized matrix over rows in use (view, includes tombstones)."""
+        return self._data[: len(self._ids)]
+
+    def norms(self) -> Any:
+        """Original vector norms over rows in use (view)."""
+        return self._norms[: len(self._ids)]
+
+    def normalize_query(self, query: list[float]) -> Any:
+        """Query as a unit float32 vector. Zero queries stay zero (score 0.0)."""
+        q = np.asarray(query, dtype=np.float32)
+        if q.shape != (self.dimension,):
+            raise ValidationError(
+                "Query dimension mismatch",
+                details={"expected": self.dimension, "actual": int(q.size)},
+            )
+        norm = float(np.linalg.norm(q))
+        return q / norm if norm > 0 else q
+
+    def normalize_queries(self, queries: Any) -> Any:
+        """Queries as a (batch, dimension) float32 matrix of unit rows."""
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim != 2 or q.shape[1] != self.dimension:
+            raise ValidationError(
+                "Query dimension mismatch",
+                details={"expected": self.dimension, "actual": list(q.shape)},
+            )
+        norms = np.linalg.norm(q, axis=1, keepdims=True)
+        return np.divide(q, norms, out=np.zeros_like(q), where=norms > 0)
+
+    def search(
+        self,
+        query: list[float],
+        top_k: int,
+        min_score: float | None = None,
+        rows: Any = None,
+    ) -> list[tuple[int, float]]:
+        """
+        One matrix-vector product over live rows, argpartition top-k. Returns (row, score).
+        rows (int array of live rows, e.g. a metadata pre-filter) restricts scoring to them.
+        """
+        n = len(self._ids)
+        if n == 0 or self._live_count == 0:
+            return []
+        q = self.normalize_query(query)
+        if rows is not None:
+            if len(rows) == 0:
+                return []
+            return select_top_k(self._data[rows] @ q, top_k, min_score, rows=rows)
+        scores = self._data[:n] @ q
+        if self._dead:
+            scores[~self._live[:n]] = -np.inf
+        return select_top_k(scores, top_k, min_score)
+
+    def search_batch(
+        self,
+        queries: Any,
+        top_k: int,
+        min_score: float | None = None,
+        chunk_rows: int = _BATCH_CHUNK_ROWS,
+        rows: Any = None,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Score all queries against the store with one matrix-matrix product per
+        chunk of chunk_rows rows, keeping a running per-query top-k. Peak scratch
+        memory is batch * chunk_rows floats regardless of store size.
+        rows restricts scoring to the given live rows (shared by all queries).
+        """
+        q = self.normalize_queries(queries)
+        batch = q.shape[0]
+        n = len(self._ids) if rows is None else len(rows)
+        if batch == 0 or n == 0 or self._live_count == 0:
+            return [[] for _ in range(batch)]
+        k = min(top_k, self._live_count)
+        best_scores = np.empty((batch, 0), dtype=np.float32)
+        best_rows = np.empty((batch, 0), dtype=np.int64)
+        for start in range(0, n, max(1, chunk_rows)):
+            stop = min(n, start + max(1, chunk_rows))
+            if rows is None:
+                row_ids = np.arange(start, stop, dtype=np.int64)
+                scores = q @ self._data[start:stop].T
+                live = self._live[start:stop]
+                if not live.all():
+                    scores[:, ~live] = -np.inf
+            else:
+                row_ids = np.asarray(rows[start:stop], dtype=np.int64)
+                scores = q @ self._data[row_ids].T
+            if min_score is not None:
+                scores[scores < min_score] = -np.inf
+            cand_scores, cand_cols = _row_top_k(scores, k)
+            best_scores = np.concatenate([best_scores, cand_scores], axis=1)
+            best_rows = np.concatenate([best_rows, row_ids[cand_cols]], axis=1)
+            if best_scores.shape[1] > k:
+                best_scores, idx = _row_top_k(best_scores, k)
+                best_rows = np.take_along_axis(best_rows, idx, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            [(int(r), float(s)) for r, s in zip(row_ids, row_scores) if s > -np.inf]
+            for row_ids, row_scores in zip(best_rows, best_scores)
+        ]
+
+    def needs_compaction(self) -> bool:
+        """True once tombstones exceed the configured fraction of rows."""
+        return self._dead >= self._min_compact and self._dead >= self._compact_ratio * len(self._ids)
+
+    def compact(self) -> Any:
+        """Drop tombstoned rows. Returns int64 remap old row -> new row (-1 if dropped)."""
+        n = len(self._ids)
+        keep = np.flatnonzero(self._live[:n])
+        remap = np.full(n, -1, dtype=np.int64)
+        remap[keep] = np.arange(keep.size)
+        m = keep.size
+        self._data[:m] = self._data[keep]
+        self._norms[:m] = self._norms[keep]
+        self._live[:m] = True
+        self._live[m:n] = False
+        self._ids = [self._ids[r] for r in keep]
+        self._metadata = [self._metadata[r] for r in keep]
+        self._rows = None
+        _logger.debug("vector_matrix.compact dropped=%s rows=%s", self._dead, m)
+        self._dead = 0
+        return remap
+
+
+def _row_top_k(scores: Any, k: int) -> tuple[Any, Any]:
+    """Per-row top-k (unordered) of a 2-D score matrix. Returns (scores, column indices)."""
+    cols = scores.shape[1]
+    if cols <= k:
+        idx = np.broadcast_to(np.arange(cols, dtype=np.int64), scores.shape)
+        return scores, np.array(idx)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, idx, axis=1), idx
+
+
+def select_top_k(
+    scores: Any,
+    top_k: int,
+    min_score: float | None = None,
+    rows: Any = None,
+) -> list[tuple[int, float]]:
+    """
+    Top-k (row, score) pairs by descending score using argpartition.
+    scores[i] belongs to rows[i] when rows is given, else to row i.
+    Rows scored -inf (tombstones) are never returned.
+    """
+    if min_score is not None:
+        keep = np.flatnonzero(scores >= min_score)
+    else:
+        keep = np.flatnonzero(scores > -np.inf)
+    if keep.size == 0:
+        return []
+    candidate = scores[keep]
+    k = min(top_k, keep.size)
+    if k < keep.size:
+        part = np.argpartition(-candidate, k - 1)[:k]
+    else:
+        part = np.arange(keep.size)
+    order = part[np.argsort(-candidate[part], kind="stable")]
+    picked = keep[order]
+    if rows is not None:
+        picked_rows = np.asarray(rows)[picked]
+    else:
+        picked_rows = picked
+    return [(int(r), float(s)) for r, s in zip(picked_rows, scores[picked])]
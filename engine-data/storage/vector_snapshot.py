@@ -0,0 +1,197 @@
+"""
+Vector snapshot — versioned on-disk layout for VectorStore.
+A snapshot is a directory holding a raw float32 matrix of unit rows, their
+norms, a packed id table, a packed JSONL metadata sidecar and (optionally)
+the approximate index state (IVF centroids/labels or quantizer codebooks
+and codes) as .npy arrays. Opening with mmap=True maps the arrays
+copy-on-write, so reopen is O(1) in store size and worker processes that
+open the same snapshot share its page cache.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from errors.error_model import ValidationError
+from storage.vector_matrix import VectorMatrix, np, require_numpy
+
+_logger = logging.getLogger("engine-data")
+
+SNAPSHOT_FORMAT = "nexus-vector-store"
+SNAPSHOT_VERSION = 2
+
+_MANIFEST = "manifest.json"
+_VECTORS = "vectors.f32"
+_NORMS = "norms.f32"
+_IDS = "ids.bin"
+_IDS_OFFSETS = "ids.off"
+_METADATA = "metadata.jsonl"
+_METADATA_OFFSETS = "metadata.off"
+_INDEX_STATE = "index.{}.npy"
+_WRITE_CHUNK_ROWS = 65536
+
+
+class PackedRecords:
+    """
+    Read-only sequence over a byte blob and int64 offsets (n + 1 entries).
+    Items are decoded on access, so opening a snapshot does not touch them.
+    """
+
+    def __init__(self, blob: Any, offsets: Any, decode: Callable[[bytes], Any]) -> None:
+        self._blob = blob
+        self._offsets = offsets
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return int(self._offsets.shape[0]) - 1
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += len(self)
+        start, stop = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._decode(bytes(self._blob[start:stop]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _decode_id(raw: bytes) -> str:
+    return raw.decode("utf-8")
+
+
+def _decode_metadata(raw: bytes) -> dict[str, Any]:
+    return json.loads(raw) if raw.strip() else {}
+
+
+def _write_packed(path: Path, offsets_path: Path, items: Iterable[bytes]) -> None:
+    offsets = [0]
+    with open(path, "wb") as f:
+        for raw in items:
+            f.write(raw)
+            offsets.append(offsets[-1] + len(raw))
+    np.asarray(offsets, dtype=np.int64).tofile(offsets_path)
+
+
+def _write_rows(path: Path, source: Any, live: Any) -> None:
+    with open(path, "wb") as f:
+        for start in range(0, source.shape[0], _WRITE_CHUNK_ROWS):
+            stop = start + _WRITE_CHUNK_ROWS
+            np.ascontiguousarray(source[start:stop][live[start:stop]], dtype=source.dtype).tofile(f)
+
+
+def _load(path: Path, dtype: Any, shape: tuple[int, ...], mmap: bool) -> Any:
+    if mmap:
+        if 0 in shape:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="c", shape=shape)
+    return np.fromfile(path, dtype=dtype).reshape(shape)
+
+
+def save_snapshot(
+    path: str | Path,
+    matrix: VectorMatrix,
+    manifest: dict[str, Any],
+    index_state: dict[str, Any] | None = None,
+) -> None:
+    """
+    Write live rows of matrix (tombstones dropped) plus sidecars to directory path.
+    index_state maps array name -> array (per-row arrays already restricted
+    to live rows). The manifest is written last, so a partially written
+    snapshot never opens.
+    """
+    require_numpy()
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / _MANIFEST
+    if manifest_path.exists():
+        manifest_path.unlink()
+    live = matrix.live_mask()
+    rows = np.flatnonzero(live)
+    _write_rows(root / _VECTORS, matrix.unit_rows(), live)
+    _write_rows(root / _NORMS, matrix.norms(), live)
+    _write_packed(
+        root / _IDS,
+        root / _IDS_OFFSETS,
+        (matrix.id_at(int(r)).encode("utf-8") for r in rows),
+    )
+    _write_packed(
+        root / _METADATA,
+        root / _METADATA_OFFSETS,
+        (json.dumps(matrix.metadata_at(int(r)), sort_keys=True, default=str).encode("utf-8") + b"\n" for r in rows),
+    )
+    files = [_VECTORS, _NORMS, _IDS, _IDS_OFFSETS, _METADATA, _METADATA_OFFSETS]
+    for name, array in (index_state or {}).items():
+        np.save(root / _INDEX_STATE.format(name), np.ascontiguousarray(array))
+        files.append(_INDEX_STATE.format(name))
+    body = {
+        **manifest,
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "dtype": "float32",
+        "dimension": matrix.dimension,
+        "rows": int(rows.size),
+        "index_state": sorted((index_state or {}).keys()),
+        "files": files,
+    }
+    tmp = root / (_MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(body, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, manifest_path)
+    _logger.info("vector_snapshot.save path=%s rows=%s", root, rows.size)
+
+
+def read_manifest(path: str | Path) -> dict[str, Any]:
+    """Read and check a snapshot manifest. Raises ValidationError if missing or unsupported."""
+    manifest_path = Path(path) / _MANIFEST
+    if not manifest_path.is_file():
+        raise ValidationError("snapshot manifest not found", details={"path": str(manifest_path)})
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValidationError("not a vector store snapshot", details={"format": manifest.get("format")})
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValidationError(
+            "unsupported snapshot version",
+            details={"version": manifest.get("version"), "supported": [SNAPSHOT_VERSION]},
+        )
+    return manifest
+
+
+def load_snapshot(
+    path: str | Path,
+    mmap: bool = True,
+    compact_ratio: float = 0.25,
+) -> tuple[dict[str, Any], VectorMatrix, dict[str, Any]]:
+    """
+    Open a snapshot. Returns (manifest, matrix, index_state arrays).
+    With mmap=True arrays are mapped copy-on-write and ids/metadata are
+    decoded lazily; otherwise everything is read into memory.
+    """
+    require_numpy()
+    root = Path(path)
+    manifest = read_manifest(root)
+    rows, dim = int(manifest["rows"]), int(manifest["dimension"])
+    data = _load(root / _VECTORS, np.float32, (rows, dim), mmap)
+    norms = _load(root / _NORMS, np.float32, (rows,), mmap)
+    id_offsets = _load(root / _IDS_OFFSETS, np.int64, (rows + 1,), mmap)
+    meta_offsets = _load(root / _METADATA_OFFSETS, np.int64, (rows + 1,), mmap)
+    ids = PackedRecords(_load(root / _IDS, np.uint8, (int(id_offsets[-1]),), mmap), id_offsets, _decode_id)
+    metadata = PackedRecords(
+        _load(root / _METADATA, np.uint8, (int(meta_offsets[-1]),), mmap), meta_offsets, _decode_metadata
+    )
+    if not mmap:
+        ids, metadata = list(ids), list(metadata)
+    matrix = VectorMatrix.from_arrays(data, norms, ids, metadata, compact_ratio=compact_ratio)
+    index_state = {
+        name: np.load(root / _INDEX_STATE.format(name), mmap_mode="c" if mmap else None)
+        for name in manifest.get("index_state") or []
+    }
+    _logger.info("vector_snapshot.open path=%s rows=%s mmap=%s", root, rows, mmap)
+    return manifest, matrix, index_state
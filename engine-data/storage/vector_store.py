@@ -1,5 +1,11 @@
 """
 Vector store — store and query vectors (e.g. embeddings).
+Modes: "list" keeps VectorEntry objects and scores in pure Python;
+"matrix" keeps a contiguous pre-normalized float32 matrix (numpy).
+index="ivf" adds an approximate IVF index on top of the matrix; index="sq8"
+or "pq" searches int8 / product-quantized codes instead of float rows.
+search(..., filter={...}) restricts candidates by metadata before scoring.
+save(path) / VectorStore.open(path, mmap=True) persist a versioned snapshot.
 Enterprise: validation, logging, clear errors (ERL-4).
 """
 from __future__ import annotations
@@ -9,9 +15,18 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from errors.error_model import ValidationError
+from storage.ivf_index import IVFIndex, recall_report
+from storage.metadata_index import MetadataIndex, matches_filter, validate_filter
+from storage.quantization import ProductQuantizer, QuantizedIndex, ScalarQuantizer
+from storage.vector_matrix import VectorMatrix, np, require_numpy
+from storage.vector_snapshot import load_snapshot, save_snapshot
 
 _logger = logging.getLogger("engine-data")
 
+VECTOR_STORE_MODES = ("list", "matrix")
+VECTOR_INDEX_TYPES = ("ivf", "sq8", "pq")
+_INDEX_CLASSES = {"ivf": IVFIndex, "sq8": ScalarQuantizer, "pq": ProductQuantizer}
+
 
 @dataclass
 class VectorEntry:
@@ -37,56 +52,207 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
 class VectorStore:
     """
     In-memory vector store: add, get, search by similarity.
+    mode="matrix" stores vectors in a VectorMatrix: search is one
+    matrix-vector product plus argpartition top-k; deletes tombstone rows
+    and compaction runs once tombstones pass compact_ratio of the rows.
+    index="ivf" (implies matrix mode) serves search/search_batch from an
+    IVFIndex; index_options (n_lists, nprobe, ...) tune recall vs latency.
+    index="sq8"/"pq" serve them from a QuantizedIndex (ADC over uint8 codes,
+    optional exact re-rank via rerank_factor). For compact residency, save()
+    and open(mmap=True): only codes stay hot, float rows are read from the
+    mapped file for re-ranking.
+    Matrix mode keeps a MetadataIndex so filtered searches score only the
+    candidate rows (exactly, bypassing the ANN index); it is built on the
+    first filtered search and maintained from then on.
     Enterprise: input validation, structured logging, safe errors.
     """
 
-    def __init__(self, dimension: int | None = None) -> None:
+    def __init__(
+        self,
+        dimension: int | None = None,
+        mode: str = "list",
+        compact_ratio: float = 0.25,
+        index: str | None = None,
+        **index_options: Any,
+    ) -> None:
+        if mode not in VECTOR_STORE_MODES:
+            raise ValidationError(
+                "Unknown vector store mode",
+                details={"mode": mode, "allowed": list(VECTOR_STORE_MODES)},
+            )
+        if index is not None and index not in VECTOR_INDEX_TYPES:
+            raise ValidationError(
+                "Unknown vector index type",
+                details={"index": index, "allowed": list(VECTOR_INDEX_TYPES)},
+            )
+        if index is not None:
+            mode = "matrix"
+        if mode == "matrix":
+            require_numpy()
         self._dimension = dimension
+        self._mode = mode
+        self._compact_ratio = compact_ratio
         self._entries: dict[str, VectorEntry] = {}
+        self._matrix: VectorMatrix | None = None
+        self._index_type = index
+        self._index_options = index_options
+        self._index: IVFIndex | QuantizedIndex | None = None
+        self._metadata_index: MetadataIndex | None = None
 
-    def add(self, entry: VectorEntry) -> None:
-        """Add or replace vector. Validates id and dimension."""
+    @property
+    def mode(self) -> str:
+        """Storage mode ("list" or "matrix")."""
+        return self._mode
+
+    @property
+    def index(self) -> IVFIndex | QuantizedIndex | None:
+        """ANN index (None when exact scan only). Tune e.g. index.nprobe at runtime."""
+        if self._index_type is not None and self._dimension is not None:
+            self._ensure_matrix()
+        return self._index
+
+    def _ensure_matrix(self) -> VectorMatrix:
+        if self._matrix is None:
+            self._attach(VectorMatrix(self._dimension, compact_ratio=self._compact_ratio))
+        return self._matrix
+
+    def _attach(self, matrix: VectorMatrix) -> None:
+        self._matrix = matrix
+        self._metadata_index = None
+        if self._index_type is not None:
+            self._index = _INDEX_CLASSES[self._index_type](matrix, **self._index_options)
+
+    def _ensure_metadata_index(self) -> MetadataIndex:
+        if self._metadata_index is None:
+            matrix = self._ensure_matrix()
+            index = MetadataIndex()
+            live = matrix.live_mask()
+            for row in range(matrix.rows()):
+                if live[row]:
+                    index.add(row, matrix.metadata_at(row))
+            self._metadata_index = index
+        return self._metadata_index
+
+    def _entry_at(self, row: int) -> VectorEntry:
+        m = self._ensure_matrix()
+        return VectorEntry(id=m.id_at(row), vector=m.vector_at(row), metadata=m.metadata_at(row))
+
+    def validate_entry(self, entry: VectorEntry) -> None:
+        """Raise ValidationError if add(entry) would reject it (id, empty vector, dimension)."""
         if not (entry.id or "").strip():
             raise ValidationError("vector entry id is required", details={"field": "id"})
-        if not entry.vector:
+        if entry.vector is None or len(entry.vector) == 0:
             raise ValidationError("vector cannot be empty", details={"field": "vector"})
         if self._dimension is not None and len(entry.vector) != self._dimension:
             raise ValidationError(
                 "Vector dimension mismatch",
                 details={"expected": self._dimension, "actual": len(entry.vector)},
             )
+
+    def add(self, entry: VectorEntry) -> None:
+        """Add or replace vector. Validates id and dimension."""
+        self.validate_entry(entry)
         self._dimension = self._dimension or len(entry.vector)
-        self._entries[entry.id] = entry
+        if self._mode == "matrix":
+            matrix = self._ensure_matrix()
+            metadata = dict(entry.metadata or {})
+            old = matrix.row_of(entry.id)
+            if old is not None and self._metadata_index is not None:
+                self._metadata_index.remove(old, matrix.metadata_at(old))
+            row = matrix.upsert(entry.id, entry.vector, metadata)
+            if self._metadata_index is not None:
+                self._metadata_index.add(row, metadata)
+            if self._index is not None:
+                self._index.add(row)
+        else:
+            self._entries[entry.id] = entry
         _logger.info("vector_store.add id=%s dimension=%s", entry.id, len(entry.vector))
 
     def get(self, id: str) -> VectorEntry | None:
-        """Get entry by id. Returns None if not found."""
+        """
+        Get entry by id. Returns None if not found.
+        In matrix mode the entry is rebuilt from the float32 row.
+        """
+        if self._mode == "matrix":
+            if self._matrix is None:
+                return None
+            row = self._matrix.row_of(id)
+            return self._entry_at(row) if row is not None else None
         return self._entries.get(id)
 
+    def entries(self) -> list[VectorEntry]:
+        """All stored entries (matrix mode rebuilds them from the float32 rows)."""
+        if self._mode == "matrix":
+            if self._matrix is None:
+                return []
+            live = self._matrix.live_mask()
+            return [self._entry_at(row) for row in range(self._matrix.rows()) if live[row]]
+        return list(self._entries.values())
+
     def delete(self, id: str) -> bool:
         """Remove entry. Returns True if removed."""
+        if self._mode == "matrix":
+            row = self._matrix.row_of(id) if self._matrix is not None else None
+            if row is None:
+                return False
+            if self._metadata_index is not None:
+                self._metadata_index.remove(row, self._matrix.metadata_at(row))
+            self._matrix.remove(id)
+            if self._index is not None:
+                self._index.remove(row)
+            _logger.debug("vector_store.delete id=%s", id)
+            if self._matrix.needs_compaction():
+                self.compact()
+            return True
         if id in self._entries:
             del self._entries[id]
             _logger.debug("vector_store.delete id=%s", id)
             return True
         return False
 
+    def compact(self) -> None:
+        """Reclaim tombstoned rows (matrix mode). No-op in list mode."""
+        if self._matrix is not None:
+            remap = self._matrix.compact()
+            if self._metadata_index is not None:
+                self._metadata_index.remap(remap)
+            if self._index is not None:
+                self._index.remap(remap)
+
     def search(
         self,
         query: list[float],
         top_k: int = 10,
         min_score: float | None = None,
+        filter: dict[str, Any] | None = None,
     ) -> list[tuple[VectorEntry, float]]:
         """
         Search by similarity to query vector. Returns list of (entry, score).
+        filter maps metadata field -> value or list of allowed values (fields ANDed).
         Validates query; logs result count.
         """
-        if not query and self._dimension is not None:
+        if (query is None or len(query) == 0) and self._dimension is not None:
             raise ValidationError("query vector cannot be empty", details={"field": "query"})
         if top_k < 1:
             raise ValidationError("top_k must be >= 1", details={"top_k": top_k})
+        spec = validate_filter(filter) if filter else None
+        if self._mode == "matrix":
+            if self._matrix is None:
+                return []
+            if spec is not None:
+                rows = self._ensure_metadata_index().candidate_rows(spec)
+                hits = self._matrix.search(query, top_k, min_score, rows=rows)
+            elif self._index is not None:
+                hits = self._index.search(query, top_k, min_score)
+            else:
+                hits = self._matrix.search(query, top_k, min_score)
+            out = [(self._entry_at(row), score) for row, score in hits]
+            _logger.debug("vector_store.search top_k=%s results=%s", top_k, len(out))
+            return out
         results: list[tuple[VectorEntry, float]] = []
         for entry in self._entries.values():
+            if spec is not None and not matches_filter(entry.metadata, spec):
+                continue
             score = cosine_similarity(query, entry.vector)
             if min_score is not None and score < min_score:
                 continue
@@ -96,11 +262,116 @@ class VectorStore:
         _logger.debug("vector_store.search top_k=%s results=%s", top_k, len(out))
         return out
 
+    def search_batch(
+        self,
+        queries: list[list[float]],
+        top_k: int = 10,
+        min_score: float | None = None,
+        filter: dict[str, Any] | None = None,
+    ) -> list[list[tuple[VectorEntry, float]]]:
+        """
+        Search several queries at once. Returns one (entry, score) list per query.
+        Matrix mode scores the whole batch per store chunk in a single
+        matrix-matrix product; list mode falls back to search() per query.
+        filter is shared by all queries (see search()).
+        """
+        if queries is None:
+            raise ValidationError("queries is required", details={"field": "queries"})
+        if top_k < 1:
+            raise ValidationError("top_k must be >= 1", details={"top_k": top_k})
+        if self._mode != "matrix":
+            return [self.search(q, top_k=top_k, min_score=min_score, filter=filter) for q in queries]
+        if len(queries) == 0 or self._matrix is None:
+            return [[] for _ in range(len(queries))]
+        if filter:
+            rows = self._ensure_metadata_index().candidate_rows(validate_filter(filter))
+            hits = self._matrix.search_batch(queries, top_k, min_score, rows=rows)
+        elif self._index is not None:
+            hits = self._index.search_batch(queries, top_k, min_score)
+        else:
+            hits = self._matrix.search_batch(queries, top_k, min_score)
+        entries: dict[int, VectorEntry] = {}
+        out: list[list[tuple[VectorEntry, float]]] = []
+        for per_query in hits:
+            for row, _score in per_query:
+                if row not in entries:
+                    entries[row] = self._entry_at(row)
+            out.append([(entries[row], score) for row, score in per_query])
+        _logger.debug("vector_store.search_batch queries=%s top_k=%s", len(queries), top_k)
+        return out
+
+    def recall_report(self, queries: list[list[float]], top_k: int = 10) -> dict[str, Any]:
+        """Recall@k and latency of the ANN index versus the exact scan."""
+        if self._index is None or self._matrix is None:
+            raise ValidationError("recall_report requires an ANN index", details={"index": self._index_type})
+        return recall_report(self._matrix, self._index, queries, top_k=top_k)
+
+    def save(self, path: str) -> None:
+        """
+        Write a versioned snapshot directory: float32 unit-row matrix, norms,
+        id table, metadata sidecar and index state. Tombstoned rows are skipped.
+        """
+        if not (str(path or "")).strip():
+            raise ValidationError("path is required", details={"field": "path"})
+        if self._mode == "matrix" and self._matrix is not None:
+            matrix = self._matrix
+        else:
+            if self._dimension is None:
+                raise ValidationError("cannot save an empty store without a dimension", details={"field": "dimension"})
+            matrix = VectorMatrix(self._dimension)
+            for entry in self._entries.values():
+                matrix.upsert(entry.id, entry.vector, entry.metadata)
+        manifest = {
+            "mode": self._mode,
+            "index": self._index_type,
+            "index_options": self._index.options() if self._index is not None else self._index_options,
+            "compact_ratio": self._compact_ratio,
+        }
+        live_rows = np.flatnonzero(matrix.live_mask())
+        index_state = self._index.state(live_rows) if self._index is not None else {}
+        save_snapshot(path, matrix, manifest, index_state)
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> VectorStore:
+        """
+        Open a snapshot written by save(). With mmap=True the matrix is mapped
+        copy-on-write (zero copy, shared page cache) and ids/metadata decode
+        lazily, so the store is searchable immediately. List-mode snapshots
+        are loaded back into VectorEntry objects.
+        """
+        if not (str(path or "")).strip():
+            raise ValidationError("path is required", details={"field": "path"})
+        manifest, matrix, index_state = load_snapshot(path, mmap=mmap)
+        store = cls(
+            dimension=matrix.dimension,
+            mode=manifest.get("mode", "matrix"),
+            compact_ratio=manifest.get("compact_ratio", 0.25),
+            index=manifest.get("index"),
+            **(manifest.get("index_options") or {}),
+        )
+        if store._mode == "list":
+            for row in range(matrix.rows()):
+                store._entries[matrix.id_at(row)] = VectorEntry(
+                    id=matrix.id_at(row), vector=matrix.vector_at(row), metadata=matrix.metadata_at(row)
+                )
+            return store
+        store._attach(matrix)
+        if store._index is not None and index_state:
+            store._index.restore(index_state)
+        return store
+
     def size(self) -> int:
         """Number of stored vectors."""
+        if self._mode == "matrix":
+            return self._matrix.size() if self._matrix is not None else 0
         return len(self._entries)
 
 
-def create_vector_store(dimension: int | None = None) -> VectorStore:
+def create_vector_store(
+    dimension: int | None = None,
+    mode: str = "list",
+    index: str | None = None,
+    **index_options: Any,
+) -> VectorStore:
     """Create empty vector store. Enterprise-ready."""
-    return VectorStore(dimension=dimension)
+    return VectorStore(dimension=dimension, mode=mode, index=index, **index_options)
@@ -0,0 +1,359 @@
+"""
+Write-ahead log — append-only, group-committed record log.
+Records are JSON objects framed as (length, crc32, lsn) + payload and get
+consecutive log sequence numbers. Appends only buffer the frame. wait(lsn)
+makes a record durable by group commit: the first waiter writes and fsyncs
+everything buffered, and writers that append during that fsync are covered
+together by the next one, so concurrent writers share fsyncs. A flusher
+thread also syncs every sync_interval seconds, bounding the loss window for
+appends nobody waits on; sync_interval=0 fsyncs inline on every append. The log is split into segment files named by their
+first lsn; truncate(lsn) drops whole segments once a snapshot covers them.
+On open, a torn or corrupt tail of the last segment (a crash mid-write) is
+cut off; corruption anywhere else raises. A failed write or fsync cuts the
+segment back and keeps the frames buffered for the next sync; if that
+cleanup fails too, the log is marked failed and every later call raises.
+ERL-4: validation at entry, structured logging, platform error model.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from errors.error_model import ExecutionError, ValidationError
+
+_logger = logging.getLogger("engine-data")
+
+DEFAULT_SYNC_INTERVAL = 0.01
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+_HEADER = struct.Struct("<IIQ")
+_SEGMENT_PREFIX = "wal-"
+_SEGMENT_SUFFIX = ".log"
+_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str).encode
+_decode = json.JSONDecoder().decode
+
+
+def _segment_name(first_lsn: int) -> str:
+    return f"{_SEGMENT_PREFIX}{first_lsn:020d}{_SEGMENT_SUFFIX}"
+
+
+def _fsync_dir(path: Path) -> None:
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def encode_frame(lsn: int, record: dict[str, Any]) -> bytes:
+    """One framed record: header (length, crc32, lsn) + compact JSON payload."""
+    return _frame(lsn, _encode(record).encode("utf-8"))
+
+
+def _frame(lsn: int, payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), zlib.crc32(payload), lsn) + payload
+
+
+def _scan(data: bytes) -> tuple[list[tuple[int, int, int]], int]:
+    """(lsn, payload start, payload end) of each intact frame, and where intact frames end."""
+    frames: list[tuple[int, int, int]] = []
+    pos, size, header = 0, len(data), _HEADER.size
+    while pos + header <= size:
+        length, crc, lsn = _HEADER.unpack_from(data, pos)
+        start, end = pos + header, pos + header + length
+        if end > size or zlib.crc32(data[start:end]) != crc:
+            break
+        frames.append((lsn, start, end))
+        pos = end
+    return frames, pos
+
+
+def read_frames(path: str | Path) -> tuple[list[tuple[int, dict[str, Any]]], int]:
+    """
+    (lsn, record) pairs of a segment, plus the byte offset where valid
+    frames end (less than the file size when the tail is torn or corrupt).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    frames, end = _scan(data)
+    return [(lsn, _decode(data[start:stop].decode("utf-8"))) for lsn, start, stop in frames], end
+
+
+class WriteAheadLog:
+    """
+    Segmented append-only log with batched fsync. append/append_many return
+    lsns; wait(lsn) blocks until durable; sync() flushes now; replay(after)
+    yields logged records; close() flushes and stops the flusher.
+    Testable.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        first_lsn: int = 1,
+    ) -> None:
+        if not str(directory or "").strip():
+            raise ValidationError("directory is required", details={"field": "directory"})
+        if sync_interval is None or sync_interval < 0:
+            raise ValidationError("sync_interval must be >= 0", details={"sync_interval": sync_interval})
+        if segment_bytes < 1:
+            raise ValidationError("segment_bytes must be >= 1", details={"segment_bytes": segment_bytes})
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._buffer: list[bytes] = []
+        self._failed: OSError | None = None
+        self.syncs = 0
+        self.bytes_written = 0
+        last = self._recover_tail(first_lsn - 1)
+        self._next_lsn = last + 1
+        self._durable_lsn = last
+        self._open_segment(self._next_lsn)
+        self._closed = False
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if sync_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    def segments(self) -> list[tuple[int, Path]]:
+        """(first lsn, path) of each segment, oldest first."""
+        out = []
+        for path in self.directory.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"):
+            digits = path.name[len(_SEGMENT_PREFIX) : -len(_SEGMENT_SUFFIX)]
+            if digits.isdigit():
+                out.append((int(digits), path))
+        return sorted(out)
+
+    def _recover_tail(self, floor: int) -> int:
+        """Cut a torn tail off the last segment; returns the last valid lsn (floor when empty)."""
+        segments = self.segments()
+        while segments:
+            first, path = segments[-1]
+            data = path.read_bytes()
+            frames, end = _scan(data)
+            if end < len(data):
+                _logger.warning("wal.recover truncated torn tail path=%s offset=%s", path, end)
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+                    f.flush()
+                    os.fsync(f.fileno())
+            if frames:
+                return frames[-1][0]
+            if len(segments) == 1:
+                return max(first - 1, floor)
+            path.unlink()
+            segments.pop()
+        return floor
+
+    def _open_segment(self, first_lsn: int) -> None:
+        path = self.directory / _segment_name(first_lsn)
+        self._file = open(path, "ab")
+        self._segment_size = self._file.tell()
+        _fsync_dir(self.directory)
+
+    @property
+    def last_lsn(self) -> int:
+        """Lsn of the most recent append (0 when the log is empty)."""
+        return self._next_lsn - 1
+
+    @property
+    def durable_lsn(self) -> int:
+        """Every record up to this lsn is on disk."""
+        return self._durable_lsn
+
+    def append(self, record: dict[str, Any]) -> int:
+        """Buffer one record; returns its lsn (durable after wait(lsn))."""
+        return self.append_many((record,))
+
+    def append_many(self, records: Iterable[dict[str, Any]]) -> int:
+        """Buffer records with consecutive lsns; returns the last lsn."""
+        payloads = [_encode(record).encode("utf-8") for record in records]
+        with self._lock:
+            if self._closed:
+                raise ExecutionError("write-ahead log is closed", details={"directory": str(self.directory)})
+            self._check_failed()
+            lsn = self._next_lsn
+            frames = [_frame(lsn + i, payload) for i, payload in enumerate(payloads)]
+            self._buffer.extend(frames)
+            last = lsn + len(frames) - 1
+            self._next_lsn = last + 1
+        if self.sync_interval == 0:
+            try:
+                self.sync()
+            except ExecutionError:
+                # Frames kept for retry are logged; wait() reports whether they become durable.
+                if self._failed is not None:
+                    raise
+        return last
+
+    def sync(self) -> int:
+        """
+        Write and fsync everything buffered; returns the durable lsn. On an
+        I/O error the frames stay buffered (see _undo_write) and
+        ExecutionError is raised, so no lsn in the failed batch is reported
+        durable.
+        """
+        with self._io_lock:
+            self._check_failed()
+            if not self._buffer:
+                return self._durable_lsn
+            with self._lock:
+                frames, self._buffer = self._buffer, []
+                upto = self._next_lsn - 1
+            blob = b"".join(frames)
+            try:
+                self._file.write(blob)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                self._undo_write(frames, e)
+                raise ExecutionError(
+                    "write-ahead log sync failed",
+                    details={"directory": str(self.directory), "lsn": upto, "failed": self._failed is not None},
+                    cause=type(e).__name__,
+                    retryable=self._failed is None,
+                ) from e
+            self._segment_size += len(blob)
+            self.bytes_written += len(blob)
+            self.syncs += 1
+            self._durable_lsn = upto
+            if self._segment_size >= self.segment_bytes:
+                self._next_segment(upto + 1)
+            return upto
+
+    def _undo_write(self, frames: list[bytes], error: OSError) -> None:
+        """
+        Cut the segment back to its size before the failed write (dropping
+        any partial frame, and pages a failed fsync may have left unwritten),
+        reopen it and put the frames back in front of the buffer. If that is
+        not possible the log is marked failed.
+        """
+        path = Path(self._file.name)
+        try:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            with open(path, "r+b") as f:
+                f.truncate(self._segment_size)
+                os.fsync(f.fileno())
+            self._file = open(path, "ab")
+        except OSError as cleanup_error:
+            self._fail(cleanup_error)
+            return
+        with self._lock:
+            self._buffer[:0] = frames
+        _logger.warning("wal.sync failed, frames kept for retry directory=%s error=%s", self.directory, error)
+
+    def _next_segment(self, first_lsn: int) -> None:
+        try:
+            self._file.close()
+            self._open_segment(first_lsn)
+        except OSError as e:
+            self._fail(e)
+            raise ExecutionError(
+                "write-ahead log rotation failed", details={"directory": str(self.directory)}, cause=type(e).__name__
+            ) from e
+
+    def _fail(self, error: OSError) -> None:
+        self._failed = error
+        _logger.error("wal failed directory=%s error=%s", self.directory, error)
+
+    def _check_failed(self) -> None:
+        if self._failed is not None:
+            raise ExecutionError(
+                "write-ahead log failed", details={"directory": str(self.directory)}, cause=type(self._failed).__name__
+            )
+
+    def wait(self, lsn: int) -> bool:
+        """
+        Block until lsn is durable: sync unless it already is (a writer that
+        queued behind another's fsync usually finds its record covered by the
+        one after). Returns False only if lsn was never appended; raises
+        ExecutionError if the write or fsync fails.
+        """
+        if lsn > self._durable_lsn:
+            self.sync()
+        return self._durable_lsn >= lsn
+
+    def _flush_loop(self) -> None:
+        # A failed sync keeps its frames buffered (retried next tick, and by
+        # waiters) or fails the log, which append and wait then report.
+        while not self._stop.wait(self.sync_interval):
+            if self._buffer:
+                try:
+                    self.sync()
+                except ExecutionError:
+                    if self._failed is not None:
+                        return
+
+    def rotate(self) -> int:
+        """Flush, then start a new segment; returns the last lsn of the old one."""
+        upto = self.sync()
+        with self._io_lock:
+            if self._segment_size:
+                self._next_segment(upto + 1)
+        return upto
+
+    def truncate(self, upto_lsn: int) -> int:
+        """Delete segments whose records are all <= upto_lsn; returns how many."""
+        segments = self.segments()
+        removed = 0
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 > upto_lsn:
+                break
+            path.unlink()
+            removed += 1
+        if removed:
+            _fsync_dir(self.directory)
+            _logger.info("wal.truncate upto_lsn=%s segments=%s", upto_lsn, removed)
+        return removed
+
+    def replay(self, after_lsn: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Written (lsn, record) pairs with lsn > after_lsn, in order."""
+        segments = self.segments()
+        for i, (first, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] - 1 <= after_lsn:
+                continue
+            data = path.read_bytes()
+            frames, end = _scan(data)
+            if end < len(data) and path != Path(self._file.name):
+                raise ExecutionError("write-ahead log segment is corrupt", details={"path": str(path), "offset": end})
+            for lsn, start, stop in frames:
+                if lsn > after_lsn:
+                    yield lsn, _decode(data[start:stop].decode("utf-8"))
+
+    def size_bytes(self) -> int:
+        """Bytes across all segments."""
+        return sum(path.stat().st_size for _, path in self.segments())
+
+    def close(self) -> None:
+        """Flush, stop the flusher and close the segment. Idempotent."""
+        if self._closed:
+            return
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        try:
+            self.sync()
+        finally:
+            with self._lock:
+                self._closed = True
+            try:
+                self._file.close()
+            except OSError:
+                pass
@@ -0,0 +1,266 @@
+"""Caching tests for engine-data: eviction, expiry, stats, single-flight, dependency invalidation."""
+import threading
+import time
+
+import pytest
+from caching.cache_engine import CacheEngine, create_cache_engine
+from caching.sketch import CountMinSketch, SpaceSaving
+from errors.error_model import ValidationError
+from indexing.indexing_engine import create_indexing_engine
+
+
+class TestBoundedCache:
+    def test_lru_evicts_least_recent(self):
+        c = create_cache_engine(max_entries=2, policy="lru")
+        c.set("a", 1)
+        c.set("b", 2)
+        c.get("a")
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1
+        assert c.get("c") == 3
+        assert c.size() == 2
+
+    def test_lfu_evicts_least_frequent(self):
+        c = create_cache_engine(max_entries=2, policy="lfu")
+        c.set("a", 1)
+        c.set("b", 2)
+        for _ in range(3):
+            c.get("a")
+        c.get("b")
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1
+        assert c.get("c") == 3
+
+    def test_tinylfu_rejects_cold_newcomer(self):
+        c = create_cache_engine(max_entries=2, policy="tinylfu")
+        c.set("hot1", 1)
+        c.set("hot2", 2)
+        for _ in range(5):
+            c.get("hot1")
+            c.get("hot2")
+        c.set("cold", 3)
+        assert c.get("cold") is None
+        assert c.get("hot1") == 1
+        assert c.get("hot2") == 2
+
+    def test_tinylfu_admits_frequent_newcomer(self):
+        c = create_cache_engine(max_entries=1, policy="tinylfu")
+        c.set("old", 1)
+        for _ in range(5):
+            c.get("new")
+        c.set("new", 2)
+        assert c.get("new") == 2
+        assert c.get("old") is None
+
+    def test_max_bytes(self):
+        c = CacheEngine(max_bytes=100, size_of=lambda v: v)
+        c.set("a", 40)
+        c.set("b", 40)
+        c.set("c", 40)
+        assert c.get("a") is None
+        assert c.bytes() == 80
+        c.set("huge", 500)
+        assert c.get("huge") is None
+        assert c.size() == 2
+
+    def test_overwrite_keeps_single_entry(self):
+        c = CacheEngine(max_entries=2, max_bytes=100, size_of=lambda v: v)
+        c.set("a", 10)
+        c.set("a", 30)
+        assert c.size() == 1
+        assert c.bytes() == 30
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValidationError):
+            create_cache_engine(policy="fifo")
+        with pytest.raises(ValidationError):
+            create_cache_engine(max_entries=0)
+
+
+class TestCacheExpiry:
+    def test_size_counts_live_entries_only(self):
+        c = create_cache_engine()
+        c.set("short", 1, ttl_seconds=0.01)
+        c.set("long", 2, ttl_seconds=60)
+        c.set("forever", 3)
+        c.get_or_compute("stale", lambda: 4, ttl_seconds=0.01, stale_while_revalidate=5)
+        time.sleep(0.02)
+        assert c.size() == 2 and c.stats()["entries"] == 3
+        assert c.get("short") is None
+
+    def test_purge_skips_replaced_keys(self):
+        c = create_cache_engine()
+        c.set("k", 1, ttl_seconds=0.01)
+        c.set("k", 2, ttl_seconds=60)
+        time.sleep(0.02)
+        assert c.purge_expired() == 0
+        assert c.get("k") == 2
+
+    def test_background_reaper(self):
+        c = CacheEngine(expiry_interval_seconds=0.01)
+        try:
+            c.set("k", 1, ttl_seconds=0.01)
+            time.sleep(0.1)
+            assert len(c._store) == 0
+        finally:
+            c.close()
+
+
+class TestCacheStats:
+    def test_counters(self):
+        c = CacheEngine(max_entries=2)
+        c.set("a", 1)
+        c.set("b", 2, ttl_seconds=0.01)
+        c.get("a")
+        c.get("a")
+        c.get("missing")
+        time.sleep(0.02)
+        c.get("b")
+        c.set("c", 3)
+        c.set("d", 4)
+        stats = c.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_ratio"] == 0.5
+        assert stats["expirations"] == 1
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 2
+        assert stats["avg_age_seconds"] >= 0.0
+
+    def test_hot_keys(self):
+        c = create_cache_engine(hot_keys=4)
+        for i in range(200):
+            c.get("hot")
+            c.get(f"cold{i}")
+        top = c.stats()["hot_keys"]
+        assert top[0]["key"] == "hot"
+        assert (top[0]["count"], top[0]["error"]) == (200, 0)
+        c.reset_stats()
+        assert c.stats()["hot_keys"] == []
+        assert c.stats()["misses"] == 0
+
+    def test_bytes(self):
+        c = CacheEngine(max_bytes=1000, size_of=lambda v: len(v))
+        c.set("a", "x" * 10)
+        c.set("b", "y" * 20)
+        assert c.stats()["bytes"] == 30
+
+
+class TestGetOrCompute:
+    def test_single_flight(self):
+        c = create_cache_engine()
+        calls = []
+        gate = threading.Event()
+
+        def loader():
+            calls.append(1)
+            gate.wait(1)
+            return "v"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(c.get_or_compute("k", loader))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+        assert calls == [1]
+        assert results == ["v"] * 8
+        assert c.stats()["coalesced"] == 7
+        assert c.get_or_compute("k", loader) == "v"
+        assert calls == [1]
+
+    def test_loader_error_shared_and_not_cached(self):
+        c = create_cache_engine()
+
+        def boom():
+            raise ValueError("down")
+
+        with pytest.raises(ValueError):
+            c.get_or_compute("k", boom)
+        assert c.size() == 0
+        assert c.get_or_compute("k", lambda: 1) == 1
+
+    def test_stale_while_revalidate(self):
+        c = create_cache_engine()
+        refreshed = threading.Event()
+        c.get_or_compute("k", lambda: "old", ttl_seconds=0.01, stale_while_revalidate=5)
+        time.sleep(0.02)
+
+        def reload():
+            refreshed.set()
+            return "new"
+
+        assert c.get_or_compute("k", reload, ttl_seconds=60, stale_while_revalidate=5) == "old"
+        assert refreshed.wait(1)
+        for _ in range(100):
+            if c.get("k") == "new":
+                break
+            time.sleep(0.01)
+        assert c.get("k") == "new"
+        assert c.stats()["stale_hits"] == 1
+
+
+class TestDependencyInvalidation:
+    def _engines(self):
+        idx = create_indexing_engine(key_extractor=lambda d: d.get("tags", []))
+        return idx, create_cache_engine(generation_source=idx)
+
+    def test_only_affected_entries_invalidated(self):
+        idx, c = self._engines()
+        idx.index("d1", {"tags": ["x"]})
+        idx.index("d2", {"tags": ["y"]})
+        c.set("qx", idx.search(["x"]), depends_on=["x"])
+        c.set("qy", idx.search(["y"]), depends_on=["y"])
+        idx.index("d3", {"tags": ["x"]})
+        assert c.get("qx") is None
+        assert c.get("qy") == ["d2"]
+        assert c.stats()["invalidations"] == 1
+
+    def test_remove_invalidates(self):
+        idx, c = self._engines()
+        idx.index("d1", {"tags": ["x"]})
+        assert c.get_or_compute("q", lambda: idx.search(["x"]), depends_on=["x"]) == ["d1"]
+        idx.remove("d1", {"tags": ["x"]})
+        assert c.get_or_compute("q", lambda: idx.search(["x"]), depends_on=["x"]) == []
+
+    def test_invalidated_value_not_served_stale(self):
+        idx, c = self._engines()
+        c.get_or_compute("q", lambda: "old", ttl_seconds=0.01, stale_while_revalidate=5, depends_on=["x"])
+        time.sleep(0.02)
+        idx.index("d1", {"tags": ["x"]})
+        assert c.get_or_compute("q", lambda: "new", ttl_seconds=60, depends_on=["x"]) == "new"
+
+    def test_depends_on_requires_source(self):
+        with pytest.raises(ValidationError):
+            create_cache_engine().set("k", 1, depends_on=["x"])
+
+
+class TestSpaceSaving:
+    def test_heavy_hitters_tracked(self):
+        s = SpaceSaving(capacity=3)
+        for i in range(300):
+            s.offer("x" if i % 3 == 0 else f"n{i}")
+        keys = [k for k, _, _ in s.top()]
+        assert "x" in keys
+        assert len(keys) == 3
+
+
+class TestCountMinSketch:
+    def test_estimate_never_undercounts(self):
+        s = CountMinSketch(width=64, sample_size=10_000)
+        for i in range(200):
+            for _ in range(i % 5):
+                s.increment(f"k{i}")
+        assert all(s.estimate(f"k{i}") >= i % 5 for i in range(200))
+
+    def test_aging_halves_counts(self):
+        s = CountMinSketch(width=64, sample_size=8)
+        for _ in range(7):
+            s.increment("a")
+        assert s.estimate("a") == 7
+        s.increment("a")
+        assert s.estimate("a") == 4
@@ -0,0 +1,259 @@
+"""Indexing tests for engine-data: posting lists, set algebra, range/prefix field indexes, BM25 text index."""
+import random
+
+import pytest
+from errors.error_model import ValidationError
+from indexing import postings as pl
+from indexing import text_index as text_index_module
+from indexing.indexing_engine import create_indexing_engine
+from indexing.text_index import Analyzer, create_text_index
+
+
+def _engine():
+    e = create_indexing_engine(key_extractor=lambda d: d.get("tags", []))
+    e.index("a", {"tags": ["x", "y"]})
+    e.index("b", {"tags": ["x"]})
+    e.index("c", {"tags": ["y", "z"]})
+    return e
+
+
+class TestIndexingEngineSearch:
+    def test_any_all_not(self):
+        e = _engine()
+        assert e.search_any(["x", "y"]) == ["a", "b", "c"]
+        assert e.search(["x", "y"]) == ["a", "b", "c"]
+        assert e.search_all(["x", "y"]) == ["a"]
+        assert e.search_all(["x", "missing"]) == []
+        assert e.search_not(["y"], ["z"]) == ["a"]
+        assert e.search_not(["x"], []) == ["a", "b"]
+        assert e.search_not(["x", "z"], ["y"], match="any") == ["b"]
+
+    def test_remove_and_reindex(self):
+        e = _engine()
+        e.remove("a", {"tags": ["x", "y"]})
+        assert e.get("x") == ["b"]
+        assert e.search_all(["x", "y"]) == []
+        e.index("a", {"tags": ["x"]})
+        assert e.get("x") == ["a", "b"]
+        assert "z" in e.keys()
+        e.remove("c", {"tags": ["y", "z"]})
+        assert "z" not in e.keys()
+
+    def test_stats(self):
+        stats = _engine().stats()
+        assert stats["keys"] == 3
+        assert stats["postings"] == 5
+        assert stats["posting_bytes"] == 5 * 4
+
+    def test_index_many_matches_index(self):
+        docs = [("a", {"tags": ["x", "y"]}), ("b", {"tags": ["x"]}), ("c", {"tags": ["y", "z"]})]
+        e = create_indexing_engine(key_extractor=lambda d: d.get("tags", []), text_index=create_text_index())
+        e.add_field_index("n", "range")
+        assert e.index_many((doc_id, {**doc, "n": i, "text": f"w{i}"}) for i, (doc_id, doc) in enumerate(docs)) == 3
+        assert e.search_any(["x", "y"]) == ["a", "b", "c"] and e.search_all(["x", "y"]) == ["a"]
+        assert e.search_range("n", 1, 2) == ["b", "c"]
+        assert [d for d, _ in e.search_text("w2")] == ["c"]
+        assert len(set(e.generations(["x", "y", "z"]))) == 1
+        before = e.generation("x")
+        with pytest.raises(ValidationError):
+            e.index_many([("d", {"tags": ["x"]}), ("", {"tags": ["x"]})])
+        assert e.get("x") == ["a", "b"] and e.generation("x") == before
+
+    def test_compact_releases_removed_numbers(self):
+        e = create_indexing_engine(key_extractor=lambda d: d.get("tags", []))
+        e.add_field_index("n", "range")
+        e.add_field_index("s", "prefix")
+        for i in range(5000):
+            e.index(f"tmp{i}", {"tags": ["x"], "n": i, "s": f"v{i}"})
+            if i >= 10:
+                old = i - 10
+                e.remove(f"tmp{old}", {"tags": ["x"], "n": old, "s": f"v{old}"})
+        assert len(e._doc_ids) < 2000 and e.stats()["documents"] == 10
+        live = [f"tmp{i}" for i in range(4990, 5000)]
+        assert e.get("x") == live and e.search_range("n", 0, 10_000) == live
+        assert e.search_prefix("s", "v499") == live
+        e.remove("tmp4990", {"tags": ["x"], "n": 4990, "s": "v4990"})
+        e.index("tmp4990", {"tags": ["x"], "n": 4990, "s": "v4990"})
+        assert e.get("x") == live
+        e.compact()
+        e.remove("tmp4995", {"tags": ["x"], "n": 4995, "s": "v4995"})
+        assert e.compact() == 1 and e.compact() == 0
+        assert e.get("x") == [d for d in live if d != "tmp4995"] and len(e._doc_ids) == 9
+
+    def test_validation(self):
+        e = _engine()
+        with pytest.raises(ValidationError):
+            e.search_all(None)
+        with pytest.raises(ValidationError):
+            e.search_not(["x"], None)
+
+
+class TestPostings:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_set_algebra_matches_sets(self, seed):
+        rng = random.Random(seed)
+        a = set(rng.sample(range(5000), 40))
+        b = set(rng.sample(range(5000), 2000))
+        c = set(rng.sample(range(5000), 300))
+        pa, pb, pc = pl.new_postings(a), pl.new_postings(b), pl.new_postings(c)
+        assert list(pl.intersect(pa, pb)) == sorted(a & b)
+        assert list(pl.intersect_all([pb, pc, pa])) == sorted(a & b & c)
+        assert list(pl.union_all([pa, pb, pc])) == sorted(a | b | c)
+        assert list(pl.difference(pb, pc)) == sorted(b - c)
+
+    def test_insert_discard(self):
+        p = pl.new_postings([5, 1])
+        assert pl.insert(p, 3) and pl.insert(p, 9)
+        assert not pl.insert(p, 3)
+        assert list(p) == [1, 3, 5, 9]
+        assert pl.discard(p, 5) and not pl.discard(p, 4)
+        assert list(p) == [1, 3, 9]
+
+
+class TestFieldIndexes:
+    def _engine(self):
+        e = create_indexing_engine(key_extractor=lambda d: d.get("tags", []))
+        e.add_field_index("amount", "range")
+        e.add_field_index("meta.name", "prefix")
+        docs = {
+            "a": {"tags": ["x"], "amount": 5, "meta": {"name": "alpha"}},
+            "b": {"tags": ["x"], "amount": 50.5, "meta": {"name": "beta"}},
+            "c": {"tags": ["y"], "amount": 150, "meta": {"name": "alps"}},
+            "d": {"tags": ["y"], "amount": "2024-01-02"},
+        }
+        for doc_id, doc in docs.items():
+            e.index(doc_id, doc)
+        return e, docs
+
+    def test_range(self):
+        e, _ = self._engine()
+        assert e.search_range("amount", 10, 200) == ["b", "c"]
+        assert e.search_range("amount", None, 50.5) == ["a", "b"]
+        assert e.search_range("amount", "2024-01-01", "2024-12-31") == ["d"]
+        assert e.search_range("amount") == ["a", "b", "c", "d"]
+        with pytest.raises(ValidationError):
+            e.search_range("amount", 1, "z")
+
+    def test_prefix(self):
+        e, _ = self._engine()
+        assert e.search_prefix("meta.name", "al") == ["a", "c"]
+        assert e.search_prefix("meta.name", "alpha") == ["a"]
+        assert e.search_prefix("meta.name", "z") == []
+
+    def test_remove_updates_field_indexes(self):
+        e, docs = self._engine()
+        before = e.generation(e.field_key("range", "amount"))
+        e.remove("c", docs["c"])
+        assert e.search_range("amount", 10, 200) == ["b"]
+        assert e.search_prefix("meta.name", "al") == ["a"]
+        assert e.generation(e.field_key("range", "amount")) != before
+
+    def test_select_combines_clauses(self):
+        e, _ = self._engine()
+        assert e.select(keys=["x"], ranges={"amount": [10, None]}) == ["b"]
+        assert e.select(ranges={"amount": [0, 200]}, prefixes={"meta.name": "al"}, exclude=["y"]) == ["a"]
+        assert e.select() == []
+        with pytest.raises(ValidationError):
+            e.select(ranges={"missing": [0, 1]})
+
+    def test_backfill(self):
+        e = create_indexing_engine()
+        assert e.add_field_index("n", "range", documents=[("p", {"n": 3}), ("q", {"n": 9})])
+        assert not e.add_field_index("n", "range")
+        assert e.search_range("n", 5, 10) == ["q"]
+        with pytest.raises(ValidationError):
+            e.add_field_index("n", "btree")
+
+    def test_bulk_backfill_then_incremental_add(self):
+        _, docs = self._engine()
+        bulk = create_indexing_engine()
+        bulk.add_field_index("amount", "range", documents=docs.items())
+        bulk.add_field_index("meta.name", "prefix", documents=docs.items())
+        bulk.index("e", {"amount": 7, "meta": {"name": "alpine"}})
+        assert bulk.search_range("amount", 0, 200) == ["a", "b", "c", "e"]
+        assert bulk.search_range("amount", "2024-01-01", "2024-12-31") == ["d"]
+        assert bulk.search_prefix("meta.name", "alp") == ["a", "c", "e"]
+
+
+class TestTextIndex:
+    DOCS = {
+        "1": {"title": "The quick brown fox", "body": "jumps over the lazy dog"},
+        "2": {"title": "Quick start", "body": "brown bread recipe, quick and easy"},
+        "3": {"title": "Dogs", "body": "the lazy dog sleeps all day"},
+    }
+
+    def _index(self):
+        t = create_text_index(fields=("title", "body"))
+        for doc_id, doc in self.DOCS.items():
+            t.add(doc_id, doc)
+        return t
+
+    def test_analyzer(self):
+        assert Analyzer()("The Lazy-Dog") == [("lazy", 1), ("dog", 2)]
+        assert Analyzer(stopwords=None).terms("The dog") == ["the", "dog"]
+
+    def test_bm25_ranking(self):
+        t = self._index()
+        hits = t.search("quick")
+        assert [d for d, _ in hits] == ["2", "1"]
+        assert hits[0][1] > hits[1][1] > 0
+        assert [d for d, _ in t.search("quick brown dog", top_k=1)] == ["1"]
+        assert t.search("missing") == []
+
+    def test_phrase_and_candidates(self):
+        t = self._index()
+        assert sorted(d for d, _ in t.search("lazy dog", phrase=True)) == ["1", "3"]
+        assert [d for d, _ in t.search("brown fox", phrase=True)] == ["1"]
+        assert t.search("fox brown", phrase=True) == []
+        assert [d for d, _ in t.search("dog", candidates=["3"])] == ["3"]
+
+    def test_incremental_delete_and_compact(self):
+        t = self._index()
+        t.remove("1", self.DOCS["1"])
+        assert [d for d, _ in t.search("quick")] == ["2"]
+        t.add("1", {"title": "slow fox"})
+        assert [d for d, _ in t.search("fox")] == ["1"]
+        assert t.search("jumps") == []
+        t.compact()
+        assert t.stats()["documents"] == 3
+        assert [d for d, _ in t.search("quick")] == ["2"]
+
+    def test_compact_renumbers_live_docs(self):
+        t = create_text_index(fields=("title",))
+        for round_ in range(20):
+            for i in range(10):
+                t.add(f"d{i}", {"title": f"red fox {i} round {round_}"})
+        t.compact()
+        assert len(t._doc_ids) == len(t) == 10
+        assert len(t.search("red fox", top_k=20, phrase=True)) == 10
+        assert [d for d, _ in t.search("round 19 fox", candidates=["d3"])] == ["d3"]
+
+    def test_vectorized_matches_python(self):
+        if text_index_module.np is None:
+            pytest.skip("numpy not installed")
+        t = create_text_index()
+        rng = random.Random(7)
+        words = [f"w{i}" for i in range(50)]
+        for i in range(3000):
+            t.add(f"d{i}", {"text": " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))})
+        for i in range(0, 3000, 7):
+            t.remove(f"d{i}")
+        terms = {"w1": 1, "w2": 1, "w3": 2}
+        fast = t._score_vectorized(terms, None, 20)
+        slow = t._score_python(terms, None, 20)
+        assert len(fast) == len(slow) == 20
+        assert all(abs(a - b) < 1e-4 for (_, a), (_, b) in zip(fast, slow))
+        scores = dict(slow)
+        assert all(abs(scores.get(n, s) - s) < 1e-4 for n, s in fast)
+
+    def test_engine_lifecycle(self):
+        e = create_indexing_engine(key_extractor=lambda d: d.get("tags", []), text_index=create_text_index())
+        e.index("a", {"tags": ["x"], "text": "red apple"})
+        e.index("b", {"tags": ["y"], "text": "green apple"})
+        before = e.generations(e.text_dependencies("apple"))
+        assert [d for d, _ in e.search_text("apple", candidates=e.search_any(["y"]))] == ["b"]
+        e.remove("a", {"tags": ["x"], "text": "red apple"})
+        assert e.generations(e.text_dependencies("apple")) != before
+        assert [d for d, _ in e.search_text("apple")] == ["b"]
+        with pytest.raises(ValidationError):
+            create_indexing_engine().search_text("apple")
@@ -0,0 +1,413 @@
+"""Model tests for engine-data: declarative DocumentModel queries and indexes, sharding, columnar tables, joins."""
+import random
+
+import pytest
+from errors.error_model import ValidationError
+from models import Document, Row, create_document_model, create_sharded_document_model, shard_for
+from models.document_query import parse_query
+
+
+def _orders():
+    m = create_document_model()
+    m.insert("orders", Document("o1", {"status": "open", "tags": ["a", "b"], "order": {"amount": 10}}))
+    m.insert("orders", Document("o2", {"status": "closed", "tags": ["b"], "order": {"amount": 50}}))
+    m.insert("orders", Document("o3", {"status": "open", "order": {"amount": 120}, "note": "x"}))
+    m.insert("orders", Document("o4", {"status": "open", "tags": "c", "order": {"amount": "n/a"}}))
+    return m
+
+
+def _ids(docs):
+    return sorted(d.id for d in docs)
+
+
+class TestDocumentQuery:
+    def test_insert_many(self):
+        m = _orders()
+        m.create_index("orders", "status")
+        previous = m.insert_many("orders", [Document("o2", {"status": "open"}), Document("o5", {"status": "new"})])
+        assert [p.body["status"] if p else None for p in previous] == ["closed", None]
+        assert _ids(m.find("orders", {"field": "status", "eq": "open"})) == ["o1", "o2", "o3", "o4"]
+        assert _ids(m.find("orders", {"field": "status", "eq": "new"})) == ["o5"]
+        assert m.find("orders", {"field": "status", "eq": "closed"}) == []
+
+    def test_operators_scan(self):
+        m = _orders()
+        assert _ids(m.find("orders", {"field": "status", "eq": "open"})) == ["o1", "o3", "o4"]
+        assert _ids(m.find("orders", {"field": "tags", "eq": "b"})) == ["o1", "o2"]
+        assert _ids(m.find("orders", {"field": "tags", "in": ["a", "c"]})) == ["o1", "o4"]
+        assert _ids(m.find("orders", {"field": "order.amount", "range": [10, 100]})) == ["o1", "o2"]
+        assert _ids(m.find("orders", {"field": "order.amount", "range": [None, 60]})) == ["o1", "o2"]
+        assert _ids(m.find("orders", {"field": "note", "exists": True})) == ["o3"]
+        assert _ids(m.find("orders", {"field": "note", "exists": False})) == ["o1", "o2", "o4"]
+        both = [{"field": "status", "eq": "open"}, {"field": "order.amount", "range": [50, None]}]
+        assert _ids(m.find("orders", both)) == ["o3"]
+        assert _ids(m.find("orders", lambda d: d.get("status") == "closed")) == ["o2"]
+
+    def test_parse_rejects_malformed(self):
+        for bad in ({"eq": 1}, {"field": "a"}, {"field": "a", "eq": 1, "in": [1]}, {"field": "a", "in": 1},
+                    {"field": "a", "range": [1]}, {"field": "a", "exists": "yes"}, "status"):
+            with pytest.raises(ValidationError):
+                parse_query(bad)
+
+    def test_planner_picks_most_selective_index(self):
+        m = _orders()
+        m.create_index("orders", "status")
+        m.create_index("orders", "order.amount", kind="sorted")
+        query = [{"field": "status", "eq": "open"}, {"field": "order.amount", "range": [100, 200]}]
+        plan = m.explain("orders", query)
+        assert plan["strategy"] == "index"
+        assert plan["driver"] == {"field": "order.amount", "range": [100, 200]}
+        assert plan["estimated_rows"] == 1
+        assert plan["residual"] == [{"field": "status", "eq": "open"}]
+        assert len(plan["considered"]) == 2
+        assert _ids(m.find("orders", query)) == ["o3"]
+
+    def test_scan_fallback(self):
+        m = _orders()
+        m.create_index("orders", "order.amount")
+        plan = m.explain("orders", {"field": "order.amount", "range": [0, 100]})
+        assert plan["strategy"] == "scan"
+        assert plan["estimated_rows"] == 4
+        assert m.explain("orders", {"field": "note", "exists": False})["strategy"] == "scan"
+
+    def test_indexes_follow_insert_and_delete(self):
+        m = _orders()
+        m.create_index("orders", "status")
+        m.create_index("orders", "order.amount", kind="sorted")
+        m.insert("orders", Document("o1", {"status": "closed", "order": {"amount": 70}}))
+        assert _ids(m.find("orders", {"field": "status", "eq": "open"})) == ["o3", "o4"]
+        assert _ids(m.find("orders", {"field": "order.amount", "range": [60, 80]})) == ["o1"]
+        assert m.delete("orders", "o3")
+        assert _ids(m.find("orders", {"field": "status", "exists": True})) == ["o1", "o2", "o4"]
+        assert {i["field"]: i["entries"] for i in m.indexes("orders")} == {"status": 3, "order.amount": 3}
+        assert m.drop_index("orders", "status")
+        assert not m.drop_index("orders", "status")
+
+    def test_index_and_scan_agree(self):
+        rng = random.Random(3)
+        indexed, plain = create_document_model(), create_document_model()
+        indexed.create_index("c", "k")
+        indexed.create_index("c", "n", kind="sorted")
+        for i in range(400):
+            body = {"k": rng.choice(["a", "b", "c", None]), "n": rng.choice([rng.randint(0, 99), [1, 2], "s", None])}
+            for m in (indexed, plain):
+                m.insert("c", Document(f"d{i % 300}", dict(body)))
+        backfilled = create_document_model()
+        backfilled.insert_many("c", plain.get_collection("c").values())
+        backfilled.create_index("c", "k")
+        backfilled.create_index("c", "n", kind="sorted")
+        for query in ({"field": "k", "eq": "a"}, {"field": "k", "in": ["b", "c"]}, {"field": "k", "exists": True},
+                      {"field": "n", "range": [10, 40]}, {"field": "n", "range": ["a", None]},
+                      [{"field": "k", "eq": "b"}, {"field": "n", "range": [None, 50]}]):
+            assert indexed.explain("c", query)["strategy"] == "index"
+            assert _ids(indexed.find("c", query)) == _ids(plain.find("c", query)) == _ids(backfilled.find("c", query))
+
+    def test_results_in_insertion_order_on_every_plan(self):
+        m = create_document_model()
+        for i in range(100):
+            m.insert("c", Document(f"d{99 - i}", {"k": i % 10}))
+        m.delete("c", "d95")
+        m.insert("c", Document("d95", {"k": 0}))
+        m.insert("c", Document("d99", {"k": 0}))
+        scan = [d.id for d in m.find("c", {"field": "k", "eq": 0})]
+        m.create_index("c", "k")
+        assert m.explain("c", {"field": "k", "eq": 0})["strategy"] == "index"
+        assert [d.id for d in m.find("c", {"field": "k", "eq": 0})] == scan
+        assert scan[0] == "d99" and scan[-1] == "d95"
+
+
+def _open(doc):
+    return doc.get("status") == "open"
+
+
+class TestShardedDocumentModel:
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_scatter_gather_matches_single_model(self, executor):
+        rng = random.Random(5)
+        docs = [Document(f"o{i}", {"status": rng.choice(["open", "closed"]), "amount": rng.randint(0, 200)}) for i in range(600)]
+        single = create_document_model()
+        single.insert_many("orders", docs)
+        sharded = create_sharded_document_model(shards=3, executor=executor)
+        try:
+            assert sharded.insert_many("orders", docs) == 600
+            assert sharded.create_index("orders", "status")["entries"] == 600
+            query = [{"field": "status", "eq": "open"}, {"field": "amount", "range": [50, 150]}]
+            expected = _ids(single.find("orders", query))
+            assert _ids(sharded.find("orders", query)) == expected
+            assert sharded.count("orders", query) == len(expected) and sharded.count("orders") == 600
+            assert _ids(sharded.find("orders", _open)) == _ids(single.find("orders", _open))
+            assert sharded.explain("orders", query)["shards"][0]["strategy"] == "index"
+            assert sharded.get("orders", "o7").body == single.get("orders", "o7").body
+            assert sharded.delete("orders", "o7") is True and sharded.get("orders", "o7") is None
+            with pytest.raises(ValidationError):
+                sharded.find("orders", {"field": "status"})
+        finally:
+            sharded.close()
+
+    def test_reshard_moves_only_remapped_documents(self):
+        ids = [f"d{i}" for i in range(3000)]
+        assert all(0 <= shard_for(i, 4) < 4 for i in ids)
+        expected_moves = sum(shard_for(i, 4) != shard_for(i, 5) for i in ids)
+        assert expected_moves < len(ids) * 0.3
+        sharded = create_sharded_document_model(shards=4)
+        sharded.insert_many("c", [Document(i, {"n": n, "tag": f"t{n % 3}"}) for n, i in enumerate(ids)])
+        sharded.create_index("c", "tag")
+        grown = sharded.reshard(5)
+        assert grown["moved"] == expected_moves and sharded.shard_count == 5
+        assert min(sharded.shard_sizes("c")) > 0 and sum(sharded.shard_sizes("c")) == 3000
+        assert sharded.indexes("c") == [{"field": "tag", "kind": "hash", "entries": 3000, "values_per_shard_sum": 15, "shards": 5}]
+        sharded.reshard(2)
+        assert sharded.shard_sizes("c") == [sum(shard_for(i, 2) == s for i in ids) for s in range(2)]
+        assert sharded.count("c", {"field": "tag", "eq": "t1"}) == 1000
+        assert sharded.get("c", "d42").body == {"n": 42, "tag": "t0"}
+        with pytest.raises(ValidationError):
+            sharded.reshard(0)
+        sharded.close()
+
+
+def _sales():
+    pytest.importorskip("numpy")
+    from models import Column, create_relational_model
+
+    m = create_relational_model()
+    t = m.create_table(
+        "sales",
+        [Column("id", "int"), Column("region", "str"), Column("amount", "float"), Column("paid", "bool")],
+        storage="columnar",
+    )
+    for i in range(6):
+        t.insert({"id": i, "region": ["eu", "us", None][i % 3], "amount": None if i == 4 else i * 10.0, "paid": i % 2 == 0})
+    t.extend({"id": [6, 7], "region": ["eu", "apac"], "amount": [5.0, None]})
+    return m, t
+
+
+class TestColumnarTable:
+    def test_storage_and_row_surface(self):
+        m, t = _sales()
+        assert m.get_table("sales") is t and len(t) == 8
+        assert t.column("amount").tolist()[:4] == [0.0, 10.0, 20.0, 30.0]
+        assert t.nulls("amount").tolist() == [False, False, False, False, True, False, False, True]
+        rows = t.select(["id", "region"])
+        assert rows[2].values == {"id": 2, "region": None}
+        assert [r.get("id") for r in t.where(lambda r: r.get("paid") is False)] == [1, 3, 5]
+        with pytest.raises(ValidationError):
+            t.insert({"id": 1, "nope": 2})
+        with pytest.raises(ValidationError):
+            t.insert({"id": "x"})
+        with pytest.raises(ValidationError):
+            m.create_table("bad", [], storage="parquet")
+
+    def test_projection_is_a_view(self):
+        np = pytest.importorskip("numpy")
+        _, t = _sales()
+        p = t.project(["amount"])
+        assert np.shares_memory(p.column("amount"), t.column("amount"))
+        with pytest.raises(ValueError):
+            t.column("amount")[0] = 1.0
+        p.insert({"amount": 1.0})
+        assert len(p) == 9 and len(t) == 8
+
+    def test_filter_and_aggregate(self):
+        _, t = _sales()
+        assert [r.get("id") for r in t.where([("region", "==", "eu"), ("amount", ">", 1)])] == [3, 6]
+        assert [r.get("id") for r in t.where([("region", "in", ["us", "apac"])])] == [1, 4, 7]
+        assert [r.get("id") for r in t.where([("amount", "is_null", None)])] == [4, 7]
+        assert t.aggregate("sum", "amount") == 115.0
+        assert t.aggregate("count", "amount") == 6 and t.aggregate("count") == 8
+        assert t.aggregate("mean", "amount", [("paid", "==", True)]) == 10.0
+        assert (t.aggregate("min", "region"), t.aggregate("max", "id")) == ("apac", 7)
+        assert t.aggregate("sum", "amount", [("id", ">", 100)]) is None
+        with pytest.raises(ValidationError):
+            t.aggregate("sum", "region")
+        with pytest.raises(ValidationError):
+            t.aggregate("median", "amount")
+
+    def test_ordering_on_nullable_object_column(self):
+        _, t = _sales()
+        assert [r.get("id") for r in t.where([("region", "<", "f")])] == [0, 3, 6, 7]
+        assert [r.get("id") for r in t.where([("region", ">=", "u"), ("amount", "not_null", None)])] == [1]
+        assert [r.get("id") for r in t.where([("region", "!=", "eu")])] == [1, 4, 7]
+        assert t.aggregate("count", None, [("region", "<=", "eu")]) == 4
+
+    def test_group_by(self):
+        _, t = _sales()
+        g = t.group_by(["region"], {"n": ("count", None), "total": ("sum", "amount"), "top": ("max", "amount"),
+                                    "avg": ("mean", "amount"), "paid": ("sum", "paid")})
+        by_region = {r.get("region"): r.values for r in g.to_rows()}
+        assert list(by_region) == ["apac", "eu", "us", None]
+        assert by_region["eu"] == {"region": "eu", "n": 3, "total": 35.0, "top": 30.0, "avg": 35.0 / 3, "paid": 1}
+        assert by_region["apac"]["total"] is None and by_region["apac"]["n"] == 1
+        assert by_region[None]["avg"] == 35.0
+        pairs = t.group_by(["paid", "id"], {"n": ("count", None)})
+        assert len(pairs) == 8 and pairs.to_rows()[0].values == {"paid": False, "id": 1, "n": 1}
+
+    def test_group_by_matches_python(self):
+        np = pytest.importorskip("numpy")
+        from models import Column, ColumnarTable
+
+        rng = np.random.default_rng(0)
+        n = 5000
+        keys, vals = rng.integers(-5, 5, n), rng.integers(0, 1000, n)
+        t = ColumnarTable("t", [Column("k", "int"), Column("v", "int")])
+        t.extend({"k": keys, "v": vals})
+        g = {r.get("k"): r.values for r in t.group_by(["k"], {"s": ("sum", "v"), "lo": ("min", "v")}).to_rows()}
+        for k in range(-5, 5):
+            assert g[k]["s"] == int(vals[keys == k].sum()) and g[k]["lo"] == int(vals[keys == k].min())
+
+    def test_group_by_key_space_beyond_int64(self):
+        np = pytest.importorskip("numpy")
+        from models import Column, ColumnarTable
+
+        rng = np.random.default_rng(1)
+        names = [f"k{i}" for i in range(20)]
+        t = ColumnarTable("t", [Column(name, "int") for name in names])
+        t.extend({name: rng.permutation(10) for name in names})
+        t.extend({name: t.column(name)[:3] for name in names})
+        g = t.group_by(names, {"n": ("count", None)})
+        expected: dict[tuple, int] = {}
+        for row in t.to_rows():
+            key = tuple(row.get(name) for name in names)
+            expected[key] = expected.get(key, 0) + 1
+        got = {tuple(r.get(name) for name in names): r.get("n") for r in g.to_rows()}
+        assert got == expected and len(g) == 10
+        assert list(got) == sorted(got)
+
+
+def _join_model(storage="row"):
+    from models import Column, create_relational_model
+
+    m = create_relational_model()
+    int_type = "int" if storage == "columnar" else "any"
+    users = m.create_table("users", [Column("id", int_type), Column("name", "str")], storage=storage)
+    orders = m.create_table(
+        "orders", [Column("id", int_type), Column("user_id", int_type), Column("amt", int_type)], storage=storage
+    )
+    for uid, name in [(3, "c"), (1, "a"), (None, "z"), (2, "b")]:
+        users.insert({"id": uid, "name": name} if storage == "columnar" else Row(values={"id": uid, "name": name}))
+    for oid, (uid, amt) in enumerate([(1, 5), (3, 9), (1, 7), (4, 1), (None, 2)]):
+        values = {"id": oid, "user_id": uid, "amt": amt}
+        orders.insert(values if storage == "columnar" else Row(values=values))
+    return m
+
+
+def _join_rows(m, **kwargs):
+    out = []
+    for batch in m.join("users", "orders", on=("id", "user_id"), **kwargs):
+        out.extend(batch.to_rows() if hasattr(batch, "to_rows") else batch)
+    return [r.values for r in out]
+
+
+class TestJoins:
+    def test_hash_inner_and_left(self):
+        m = _join_model()
+        inner = _join_rows(m)
+        assert [(r["name"], r["orders.id"], r["amt"]) for r in inner] == [("c", 1, 9), ("a", 0, 5), ("a", 2, 7)]
+        left = _join_rows(m, how="left")
+        assert [(r["name"], r["amt"]) for r in left] == [("c", 9), ("a", 5), ("a", 7), ("z", None), ("b", None)]
+
+    def test_merge_walks_key_order(self):
+        m = _join_model()
+        assert [(r["id"], r["orders.id"]) for r in _join_rows(m, algorithm="merge")] == [(1, 0), (1, 2), (3, 1)]
+        left = _join_rows(m, algorithm="merge", how="left")
+        assert [r["name"] for r in left] == ["a", "a", "b", "c", "z"]
+
+    def test_streams_in_batches(self):
+        m = _join_model()
+        batches = list(m.join("users", "orders", on=("id", "user_id"), how="left", batch_size=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+        with pytest.raises(ValidationError):
+            m.join("users", "orders", on=("id", "user_id"), how="outer")
+        with pytest.raises(ValidationError):
+            m.join("users", "missing", on="id")
+
+    def test_columnar_matches_row_join(self):
+        pytest.importorskip("numpy")
+        from models import ColumnarTable
+
+        rows, cols = _join_model(), _join_model("columnar")
+        for algorithm in ("hash", "merge"):
+            for how in ("inner", "left"):
+                batches = list(cols.join("users", "orders", on=("id", "user_id"), how=how, algorithm=algorithm))
+                assert all(isinstance(b, ColumnarTable) for b in batches)
+                assert _join_rows(cols, how=how, algorithm=algorithm) == _join_rows(rows, how=how, algorithm=algorithm)
+
+    def test_composite_key(self):
+        from models import Column, create_relational_model
+
+        m = create_relational_model()
+        a = m.create_table("a", [Column("x"), Column("y"), Column("v")])
+        b = m.create_table("b", [Column("x"), Column("y"), Column("w")])
+        for x, y, v in [(1, "p", 1), (1, "q", 2), (2, "p", 3)]:
+            a.insert(Row(values={"x": x, "y": y, "v": v}))
+            b.insert(Row(values={"x": x, "y": "p", "w": v * 10}))
+        for algorithm in ("hash", "merge"):
+            got = [r.values for batch in m.join("a", "b", on=["x", "y"], algorithm=algorithm) for r in batch]
+            assert [(r["v"], r["w"]) for r in got] == [(1, 10), (1, 20), (3, 30)]
+            assert set(got[0]) == {"x", "y", "v", "w"}
+
+
+def _graph():
+    from models import Edge, Node, create_graph
+
+    g = create_graph()
+    for n in "abcdefg":
+        g.add_node(Node(n))
+    edges = [("a", "b", 1), ("b", "c", 2), ("a", "c", 5), ("c", "d", 1), ("d", "b", 1), ("e", "f", 3)]
+    for i, (s, t, w) in enumerate(edges):
+        g.add_edge(Edge(f"e{i}", s, t, properties={"weight": w}))
+    g.add_edge(Edge("dangling", "a", "missing"))
+    return g
+
+
+class TestGraphCSR:
+    def test_neighbors_and_freeze_cache(self):
+        from models import Edge
+
+        g = _graph()
+        csr = g.freeze()
+        assert g.freeze() is csr
+        assert csr.neighbors("a") == ["b", "c"] == g.neighbor_ids("a")
+        assert csr.neighbors("b", direction="in") == ["a", "d"]
+        assert sorted(csr.neighbors("c", direction="both")) == ["a", "b", "d"]
+        assert (csr.degree("a"), csr.stats()["edges"]) == (2, 6)
+        g.add_edge(Edge("e0", "a", "d", properties={"weight": 1}))
+        assert g.neighbor_ids("a") == ["c", "d"] and g.neighbor_ids("b", direction="in") == ["d"]
+        assert g.freeze() is not csr and csr.neighbors("a") == ["b", "c"]
+
+    def test_traversals(self):
+        csr = _graph().freeze()
+        assert csr.bfs("a") == ["a", "b", "c", "d"]
+        assert csr.bfs("a", max_depth=1) == ["a", "b", "c"]
+        assert csr.dfs("a") == ["a", "b", "c", "d"]
+        assert csr.bfs("b", direction="in") == ["b", "a", "d", "c"]
+        assert csr.k_hop("a", 2) == {"b": 1, "c": 1, "d": 2}
+        assert csr.k_hop("a", 0) == {}
+        with pytest.raises(ValidationError):
+            csr.bfs("missing")
+        with pytest.raises(ValidationError):
+            csr.bfs("a", direction="sideways")
+
+    def test_dijkstra(self):
+        csr = _graph().freeze()
+        assert csr.shortest_path("a", "d") == (4.0, ["a", "b", "c", "d"])
+        assert csr.shortest_path("a", "e") is None
+        assert csr.shortest_paths("a") == {"a": 0.0, "b": 1.0, "c": 3.0, "d": 4.0}
+        from models import CSRGraph
+
+        with pytest.raises(ValidationError):
+            CSRGraph.from_edges(["x", "y"], [("x", "y", -1)]).shortest_paths("x")
+        with pytest.raises(ValidationError):
+            CSRGraph.from_edges(["x"], [("x", "y")])
+
+    def test_components_and_pagerank(self, monkeypatch):
+        from models import graph_csr
+
+        csr = _graph().freeze()
+        assert csr.connected_components() == [["a", "b", "c", "d"], ["e", "f"], ["g"]]
+        ranks = csr.pagerank(tol=1e-12)
+        assert abs(sum(ranks.values()) - 1.0) < 1e-9
+        assert ranks["b"] > ranks["a"] and ranks["f"] > ranks["e"]
+        monkeypatch.setattr(graph_csr, "np", None)
+        pure = graph_csr.CSRGraph.from_edges("abcdefg", [(s, t) for s in "abcdefg" for t in csr.neighbors(s)])
+        assert (pure.offsets, pure.targets, pure.in_offsets) == (csr.offsets, csr.targets, csr.in_offsets)
+        assert all(abs(pure.pagerank(tol=1e-12)[k] - v) < 1e-9 for k, v in ranks.items())
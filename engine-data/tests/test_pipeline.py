@@ -1,5 +1,9 @@
 """Pipeline tests for engine-data."""
+import itertools
+import time
+
 import pytest
+from errors.error_model import ExecutionError, ValidationError
 from pipelines.data_pipeline import create_pipeline
 from caching.cache_engine import create_cache_engine
 
@@ -17,6 +21,161 @@ class TestDataPipelineFlow:
         assert out["items"] == [2, 4, 6]
 
 
+class TestDataPipelineStream:
+    def _pipeline(self, seen):
+        def evens(batch):
+            seen.append(len(batch))
+            return [x for x in batch if x % 2 == 0]
+
+        return (
+            create_pipeline("stream")
+            .add_stage("parse", int)
+            .add_stage("evens", evens, mode="batch")
+            .add_stage("pair", lambda b: [y for x in b for y in (x, -x)], mode="batch")
+            .add_stage("square", lambda x: x * x)
+        )
+
+    def test_stream_batches_and_order(self):
+        seen = []
+        out = list(self._pipeline(seen).stream(map(str, range(10)), batch_size=4))
+        assert out == [0, 0, 4, 4, 16, 16, 36, 36, 64, 64]
+        assert seen == [4, 4, 2]
+
+    def test_stream_is_lazy(self):
+        seen = []
+        pulled = []
+        source = (pulled.append(i) or i for i in itertools.count())
+        stream = self._pipeline(seen).stream(source, batch_size=8)
+        assert len(pulled) == 0
+        assert list(itertools.islice(stream, 3)) == [0, 0, 4]
+        assert len(pulled) == 8 and seen == [8]
+
+    def test_run_matches_stream(self):
+        p = self._pipeline([])
+        assert p.run("3") is None
+        assert p.run("4") == [16, 16]
+        single = create_pipeline("one").add_stage("inc", lambda b: [x + 1 for x in b], mode="batch")
+        assert single.run(1) == 2
+
+    def test_errors_map_to_execution_error(self):
+        p = create_pipeline("bad").add_stage("boom", lambda x: 1 / x)
+        with pytest.raises(ExecutionError):
+            list(p.stream([1, 0]))
+        not_list = create_pipeline("bad").add_stage("tuple", tuple, mode="batch")
+        with pytest.raises(ExecutionError):
+            list(not_list.stream([1]))
+        with pytest.raises(ValidationError):
+            create_pipeline("bad").add_stage("x", int, mode="vector")
+        with pytest.raises(ValidationError):
+            create_pipeline("bad").stream([1], batch_size=0)
+
+
+def _slow_double(x):
+    time.sleep(0.002)
+    return x * 2
+
+
+class TestDataPipelineParallel:
+    def test_thread_stage_keeps_order(self):
+        p = create_pipeline("par").add_stage("slow", _slow_double, parallel=4).add_stage("inc", lambda x: x + 1)
+        assert list(p.stream(range(100), batch_size=3)) == [x * 2 + 1 for x in range(100)]
+        metrics = p.stage_metrics()
+        assert metrics["slow"]["items_in"] == 100 and metrics["slow"]["calls"] == 34
+        assert 1 <= metrics["slow"]["max_queue_depth"] <= 8 and metrics["slow"]["queue_depth"] == 0
+        assert metrics["inc"]["items_out"] == 100 and metrics["inc"]["parallel"] == 1
+
+    def test_unordered_and_bounded_queue(self):
+        def jitter(batch):
+            time.sleep(0.001 * (batch[0] % 3))
+            return batch
+
+        p = create_pipeline("par").add_stage("jitter", jitter, mode="batch", parallel=3)
+        out = list(p.stream(range(60), batch_size=2, ordered=False, queue_size=2))
+        assert sorted(out) == list(range(60))
+        assert p.stage_metrics()["jitter"]["max_queue_depth"] == 2
+
+    def test_process_stage(self):
+        p = create_pipeline("proc").add_stage("abs", abs, parallel=2, executor="process")
+        assert list(p.stream(range(-4, 4), batch_size=2)) == [4, 3, 2, 1, 0, 1, 2, 3]
+
+    def test_parallel_errors_and_validation(self):
+        p = create_pipeline("bad").add_stage("boom", lambda x: 1 / x, parallel=2)
+        with pytest.raises(ExecutionError):
+            list(p.stream([1, 2, 0, 3], batch_size=1))
+        assert p.stage_metrics()["boom"]["errors"] == 1
+        with pytest.raises(ValidationError):
+            create_pipeline("bad").add_stage("lam", lambda x: x, parallel=2, executor="process")
+        with pytest.raises(ValidationError):
+            create_pipeline("bad").add_stage("x", abs, parallel=0)
+        with pytest.raises(ValidationError):
+            create_pipeline("bad").add_stage("x", abs, executor="fiber")
+
+
+def _busy_loop(x):
+    end = time.perf_counter() + 0.004
+    while time.perf_counter() < end:
+        pass
+    return x
+
+
+class TestDataPipelineObservability:
+    def test_latency_histogram(self):
+        from pipelines.stage_metrics import LatencyHistogram
+
+        h = LatencyHistogram()
+        for ms in [1] * 90 + [10] * 9 + [100]:
+            h.add(ms / 1000)
+        assert 0.001 <= h.percentile(50) < 0.0012
+        assert 0.01 <= h.percentile(95) < 0.012
+        assert h.percentile(99) < 0.012 and h.percentile(100) == pytest.approx(0.1)
+        assert sum(n for _, n in h.buckets()) == 100 and LatencyHistogram().percentile(99) == 0.0
+
+    def test_stage_latency_and_slowest(self):
+        from pipelines.observability import slowest_stages
+
+        p = create_pipeline("obs").add_stage("fast", lambda x: x).add_stage("slow", _busy_loop)
+        for i in range(5):
+            p.run(i)
+        metrics = p.stage_metrics()
+        assert metrics["slow"]["calls"] == 5 and metrics["slow"]["latency_ms"]["p50"] >= 4
+        assert metrics["fast"]["latency_ms"]["p99"] < metrics["slow"]["latency_ms"]["p50"]
+        assert [row["stage"] for row in slowest_stages(p, limit=2)] == ["slow", "fast"]
+        with pytest.raises(ValidationError):
+            slowest_stages(p, by="median")
+        p.reset_metrics()
+        assert p.stage_metrics()["slow"]["latency_ms"]["max"] == 0.0
+
+    def test_cprofile_hook(self):
+        p = create_pipeline("prof").add_stage("slow", _busy_loop).add_stage("batch", lambda b: b, mode="batch")
+        p.enable_profiling("slow")
+        assert list(p.stream(range(6), batch_size=3)) == list(range(6))
+        p.run(1)
+        report = p.profile_report("slow")
+        assert report["kind"] == "cprofile" and report["calls"] == 3
+        assert any("_busy_loop" in row["function"] for row in report["top"])
+        assert p.disable_profiling("slow")["calls"] == 3
+        assert p.disable_profiling("slow") is None
+        with pytest.raises(ValidationError):
+            p.profile_report("slow")
+
+    def test_sampling_hook_parallel(self):
+        p = create_pipeline("prof").add_stage("slow", _busy_loop, parallel=2)
+        p.enable_profiling("slow", kind="sample", interval=0.001)
+        assert list(p.stream(range(20), batch_size=2)) == list(range(20))
+        report = p.disable_profiling("slow")
+        assert report["kind"] == "sample" and report["calls"] == 10 and report["samples"] > 0
+        assert any("_busy_loop" in row["function"] for row in report["cumulative"])
+
+    def test_profiling_validation(self):
+        p = create_pipeline("prof").add_stage("a", abs, parallel=2, executor="process")
+        with pytest.raises(ValidationError):
+            p.enable_profiling("a")
+        with pytest.raises(ValidationError):
+            p.enable_profiling("missing")
+        with pytest.raises(ValidationError):
+            create_pipeline().add_stage("b", abs).enable_profiling("b", kind="perf")
+
+
 class TestCacheEngine:
     def test_get_set(self):
         c = create_cache_engine()
@@ -0,0 +1,75 @@
+"""Schema tests for engine-data: interpreted vs compiled DocumentSchema validation."""
+import random
+
+import pytest
+from errors.error_model import ValidationError
+from schemas import DocumentSchema, FieldSchema, optional_int, required_string
+
+
+def _schema():
+    return DocumentSchema(
+        "user",
+        [
+            FieldSchema("id", dtype="str", validator=required_string),
+            FieldSchema("age", dtype="int", required=False, validator=lambda v: isinstance(v, int) and 0 <= v < 150),
+            FieldSchema("score", dtype="float"),
+            FieldSchema("tags", dtype="list", required=False),
+            FieldSchema("note", required=False),
+            FieldSchema("count", required=False, validator=optional_int),
+        ],
+    )
+
+
+_VALUES = [None, "", " ", "x", 0, 7, -1, 200, 1.5, True, [], ["a"], {}, {"k": 1}]
+
+
+class TestCompiledSchema:
+    def test_matches_interpreted(self):
+        schema = _schema()
+        compiled = schema.compile()
+        rng = random.Random(3)
+        records = []
+        for _ in range(2000):
+            record = {f.name: rng.choice(_VALUES) for f in schema.fields if rng.random() < 0.8}
+            records.append(record)
+            assert compiled.validate(record) == schema.validate(record), record
+        batch = schema.validate_batch(records)
+        assert batch.count == 2000 and batch.invalid_count > 0
+        for i, record in enumerate(records):
+            valid, errors = schema.validate(record)
+            assert batch.is_valid(i) == valid
+            assert compiled.errors(record, batch.masks.get(i, 0)) == errors
+
+    def test_batch_bitmap(self):
+        schema = _schema()
+        records = [
+            {"id": "a", "score": 1.0},
+            {"id": "", "score": 2},
+            {"score": 1.0, "age": 400},
+            {"id": "b"},
+        ]
+        batch = schema.validate_batch(records)
+        assert batch.bitmap == bytearray([0b1110]) and batch.invalid_indices() == [1, 2, 3]
+        assert batch.failed_fields(2) == ["id", "age"] and batch.failed_fields(0) == []
+        assert batch.field_counts() == {"id": 2, "age": 1, "score": 1}
+        assert batch.select(records) == [records[0]] and len(batch.select(records, valid=False)) == 3
+        assert schema.validate(records[2]) == (
+            False,
+            ["Missing required field: id", "Invalid value for field: age"],
+        )
+
+    def test_cache_and_validation(self):
+        schema = _schema()
+        first = schema.compiled()
+        assert schema.compiled() is first
+        schema.fields.append(FieldSchema("email", dtype="str"))
+        assert schema.compiled() is not first
+        assert "def check(data):" in schema.compiled().source
+        assert not schema.validate_batch([{"id": "a", "score": 1}]).valid
+        with pytest.raises(ValidationError):
+            schema.validate_batch([{"id": "a"}, "not a dict"])
+
+    def test_dtype_is_descriptive_only(self):
+        schema = DocumentSchema("s", [FieldSchema("n", dtype="number"), FieldSchema("s", dtype="string")])
+        record = {"n": "not a number", "s": 5}
+        assert schema.validate(record) == schema.compile().validate(record) == (True, [])
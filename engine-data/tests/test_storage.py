@@ -0,0 +1,349 @@
+"""Storage tests for engine-data."""
+import errno
+import json
+
+import pytest
+from errors import ExecutionError, ValidationError
+from indexing.indexing_engine import create_indexing_engine
+from models.document_model import create_document_model
+from storage.data_loader import DataLoader, create_data_loader, load_from_iter
+from storage import durable_store as durable_store_module
+from storage.durable_store import DurableStore
+from storage import wal as wal_module
+from storage.wal import WriteAheadLog
+from storage.vector_store import VectorEntry, VectorStore, create_vector_store
+
+
+def _seed(store):
+    store.add(VectorEntry("a", [1.0, 0.0, 0.0], {"kind": "x"}))
+    store.add(VectorEntry("b", [0.0, 2.0, 0.0]))
+    store.add(VectorEntry("c", [1.0, 1.0, 0.0]))
+    return store
+
+
+class TestMatrixVectorStore:
+    def test_search_matches_list_mode(self):
+        lst = _seed(create_vector_store())
+        mat = _seed(create_vector_store(mode="matrix"))
+        q = [1.0, 0.2, 0.0]
+        expected = [(e.id, s) for e, s in lst.search(q, top_k=2)]
+        got = [(e.id, s) for e, s in mat.search(q, top_k=2)]
+        assert [i for i, _ in got] == [i for i, _ in expected]
+        for (_, s1), (_, s2) in zip(got, expected):
+            assert s1 == pytest.approx(s2, abs=1e-6)
+
+    def test_get_rebuilds_entry(self):
+        mat = _seed(create_vector_store(mode="matrix"))
+        e = mat.get("b")
+        assert e.vector == pytest.approx([0.0, 2.0, 0.0])
+        assert mat.get("a").metadata == {"kind": "x"}
+        assert mat.get("missing") is None
+
+    def test_delete_tombstones_and_compacts(self):
+        mat = _seed(create_vector_store(mode="matrix"))
+        assert mat.delete("a") is True
+        assert mat.delete("a") is False
+        assert mat.size() == 2
+        assert "a" not in [e.id for e, _ in mat.search([1.0, 0.0, 0.0], top_k=3)]
+        mat.compact()
+        assert [e.id for e, _ in mat.search([0.0, 1.0, 0.0], top_k=1)] == ["b"]
+        mat.add(VectorEntry("d", [0.0, 0.0, 1.0]))
+        assert mat.get("d") is not None and mat.size() == 3
+
+    def test_min_score_and_dimension(self):
+        mat = _seed(create_vector_store(mode="matrix"))
+        assert [e.id for e, _ in mat.search([1.0, 0.0, 0.0], min_score=0.9)] == ["a"]
+        with pytest.raises(ValidationError):
+            mat.search([1.0, 0.0])
+        with pytest.raises(ValidationError):
+            create_vector_store(mode="bogus")
+
+    def test_search_batch_matches_search(self):
+        mat = _seed(create_vector_store(mode="matrix"))
+        mat.add(VectorEntry("d", [0.0, 0.0, 1.0]))
+        mat.delete("c")
+        queries = [[1.0, 0.2, 0.0], [0.0, 0.1, 1.0], [0.0, 1.0, 0.0]]
+        batch = mat._matrix.search_batch(queries, top_k=2, chunk_rows=2)
+        for q, hits in zip(queries, batch):
+            assert [r for r, _ in hits] == [r for r, _ in mat._matrix.search(q, top_k=2)]
+        out = mat.search_batch(queries, top_k=1, min_score=0.99)
+        assert [[e.id for e, _ in hits] for hits in out] == [[], ["d"], ["b"]]
+
+
+class TestIVFIndex:
+    def test_ivf_store_recall_and_lifecycle(self):
+        np = pytest.importorskip("numpy")
+        rng = np.random.default_rng(1)
+        data = rng.standard_normal((600, 16)).astype("float32")
+        store = create_vector_store(index="ivf", n_lists=8, nprobe=8, train_threshold=500)
+        for i, v in enumerate(data):
+            store.add(VectorEntry(f"v{i}", v.tolist()))
+        assert store.mode == "matrix"
+        hits = store.search(data[3].tolist(), top_k=5)
+        assert store.index.trained and hits[0][0].id == "v3"
+        report = store.recall_report(data[:20], top_k=5)
+        assert report["recall_at_k"] == pytest.approx(1.0)
+        store.index.nprobe = 1
+        assert 0.0 < store.recall_report(data[:20], top_k=5)["recall_at_k"] <= 1.0
+        for i in range(300):
+            store.delete(f"v{i}")
+        store.add(VectorEntry("new", data[0].tolist()))
+        assert store.search(data[0].tolist(), top_k=1)[0][0].id == "new"
+        assert store.search(data[400].tolist(), top_k=1)[0][0].id == "v400"
+
+
+class TestFilteredSearch:
+    def _store(self, mode):
+        store = create_vector_store(mode=mode)
+        store.add(VectorEntry("a", [1.0, 0.0], {"tenant": "t1", "type": "a"}))
+        store.add(VectorEntry("b", [0.9, 0.1], {"tenant": "t2", "type": "a"}))
+        store.add(VectorEntry("c", [0.5, 0.5], {"tenant": "t1", "type": "b"}))
+        store.add(VectorEntry("d", [0.0, 1.0], {"tenant": "t1", "type": "c", "tags": ["x", "y"]}))
+        return store
+
+    @pytest.mark.parametrize("mode", ["list", "matrix"])
+    def test_filter_applied_before_top_k(self, mode):
+        store = self._store(mode)
+        hits = store.search([1.0, 0.0], top_k=2, filter={"tenant": "t1", "type": ["a", "b"]})
+        assert [e.id for e, _ in hits] == ["a", "c"]
+        assert [e.id for e, _ in store.search([1.0, 0.0], top_k=1, filter={"tenant": "t2"})] == ["b"]
+        assert [e.id for e, _ in store.search([1.0, 0.0], filter={"tags": "y"})] == ["d"]
+        assert store.search([1.0, 0.0], filter={"tenant": "nope"}) == []
+
+    def test_filter_tracks_updates_and_deletes(self):
+        store = self._store("matrix")
+        store.add(VectorEntry("a", [1.0, 0.0], {"tenant": "t2"}))
+        store.delete("b")
+        store.compact()
+        assert [e.id for e, _ in store.search([1.0, 0.0], filter={"tenant": "t2"})] == ["a"]
+        batch = store.search_batch([[1.0, 0.0], [0.0, 1.0]], top_k=1, filter={"tenant": "t1"})
+        assert [[e.id for e, _ in hits] for hits in batch] == [["c"], ["d"]]
+        with pytest.raises(ValidationError):
+            store.search([1.0, 0.0], filter="tenant")
+
+
+class TestVectorSnapshot:
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_save_open_roundtrip(self, tmp_path, mmap):
+        np = pytest.importorskip("numpy")
+        data = np.random.default_rng(2).standard_normal((300, 8)).astype("float32")
+        store = create_vector_store(index="ivf", n_lists=4, train_threshold=100)
+        for i, v in enumerate(data):
+            store.add(VectorEntry(f"v{i}", v.tolist(), {"tenant": f"t{i % 3}"}))
+        store.delete("v0")
+        store.search(data[1].tolist())
+        store.save(str(tmp_path / "snap"))
+
+        reopened = VectorStore.open(str(tmp_path / "snap"), mmap=mmap)
+        assert reopened.size() == 299 and reopened.get("v0") is None
+        assert reopened.index.trained and reopened.index.n_lists() == 4
+        assert reopened.get("v5").metadata == {"tenant": "t2"}
+        assert reopened.get("v5").vector == pytest.approx(data[5].tolist(), abs=1e-5)
+        assert reopened.search(data[7].tolist(), top_k=1)[0][0].id == "v7"
+        hits = reopened.search(data[7].tolist(), top_k=3, filter={"tenant": "t1"})
+        assert all(e.metadata["tenant"] == "t1" for e, _ in hits)
+        reopened.add(VectorEntry("new", data[0].tolist()))
+        reopened.delete("v7")
+        assert reopened.search(data[0].tolist(), top_k=1)[0][0].id == "new"
+
+    def test_list_mode_and_bad_path(self, tmp_path):
+        store = _seed(create_vector_store())
+        store.save(str(tmp_path / "list"))
+        reopened = VectorStore.open(str(tmp_path / "list"))
+        assert reopened.mode == "list" and reopened.size() == 3
+        with pytest.raises(ValidationError):
+            VectorStore.open(str(tmp_path / "missing"))
+
+
+class TestQuantizedIndex:
+    @pytest.mark.parametrize("kind,options", [("sq8", {}), ("pq", {"m": 4})])
+    def test_quantized_search_snapshot(self, tmp_path, kind, options):
+        np = pytest.importorskip("numpy")
+        data = np.random.default_rng(3).standard_normal((400, 16)).astype("float32")
+        store = create_vector_store(index=kind, train_threshold=200, rerank_factor=4, **options)
+        for i, v in enumerate(data):
+            store.add(VectorEntry(f"v{i}", v.tolist()))
+        assert store.search(data[11].tolist(), top_k=1)[0][0].id == "v11"
+        assert store.index.trained and store.index.memory_per_vector() == (16 if kind == "sq8" else 4)
+        assert store.recall_report(data[:20], top_k=5)["recall_at_k"] >= 0.8
+        store.delete("v11")
+        store.add(VectorEntry("late", data[11].tolist()))
+        store.save(str(tmp_path / kind))
+        reopened = VectorStore.open(str(tmp_path / kind))
+        assert reopened.index.trained
+        assert reopened.search(data[11].tolist(), top_k=1)[0][0].id == "late"
+
+
+def _boom(record):
+    raise RuntimeError("sink down")
+
+
+def _write_jsonl(path, n, bad_every=0):
+    lines = []
+    for i in range(n):
+        lines.append("{not json" if bad_every and i % bad_every == 0 else json.dumps({"id": i, "v": f"x{i}"}))
+    path.write_text("\n".join(lines) + "\n\n")
+    return path
+
+
+class TestDataLoaderFiles:
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_jsonl_chunks_batches_and_errors(self, tmp_path, use_mmap):
+        path = _write_jsonl(tmp_path / "data.jsonl", 1000, bad_every=100)
+        batches = []
+        loader = create_data_loader(sink_batch=batches.append)
+        result = loader.load_file(str(path), chunk_bytes=512, use_mmap=use_mmap)
+        assert result.count == 990 and result.error_count == 10
+        assert result.errors[0].startswith("line 1: invalid JSON") and result.errors[1].startswith("line 101:")
+        assert [r["id"] for batch in batches for r in batch] == [i for i in range(1000) if i % 100]
+        assert len(batches) > 1 and all(len(b) <= 1000 for b in batches)
+
+    def test_parallel_workers_match_serial(self, tmp_path):
+        path = _write_jsonl(tmp_path / "data.ndjson", 3000, bad_every=7)
+        serial, parallel = [], []
+        a = create_data_loader(sink_batch=serial.extend).load_file(str(path), chunk_bytes=4096)
+        b = create_data_loader(sink_batch=parallel.extend).load_file(str(path), chunk_bytes=4096, workers=2)
+        assert serial == parallel and (a.count, a.error_count, a.errors) == (b.count, b.error_count, b.errors)
+
+    def test_errors_are_capped(self, tmp_path):
+        path = _write_jsonl(tmp_path / "bad.jsonl", 500, bad_every=1)
+        result = DataLoader(sink=lambda r: None, max_errors=5).load_file(str(path), chunk_bytes=256)
+        assert result.count == 0 and result.error_count == 500
+        assert len(result.errors) == 5 and result.errors_truncated
+        failing = load_from_iter(iter([{"a": 1}] * 2500), sink=_boom, max_errors=3)
+        assert failing.error_count == 2500 and len(failing.errors) == 3
+
+    def test_csv_and_validator(self, tmp_path):
+        path = tmp_path / "rows.csv"
+        path.write_text('id,name\n1,"multi\nline"\n2,b,extra\n3,c\n')
+        records = []
+        result = create_data_loader(
+            sink=records.append, validator=lambda r: (r["id"] != "3", "id 3 rejected")
+        ).load_file(str(path))
+        assert records == [{"id": "1", "name": "multi\nline"}]
+        assert result.error_count == 2 and result.errors == ["line 4: expected 2 fields", "id 3 rejected"]
+
+    def test_parquet_and_validation(self, tmp_path):
+        with pytest.raises(ValidationError):
+            create_data_loader(sink=print).load_file(str(tmp_path / "missing.jsonl"))
+        (tmp_path / "x.txt").write_text("a")
+        with pytest.raises(ValidationError):
+            create_data_loader(sink=print).load_file(str(tmp_path / "x.txt"))
+        with pytest.raises(ValidationError):
+            DataLoader()
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        pq.write_table(pa.table({"id": [1, 2, 3]}), str(tmp_path / "t.parquet"))
+        rows = []
+        assert create_data_loader(sink_batch=rows.extend).load_file(str(tmp_path / "t.parquet")).count == 3
+        assert rows == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def _durable(path, **options):
+    documents = create_document_model()
+    index = create_indexing_engine(key_extractor=lambda d: [d["id"], *d.get("tags", [])])
+    store = DurableStore(str(path), documents, index, create_vector_store(), snapshot_interval=0, **options)
+    return store, documents, index
+
+
+class TestWriteAheadLog:
+    def test_group_commit_replay_and_torn_tail(self, tmp_path):
+        wal = WriteAheadLog(str(tmp_path), sync_interval=0.01, segment_bytes=100)
+        lsns = [wal.append({"n": i}) for i in range(10)]
+        assert lsns == list(range(1, 11)) and wal.wait(10) and wal.syncs < 10
+        for i in range(10, 20):
+            wal.append({"n": i})
+            wal.sync()
+        assert len(wal.segments()) > 2
+        wal.close()
+        with open(wal.segments()[-1][1], "ab") as f:
+            f.write(b"\x05\x00\x00\x00torn")
+        reopened = WriteAheadLog(str(tmp_path), sync_interval=0)
+        assert reopened.last_lsn == 20
+        assert [r["n"] for _, r in reopened.replay(15)] == [15, 16, 17, 18, 19]
+        assert reopened.append({"n": 20}) == 21 and reopened.durable_lsn == 21
+        assert reopened.truncate(10) > 0 and [lsn for lsn, _ in reopened.replay(10)][0] == 11
+        reopened.close()
+        with pytest.raises(ValidationError):
+            WriteAheadLog(str(tmp_path), sync_interval=-1)
+
+    def test_failed_write_is_never_acknowledged(self, tmp_path, monkeypatch):
+        wal = WriteAheadLog(str(tmp_path), sync_interval=0)
+        wal.append({"n": 0})
+        real = wal._file
+
+        class _DiskFull:
+            name = real.name
+
+            def write(self, blob):
+                real.write(blob[: len(blob) // 2])
+                real.flush()
+                raise OSError(errno.ENOSPC, "No space left on device")
+
+            def close(self):
+                real.close()
+
+        wal._file = _DiskFull()
+        assert wal.append({"n": 1}) == 2
+        assert wal.durable_lsn == 1 and wal.last_lsn == 2
+        assert wal.wait(2) and [r["n"] for _, r in wal.replay()] == [0, 1]
+
+        def fsync_fails(fd):
+            raise OSError(errno.EIO, "Input/output error")
+
+        monkeypatch.setattr(wal_module.os, "fsync", fsync_fails)
+        with pytest.raises(ExecutionError):
+            wal.append({"n": 2})
+        monkeypatch.undo()
+        with pytest.raises(ExecutionError):
+            wal.wait(3)
+        with pytest.raises(ExecutionError):
+            wal.append({"n": 3})
+        assert wal.durable_lsn == 2
+        with pytest.raises(ExecutionError):
+            wal.close()
+        reopened = WriteAheadLog(str(tmp_path), sync_interval=0)
+        assert [r["n"] for _, r in reopened.replay()] == [0, 1]
+        reopened.close()
+
+
+class TestDurableStore:
+    def test_recovery_from_log_and_snapshot(self, tmp_path):
+        store, _, _ = _durable(tmp_path)
+        store.put_many("default", [(f"d{i}", {"tags": [f"t{i % 2}"]}) for i in range(6)])
+        store.put("default", "d0", {"tags": ["x"]})
+        assert store.delete("default", "d1") is True and store.delete("default", "zz") is False
+        store.put("other", "o1", {"v": 1})
+        store.put_vector(VectorEntry("v1", [1.0, 0.0]))
+        store.put_vector(VectorEntry("v2", [0.0, 1.0], {"k": "a"}))
+        assert store.delete_vector("v1") is True
+        store.close()
+
+        store, documents, index = _durable(tmp_path)
+        assert store.recovery["snapshot_lsn"] == 0 and store.recovery["wal_records"] == 12
+        assert index.get("x") == ["d0"] and index.get("t1") == ["d3", "d5"] and index.get("t0") == ["d2", "d4"]
+        assert documents.get("other", "o1").body == {"v": 1} and index.get("o1") == []
+        assert [(e.id, e.metadata) for e in store.vector_store.entries()] == [("v2", {"k": "a"})]
+
+        first = store.checkpoint()
+        assert first["written"] and first["records"] == 7 and store.checkpoint()["written"] is False
+        store.put("default", "d9", {"tags": ["t1"]})
+        store.close()
+        store, documents, index = _durable(tmp_path)
+        assert store.recovery["snapshot_records"] == 7 and store.recovery["wal_records"] == 1
+        assert index.get("t1") == ["d3", "d5", "d9"] and len(documents.get_collection("default")) == 6
+        assert len(store.wal.segments()) <= 2
+        store.close()
+
+    def test_checkpoint_syncs_rename_before_truncating(self, tmp_path, monkeypatch):
+        (tmp_path / "snapshot-00000000000000000009.tmp").write_bytes(b"partial")
+        store, _, _ = _durable(tmp_path)
+        assert not list(tmp_path.glob("*.tmp"))
+        store.put("default", "a", {"tags": ["t"]})
+        events = []
+        monkeypatch.setattr(durable_store_module, "_fsync_dir", lambda path: events.append(("fsync", path)))
+        monkeypatch.setattr(store.wal, "truncate", lambda lsn: events.append(("truncate", lsn)))
+        store.checkpoint()
+        assert events == [("fsync", tmp_path), ("truncate", 1)]
+        monkeypatch.undo()
+        store.close()
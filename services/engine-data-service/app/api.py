@@ -1,6 +1,7 @@
-"""HTTP layer: /api/Data/query, /api/Data/index, /health."""
+"""HTTP layer: /api/Data/query, /api/Data/index, /api/Data/index/bulk, /api/Data/cache/stats, /api/Data/wal/stats, /health."""
 from typing import Any
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from starlette.concurrency import run_in_threadpool
 from .health import get_health
 from . import service as svc
 
@@ -17,6 +18,23 @@ def data_index(body: dict[str, Any]) -> dict[str, Any]:
     return svc.index(body or {})
 
 
+@api.post("/Data/index/bulk")
+async def data_index_bulk(request: Request) -> dict[str, Any]:
+    # Raw body: NDJSON is not a JSON document, and large arrays skip request-model parsing.
+    body = await request.body()
+    return await run_in_threadpool(svc.bulk_index, body, request.headers.get("content-type", ""))
+
+
+@api.get("/Data/cache/stats")
+def data_cache_stats() -> dict[str, Any]:
+    return svc.cache_stats()
+
+
+@api.get("/Data/wal/stats")
+def data_wal_stats() -> dict[str, Any]:
+    return svc.durability_stats()
+
+
 @api.get("/Data/health")
 def data_health() -> dict[str, Any]:
     return get_health()
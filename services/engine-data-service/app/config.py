@@ -9,6 +9,17 @@ class ServiceConfig:
     port: int
     service_name: str
     log_level: str
+    wal_dir: str | None = None
+    wal_sync_interval: float = 0.01
+    snapshot_interval: float = 300.0
+    field_indexes: tuple[str, ...] | None = None
+    gc_threshold: int = 0
+
+
+def _csv(value: str | None) -> tuple[str, ...] | None:
+    if value is None:
+        return None
+    return tuple(part.strip() for part in value.split(",") if part.strip())
 
 
 def load_config() -> ServiceConfig:
@@ -17,4 +28,9 @@ def load_config() -> ServiceConfig:
         port=int(os.getenv("PORT", os.getenv("ENGINE_DATA_SERVICE_PORT", "5015"))),
         service_name=os.getenv("SERVICE_NAME", "engine-data-service"),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        wal_dir=os.getenv("ENGINE_DATA_WAL_DIR") or None,
+        wal_sync_interval=float(os.getenv("ENGINE_DATA_WAL_SYNC_INTERVAL", "0.01")),
+        snapshot_interval=float(os.getenv("ENGINE_DATA_SNAPSHOT_INTERVAL", "300")),
+        field_indexes=_csv(os.getenv("ENGINE_DATA_FIELD_INDEXES")),
+        gc_threshold=int(os.getenv("ENGINE_DATA_GC_THRESHOLD", "0")),
     )
@@ -7,6 +7,7 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -25,13 +26,30 @@ _logger = logging.getLogger("engine-data-service")
 # Default collection and cache TTL
 _DEFAULT_COLLECTION = "default"
 _QUERY_CACHE_TTL_SECONDS = 300.0
+_QUERY_CACHE_MAX_ENTRIES = 10_000
+_QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_QUERY_CACHE_POLICY = "tinylfu"
+_QUERY_CACHE_STALE_SECONDS = 30.0
+_QUERY_MATCH_MODES = ("any", "all")
+_TEXT_FIELDS = ("text", "title", "body", "content", "description")
+# Fields range/prefix clauses may use; each gets its field index on first query.
+_FIELD_INDEX_FIELDS = ("price", "amount", "created_at", "updated_at", "name", "title")
+_TEXT_DEFAULT_TOP_K = 10
+_TEXT_MAX_TOP_K = 1000
+_BULK_BATCH_SIZE = 10_000
+_BULK_MAX_ERRORS = 100
+# Placeholder for an NDJSON line that failed to parse (reported as INVALID_JSON).
+_INVALID_JSON = object()
 
 
 def _key_extractor(doc: dict[str, Any]) -> list[str]:
     """Extract index keys from a document: id plus optional keywords/tags. Generic, reusable."""
-    keys = [str(doc.get("id", ""))] if doc.get("id") else []
+    doc_id = doc.get("id")
+    keys = [str(doc_id)] if doc_id else []
     for field in ("keywords", "tags", "keys"):
         val = doc.get(field)
+        if val is None:
+            continue
         if isinstance(val, list):
             keys.extend(str(v) for v in val if v is not None)
         elif isinstance(val, str) and val.strip():
@@ -39,16 +57,75 @@ def _key_extractor(doc: dict[str, Any]) -> list[str]:
     return [k for k in keys if k]
 
 
+def _as_key_list(value: Any) -> list[str]:
+    """Normalize a query_spec key field (str or list) to a list of keys."""
+    if isinstance(value, str):
+        return [value]
+    return list(value) if value else []
+
+
+def _doc_id(record: dict[str, Any]) -> str:
+    """Document id: the record's id, else a content hash (same scheme as the store stage)."""
+    return str(record.get("id") or hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()[:16])
+
+
+_json_decode = json.JSONDecoder().decode
+
+
+def _decode_or_invalid(line: str | bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return _INVALID_JSON
+
+
+def parse_ndjson(body: bytes | str) -> list[Any]:
+    """
+    Parse NDJSON: one JSON value per non-blank line. Lines that are not valid
+    JSON become placeholders so bulk_index reports them by position.
+    """
+    try:
+        text = body.decode() if isinstance(body, bytes) else body
+    except UnicodeDecodeError:
+        return [_decode_or_invalid(line) for line in body.split(b"\n") if line.strip()]
+    lines = [line for line in text.split("\n") if line.strip()]
+    decode = _json_decode
+    try:
+        return [decode(line) for line in lines]
+    except ValueError:
+        return [_decode_or_invalid(line) for line in lines]
+
+
+def _bulk_issue(record: Any) -> tuple[str, str]:
+    if record is _INVALID_JSON:
+        return "INVALID_JSON", "line is not valid JSON"
+    if record is None:
+        return "NULL_INPUT", "record is null"
+    if not isinstance(record, dict):
+        return "INVALID_TYPE", "record must be a dict"
+    return "MISSING_ID", "record must have id or content"
+
+
 def _ensure_engine() -> "DataEngineContext":
     if _engine_context is None:
         raise RuntimeError("Data engine not initialized; call init_engine() at startup")
     return _engine_context
 
 
-def init_engine() -> None:
+def init_engine(
+    wal_dir: str | None = None,
+    wal_sync_interval: float = 0.01,
+    snapshot_interval: float = 300.0,
+    field_indexes: tuple[str, ...] | list[str] | None = None,
+) -> None:
     """
     Initialize domain engines: document store, indexing, pipeline, cache, validation.
     Idempotent; safe to call from lifecycle startup.
+    field_indexes lists the fields range/prefix queries may use (default
+    _FIELD_INDEX_FIELDS); a query on any other field is rejected.
+    With wal_dir, writes go through a write-ahead log (group commit every
+    wal_sync_interval seconds, snapshots every snapshot_interval seconds) and
+    the documents and index are recovered from it before serving.
     If engine-data is not on path or any error occurs, logs and leaves engine uninitialized (health still works).
     """
     global _engine_context
@@ -56,17 +133,39 @@ def init_engine() -> None:
         from errors.error_model import ValidationError
         from models.document_model import Document, DocumentModel, create_document_model
         from indexing.indexing_engine import IndexingEngine, create_indexing_engine
+        from indexing.text_index import create_text_index
         from pipelines.data_pipeline import DataPipeline, create_pipeline
         from caching.cache_engine import CacheEngine, create_cache_engine
+        from storage.durable_store import DurableStore
         from validation.validation_layer import ValidationLayer, ValidationResult, ValidationIssue
     except ImportError as e:
         _logger.warning("engine-data domain not available; data operations will fail. %s", e)
         return
 
+    shutdown_engine()
+    indexable_fields = frozenset(_FIELD_INDEX_FIELDS if field_indexes is None else field_indexes)
     document_model = create_document_model()
-    indexing_engine = create_indexing_engine(key_extractor=_key_extractor)
+    indexing_engine = create_indexing_engine(
+        key_extractor=_key_extractor, text_index=create_text_index(fields=_TEXT_FIELDS)
+    )
+    write_lock = threading.Lock()
+    durable_store = None
+    if wal_dir:
+        durable_store = DurableStore(
+            wal_dir,
+            document_model,
+            indexing_engine,
+            index_collection=_DEFAULT_COLLECTION,
+            sync_interval=wal_sync_interval,
+            snapshot_interval=snapshot_interval,
+            lock=write_lock,
+        )
     cache_engine: CacheEngine[Any, Any] = create_cache_engine(
-        default_ttl_seconds=_QUERY_CACHE_TTL_SECONDS
+        default_ttl_seconds=_QUERY_CACHE_TTL_SECONDS,
+        max_entries=_QUERY_CACHE_MAX_ENTRIES,
+        max_bytes=_QUERY_CACHE_MAX_BYTES,
+        policy=_QUERY_CACHE_POLICY,
+        generation_source=indexing_engine,
     )
     validation_layer = ValidationLayer()
 
@@ -84,14 +183,21 @@ def init_engine() -> None:
         if not isinstance(data, dict):
             raise ValidationError("store stage expects dict", details={"field": "data"})
         doc_id = str(data.get("id") or hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16])
+        previous = document_model.get(_DEFAULT_COLLECTION, doc_id)
         doc = Document(id=doc_id, body=dict(data))
+        if durable_store is not None:
+            # Logged before it is applied: a refused write never reaches memory.
+            durable_store.log([{"op": "put", "c": _DEFAULT_COLLECTION, "id": doc_id, "body": doc.body}])
         document_model.insert(_DEFAULT_COLLECTION, doc)
-        return {"doc_id": doc_id, "document": data}
+        return {"doc_id": doc_id, "document": data, "previous": previous.body if previous else None}
 
     def index_stage(data: Any) -> Any:
         if not isinstance(data, dict) or "doc_id" not in data or "document" not in data:
             raise ValidationError("index stage expects {doc_id, document}", details={"field": "data"})
         doc_id = data["doc_id"]
+        if data.get("previous") is not None:
+            # Replacing a document: drop its old keys and field values first.
+            indexing_engine.remove(doc_id, {**data["previous"], "id": doc_id})
         document = {**data["document"], "id": doc_id}
         indexing_engine.index(doc_id, document)
         return doc_id
@@ -120,9 +226,39 @@ def init_engine() -> None:
             return ValidationResult(valid=False, issues=[ValidationIssue(message="query_spec is null", code="NULL_INPUT")])
         if not isinstance(input_data, dict):
             return ValidationResult(valid=False, issues=[ValidationIssue(message="query_spec must be a dict", code="INVALID_TYPE")])
+        issues: list[ValidationIssue] = []
+        if input_data.get("match", "any") not in _QUERY_MATCH_MODES:
+            issues.append(ValidationIssue(path="match", message=f"must be one of {list(_QUERY_MATCH_MODES)}", code="INVALID_VALUE"))
+        ranges = input_data.get("range")
+        if ranges is not None:
+            if not isinstance(ranges, dict):
+                issues.append(ValidationIssue(path="range", message="must be an object of field -> [low, high]", code="INVALID_TYPE"))
+            else:
+                for field, bounds in ranges.items():
+                    if not isinstance(bounds, list) or len(bounds) != 2:
+                        issues.append(ValidationIssue(path=f"range.{field}", message="must be [low, high]", code="INVALID_TYPE"))
+        prefixes = input_data.get("prefix")
+        if prefixes is not None:
+            if not isinstance(prefixes, dict) or not all(isinstance(v, str) for v in prefixes.values()):
+                issues.append(ValidationIssue(path="prefix", message="must be an object of field -> string", code="INVALID_TYPE"))
+        for kind, fields in (("range", ranges), ("prefix", prefixes)):
+            for field in fields if isinstance(fields, dict) else ():
+                if field not in indexable_fields:
+                    issues.append(ValidationIssue(path=f"{kind}.{field}", message=f"field is not indexed; allowed: {sorted(indexable_fields)}", code="INVALID_VALUE"))
+        if "text" in input_data and not isinstance(input_data["text"], str):
+            issues.append(ValidationIssue(path="text", message="must be a string", code="INVALID_TYPE"))
+        top_k = input_data.get("top_k", _TEXT_DEFAULT_TOP_K)
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= _TEXT_MAX_TOP_K:
+            issues.append(ValidationIssue(path="top_k", message=f"must be an integer in [1, {_TEXT_MAX_TOP_K}]", code="INVALID_VALUE"))
+        return ValidationResult(valid=not issues, issues=issues)
+
+    def validator_bulk_index(input_data: Any) -> ValidationResult:
+        if not isinstance(input_data, dict) or not isinstance(input_data.get("documents"), list):
+            return ValidationResult(valid=False, issues=[ValidationIssue(path="documents", message="documents must be a list", code="INVALID_TYPE")])
         return ValidationResult(valid=True)
 
     validation_layer.register("index", validator_index)
+    validation_layer.register("bulk_index", validator_bulk_index)
     validation_layer.register("query", validator_query)
 
     class DataEngineContext:
@@ -133,12 +269,21 @@ def init_engine() -> None:
             cache_engine: CacheEngine[Any, Any],
             validation_layer: ValidationLayer,
             ingestion_pipeline: DataPipeline[Any],
+            write_lock: Any | None = None,
+            durable_store: DurableStore | None = None,
         ):
             self.document_model = document_model
             self.indexing_engine = indexing_engine
             self.cache_engine = cache_engine
             self.validation_layer = validation_layer
             self.ingestion_pipeline = ingestion_pipeline
+            self.durable_store = durable_store
+            self._write_lock = write_lock or threading.Lock()
+
+        def _wait_durable(self) -> None:
+            """Acknowledge only once this thread's logged writes are on disk (group commit)."""
+            if self.durable_store is not None:
+                self.durable_store.wait()
 
         def index_documents(self, payload: dict[str, Any]) -> dict[str, Any]:
             """Run payload through validation, then pipeline; return indexed count and errors."""
@@ -159,45 +304,177 @@ def init_engine() -> None:
                         errors.extend(f"documents[{i}]: {iss.message}" for iss in vr.issues)
                         continue
                     try:
-                        self.ingestion_pipeline.run(record)
+                        with self._write_lock:
+                            self.ingestion_pipeline.run(record)
                         indexed += 1
                     except Exception as e:
                         errors.append(f"documents[{i}]: {e}")
             else:
                 try:
-                    self.ingestion_pipeline.run(payload)
+                    with self._write_lock:
+                        self.ingestion_pipeline.run(payload)
                     indexed = 1
                 except Exception as e:
                     errors.append(str(e))
+            self._wait_durable()
             _logger.info("domain_facade.index_documents indexed=%s errors=%s", indexed, len(errors))
             return {"indexed": indexed, "errors": errors}
 
+        def bulk_index_documents(self, payload: dict[str, Any] | bytes | str) -> dict[str, Any]:
+            """
+            Bulk ingest NDJSON (bytes/str) or {"documents": [...]}. Records are
+            validated in one pass, then stored and indexed _BULK_BATCH_SIZE at
+            a time, each batch under one write-lock acquisition; a repeated id
+            keeps its last record. Records are stored as given (not copied), so
+            callers hand over ownership. Errors are {index, code, message},
+            capped at _BULK_MAX_ERRORS.
+            """
+            if not isinstance(payload, (bytes, str)):
+                result = self.validation_layer.validate_input("bulk_index", payload)
+                if not result.valid:
+                    issues = [f"{i.path or 'payload'}: {i.message}" for i in result.issues]
+                    raise ValidationError("Validation failed", details={"issues": issues})
+            documents = payload["documents"] if isinstance(payload, dict) else parse_ndjson(payload)
+            return self._bulk_write(documents)
+
+        def _bulk_write(self, documents: list[Any]) -> dict[str, Any]:
+            errors: list[dict[str, Any]] = []
+            failed = 0
+            truncated = False
+            latest: dict[str, dict[str, Any]] = {}
+            for i, record in enumerate(documents):
+                if isinstance(record, dict) and record:
+                    doc_id = record.get("id")
+                    latest[doc_id if type(doc_id) is str and doc_id else _doc_id(record)] = record
+                    continue
+                failed += 1
+                if len(errors) < _BULK_MAX_ERRORS:
+                    code, message = _bulk_issue(record)
+                    errors.append({"index": i, "code": code, "message": message})
+                else:
+                    truncated = True
+            items = list(latest.items())
+            indexed = len(documents) - failed
+            for start in range(0, len(items), _BULK_BATCH_SIZE):
+                chunk = items[start : start + _BULK_BATCH_SIZE]
+                try:
+                    self._write_batch(chunk)
+                except Exception as e:
+                    indexed -= len(chunk)
+                    failed += len(chunk)
+                    if len(errors) < _BULK_MAX_ERRORS:
+                        errors.append({"index": None, "count": len(chunk), "code": type(e).__name__, "message": str(e)})
+                    else:
+                        truncated = True
+            self._wait_durable()
+            _logger.info("domain_facade.bulk_index_documents indexed=%s failed=%s", indexed, failed)
+            return {
+                "indexed": indexed,
+                "failed": failed,
+                "errors": errors,
+                **({"errors_truncated": True} if truncated else {}),
+            }
+
+        def _write_batch(self, chunk: list[tuple[str, dict[str, Any]]]) -> None:
+            docs = [Document(id=doc_id, body=record) for doc_id, record in chunk]
+            index_docs = [
+                (doc_id, record if record.get("id") == doc_id else {**record, "id": doc_id})
+                for doc_id, record in chunk
+            ]
+            with self._write_lock:
+                if self.durable_store is not None:
+                    self.durable_store.log(
+                        [{"op": "put", "c": _DEFAULT_COLLECTION, "id": doc_id, "body": record} for doc_id, record in chunk]
+                    )
+                previous = self.document_model.insert_many(_DEFAULT_COLLECTION, docs)
+                for (doc_id, _), old in zip(chunk, previous):
+                    if old is not None:
+                        self.indexing_engine.remove(doc_id, {**old.body, "id": doc_id})
+                self.indexing_engine.index_many(index_docs)
+
         def query_documents(self, query_spec: dict[str, Any]) -> dict[str, Any]:
-            """Validate query_spec, check cache, then run index search and return results."""
+            """
+            Validate query_spec, then serve from cache or run the index search.
+            Concurrent identical queries share one computation (single-flight).
+            Cached results depend on the index keys they read, so indexing or
+            removing a document under one of those keys invalidates them.
+            range / prefix clauses (on configured fields only) build the
+            field index on first use, backfilled from the stored documents. A "text" clause ranks the
+            matching documents by BM25 (top_k best, each with "_score").
+            """
             result = self.validation_layer.validate_input("query", query_spec)
             if not result.valid:
                 issues = [f"{i.path or 'query'}: {i.message}" for i in result.issues]
                 raise ValidationError("Validation failed", details={"issues": issues})
+            keys = _as_key_list(query_spec.get("keys") or query_spec.get("key"))
+            exclude = _as_key_list(query_spec.get("exclude"))
+            match = query_spec.get("match", "any")
+            ranges = query_spec.get("range") or {}
+            prefixes = query_spec.get("prefix") or {}
+            clauses = {"keys": keys, "match": match, "exclude": exclude, "ranges": ranges, "prefixes": prefixes}
+            text = query_spec.get("text")
+            depends_on: list[Any] = keys + exclude
+            for kind, fields in (("range", ranges), ("prefix", prefixes)):
+                for field in fields:
+                    self._ensure_field_index(field, kind)
+                    depends_on.append(self.indexing_engine.field_key(kind, field))
+            if text is not None:
+                depends_on.extend(self.indexing_engine.text_dependencies(text))
+            top_k = query_spec.get("top_k", _TEXT_DEFAULT_TOP_K)
+            phrase = bool(query_spec.get("phrase", False))
             cache_key = hashlib.sha256(json.dumps(query_spec, sort_keys=True).encode()).hexdigest()
-            cached = self.cache_engine.get(cache_key)
-            if cached is not None:
-                _logger.debug("domain_facade.query_documents cache_hit key=%s", cache_key[:8])
-                return cached
-            keys = query_spec.get("keys") or query_spec.get("key")
-            if isinstance(keys, str):
-                keys = [keys]
-            if not keys:
-                keys = []
-            doc_ids = self.indexing_engine.search(keys) if keys else []
+            return self.cache_engine.get_or_compute(
+                cache_key,
+                lambda: self._run_query(clauses, text, top_k, phrase),
+                ttl_seconds=_QUERY_CACHE_TTL_SECONDS,
+                stale_while_revalidate=_QUERY_CACHE_STALE_SECONDS,
+                depends_on=depends_on,
+            )
+
+        def _ensure_field_index(self, field: str, kind: str) -> None:
+            """
+            Build the field index once. Check, backfill and registration run
+            under the write lock, so no write lands between the backfill and
+            the index going live, and writers never see the index set change.
+            """
+            if self.indexing_engine.has_field_index(field, kind):
+                return
+            with self._write_lock:
+                if self.indexing_engine.has_field_index(field, kind):
+                    return
+                collection = self.document_model.get_collection(_DEFAULT_COLLECTION)
+                self.indexing_engine.add_field_index(
+                    field, kind, documents=((d.id, {**d.body, "id": d.id}) for d in collection.values())
+                )
+
+        def _run_query(
+            self,
+            clauses: dict[str, Any],
+            text: str | None,
+            top_k: int,
+            phrase: bool,
+        ) -> dict[str, Any]:
+            """
+            Index search: keys OR-ed (match="any") or AND-ed (match="all"),
+            AND range/prefix clauses, minus exclude keys; then BM25 ranking
+            when text is given (restricted to the clause matches, if any).
+            """
+            has_clauses = bool(clauses["keys"] or clauses["ranges"] or clauses["prefixes"])
+            doc_ids = self.indexing_engine.select(**clauses) if has_clauses else []
+            scores: dict[str, float] = {}
+            if text is not None:
+                ranked = self.indexing_engine.search_text(
+                    text, top_k=top_k, candidates=doc_ids if has_clauses else None, phrase=phrase
+                )
+                doc_ids = [doc_id for doc_id, _ in ranked]
+                scores = dict(ranked)
             results: list[dict[str, Any]] = []
             for doc_id in doc_ids:
                 doc = self.document_model.get(_DEFAULT_COLLECTION, doc_id)
                 if doc is not None:
-                    results.append({"id": doc.id, **doc.body})
-            out = {"results": results, "count": len(results)}
-            self.cache_engine.set(cache_key, out, ttl_seconds=_QUERY_CACHE_TTL_SECONDS)
-            _logger.info("domain_facade.query_documents keys=%s count=%s", len(keys), len(results))
-            return out
+                    results.append({"id": doc.id, **doc.body, **({"_score": scores[doc_id]} if scores else {})})
+            _logger.info("domain_facade.query_documents keys=%s text=%s count=%s", len(clauses["keys"]), text is not None, len(results))
+            return {"results": results, "count": len(results)}
 
     global _engine_context
     _engine_context = DataEngineContext(
@@ -206,8 +483,18 @@ def init_engine() -> None:
         cache_engine=cache_engine,
         validation_layer=validation_layer,
         ingestion_pipeline=ingestion_pipeline,
+        write_lock=write_lock,
+        durable_store=durable_store,
     )
-    _logger.info("domain_facade.init_engine ready")
+    _logger.info("domain_facade.init_engine ready durable=%s", durable_store is not None)
+
+
+def shutdown_engine() -> None:
+    """Flush and close the write-ahead log, if any. Safe to call when not initialized."""
+    context = _engine_context
+    if context is not None and context.durable_store is not None:
+        context.durable_store.close()
+        _logger.info("domain_facade.shutdown_engine wal closed")
 
 
 _engine_context: "DataEngineContext | None" = None
@@ -218,11 +505,27 @@ def index_documents(payload: dict[str, Any]) -> dict[str, Any]:
     return _ensure_engine().index_documents(payload)
 
 
+def bulk_index_documents(payload: dict[str, Any] | bytes | str) -> dict[str, Any]:
+    """Bulk index NDJSON or a documents list in batched store/index writes. Domain entrypoint."""
+    return _ensure_engine().bulk_index_documents(payload)
+
+
 def query_documents(query_spec: dict[str, Any]) -> dict[str, Any]:
     """Query by keys; use cache when applicable. Domain entrypoint."""
     return _ensure_engine().query_documents(query_spec)
 
 
+def durability_stats() -> dict[str, Any]:
+    """WAL lsns, size, checkpoints and last recovery ({"enabled": False} without a WAL). Domain entrypoint."""
+    durable_store = _ensure_engine().durable_store
+    return {"enabled": True, **durable_store.stats()} if durable_store is not None else {"enabled": False}
+
+
+def cache_stats() -> dict[str, Any]:
+    """Query cache counters, bytes, average age and hot keys. Domain entrypoint."""
+    return _ensure_engine().cache_engine.stats()
+
+
 def validate_index_input(payload: Any) -> "ValidationResult":
     """Validate index payload using domain validation layer."""
     ctx = _ensure_engine()
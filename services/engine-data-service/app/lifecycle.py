@@ -14,10 +14,22 @@ def on_shutdown(fn: Callable[[], None]) -> None:
 
 
 def _startup_data_engine() -> None:
+    import gc
     import logging
     try:
+        from app.config import load_config
         from app.domain_facade import init_engine
-        init_engine()
+        config = load_config()
+        # Opt-in (ENGINE_DATA_GC_THRESHOLD): raise the generation-0 threshold once
+        # for the process so young collections do not dominate bulk loads.
+        if config.gc_threshold > 0:
+            gc.set_threshold(config.gc_threshold, *gc.get_threshold()[1:])
+        init_engine(
+            wal_dir=config.wal_dir,
+            wal_sync_interval=config.wal_sync_interval,
+            snapshot_interval=config.snapshot_interval,
+            field_indexes=config.field_indexes,
+        )
     except Exception as e:
         logging.getLogger("engine-data-service").warning(
             "data engine init failed; health will work, data ops will return ENGINE_UNAVAILABLE. %s",
@@ -26,7 +38,13 @@ def _startup_data_engine() -> None:
         )
 
 
+def _shutdown_data_engine() -> None:
+    from app.domain_facade import shutdown_engine
+    shutdown_engine()
+
+
 on_startup(_startup_data_engine)
+on_shutdown(_shutdown_data_engine)
 
 
 async def run_startup() -> None:
@@ -4,6 +4,7 @@ Uses validation, pipelines, indexing, storage, caching; maps domain errors to re
 """
 from __future__ import annotations
 
+import json
 import logging
 from typing import Any
 
@@ -55,6 +56,62 @@ def index(payload: dict[str, Any]) -> dict[str, Any]:
         raise
 
 
+def bulk_index(body: bytes, content_type: str = "application/json") -> dict[str, Any]:
+    """
+    Bulk ingest: NDJSON (application/x-ndjson) or JSON {"documents": [...]}.
+    Returns status, indexed and failed counts, and per-record errors
+    ({index, code, message}, capped).
+    """
+    try:
+        from app.domain_facade import bulk_index_documents
+        if "ndjson" in (content_type or ""):
+            payload: Any = body
+        else:
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError as e:
+                return {"status": "error", "indexed": 0, "error": "INVALID_JSON", "message": str(e)}
+        out = bulk_index_documents(payload)
+        return {
+            "status": "accepted",
+            "indexed": out.get("indexed", 0),
+            "failed": out.get("failed", 0),
+            **({"errors": out["errors"]} if out.get("errors") else {}),
+            **({"errors_truncated": True} if out.get("errors_truncated") else {}),
+        }
+    except RuntimeError as e:
+        if "not initialized" in str(e).lower():
+            return {"status": "error", "indexed": 0, "error": "ENGINE_UNAVAILABLE", "message": str(e)}
+        raise
+    except Exception as e:
+        err_response = _domain_error_response(e, "index")
+        if err_response is not None:
+            return err_response
+        raise
+
+
+def cache_stats() -> dict[str, Any]:
+    """Query cache statistics (hits, misses, evictions, bytes, hot keys) for sizing the cache."""
+    try:
+        from app.domain_facade import cache_stats as domain_cache_stats
+        return domain_cache_stats()
+    except RuntimeError as e:
+        if "not initialized" in str(e).lower():
+            return {"error": "ENGINE_UNAVAILABLE", "message": str(e)}
+        raise
+
+
+def durability_stats() -> dict[str, Any]:
+    """Write-ahead log statistics (lsns, size, checkpoints, last recovery time)."""
+    try:
+        from app.domain_facade import durability_stats as domain_durability_stats
+        return domain_durability_stats()
+    except RuntimeError as e:
+        if "not initialized" in str(e).lower():
+            return {"error": "ENGINE_UNAVAILABLE", "message": str(e)}
+        raise
+
+
 def _domain_error_response(ex: Exception, operation: str) -> dict[str, Any] | None:
     """
     Map domain errors to response bodies. Returns a dict for known engine errors
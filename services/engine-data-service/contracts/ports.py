@@ -5,3 +5,4 @@ from typing import Any, Protocol
 class DataQueryPort(Protocol):
     def query(self, query_spec: dict[str, Any]) -> dict[str, Any]: ...
     def index(self, payload: dict[str, Any]) -> dict[str, Any]: ...
+    def bulk_index(self, body: bytes, content_type: str) -> dict[str, Any]: ...
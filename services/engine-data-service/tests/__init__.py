@@ -0,0 +1 @@
+# Integration tests for engine-data-service
@@ -0,0 +1,108 @@
+"""Integration tests for engine-data-service domain facade: bulk ingestion, field-index queries, WAL recovery."""
+import json
+import sys
+from pathlib import Path
+
+# Ensure service dir is on path (domain_facade adds engine-data itself)
+_service_dir = Path(__file__).resolve().parents[1]
+if str(_service_dir) not in sys.path:
+    sys.path.insert(0, str(_service_dir))
+
+import pytest
+
+
+@pytest.fixture()
+def facade():
+    from app import domain_facade
+    domain_facade.init_engine()
+    return domain_facade
+
+
+class TestBulkIndex:
+    """Test bulk_index_documents against the per-record index path."""
+
+    def test_ndjson_matches_per_record(self, facade):
+        docs = [{"id": f"d{i}", "tags": ["even" if i % 2 == 0 else "odd"], "price": i} for i in range(10)]
+        body = "\n".join(json.dumps(d) for d in docs) + "\n\n"
+        out = facade.bulk_index_documents(body.encode())
+        assert out == {"indexed": 10, "failed": 0, "errors": []}
+        bulk = facade.query_documents({"keys": ["even"], "range": {"price": [2, 6]}})
+        facade.init_engine()
+        facade.index_documents({"documents": docs})
+        assert bulk == facade.query_documents({"keys": ["even"], "range": {"price": [2, 6]}})
+        assert [r["id"] for r in bulk["results"]] == ["d2", "d4", "d6"]
+
+    def test_per_record_errors(self, facade):
+        body = b'{"id": "a", "tags": ["t"]}\n{bad json\n[1, 2]\n{}\nnull\n{"tags": ["t"], "title": "no id"}\n'
+        out = facade.bulk_index_documents(body)
+        assert out["indexed"] == 2 and out["failed"] == 4
+        assert [(e["index"], e["code"]) for e in out["errors"]] == [
+            (1, "INVALID_JSON"),
+            (2, "INVALID_TYPE"),
+            (3, "MISSING_ID"),
+            (4, "NULL_INPUT"),
+        ]
+        assert facade.query_documents({"keys": ["t"]})["count"] == 2
+
+    def test_replace_and_duplicates(self, facade):
+        facade.bulk_index_documents({"documents": [{"id": "a", "tags": ["old"]}]})
+        out = facade.bulk_index_documents({"documents": [{"id": "a", "tags": ["mid"]}, {"id": "a", "tags": ["new"]}]})
+        assert out["indexed"] == 2
+        assert facade.query_documents({"keys": ["old"]})["count"] == 0
+        assert facade.query_documents({"keys": ["mid"]})["count"] == 0
+        assert facade.query_documents({"keys": ["new"]})["results"] == [{"id": "a", "tags": ["new"]}]
+
+    def test_error_cap_and_validation(self, facade):
+        from errors.error_model import ValidationError
+        out = facade.bulk_index_documents({"documents": [None] * 150})
+        assert out["failed"] == 150 and len(out["errors"]) == 100 and out["errors_truncated"] is True
+        with pytest.raises(ValidationError):
+            facade.bulk_index_documents({"documents": "nope"})
+
+
+class TestFieldIndexQueries:
+    """Test that range/prefix queries only build indexes for configured fields."""
+
+    def test_only_configured_fields_are_indexed(self, facade):
+        from errors.error_model import ValidationError
+        facade.init_engine(field_indexes=("score",))
+        facade.index_documents({"documents": [{"id": "a", "score": 1, "price": 1}, {"id": "b", "score": 5}]})
+        assert [r["id"] for r in facade.query_documents({"range": {"score": [0, 2]}})["results"]] == ["a"]
+        with pytest.raises(ValidationError):
+            facade.query_documents({"range": {"price": [0, 2]}})
+        engine = facade._engine_context.indexing_engine
+        assert engine.has_field_index("score", "range") and not engine.has_field_index("price", "range")
+
+
+class TestWalRecovery:
+    """Test that a restart with the same WAL directory rebuilds documents and index."""
+
+    def test_restart_recovers_documents_and_index(self, facade, tmp_path):
+        facade.init_engine(wal_dir=str(tmp_path), snapshot_interval=0)
+        facade.index_documents({"documents": [{"id": "a", "tags": ["t"], "price": 1}, {"id": "b", "tags": ["u"]}]})
+        facade.bulk_index_documents(b'{"id": "c", "tags": ["t"], "price": 3}\n{"id": "b", "tags": ["t"]}\n')
+        query = {"keys": ["t"], "range": {"price": [0, 5]}}
+        before = facade.query_documents(query)
+        facade._engine_context.durable_store.checkpoint()
+        facade.index_documents({"id": "d", "tags": ["t"], "price": 4})
+        facade.shutdown_engine()
+
+        facade.init_engine(wal_dir=str(tmp_path), snapshot_interval=0)
+        stats = facade.durability_stats()
+        assert stats["enabled"] is True
+        assert stats["recovery"]["snapshot_records"] == 3 and stats["recovery"]["wal_records"] == 1
+        after = facade.query_documents(query)
+        assert [r["id"] for r in after["results"]] == [r["id"] for r in before["results"]] + ["d"]
+        assert facade.query_documents({"keys": ["u"]})["count"] == 0
+        facade.shutdown_engine()
+        facade.init_engine()
+        assert facade.durability_stats() == {"enabled": False}
+
+    def test_refused_write_leaves_no_trace(self, facade, tmp_path):
+        facade.init_engine(wal_dir=str(tmp_path), snapshot_interval=0)
+        facade.shutdown_engine()
+        assert facade.index_documents({"id": "late", "tags": ["t"]})["indexed"] == 0
+        assert facade.bulk_index_documents({"documents": [{"id": "late2", "tags": ["t"]}]})["failed"] == 1
+        assert facade.query_documents({"keys": ["t"]})["count"] == 0
+        assert facade._engine_context.document_model.get("default", "late") is None
+        facade.init_engine()